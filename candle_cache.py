@@ -0,0 +1,271 @@
+"""
+Memory-mapped on-disk candle cache for warm restarts.
+
+Setiap (symbol, timeframe) punya satu file di direktori cache dengan layout
+yang sama seperti SharedOHLCV:
+
+    header  int64[8]        magic, version, start, length, capacity
+    ts      int64[cap]      open time candle
+    cols    float64[5,cap]  opens, highs, lows, closes, volumes
+
+Candle tertutup ditulis ke file begitu masuk (append), history REST lengkap
+lewat load(). Saat startup bot memetakan file ini (read) dan hanya mengambil
+ekor candle yang hilang dari REST (startTime), bukan 500 candle per deret.
+
+Urutan tulis aman terhadap proses yang mati di tengah jalan: baris baru
+ditulis di luar jendela yang terlihat sebelum header diubah, dan load()
+mengosongkan length dulu. Kolom di disk selalu float64 (sumber kebenaran),
+terlepas dari CPD_STORAGE_DTYPE. Header yang tidak cocok (versi / kapasitas
+berbeda, file rusak) membuat file dibuat ulang.
+
+Jumlah file yang terpetakan bersamaan dibatasi (LRU) supaya ratusan deret
+tidak menghabiskan file descriptor; deret yang jarang ditulis (4h, 1d)
+dipetakan ulang saat dibutuhkan.
+
+Env:
+  CPD_CANDLE_CACHE   direktori cache (default: candle_cache); '' / 0 / off = nonaktif
+"""
+
+import logging
+import mmap
+import os
+import re
+from collections import OrderedDict
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+MAGIC = 0x43504443          # 'CPDC'
+VERSION = 1
+HEADER_SLOTS = 8
+_MAGIC, _VERSION, _START, _LEN, _CAP = range(5)
+N_COLUMNS = 5
+
+# (timestamps, opens, highs, lows, closes, volumes)
+Columns = Tuple[np.ndarray, ...]
+
+
+def _layout_size(capacity: int) -> int:
+    return 8 * (HEADER_SLOTS + capacity + N_COLUMNS * capacity)
+
+
+def merge_columns(base: Optional[Sequence], new: Sequence) -> Columns:
+    """
+    Gabungkan dua history (timestamps + 5 kolom) berdasarkan open time: urut
+    naik, tanpa duplikat; untuk timestamp yang sama baris dari `new` menang.
+    """
+    new = tuple(np.asarray(col, dtype=np.int64 if i == 0 else np.float64) for i, col in enumerate(new))
+    if base is None or not len(base[0]):
+        return new
+    base = tuple(np.asarray(col, dtype=np.int64 if i == 0 else np.float64) for i, col in enumerate(base))
+    ts = np.concatenate([new[0], base[0]])
+    # np.unique mengambil kemunculan pertama -> baris `new` (di depan) menang
+    _, first = np.unique(ts, return_index=True)
+    return tuple(np.concatenate([n, b])[first] for n, b in zip(new, base))
+
+
+class CandleFile:
+    """Satu file cache terpetakan untuk satu (symbol, timeframe)"""
+
+    def __init__(self, path: str, maxlen: int = 1000):
+        self.path = path
+        self.maxlen = maxlen
+        capacity = 2 * maxlen
+        size = _layout_size(capacity)
+        fresh = not os.path.exists(path) or os.path.getsize(path) != size
+        with open(path, 'a+b') as f:
+            if fresh:
+                f.truncate(size)
+            self._mm = mmap.mmap(f.fileno(), size)
+        self.header = np.ndarray((HEADER_SLOTS,), np.int64, self._mm, 0)
+        self.ts = np.ndarray((capacity,), np.int64, self._mm, 8 * HEADER_SLOTS)
+        self.cols = np.ndarray((N_COLUMNS, capacity), np.float64, self._mm, 8 * (HEADER_SLOTS + capacity))
+        if fresh or not self._valid(capacity):
+            if not fresh:
+                logger.warning(f"Candle cache {path} has an incompatible header, recreating")
+            self.header[:] = 0
+            self.header[_CAP] = capacity
+            self.header[_VERSION] = VERSION
+            self.header[_MAGIC] = MAGIC
+
+    def _valid(self, capacity: int) -> bool:
+        h = self.header
+        start, length = int(h[_START]), int(h[_LEN])
+        return (int(h[_MAGIC]) == MAGIC and int(h[_VERSION]) == VERSION and int(h[_CAP]) == capacity
+                and 0 <= start and 0 <= length <= self.maxlen and start + length <= capacity)
+
+    def __len__(self) -> int:
+        return int(self.header[_LEN])
+
+    def last_ts(self) -> Optional[int]:
+        start, length = int(self.header[_START]), int(self.header[_LEN])
+        return int(self.ts[start + length - 1]) if length else None
+
+    def read(self) -> Optional[Columns]:
+        """Salinan (timestamps, opens, highs, lows, closes, volumes); None jika kosong"""
+        start, length = int(self.header[_START]), int(self.header[_LEN])
+        if not length:
+            return None
+        out = [self.ts[start:start + length].copy()]
+        out.extend(self.cols[row, start:start + length].copy() for row in range(N_COLUMNS))
+        return tuple(out)
+
+    def load(self, timestamps, opens, highs, lows, closes, volumes):
+        """Ganti seluruh isi; hanya `maxlen` candle terakhir yang disimpan"""
+        k = min(len(timestamps), self.maxlen)
+        self.header[_LEN] = 0
+        self.header[_START] = 0
+        if k:
+            self.ts[:k] = np.asarray(timestamps[-k:], dtype=np.int64)
+            for row, values in enumerate((opens, highs, lows, closes, volumes)):
+                self.cols[row, :k] = np.asarray(values[-k:], dtype=np.float64)
+        self.header[_LEN] = k
+
+    def append(self, ts: int, o: float, h: float, l: float, c: float, v: float) -> bool:
+        """Tambah satu candle tertutup; False jika bukan candle yang lebih baru"""
+        last = self.last_ts()
+        if last is not None and ts <= last:
+            return False
+        start, length = int(self.header[_START]), int(self.header[_LEN])
+        end = start + length
+        if end >= len(self.ts):
+            # compaction: jendela baru [0, keep) tidak tumpang tindih dengan jendela lama
+            keep = min(length, self.maxlen - 1)
+            self.ts[:keep] = self.ts[end - keep:end]
+            self.cols[:, :keep] = self.cols[:, end - keep:end]
+            self.header[_START] = start = 0
+            self.header[_LEN] = length = keep
+            end = keep
+        self.ts[end] = ts
+        self.cols[:, end] = (o, h, l, c, v)
+        if length + 1 > self.maxlen:
+            self.header[_START] = start + 1
+        else:
+            self.header[_LEN] = length + 1
+        return True
+
+    def flush(self):
+        self._mm.flush()
+
+    def close(self):
+        if self._mm is None:
+            return
+        try:
+            self._mm.flush()
+        except (OSError, ValueError) as e:
+            logger.debug(f"Candle cache flush failed for {self.path}: {e}")
+        # view numpy harus dilepas sebelum mmap bisa ditutup
+        self.header = self.ts = self.cols = None
+        mm, self._mm = self._mm, None
+        try:
+            mm.close()
+        except BufferError as e:
+            logger.debug(f"Candle cache {self.path} still referenced, leaving mapping open: {e}")
+
+
+class CandleCache:
+    """Semua file cache candle bot, dengan batas jumlah file terpetakan (LRU)"""
+
+    def __init__(self, directory: Optional[str] = None, maxlen: int = 1000, max_open: int = 256):
+        if directory is None:
+            directory = os.environ.get('CPD_CANDLE_CACHE', 'candle_cache').strip()
+        if directory.lower() in ('0', 'false', 'off'):
+            directory = ''
+        self.directory = directory
+        self.maxlen = maxlen
+        self.max_open = max(1, max_open)
+        self._files: "OrderedDict[Tuple[str, str], CandleFile]" = OrderedDict()
+        if self.directory:
+            try:
+                os.makedirs(self.directory, exist_ok=True)
+            except OSError as e:
+                logger.warning(f"Candle cache disabled, cannot create {self.directory}: {e}")
+                self.directory = ''
+
+        self.hits = 0           # deret yang dipulihkan dari cache saat startup
+        self.misses = 0
+        self.appended = 0
+        self.errors = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.directory)
+
+    def path(self, symbol: str, timeframe: str) -> str:
+        # '1m' dan '1M' bisa bertabrakan di filesystem case-insensitive
+        tf = timeframe.replace('M', 'mo')
+        return os.path.join(self.directory, re.sub(r'[^A-Za-z0-9_-]', '_', f"{symbol}_{tf}") + '.candles')
+
+    def _file(self, symbol: str, timeframe: str) -> CandleFile:
+        key = (symbol, timeframe)
+        f = self._files.get(key)
+        if f is not None:
+            self._files.move_to_end(key)
+            return f
+        f = self._files[key] = CandleFile(self.path(symbol, timeframe), self.maxlen)
+        while len(self._files) > self.max_open:
+            _, old = self._files.popitem(last=False)
+            old.close()
+        return f
+
+    def read(self, symbol: str, timeframe: str) -> Optional[Columns]:
+        """History tersimpan untuk deret ini; None jika tidak ada / cache nonaktif"""
+        if not self.enabled:
+            return None
+        try:
+            if not os.path.exists(self.path(symbol, timeframe)):
+                self.misses += 1
+                return None
+            columns = self._file(symbol, timeframe).read()
+        except (OSError, ValueError) as e:
+            self.errors += 1
+            logger.debug(f"Candle cache read failed for {symbol} {timeframe}: {e}")
+            return None
+        if columns is None or np.any(np.diff(columns[0]) <= 0):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return columns
+
+    def load(self, symbol: str, timeframe: str, timestamps, opens, highs, lows, closes, volumes):
+        if not self.enabled:
+            return
+        try:
+            self._file(symbol, timeframe).load(timestamps, opens, highs, lows, closes, volumes)
+        except (OSError, ValueError) as e:
+            self.errors += 1
+            logger.debug(f"Candle cache load failed for {symbol} {timeframe}: {e}")
+
+    def append(self, symbol: str, timeframe: str, ts: int, o: float, h: float, l: float, c: float, v: float):
+        if not self.enabled:
+            return
+        try:
+            if self._file(symbol, timeframe).append(ts, o, h, l, c, v):
+                self.appended += 1
+        except (OSError, ValueError) as e:
+            self.errors += 1
+            logger.debug(f"Candle cache append failed for {symbol} {timeframe}: {e}")
+
+    def flush(self):
+        for f in self._files.values():
+            try:
+                f.flush()
+            except (OSError, ValueError) as e:
+                logger.debug(f"Candle cache flush failed for {f.path}: {e}")
+
+    def close(self):
+        while self._files:
+            _, f = self._files.popitem(last=False)
+            f.close()
+
+    def stats(self) -> Dict:
+        return {
+            'enabled': self.enabled,
+            'open_files': len(self._files),
+            'restored': self.hits,
+            'missing': self.misses,
+            'appended': self.appended,
+            'errors': self.errors,
+        }
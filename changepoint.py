@@ -0,0 +1,181 @@
+"""
+Change-point gating for re-analysis.
+
+Candle close tidak selalu berarti deret bergerak cukup untuk mengubah pola.
+ChangeMonitor melacak per (symbol, timeframe), secara online per candle:
+
+  ATR Wilder(14) dan EMA volume       skala "gerak berarti"
+  CUSUM dua sisi atas return / ATR    akumulasi drift kecil searah
+  gerak sejak analisis penuh terakhir  |close - close_ref| / ATR
+
+dan memutuskan untuk candle baru:
+
+  full     jalankan seluruh pipeline (gerak >= full_move ATR, CUSUM > threshold,
+           lonjakan volume, terlalu banyak bar sejak analisis penuh, atau belum
+           pernah dianalisis)
+  refresh  pakai pola dari analisis penuh terakhir, entry/target/stop digeser
+           proporsional terhadap gerak close timeframe ini sejak analisis itu
+           (close / close_ref; gerak >= refresh_move ATR)
+  skip     pakai pola terakhir apa adanya
+
+Reference (close, pola) di-reset setiap analisis penuh (commit()). Skala
+refresh memakai close deret itu sendiri, bukan harga ticker simbol: level
+pola 4h tidak ikut digeser oleh gerak 1m yang belum terlihat di candle 4h.
+Keputusan, alasannya dan jumlah run detektor yang dihemat tersedia di stats().
+
+Env:
+  CPD_CHANGE_GATING   1 (default) | 0 (selalu full, monitor hanya mencatat)
+"""
+
+import logging
+import os
+from dataclasses import replace
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from pattern_detector import UltraPatternResult
+
+logger = logging.getLogger(__name__)
+
+FULL, REFRESH, SKIP = 'full', 'refresh', 'skip'
+DECISIONS = (FULL, REFRESH, SKIP)
+
+
+class SeriesState:
+    __slots__ = ('close', 'atr', 'vol_ema', 'vol_base', 'last_volume', 'ref_close', 'patterns',
+                 'cusum_pos', 'cusum_neg', 'bars_since')
+
+    def __init__(self):
+        self.close: Optional[float] = None
+        self.atr: Optional[float] = None
+        self.vol_ema: Optional[float] = None
+        self.vol_base: Optional[float] = None       # EMA volume sampai candle sebelumnya
+        self.last_volume = 0.0
+        self.ref_close: Optional[float] = None      # close saat analisis penuh terakhir
+        self.patterns: Optional[List[UltraPatternResult]] = None
+        self.cusum_pos = 0.0
+        self.cusum_neg = 0.0
+        self.bars_since = 0
+
+
+class ChangeMonitor:
+    def __init__(self, full_move: float = 1.0, refresh_move: float = 0.25, drift: float = 0.5,
+                 threshold: float = 4.0, volume_surge: float = 2.5, max_bars: int = 6,
+                 atr_period: int = 14, enabled: Optional[bool] = None):
+        self.full_move = full_move
+        self.refresh_move = refresh_move
+        self.drift = drift
+        self.threshold = threshold
+        self.volume_surge = volume_surge
+        self.max_bars = max_bars
+        self.atr_period = atr_period
+        if enabled is None:
+            enabled = os.environ.get('CPD_CHANGE_GATING', '1').strip().lower() not in ('0', 'false', 'off')
+        self.enabled = enabled
+        self._states: Dict[Tuple[str, str], SeriesState] = {}
+
+        self.decisions = {d: 0 for d in DECISIONS}
+        self.reasons: Dict[str, int] = {}
+        self.saved_runs = 0          # node detektor yang tidak dijalankan karena refresh / skip
+
+    # ---------- ingest ----------
+    def seed(self, symbol: str, timeframe: str, highs: Sequence[float], lows: Sequence[float],
+             closes: Sequence[float], volumes: Sequence[float]):
+        """Bangun ATR / EMA volume dari history REST; analisis berikutnya selalu full"""
+        state = self._states[(symbol, timeframe)] = SeriesState()
+        for h, l, c, v in zip(highs, lows, closes, volumes):
+            self._advance(state, float(h), float(l), float(c), float(v))
+        state.bars_since = 0
+
+    def update(self, symbol: str, timeframe: str, high: float, low: float, close: float, volume: float):
+        """Satu candle tertutup baru"""
+        state = self._states.get((symbol, timeframe))
+        if state is None:
+            state = self._states[(symbol, timeframe)] = SeriesState()
+        prev = state.close
+        self._advance(state, float(high), float(low), float(close), float(volume))
+        if prev is not None and state.atr:
+            r = (state.close - prev) / state.atr
+            state.cusum_pos = max(0.0, state.cusum_pos + r - self.drift)
+            state.cusum_neg = max(0.0, state.cusum_neg - r - self.drift)
+        state.bars_since += 1
+
+    def _advance(self, state: SeriesState, high: float, low: float, close: float, volume: float):
+        prev = state.close
+        tr = high - low if prev is None else max(high - low, abs(high - prev), abs(low - prev))
+        if state.atr is None:
+            state.atr = tr
+        else:
+            state.atr += (tr - state.atr) / self.atr_period
+        # lonjakan volume dibandingkan dengan baseline sebelum candle ini
+        state.vol_base = state.vol_ema
+        state.vol_ema = volume if state.vol_ema is None else state.vol_ema + (volume - state.vol_ema) * 2.0 / 21.0
+        state.last_volume = volume
+        state.close = close
+
+    # ---------- gating ----------
+    def decide(self, symbol: str, timeframe: str) -> Tuple[str, str]:
+        """(keputusan, alasan) untuk candle terbaru deret ini"""
+        state = self._states.get((symbol, timeframe))
+        if state is None or state.patterns is None or not state.atr or state.ref_close is None:
+            return FULL, 'new'
+        if not self.enabled:
+            return FULL, 'disabled'
+        if state.bars_since >= self.max_bars:
+            return FULL, 'age'
+        move = abs(state.close - state.ref_close) / state.atr
+        if move >= self.full_move:
+            return FULL, 'move'
+        if max(state.cusum_pos, state.cusum_neg) > self.threshold:
+            return FULL, 'cusum'
+        if state.vol_base and state.last_volume >= self.volume_surge * state.vol_base:
+            return FULL, 'volume'
+        if move >= self.refresh_move:
+            return REFRESH, 'move'
+        return SKIP, 'quiet'
+
+    def record(self, decision: str, reason: str, saved_runs: int = 0):
+        self.decisions[decision] = self.decisions.get(decision, 0) + 1
+        key = f"{decision}:{reason}"
+        self.reasons[key] = self.reasons.get(key, 0) + 1
+        if decision != FULL:
+            self.saved_runs += saved_runs
+
+    def commit(self, symbol: str, timeframe: str, patterns: List[UltraPatternResult]):
+        """Analisis penuh selesai: close deret saat ini dan polanya jadi reference baru"""
+        state = self._states.get((symbol, timeframe))
+        if state is None:
+            state = self._states[(symbol, timeframe)] = SeriesState()
+        state.ref_close = state.close
+        state.patterns = patterns
+        state.cusum_pos = state.cusum_neg = 0.0
+        state.bars_since = 0
+
+    def previous(self, symbol: str, timeframe: str) -> List[UltraPatternResult]:
+        state = self._states.get((symbol, timeframe))
+        return list(state.patterns or []) if state is not None else []
+
+    def refreshed(self, symbol: str, timeframe: str) -> List[UltraPatternResult]:
+        """Pola analisis penuh terakhir dengan level harga digeser sebesar close / close_ref deret ini"""
+        state = self._states.get((symbol, timeframe))
+        if state is None or not state.patterns:
+            return []
+        scale = state.close / state.ref_close if state.ref_close and state.close is not None else 1.0
+        return [replace(p, entry_price=p.entry_price * scale, target_price=p.target_price * scale,
+                        stop_loss=p.stop_loss * scale)
+                for p in state.patterns]
+
+    def reset(self, symbol: Optional[str] = None, timeframe: Optional[str] = None):
+        """Lupakan reference (mis. history di-load ulang / konteks detektor berubah)"""
+        for key in [k for k in self._states
+                    if (symbol is None or k[0] == symbol) and (timeframe is None or k[1] == timeframe)]:
+            self._states[key].patterns = None
+
+    def stats(self) -> Dict:
+        total = sum(self.decisions.values())
+        avoided = total - self.decisions.get(FULL, 0)
+        return {
+            'decisions': dict(self.decisions),
+            'reasons': dict(sorted(self.reasons.items())),
+            'avoided_pct': round(100.0 * avoided / total, 1) if total else 0.0,
+            'saved_detector_runs': self.saved_runs,
+        }
@@ -16,6 +16,18 @@ import traceback
 
 # Import your pattern detection class
 from pattern_detector import UltraPatternDetector, UltraPatternResult
+from indicators import IndicatorCache
+from streaming import StreamingIndicators
+from detector_pool import DetectorPool, make_frame
+from shared_market import SharedMarketStore
+from candle_cache import CandleCache, merge_columns
+from timeframes import closed_since, is_fresh, period_ms, staleness_ms
+from scheduler import AnalysisScheduler, UNRANKED
+import jit
+import klines
+import parity
+import pipeline
+import prescreen
 
 # Setup logging
 logging.basicConfig(
@@ -38,6 +50,7 @@ class CryptoPatternBot:
         
         # Binance endpoints
         self.binance_base_url = 'https://api.binance.com'
+        self.max_klines = 1000            # batas `limit` per request /api/v3/klines
         self.binance_ws_url = 'wss://stream.binance.com:9443/ws/'
         
         # Timeframes
@@ -47,11 +60,39 @@ class CryptoPatternBot:
             'long': ['4h', '1d']
         }
         
-        # Data storage
+        # Data storage: OHLCV per (symbol, timeframe) di segmen shared memory yang dibaca worker
+        self.market_store = SharedMarketStore(maxlen=1000)
+        # Candle tertutup juga ditulis ke file mmap di disk: restart hanya mengambil ekor yang hilang
+        self.candle_cache = CandleCache(maxlen=1000)
+        # Backfill gap per (symbol, timeframe) yang sedang berjalan -> candle websocket yang ditahan
+        self.backfills: Dict[Tuple[str, str], List[tuple]] = {}
+        self.backfill_sweep_running = False
+        self.gap_stats = {'gaps': 0, 'candles': 0, 'requests': 0}
+        # Sampel history float64 untuk parity report jika penyimpanan bukan float64
+        self.parity_samples = []
+        self.parity_sample_limit = 12
         self.market_data = {}
         self.top_symbols = []
+        self.symbol_rank = {}            # simbol -> peringkat volume 24h (0 = paling likuid)
         self.pattern_detector = UltraPatternDetector()
         
+        # Shared indicator bundles per (symbol, timeframe, last closed candle)
+        self.indicator_cache = IndicatorCache(max_entries=512)
+        
+        # Streaming indicator state per symbol/timeframe, advanced one candle at a time
+        # (hanya dipelihara jika detektor membacanya, lihat DetectorPool.uses_streams)
+        self.streaming_state = {}
+        
+        # Detektor dijalankan di process pool supaya event loop (websocket, Telegram) tidak terblokir
+        self.detector_pool = DetectorPool(
+            detector=self.pattern_detector, indicator_cache=self.indicator_cache
+        )
+        
+        # Event-driven analysis: candle close -> (debounce) -> satu job per simbol, diurutkan
+        # menurut deadline (close berikutnya), peringkat volume dan volatilitas terkini
+        self.analysis_concurrency = max(2, self.detector_pool.workers)
+        self.scheduler = AnalysisScheduler(self.timeframes, debounce=0.25)
+        
         # Analysis results
         self.analysis_results = {}
         self.last_alerts = {}
@@ -63,15 +104,26 @@ class CryptoPatternBot:
         """Start the bot"""
         logger.info("Starting Crypto Pattern Bot...")
         
+        # Compile helper JIT sekarang, bukan di siklus analisis pertama
+        timings = jit.warmup()
+        logger.info(f"Detector helper backend: {jit.backend()} (warmup {sum(timings.values()):.2f}s)")
+        
         # Create aiohttp session
         self.session = aiohttp.ClientSession()
         
+        self.detector_pool.start()
+        logger.info(f"Pattern analysis mode: {self.detector_pool.mode} ({self.detector_pool.workers} workers)")
+        
         try:
             # Get top 100 symbols by volume
             await self.get_top_symbols()
             
             # Initialize data storage
             await self.initialize_data_storage()
+            logger.info(f"Market store: {len(self.market_store)} series, "
+                        f"{self.market_store.nbytes / 1e6:.1f} MB ({self.market_store.dtype})")
+            if self.parity_samples:
+                asyncio.create_task(self.report_storage_parity())
             
             # Start data collection and analysis
             await asyncio.gather(
@@ -84,6 +136,9 @@ class CryptoPatternBot:
             logger.error(f"Error starting bot: {e}")
             logger.error(traceback.format_exc())
         finally:
+            self.detector_pool.shutdown()
+            self.market_store.close()
+            self.candle_cache.close()
             if self.session:
                 await self.session.close()
     
@@ -116,6 +171,8 @@ class CryptoPatternBot:
                 'BTCUSDT', 'ETHUSDT', 'BNBUSDT', 'ADAUSDT', 'XRPUSDT',
                 'SOLUSDT', 'DOTUSDT', 'DOGEUSDT', 'AVAXUSDT', 'LINKUSDT'
             ]
+        finally:
+            self.symbol_rank = {symbol: i for i, symbol in enumerate(self.top_symbols)}
     
     async def initialize_data_storage(self):
         """Initialize data storage for all symbols and timeframes"""
@@ -123,15 +180,7 @@ class CryptoPatternBot:
             self.market_data[symbol] = {}
             for timeframe_group in self.timeframes.values():
                 for tf in timeframe_group:
-                    self.market_data[symbol][tf] = {
-                        'timestamps': [],
-                        'opens': [],
-                        'highs': [],
-                        'lows': [],
-                        'closes': [],
-                        'volumes': [],
-                        'last_update': 0
-                    }
+                    self.market_data[symbol][tf] = self.market_store.block(symbol, tf)
         
         # Get initial historical data
         await self.get_historical_data()
@@ -139,72 +188,206 @@ class CryptoPatternBot:
     async def get_historical_data(self):
         """Get historical data for all symbols and timeframes"""
         logger.info("Fetching historical data...")
+        started = time.time()
+        requests = 0
         
         for symbol in self.top_symbols:
             for timeframe_group in self.timeframes.values():
                 for tf in timeframe_group:
                     try:
-                        await self.fetch_klines(symbol, tf, limit=500)
-                        await asyncio.sleep(0.1)  # Rate limiting
+                        if await self.restore_history(symbol, tf, limit=500):
+                            requests += 1
+                            await asyncio.sleep(0.1)  # Rate limiting
                     except Exception as e:
                         logger.error(f"Error fetching historical data for {symbol} {tf}: {e}")
+        
+        logger.info(f"Historical data ready in {time.time() - started:.1f}s "
+                    f"({requests} REST requests, candle cache: {self.candle_cache.stats()})")
     
-    async def fetch_klines(self, symbol: str, timeframe: str, limit: int = 500):
-        """Fetch kline data from Binance"""
+    async def restore_history(self, symbol: str, timeframe: str, limit: int = 500) -> bool:
+        """History dari candle cache + ekor yang hilang dari REST; True jika ada request REST"""
+        cached = self.candle_cache.read(symbol, timeframe)
+        if cached is not None and len(cached[0]) >= limit:
+            last_ts = int(cached[0][-1])
+            missing = closed_since(last_ts, timeframe)
+            if missing == 0:
+                self.store_history(symbol, timeframe, cached, persist=False)
+                return False
+            if missing < self.max_klines:
+                # +1: candle yang sedang berjalan ikut terkirim dan dibuang saat parsing
+                await self.fetch_klines(symbol, timeframe, limit=missing + 1,
+                                        start_time=last_ts + period_ms(timeframe), base=cached)
+                return True
+        await self.fetch_klines(symbol, timeframe, limit=limit)
+        return True
+    
+    async def fetch_klines(self, symbol: str, timeframe: str, limit: int = 500,
+                           start_time: Optional[int] = None, base=None):
+        """
+        Fetch kline data from Binance. Dengan start_time hanya candle sejak
+        start_time yang diambil lalu digabung dengan history `base`
+        (timestamps + 5 kolom, mis. dari candle cache).
+        """
         try:
-            url = f"{self.binance_base_url}/api/v3/klines"
-            params = {
-                'symbol': symbol,
-                'interval': timeframe,
-                'limit': limit
-            }
-            
-            async with self.session.get(url, params=params) as response:
-                data = await response.json()
-            
-            if symbol not in self.market_data:
-                self.market_data[symbol] = {}
-            if timeframe not in self.market_data[symbol]:
-                self.market_data[symbol][timeframe] = {
-                    'timestamps': [],
-                    'opens': [],
-                    'highs': [],
-                    'lows': [],
-                    'closes': [],
-                    'volumes': [],
-                    'last_update': 0
-                }
-            
-            # Process kline data
-            timestamps = []
-            opens = []
-            highs = []
-            lows = []
-            closes = []
-            volumes = []
-            
-            for kline in data:
-                timestamps.append(int(kline[0]))
-                opens.append(float(kline[1]))
-                highs.append(float(kline[2]))
-                lows.append(float(kline[3]))
-                closes.append(float(kline[4]))
-                volumes.append(float(kline[5]))
-            
-            # Update data
-            self.market_data[symbol][timeframe] = {
-                'timestamps': timestamps,
-                'opens': opens,
-                'highs': highs,
-                'lows': lows,
-                'closes': closes,
-                'volumes': volumes,
-                'last_update': time.time()
-            }
+            columns = await self.request_klines(symbol, timeframe, limit, start_time=start_time)
+            if base is not None:
+                columns = merge_columns(base, columns)
+            self.store_history(symbol, timeframe, columns)
             
         except Exception as e:
             logger.error(f"Error fetching klines for {symbol} {timeframe}: {e}")
     
+    async def request_klines(self, symbol: str, timeframe: str, limit: int = 500,
+                             start_time: Optional[int] = None):
+        """Satu request /api/v3/klines -> (timestamps, opens, highs, lows, closes, volumes), hanya candle tertutup"""
+        url = f"{self.binance_base_url}/api/v3/klines"
+        params = {
+            'symbol': symbol,
+            'interval': timeframe,
+            'limit': min(limit, self.max_klines)
+        }
+        if start_time is not None:
+            params['startTime'] = int(start_time)
+        
+        async with self.session.get(url, params=params) as response:
+            body = await response.read()
+        
+        # Decode seluruh response sekaligus ke kolom bertipe; candle yang belum tertutup dibuang
+        return klines.decode(body)
+    
+    async def fetch_range(self, symbol: str, timeframe: str, start_ts: int):
+        """
+        Semua candle tertutup dengan open time >= start_ts, per halaman
+        max_klines (startTime). Hanya `maxlen` candle terakhir yang diambil
+        karena store tidak menyimpan lebih dari itu.
+        """
+        step = period_ms(timeframe)
+        missing = closed_since(start_ts - step, timeframe)
+        if missing > self.market_store.maxlen:
+            start_ts += (missing - self.market_store.maxlen) * step
+            missing = self.market_store.maxlen
+        columns = None
+        while missing > 0:
+            page = await self.request_klines(symbol, timeframe, limit=missing + 1, start_time=start_ts)
+            self.gap_stats['requests'] += 1
+            if not len(page[0]):
+                break
+            columns = merge_columns(columns, page)
+            start_ts = int(page[0][-1]) + step
+            missing = closed_since(start_ts - step, timeframe)
+            if missing > 0:
+                await asyncio.sleep(0.1)  # Rate limiting
+        return columns
+    
+    def start_backfill(self, symbol: str, timeframe: str, start_ts: int, rows=()) -> asyncio.Task:
+        """
+        Daftarkan backfill deret ini sebelum task-nya berjalan, supaya candle
+        websocket berikutnya ditahan di self.backfills dan tidak membuat task kedua.
+        """
+        self.backfills[(symbol, timeframe)] = list(rows)
+        return asyncio.create_task(self.backfill_gap(symbol, timeframe, start_ts))
+    
+    async def backfill_gap(self, symbol: str, timeframe: str, start_ts: int):
+        """Isi candle yang terlewat sejak start_ts dari REST lalu gabungkan ke history secara berurutan"""
+        key = (symbol, timeframe)
+        fetched = None
+        try:
+            fetched = await self.fetch_range(symbol, timeframe, start_ts)
+        except Exception as e:
+            logger.error(f"Error backfilling {symbol} {timeframe}: {e}")
+        finally:
+            # candle websocket yang masuk selama request REST
+            pending = self.backfills.pop(key, [])
+        
+        try:
+            block = self.market_data[symbol][timeframe]
+            start, length, _ = block.snapshot()
+            columns = tuple(np.array(col) for col in block.views(start, length))
+            before = length
+            if fetched is not None:
+                columns = merge_columns(columns, fetched)
+            if pending:
+                columns = merge_columns(columns, tuple(zip(*pending)))
+            self.store_history(symbol, timeframe, columns)
+            
+            filled = len(columns[0]) - before - len(pending)
+            self.gap_stats['gaps'] += 1
+            self.gap_stats['candles'] += max(0, filled)
+            logger.info(f"Backfilled {max(0, filled)} missing {timeframe} candles for {symbol}")
+            self.schedule_analysis(symbol, timeframe)
+        except Exception as e:
+            logger.error(f"Error merging backfill for {symbol} {timeframe}: {e}")
+    
+    async def backfill_stale(self):
+        """Setelah (re)connect: backfill deret yang candle-nya tertutup selama websocket putus"""
+        if self.backfill_sweep_running:
+            return
+        self.backfill_sweep_running = True
+        try:
+            for symbol in list(self.market_data):
+                for timeframe, block in list(self.market_data[symbol].items()):
+                    if (symbol, timeframe) in self.backfills:
+                        continue
+                    last_ts = block.last_ts()
+                    if last_ts is None or not closed_since(last_ts, timeframe):
+                        continue
+                    await self.start_backfill(symbol, timeframe, last_ts + period_ms(timeframe))
+                    await asyncio.sleep(0.1)  # Rate limiting
+        except Exception as e:
+            logger.error(f"Error in backfill sweep: {e}")
+        finally:
+            self.backfill_sweep_running = False
+    
+    def store_history(self, symbol: str, timeframe: str, columns, persist: bool = True):
+        """Ganti history deret (REST / candle cache) dan seed semua state turunannya"""
+        timestamps, opens, highs, lows, closes, volumes = columns
+        if symbol not in self.market_data:
+            self.market_data[symbol] = {}
+        
+        # Update data (ditulis langsung ke segmen shared memory)
+        block = self.market_store.block(symbol, timeframe)
+        block.load(timestamps, opens, highs, lows, closes, volumes)
+        self.market_data[symbol][timeframe] = block
+        if persist:
+            self.candle_cache.load(symbol, timeframe, timestamps, opens, highs, lows, closes, volumes)
+        
+        # History bisa berubah tanpa candle terakhir baru: buang hasil deteksi yang di-memo
+        self.detector_pool.invalidate(symbol, timeframe)
+        self.detector_pool.changes.seed(symbol, timeframe, highs, lows, closes, volumes)
+        
+        if (self.market_store.dtype != np.float64 and len(closes) and
+                len(self.parity_samples) < self.parity_sample_limit and
+                pipeline.eligible(self.pattern_detector, timeframe)):
+            self.parity_samples.append((symbol, timeframe, (opens, highs, lows, closes, volumes)))
+        
+        # Seed streaming state from history (mode process: worker tidak membacanya, jadi tidak dibuat)
+        if self.detector_pool.uses_streams:
+            stream = self.streaming_state.setdefault(symbol, {}).setdefault(timeframe, StreamingIndicators())
+            stream.seed(timestamps, opens, highs, lows, closes, volumes)
+    
+    async def report_storage_parity(self):
+        """Bandingkan output detektor float64 vs dtype penyimpanan atas sampel history (sekali)"""
+        samples, self.parity_samples = self.parity_samples, []
+        dtype = self.market_store.dtype
+        
+        def run():
+            reports = []
+            for symbol, tf, cols in samples:
+                try:
+                    reports.append(parity.parity_report(self.pattern_detector, *cols, cols[3][-1], tf, dtype=dtype))
+                except Exception as e:
+                    logger.debug(f"Parity report failed for {symbol} {tf}: {e}")
+            return reports
+        
+        try:
+            reports = await asyncio.to_thread(run)
+            summary = parity.parity_summary(reports)
+            changed = {label: line for label, line in summary.items() if not line.startswith('0/')}
+            logger.info(f"Storage parity ({dtype}, {len(reports)} series): "
+                        f"{changed if changed else 'no detector output changed'}")
+        except Exception as e:
+            logger.error(f"Error running storage parity report: {e}")
+    
     async def collect_market_data(self):
         """Collect real-time market data via WebSocket"""
         while True:
@@ -217,6 +400,9 @@ class CryptoPatternBot:
                         for tf in timeframe_group:
                             streams.append(f"{symbol_lower}@kline_{tf}")
                 
+                # Candle yang tertutup selama websocket putus diisi dari REST di background
+                asyncio.create_task(self.backfill_stale())
+                
                 # Split streams into chunks (Binance has limit)
                 stream_chunks = [streams[i:i+200] for i in range(0, len(streams), 200)]
                 
@@ -284,49 +470,110 @@ class CryptoPatternBot:
                 return
             
             # Update data
-            data_dict = self.market_data[symbol][timeframe]
+            block = self.market_data[symbol][timeframe]
             
-            data_dict['timestamps'].append(int(kline['t']))
-            data_dict['opens'].append(float(kline['o']))
-            data_dict['highs'].append(float(kline['h']))
-            data_dict['lows'].append(float(kline['l']))
-            data_dict['closes'].append(float(kline['c']))
-            data_dict['volumes'].append(float(kline['v']))
+            # Ignore duplicate / out-of-order candles
+            last_ts = block.last_ts()
+            if last_ts is not None and int(kline['t']) <= last_ts:
+                return
             
-            # Keep only last 1000 candles
-            if len(data_dict['closes']) > 1000:
-                for key in ['timestamps', 'opens', 'highs', 'lows', 'closes', 'volumes']:
-                    data_dict[key] = data_dict[key][-1000:]
+            row = (int(kline['t']), float(kline['o']), float(kline['h']),
+                   float(kline['l']), float(kline['c']), float(kline['v']))
+            key = (symbol, timeframe)
+            if key in self.backfills:
+                # Backfill sedang berjalan: candle ini digabung setelah ekor REST masuk
+                self.backfills[key].append(row)
+                return
+            if last_ts is not None and row[0] > last_ts + period_ms(timeframe):
+                # Gap: append langsung akan merusak setiap jendela indikator
+                logger.warning(f"Gap in {symbol} {timeframe}: "
+                               f"{(row[0] - last_ts) // period_ms(timeframe) - 1} candles missing, backfilling")
+                self.start_backfill(symbol, timeframe, last_ts + period_ms(timeframe), rows=[row])
+                return
             
-            data_dict['last_update'] = time.time()
+            # Tulis in place ke segmen shared memory (store menyimpan 1000 candle terakhir)
+            block.append(
+                int(kline['t']), float(kline['o']), float(kline['h']),
+                float(kline['l']), float(kline['c']), float(kline['v'])
+            )
+            self.candle_cache.append(
+                symbol, timeframe, int(kline['t']), float(kline['o']), float(kline['h']),
+                float(kline['l']), float(kline['c']), float(kline['v'])
+            )
+            
+            # Advance streaming indicators by exactly one candle (hanya ada di mode inline)
+            stream = self.streaming_state.get(symbol, {}).get(timeframe)
+            if stream is not None:
+                stream.update(
+                    int(kline['t']), float(kline['o']), float(kline['h']),
+                    float(kline['l']), float(kline['c']), float(kline['v'])
+                )
+            
+            # Monitor change-point: menentukan full / refresh / skip saat simbol dianalisis
+            self.detector_pool.changes.update(
+                symbol, timeframe, float(kline['h']), float(kline['l']),
+                float(kline['c']), float(kline['v'])
+            )
+            
+            # Candle tertutup -> jadwalkan analisis simbol ini
+            self.schedule_analysis(symbol, timeframe)
             
         except Exception as e:
             logger.error(f"Error processing kline data: {e}")
     
-    async def analyze_patterns(self):
-        """Analyze patterns for all symbols"""
+    def recent_volatility(self, symbol: str, timeframe: str, window: int = 20) -> float:
+        """Stdev log return `window` candle terakhir (0.0 jika data kurang)"""
+        try:
+            closes = self.market_data[symbol][timeframe]['closes'][-(window + 1):]
+            if len(closes) < 3 or np.any(closes <= 0):
+                return 0.0
+            return float(np.std(np.diff(np.log(closes))))
+        except Exception as e:
+            logger.debug(f"Volatility unavailable for {symbol} {timeframe}: {e}")
+            return 0.0
+    
+    def schedule_analysis(self, symbol: str, timeframe: str):
+        """Mark (symbol, timeframe) dirty; the symbol is analysed once after the debounce window"""
+        if not pipeline.eligible(self.pattern_detector, timeframe):
+            return  # tidak ada tier yang min_timeframe-nya mengizinkan timeframe ini
+        block = self.market_data.get(symbol, {}).get(timeframe)
+        self.scheduler.mark(
+            symbol, timeframe,
+            block.last_ts() if block is not None else None,
+            rank=self.symbol_rank.get(symbol, UNRANKED),
+            volatility=self.recent_volatility(symbol, timeframe),
+        )
+    
+    async def analysis_worker(self):
+        """Consume jobs by priority; timeframes without a new close come from the detection cache"""
         while True:
+            job = await self.scheduler.get()
             try:
-                analysis_tasks = []
-                
-                for symbol in self.top_symbols:
-                    if symbol in self.market_data:
-                        task = asyncio.create_task(self.analyze_symbol_patterns(symbol))
-                        analysis_tasks.append(task)
-                
-                # Process in batches to avoid overwhelming
-                batch_size = 20
-                for i in range(0, len(analysis_tasks), batch_size):
-                    batch = analysis_tasks[i:i+batch_size]
-                    await asyncio.gather(*batch, return_exceptions=True)
-                    await asyncio.sleep(1)  # Brief pause between batches
-                
-                # Wait 60 seconds before next analysis cycle
-                await asyncio.sleep(60)
-                
+                await self.analyze_symbol_patterns(job.symbol)
             except Exception as e:
-                logger.error(f"Error in pattern analysis: {e}")
-                await asyncio.sleep(30)
+                logger.error(f"Error in pattern analysis for {job.symbol}: {e}")
+            finally:
+                self.scheduler.done(job)
+    
+    async def analyze_patterns(self):
+        """Analyze patterns for all symbols as their candles close"""
+        # Sweep awal atas history REST; setelah itu analisis hanya dipicu candle close.
+        # Satu pre-screen batch untuk semua simbol: deret yang tidak lolos satu detektor pun tidak dijadwalkan
+        series = {
+            (symbol, tf): (tf, len(block))
+            for symbol in self.top_symbols if symbol in self.market_data
+            for tf, block in self.market_data[symbol].items()
+        }
+        for (symbol, tf), nodes in prescreen.screen(self.pattern_detector, series, record=False).items():
+            if nodes:
+                self.schedule_analysis(symbol, tf)
+        
+        workers = [asyncio.create_task(self.analysis_worker()) for _ in range(self.analysis_concurrency)]
+        try:
+            await asyncio.gather(*workers)
+        finally:
+            for worker in workers:
+                worker.cancel()
     
     async def analyze_symbol_patterns(self, symbol: str):
         """Analyze patterns for a specific symbol"""
@@ -349,7 +596,7 @@ class CryptoPatternBot:
                     if (symbol in self.market_data and 
                         tf in self.market_data[symbol] and 
                         len(self.market_data[symbol][tf]['closes']) > 0):
-                        current_price = self.market_data[symbol][tf]['closes'][-1]
+                        current_price = float(self.market_data[symbol][tf]['closes'][-1])
                         break
                 if current_price > 0:
                     break
@@ -359,33 +606,33 @@ class CryptoPatternBot:
             
             symbol_results['current_price'] = current_price
             
-            # Analyze each timeframe group
-            for group_name, timeframes in self.timeframes.items():
-                group_patterns = {}
-                
+            # Snapshot every fresh timeframe, then analyze them in one pool task per symbol.
+            # Timeframe tanpa candle baru dilayani dari detection cache (sekali per close).
+            frames = {}
+            for timeframes in self.timeframes.values():
                 for tf in timeframes:
+                    if not pipeline.eligible(self.pattern_detector, tf):
+                        continue
                     if (tf in self.market_data[symbol] and 
                         len(self.market_data[symbol][tf]['closes']) >= 100):
                         
                         data = self.market_data[symbol][tf]
                         
-                        # Skip if data is too old
-                        if time.time() - data['last_update'] > 300:  # 5 minutes
+                        # Skip if a close expected for this timeframe has been missed
+                        last_ts = data.last_ts()
+                        if not is_fresh(last_ts, tf):
+                            logger.debug(f"Skipping stale {symbol} {tf} ({staleness_ms(last_ts, tf) / 1000:.0f}s past expected close)")
                             continue
                         
-                        try:
-                            # Run pattern detection on this timeframe
-                            patterns = await self.detect_patterns_for_timeframe(
-                                symbol, tf, data, current_price
-                            )
-                            
-                            if patterns:
-                                group_patterns[tf] = patterns
-                                
-                        except Exception as e:
-                            logger.error(f"Error analyzing {symbol} {tf}: {e}")
-                
-                symbol_results[group_name] = group_patterns
+                        frames[tf] = make_frame(data)
+            
+            detected = await self.detector_pool.detect_symbol(
+                symbol, frames, current_price, streams=self.streaming_state.get(symbol)
+            )
+            
+            # Analyze each timeframe group
+            for group_name, timeframes in self.timeframes.items():
+                symbol_results[group_name] = {tf: detected[tf] for tf in timeframes if detected.get(tf)}
             
             # Store results
             self.analysis_results[symbol] = symbol_results
@@ -396,149 +643,6 @@ class CryptoPatternBot:
         except Exception as e:
             logger.error(f"Error analyzing symbol {symbol}: {e}")
     
-    async def detect_patterns_for_timeframe(self, symbol: str, timeframe: str, 
-                                          data: dict, current_price: float) -> List[UltraPatternResult]:
-        """Detect patterns for a specific timeframe"""
-        try:
-            opens = np.array(data['opens'])
-            highs = np.array(data['highs'])
-            lows = np.array(data['lows'])
-            closes = np.array(data['closes'])
-            volumes = np.array(data['volumes'])
-            
-            if len(closes) < 100:
-                return []
-            
-            # YOUR PATTERN DETECTION CODE GOES HERE
-            # This is where you integrate your pattern detection methods
-            # from the script you provided
-            
-            all_patterns = []
-            
-            # Detect all your pattern categories
-            perfect_patterns = self.pattern_detector._detect_perfect_patterns_stable(
-                opens, highs, lows, closes, volumes, current_price, timeframe
-            )
-            all_patterns.extend(perfect_patterns)
-            
-            most_perfect_patterns = self.pattern_detector._most_perfect_patterns_stable(
-                opens, highs, lows, closes, volumes, current_price, timeframe
-            )
-            all_patterns.extend(most_perfect_patterns)
-            
-            classic_patterns = self.pattern_detector._detect_classic_patterns_stable(
-                opens, highs, lows, closes, volumes, current_price, timeframe
-            )
-            all_patterns.extend(classic_patterns)
-            
-            harmonic_patterns = self.pattern_detector._detect_harmonic_patterns_stable(
-                highs, lows, closes, current_price, timeframe
-            )
-            all_patterns.extend(harmonic_patterns)
-            
-            elliott_patterns = self.pattern_detector._detect_elliott_wave_patterns_stable(
-                closes, current_price, timeframe
-            )
-            all_patterns.extend(elliott_patterns)
-            
-            wyckoff_patterns = self.pattern_detector._detect_wyckoff_patterns_stable(
-                opens, highs, lows, closes, volumes, current_price, timeframe
-            )
-            all_patterns.extend(wyckoff_patterns)
-            
-            volume_patterns = self.pattern_detector._detect_volume_patterns_stable(
-                closes, volumes, current_price, timeframe
-            )
-            all_patterns.extend(volume_patterns)
-            
-            fibonacci_patterns = self.pattern_detector._detect_fibonacci_patterns_stable(
-                highs, lows, closes, current_price, timeframe
-            )
-            all_patterns.extend(fibonacci_patterns)
-            
-            candlestick_patterns = self.pattern_detector._detect_candlestick_patterns_stable(
-                opens, highs, lows, closes, current_price, timeframe
-            )
-            all_patterns.extend(candlestick_patterns)
-            
-            oscillator_patterns = self.pattern_detector._detect_oscillator_patterns_stable(
-                opens, highs, lows, closes, current_price, timeframe
-            )
-            all_patterns.extend(oscillator_patterns)
-            
-            moving_patterns = self.pattern_detector._detect_moving_patterns_stable(
-                opens, highs, lows, closes, volumes, current_price, timeframe
-            )
-            all_patterns.extend(moving_patterns)
-            
-            volatility_patterns = self.pattern_detector._detect_volatility_patterns_stable(
-                opens, highs, lows, closes, volumes, current_price, timeframe
-            )
-            all_patterns.extend(volatility_patterns)
-            
-            # Add combination patterns
-            combination_patterns = self.pattern_detector._detect_combination_patterns_stable(
-                opens, highs, lows, closes, volumes, current_price, timeframe, all_patterns
-            )
-            all_patterns.extend(combination_patterns)
-            
-            godlike_patterns = self.pattern_detector._detect_godlike_patterns_stable(
-                opens, highs, lows, closes, volumes, current_price, timeframe, all_patterns
-            )
-            all_patterns.extend(godlike_patterns)
-            
-            legendary_patterns = self.pattern_detector._detect_legendary_patterns_stable(
-                opens, highs, lows, closes, volumes, current_price, timeframe, all_patterns
-            )
-            all_patterns.extend(legendary_patterns)
-            
-            master_patterns = self.pattern_detector._detect_master_patterns_stable(
-                opens, highs, lows, closes, volumes, current_price, timeframe, all_patterns
-            )
-            all_patterns.extend(master_patterns)
-            
-            blockchain_patterns = self.pattern_detector._detect_blockchain_patterns_stable(
-                opens, highs, lows, closes, volumes, current_price, timeframe, all_patterns
-            )
-            all_patterns.extend(blockchain_patterns)
-            
-            cross_patterns = self.pattern_detector._detect_cross_patterns_stable(
-                opens, highs, lows, closes, volumes, current_price, timeframe, all_patterns
-            )
-            all_patterns.extend(cross_patterns)
-            
-            real_patterns = self.pattern_detector._detect_real_patterns_stable(
-                opens, highs, lows, closes, volumes, current_price, timeframe, all_patterns
-            )
-            all_patterns.extend(real_patterns)
-            
-            quantum_patterns = self.pattern_detector._detect_quantum_patterns_stable(
-                opens, highs, lows, closes, volumes, current_price, timeframe, all_patterns
-            )
-            all_patterns.extend(quantum_patterns)
-            
-            microstructure_patterns = self.pattern_detector._detect_microstructur_patterns_stable(
-                opens, highs, lows, closes, volumes, current_price, timeframe, all_patterns
-            )
-            all_patterns.extend(microstructure_patterns)
-            
-            seasonal_patterns = self.pattern_detector._detect_seasonal_patterns_stable(
-                opens, highs, lows, closes, volumes, current_price, timeframe, all_patterns
-            )
-            all_patterns.extend(seasonal_patterns)
-            
-            # Filter patterns with minimum confidence
-            filtered_patterns = [
-                pattern for pattern in all_patterns 
-                if hasattr(pattern, 'confidence') and pattern.confidence >= 10.0
-            ]
-            
-            return filtered_patterns
-            
-        except Exception as e:
-            logger.error(f"Error detecting patterns for {symbol} {timeframe}: {e}")
-            return []
-    
     async def generate_predictions(self, symbol: str, results: dict):
         """Generate predictions for short, mid, long term"""
         try:
@@ -717,6 +821,12 @@ class CryptoPatternBot:
                 
                 if active_signals > 0:
                     logger.info(f"Monitoring {active_signals} active symbols")
+                logger.info(f"Detection cache: {self.detector_pool.results.stats()}")
+                logger.info(f"Analysis scheduler: {self.scheduler.stats()}")
+                logger.info(f"Pre-screen hit rates: {self.detector_pool.screen_stats()}")
+                logger.info(f"Re-analysis gating: {self.detector_pool.changes.stats()}")
+                logger.info(f"Gap backfill: {self.gap_stats}")
+                self.candle_cache.flush()
                 
             except Exception as e:
                 logger.error(f"Error in monitoring: {e}")
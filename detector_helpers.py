@@ -0,0 +1,140 @@
+"""
+Shared detector helpers.
+
+Helper kecil yang dulu didefinisikan ulang sebagai closure di setiap
+_detect_*_patterns_stable (crossed_above, near, vol_spike, rough_poc,
+linreg_slope, atr_stop, ...). Di sini semuanya fungsi module-level tanpa
+state: konteks (deret close/volume, ATR) dioper eksplisit oleh detektor,
+sehingga tidak ada alokasi closure per panggilan dan bisa diprofil per nama.
+"""
+
+import logging
+from typing import Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+# ================== CROSS / PROXIMITY ==================
+
+def crossed_above(a, b) -> bool:
+    return len(a) >= 2 and len(b) >= 2 and a[-2] <= b[-2] and a[-1] > b[-1]
+
+
+def crossed_below(a, b) -> bool:
+    return len(a) >= 2 and len(b) >= 2 and a[-2] >= b[-2] and a[-1] < b[-1]
+
+
+def near(a, b, tol: float = 0.01) -> bool:
+    """|a-b| relatif terhadap b dalam toleransi; False jika salah satu bukan angka"""
+    return bool(np.isfinite(a) and np.isfinite(b) and abs(a - b) / max(1e-12, abs(b)) <= tol)
+
+
+# ================== VOLUME ==================
+
+def _prior_mean(v, n: int) -> float:
+    # rata-rata n bar sebelum bar terakhir (atau seluruh deret jika terlalu pendek)
+    return float(np.mean(v[-n-1:-1]) if len(v) > n else np.mean(v))
+
+
+def vol_spike(v, factor: float = 1.2, n: int = 20) -> bool:
+    if len(v) < 2:
+        return False
+    return v[-1] > factor * _prior_mean(v, n)
+
+
+def vol_dryup(v, factor: float = 0.8, n: int = 20) -> bool:
+    if len(v) < 2:
+        return False
+    return v[-1] < factor * _prior_mean(v, n)
+
+
+def vol_climax(v, factor: float = 1.5, n: int = 20) -> bool:
+    return vol_spike(v, factor, n)
+
+
+def volume_surge(volumes, factor: float = 1.5, lookback: int = 30) -> bool:
+    """Volume bar terakhir >= factor x rata-rata `lookback` bar sebelumnya"""
+    if len(volumes) < lookback + 1:
+        return False
+    base = volumes[-(lookback+1):-1]
+    if np.isnan(base).any():
+        return False
+    return bool(volumes[-1] >= factor * base.mean())
+
+
+def volume_contract(volumes, lookback: int = 30) -> bool:
+    """Kontraksi volume: stdev `lookback` bar terakhir < stdev periode sebelumnya"""
+    if len(volumes) < lookback * 2:
+        return False
+    return bool(np.nanstd(volumes[-lookback:]) < np.nanstd(volumes[-2*lookback:-lookback]))
+
+
+def rough_poc(close, vol, bins: int = 24, lookback: int = 150) -> Optional[float]:
+    """Volume Profile POC kasar: titik tengah bin harga dengan volume terbesar (bar NaN dilewati)"""
+    xs = np.asarray(close[-lookback:], dtype=float)
+    vs = np.asarray(vol[-lookback:], dtype=float)
+    ok = np.isfinite(xs) & np.isfinite(vs)
+    if not ok.all():
+        xs, vs = xs[ok], vs[ok]
+    if len(xs) < 10:
+        return None
+    lo, hi = np.min(xs), np.max(xs)
+    if hi <= lo:
+        return None
+    edges = np.linspace(lo, hi, bins + 1)
+    idxs = np.digitize(xs, edges) - 1
+    inside = (idxs >= 0) & (idxs < bins)
+    acc = np.bincount(idxs[inside], weights=vs[inside], minlength=bins)
+    m = int(np.argmax(acc))
+    return float((edges[m] + edges[m+1]) / 2.0)
+
+
+# ================== PRICE / TREND ==================
+
+def linreg_slope(y, window: int = 20) -> float:
+    """
+    Slope regresi linear `window` nilai terakhir. 0.0 jika data kurang atau seluruh
+    jendela NaN; NaN jika hanya sebagian jendela NaN (perbandingan slope jadi False).
+    """
+    if len(y) < window:
+        return 0.0
+    x = np.arange(window)
+    yy = np.asarray(y, dtype=float)[-window:]
+    if np.isnan(yy).all():
+        return 0.0
+    xm, ym = x.mean(), np.nanmean(yy)
+    denom = ((x - xm)**2).sum()
+    if denom == 0:
+        return 0.0
+    num = ((x - xm) * (yy - ym)).sum()
+    return float(num / denom)
+
+
+def swing_low(lows, lookback: int = 30) -> float:
+    return float(np.min(lows[-lookback:]))
+
+
+def swing_high(highs, lookback: int = 30) -> float:
+    return float(np.max(highs[-lookback:]))
+
+
+def last_close_above(closes, level: float, k: int = 1, margin: float = 0.002) -> bool:
+    """k close terakhir semuanya di atas level (+margin)"""
+    if len(closes) < k:
+        return False
+    return bool(np.all(closes[-k:] >= level * (1 + margin)))
+
+
+def last_close_below(closes, level: float, k: int = 1, margin: float = 0.002) -> bool:
+    if len(closes) < k:
+        return False
+    return bool(np.all(closes[-k:] <= level * (1 - margin)))
+
+
+# ================== RISK ==================
+
+def atr_stop(entry: float, atr: float, long: bool = True, mult: float = 2.0) -> float:
+    """Stop loss berjarak mult x ATR dari entry"""
+    return (entry - mult * atr) if long else (entry + mult * atr)
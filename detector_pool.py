@@ -0,0 +1,400 @@
+"""
+Detector execution off the asyncio event loop.
+
+Ke-21 detektor pola bersifat sinkron dan berat di CPU; dipanggil langsung dari
+coroutine, mereka memblokir event loop sehingga websocket_stream berhenti
+membaca frame dan kiriman Telegram tertahan. DetectorPool menjalankan seluruh
+pipeline detektor untuk satu simbol (semua timeframe sekaligus, satu task per
+simbol) di ProcessPoolExecutor, lalu hasilnya (UltraPatternResult, picklable)
+dikembalikan ke event loop untuk disimpan di analysis_results.
+
+Jika market_data disimpan di SharedOHLCV, yang dikirim ke worker hanya handle
+segmen shared memory; worker memetakan segmen itu dan detektor membaca view
+read-only tanpa salinan (lihat shared_market.py).
+
+Output detektor di-memo per (symbol, timeframe, candle tertutup terakhir,
+DETECTOR_VERSION, context) di DetectionCache: deret yang belum mendapat candle
+baru (mis. 1d) langsung memakai daftar pola yang sama tanpa menjalankan detektor.
+
+Candle baru tidak otomatis memicu pipeline penuh: ChangeMonitor (changepoint.py)
+memutuskan full / refresh (pola terakhir, level harga digeser) / skip per deret
+berdasarkan gerak ATR, CUSUM dan volume sejak analisis penuh terakhir.
+
+Sebelum dikirim, frame yang tidak lolos pre-screen murah satu detektor pun
+(jumlah bar, timeframe) langsung dijawab kosong; worker juga melewati node yang
+gagal syarat strukturalnya. Hit rate pre-screen dilaporkan lewat screen_stats().
+
+StreamingIndicators (ekor indikator yang dimajukan per candle di proses bot)
+hanya dipakai mode inline: mengirim ring buffer setiap deret ke worker per
+job lebih mahal daripada menghitung ulang indikator dari view shared memory,
+jadi di mode process worker membangun bundle dari deret mentah (di-memo per
+candle di IndicatorCache worker) dan bot tidak memelihara streaming state
+(lihat uses_streams).
+
+Mode diatur lewat env:
+  CPD_ANALYSIS_MODE     process (default) | inline (jalankan di proses bot, untuk debug)
+  CPD_ANALYSIS_WORKERS  jumlah worker (default: jumlah core - 1)
+  CPD_PIPELINE_THREADS  thread untuk node graf detektor yang independen, maks 4
+                        (default: 1 di mode process, jumlah core di mode inline;
+                        lihat pipeline.py)
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+import jit
+import pipeline
+import prescreen
+import talib_backend
+from changepoint import FULL, REFRESH, ChangeMonitor
+from indicators import IndicatorBundle, IndicatorCache
+from pattern_detector import UltraPatternDetector, UltraPatternResult
+from shared_market import Handle, SharedOHLCV, resolve
+
+logger = logging.getLogger(__name__)
+
+MODES = ('process', 'inline')
+MIN_BARS = 100
+MIN_CONFIDENCE = 10.0
+MAX_PIPELINE_THREADS = 4
+
+# Naikkan setiap kali logika detektor berubah supaya hasil cache lama tidak dipakai lagi
+DETECTOR_VERSION = 2
+
+# Satu timeframe yang siap dianalisis: handle shared memory, atau salinan
+# (timestamp candle terakhir, opens, highs, lows, closes, volumes)
+ArrayFrame = Tuple[int, np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]
+Frame = Union[Handle, ArrayFrame]
+
+# epoch terakhir yang dilihat proses ini per segmen, untuk membuang bundle basi
+_seen_epochs: Dict[str, int] = {}
+
+
+def make_frame(data) -> Frame:
+    """
+    Frame untuk market_data[symbol][tf]: handle segmen jika blok shared memory,
+    selain itu snapshot numpy (dipickle ke worker)
+    """
+    if isinstance(data, SharedOHLCV):
+        if data.shared:
+            return data.handle()
+        start, length, _ = data.snapshot()
+        ts, *cols = data.views(start, length)
+        return (int(ts[-1]) if length else 0, *[np.array(col) for col in cols])
+    return (
+        int(data['timestamps'][-1]),
+        np.array(data['opens'], dtype=float),
+        np.array(data['highs'], dtype=float),
+        np.array(data['lows'], dtype=float),
+        np.array(data['closes'], dtype=float),
+        np.array(data['volumes'], dtype=float),
+    )
+
+
+def run_detectors(detector: UltraPatternDetector, opens, highs, lows, closes, volumes,
+                  current_price: float, timeframe: str, indicators=None) -> List[UltraPatternResult]:
+    """Seluruh pipeline detektor untuk satu timeframe, difilter confidence minimum"""
+    if len(closes) < MIN_BARS:
+        return []
+    series = {'o': opens, 'h': highs, 'l': lows, 'c': closes, 'v': volumes}
+    # node yang gagal syarat perlu (bar / timeframe / struktur) pasti kosong: tidak dijalankan
+    passed = prescreen.screen(detector, {timeframe: (timeframe, len(closes))}, record=False)[timeframe]
+    skip = frozenset(prescreen.METHODS) - passed
+    skip |= prescreen.structural_skips(detector, series, current_price, timeframe, indicators)
+    all_patterns = pipeline.run_pipeline(detector, series, current_price, timeframe,
+                                         indicators=indicators, skip=skip)
+    return [p for p in all_patterns if hasattr(p, 'confidence') and p.confidence >= MIN_CONFIDENCE]
+
+
+def _detect_frames(detector: UltraPatternDetector, cache: IndicatorCache, symbol: str,
+                   frames: Dict[str, Frame], current_price: float,
+                   streams: Optional[Dict] = None) -> Dict[str, List[UltraPatternResult]]:
+    results: Dict[str, List[UltraPatternResult]] = {}
+    for tf, frame in frames.items():
+        try:
+            if isinstance(frame[0], str):
+                results[tf] = _detect_shared(detector, cache, symbol, tf, frame, current_price, streams)
+            else:
+                results[tf] = _detect_arrays(detector, cache, symbol, tf, frame, current_price, streams)
+        except Exception as e:
+            # timeframe yang gagal tidak dikembalikan (dan karenanya tidak di-cache)
+            logger.error(f"Error detecting patterns for {symbol} {tf}: {e}")
+    return results
+
+
+def _detect_arrays(detector, cache, symbol, tf, frame: ArrayFrame, current_price, streams):
+    last_ts, opens, highs, lows, closes, volumes = frame
+    indicators = cache.get(symbol, tf, last_ts, opens, highs, lows, closes, volumes,
+                           stream=(streams or {}).get(tf))
+    # deret float32 (CPD_STORAGE_DTYPE=float32) dipromosikan sekali ke float64 di bundle;
+    # detektor membaca deret bundle yang sama (view float64 read-only dipakai tanpa salinan)
+    opens, highs, lows, closes, volumes = (indicators.series(k) for k in IndicatorBundle.SOURCES)
+    return run_detectors(detector, opens, highs, lows, closes, volumes,
+                         current_price, tf, indicators=indicators)
+
+
+def _detect_shared(detector, cache, symbol, tf, handle: Handle, current_price, streams):
+    name, last_ts, _, _, epoch = handle
+    block, (_, opens, highs, lows, closes, volumes) = resolve(handle)
+    if _seen_epochs.get(name) != epoch:
+        # segmen di-load ulang / di-compact: bundle lama mungkin menunjuk data yang sudah ditimpa
+        cache.invalidate(symbol, tf)
+        _seen_epochs[name] = epoch
+    found = _detect_arrays(detector, cache, symbol, tf, (last_ts, opens, highs, lows, closes, volumes),
+                           current_price, streams)
+    if block.still_valid(epoch):
+        return found
+
+    # writer meng-compact segmen selama detektor berjalan: ulangi dari salinan snapshot terbaru
+    logger.debug(f"Shared segment for {symbol} {tf} changed during analysis, retrying from a copy")
+    for _ in range(3):
+        start, length, epoch = block.snapshot()
+        if not length:
+            return []
+        ts, *cols = block.views(start, length)
+        last_ts, copied = int(ts[-1]), [np.array(col) for col in cols]
+        if block.still_valid(epoch):
+            # epoch tidak berubah selama penyalinan -> salinan utuh dari satu snapshot
+            cache.invalidate(symbol, tf)
+            _seen_epochs[name] = epoch
+            return _detect_arrays(detector, cache, symbol, tf, (last_ts, *copied), current_price, streams)
+    logger.debug(f"Shared segment for {symbol} {tf} kept changing, skipping this cycle")
+    return []
+
+
+# ================== WORKER PROCESS ==================
+
+_worker_detector: Optional[UltraPatternDetector] = None
+_worker_cache: Optional[IndicatorCache] = None
+
+
+def _init_worker(threads: int = 1):
+    global _worker_detector, _worker_cache
+    pipeline.configure(threads)
+    _worker_detector = UltraPatternDetector()
+    _worker_cache = IndicatorCache(max_entries=128)
+    jit.warmup()
+
+
+def detect_symbol(symbol: str, frames: Dict[str, Frame],
+                  current_price: float) -> Tuple[Dict[str, List[UltraPatternResult]], Dict]:
+    """
+    Entry point di proses worker: semua timeframe satu simbol dalam satu task.
+    Mengembalikan (pola per timeframe, delta counter pre-screen worker ini).
+    """
+    if _worker_detector is None:
+        _init_worker()
+    results = _detect_frames(_worker_detector, _worker_cache, symbol, frames, current_price)
+    return results, prescreen.LOCAL.drain()
+
+
+# ================== RESULT CACHE ==================
+
+def frame_ts(frame: Frame) -> int:
+    """Timestamp candle tertutup terakhir dari handle shared memory atau frame array"""
+    return int(frame[1]) if isinstance(frame[0], str) else int(frame[0])
+
+
+def frame_len(frame: Frame) -> int:
+    """Jumlah candle dalam handle shared memory atau frame array"""
+    return int(frame[3]) if isinstance(frame[0], str) else len(frame[4])
+
+
+def detection_context(detector: UltraPatternDetector) -> Tuple:
+    """Flag selain data candle yang mempengaruhi output detektor"""
+    return (talib_backend.backend(), MIN_CONFIDENCE, tuple(sorted(detector.ultra_config.items())))
+
+
+class DetectionCache:
+    """
+    LRU cache daftar pola per (symbol, timeframe, last closed ts, DETECTOR_VERSION, context).
+    Candle baru -> key baru; entri lama tersingkir oleh batas max_entries.
+    """
+
+    def __init__(self, max_entries: int = 2048):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple, List[UltraPatternResult]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, symbol: str, timeframe: str, last_ts: int, context: Tuple) -> Optional[List[UltraPatternResult]]:
+        key = (symbol, timeframe, int(last_ts), DETECTOR_VERSION, context)
+        patterns = self._entries.get(key)
+        if patterns is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return patterns
+
+    def put(self, symbol: str, timeframe: str, last_ts: int, context: Tuple, patterns: List[UltraPatternResult]):
+        self._entries[(symbol, timeframe, int(last_ts), DETECTOR_VERSION, context)] = patterns
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, symbol: Optional[str] = None, timeframe: Optional[str] = None):
+        for key in [k for k in self._entries
+                    if (symbol is None or k[0] == symbol) and (timeframe is None or k[1] == timeframe)]:
+            del self._entries[key]
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+
+# ================== POOL ==================
+
+class DetectorPool:
+    """
+    Menjadwalkan analisis per simbol ke ProcessPoolExecutor (atau inline).
+    start() membuat worker, shutdown() membatalkan task yang belum jalan dan
+    menunggu worker selesai sehingga tidak ada proses yatim saat bot berhenti.
+    """
+
+    def __init__(self, workers: Optional[int] = None, mode: Optional[str] = None,
+                 detector: Optional[UltraPatternDetector] = None,
+                 indicator_cache: Optional[IndicatorCache] = None):
+        mode = (mode or os.environ.get('CPD_ANALYSIS_MODE', 'process')).lower()
+        if mode not in MODES:
+            logger.warning(f"Unknown analysis mode '{mode}', using process")
+            mode = 'process'
+        if workers is None:
+            workers = int(os.environ.get('CPD_ANALYSIS_WORKERS', '0') or 0)
+        self.mode = mode
+        self.workers = workers if workers > 0 else max(1, (os.cpu_count() or 2) - 1)
+        threads = int(os.environ.get('CPD_PIPELINE_THREADS', '0') or 0)
+        if threads <= 0:
+            # worker proses sudah memakai core per simbol, dan node detektor sebagian besar
+            # Python murni yang memegang GIL: thread di dalam worker tidak mempercepat satu
+            # deret, hanya menambah overhead. Thread hanya default di mode inline.
+            threads = (os.cpu_count() or 2) if mode == 'inline' else 1
+        self.threads = max(1, min(threads, MAX_PIPELINE_THREADS))
+        if mode == 'inline':
+            pipeline.configure(self.threads)
+        # dipakai mode inline (dan sebagai fallback); worker punya instance sendiri
+        self.detector = detector or UltraPatternDetector()
+        self.indicator_cache = indicator_cache or IndicatorCache(max_entries=512)
+        self.results = DetectionCache()
+        self.changes = ChangeMonitor()
+        self._context: Optional[Tuple] = None
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def start(self):
+        if self.mode != 'process' or self._executor is not None:
+            return
+        # spawn: worker tidak mewarisi event loop, socket, atau thread proses bot
+        ctx = multiprocessing.get_context('spawn')
+        self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=ctx,
+                                             initializer=_init_worker, initargs=(self.threads,))
+        logger.info(f"Detector pool started with {self.workers} worker processes "
+                    f"x {self.threads} pipeline threads")
+
+    @property
+    def running(self) -> bool:
+        return self._executor is not None
+
+    @property
+    def uses_streams(self) -> bool:
+        """True jika streaming state bot benar-benar dibaca detektor (hanya mode inline)"""
+        return self.mode == 'inline'
+
+    def context(self) -> Tuple:
+        """Context flag saat ini; jika berubah (backend / konfigurasi), seluruh cache hasil dibuang"""
+        context = detection_context(self.detector)
+        if context != self._context:
+            if self._context is not None:
+                logger.info("Detector context changed, clearing detection cache")
+            self.results.clear()
+            self.changes.reset()
+            self._context = context
+        return context
+
+    def invalidate(self, symbol: Optional[str] = None, timeframe: Optional[str] = None):
+        """Buang hasil & bundle cache untuk deret yang isinya berubah tanpa candle baru (mis. reload REST)"""
+        self.results.invalidate(symbol, timeframe)
+        self.changes.reset(symbol, timeframe)
+        if symbol is not None:
+            self.indicator_cache.invalidate(symbol, timeframe)
+
+    async def detect_symbol(self, symbol: str, frames: Dict[str, Frame], current_price: float,
+                            streams: Optional[Dict] = None) -> Dict[str, List[UltraPatternResult]]:
+        """Pola per timeframe; deret tanpa candle baru dilayani dari cache tanpa menjalankan detektor"""
+        context = self.context()
+        results: Dict[str, List[UltraPatternResult]] = {}
+        pending: Dict[str, Frame] = {}
+        for tf, frame in frames.items():
+            cached = self.results.get(symbol, tf, frame_ts(frame), context)
+            if cached is not None:
+                results[tf] = cached
+                continue
+            # candle baru: deret yang belum bergerak berarti memakai pola analisis penuh terakhir
+            decision, reason = self.changes.decide(symbol, tf)
+            gate = pipeline.gate(self.detector, tf)
+            self.changes.record(decision, reason, len(gate.nodes) if gate is not None else len(pipeline.PIPELINE))
+            if decision == FULL:
+                pending[tf] = frame
+                continue
+            if decision == REFRESH:
+                patterns = self.changes.refreshed(symbol, tf)
+            else:
+                patterns = self.changes.previous(symbol, tf)
+            results[tf] = patterns
+            self.results.put(symbol, tf, frame_ts(frame), context, patterns)
+        if not pending:
+            return results
+
+        # pre-screen batch semua timeframe job ini: yang tidak lolos satu node pun tidak dikirim
+        passed = prescreen.screen(self.detector, {tf: (tf, frame_len(f)) for tf, f in pending.items()})
+        for tf in [tf for tf, nodes in passed.items() if not nodes]:
+            results[tf] = []
+            self.results.put(symbol, tf, frame_ts(pending.pop(tf)), context, [])
+            self.changes.commit(symbol, tf, [])
+        if not pending:
+            return results
+
+        fresh = await self._run(symbol, pending, current_price, streams)
+        for tf, patterns in fresh.items():
+            self.results.put(symbol, tf, frame_ts(pending[tf]), context, patterns)
+            self.changes.commit(symbol, tf, patterns)
+        results.update(fresh)
+        return results
+
+    async def _run(self, symbol: str, frames: Dict[str, Frame], current_price: float,
+                   streams: Optional[Dict] = None) -> Dict[str, List[UltraPatternResult]]:
+        if self._executor is None:
+            return _detect_frames(self.detector, self.indicator_cache, symbol, frames, current_price, streams)
+
+        # streams tidak dikirim: worker menghitung indikator dari deret (lihat uses_streams)
+        loop = asyncio.get_running_loop()
+        try:
+            results, screen_counts = await loop.run_in_executor(
+                self._executor, detect_symbol, symbol, frames, current_price
+            )
+            prescreen.LOCAL.merge(screen_counts)
+            return results
+        except BrokenProcessPool as e:
+            # worker mati (OOM / segfault): bangun ulang pool, siklus berikutnya jalan lagi
+            logger.error(f"Detector pool broken while analyzing {symbol}: {e}; restarting")
+            self.shutdown(wait=False)
+            self.start()
+            return {}
+
+    def screen_stats(self) -> Dict[str, str]:
+        """Hit rate pre-screen (lolos/diperiksa) per detektor, gabungan bot + worker"""
+        return prescreen.LOCAL.stats()
+
+    def shutdown(self, wait: bool = True):
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+            logger.info("Detector pool stopped")
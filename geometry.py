@@ -0,0 +1,129 @@
+"""
+Geometric primitives for chart-pattern detectors.
+
+Garis support/resistance di-fit dengan least squares bentuk tertutup atas
+himpunan pivot (atau semua bar dalam jendela), beberapa deret sekaligus dalam
+satu operasi vektor. Setiap Line membawa slope, intercept, error fit (RMS
+residual relatif) dan jumlah touch, lalu dievaluasi hanya di bar yang
+dibutuhkan lewat Line.at() -- bukan list comprehension sepanjang n bar.
+
+Dipakai bersama oleh detektor triangle, wedge, flag/pennant, channel dan
+neckline head & shoulders.
+"""
+
+import logging
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Line:
+    slope: float
+    intercept: float
+    error: float = 0.0      # RMS residual relatif terhadap rata-rata |y|
+    touches: int = 0        # titik dengan residual relatif <= touch_tol
+    points: int = 0         # jumlah titik (finite) yang di-fit
+
+    def at(self, x):
+        """Nilai garis di x (skalar atau array indeks bar)"""
+        if np.isscalar(x):
+            return self.intercept + self.slope * float(x)
+        return self.intercept + self.slope * np.asarray(x, dtype=float)
+
+    def rel_slope(self, x) -> float:
+        """Slope per bar relatif terhadap nilai garis di x (mis. 0.002 = +0.2%/bar)"""
+        base = self.at(x)
+        return self.slope / base if base else 0.0
+
+
+def line_through(x1: float, y1: float, x2: float, y2: float) -> Line:
+    """Garis melalui dua titik (mis. neckline dari dua armpit)"""
+    if x2 == x1:
+        return Line(0.0, float(y1), 0.0, 1, 1)
+    slope = (float(y2) - float(y1)) / (float(x2) - float(x1))
+    return Line(slope, float(y1) - slope * float(x1), 0.0, 2, 2)
+
+
+def fit_lines(x, ys, touch_tol: float = 0.01) -> List[Line]:
+    """
+    Fit least squares untuk setiap baris `ys` (k x m) terhadap x yang sama
+    (panjang m), sekaligus dalam satu operasi vektor. NaN diabaikan per baris.
+    """
+    x = np.asarray(x, dtype=float)
+    Y = np.atleast_2d(np.asarray(ys, dtype=float))
+    ok = np.isfinite(Y) & np.isfinite(x)
+    cnt = ok.sum(axis=1)
+    safe = np.maximum(cnt, 1)
+
+    Xo = np.where(ok, x, 0.0)
+    Yo = np.where(ok, Y, 0.0)
+    xm = Xo.sum(axis=1) / safe
+    ym = Yo.sum(axis=1) / safe
+    # x dipusatkan per baris supaya indeks bar global tidak merusak presisi
+    dx = np.where(ok, x - xm[:, None], 0.0)
+    dy = np.where(ok, Y - ym[:, None], 0.0)
+    sxx = (dx * dx).sum(axis=1)
+    slope = np.divide((dx * dy).sum(axis=1), sxx, out=np.zeros_like(sxx), where=sxx > 0)
+    intercept = ym - slope * xm
+
+    resid = np.where(ok, Y - (intercept[:, None] + slope[:, None] * x), 0.0)
+    scale = np.maximum(np.abs(Yo).sum(axis=1) / safe, 1e-12)
+    rel = np.abs(resid) / scale[:, None]
+    error = np.sqrt((rel * rel).sum(axis=1) / safe)
+    touches = (ok & (rel <= touch_tol)).sum(axis=1)
+
+    lines = []
+    for i in range(len(Y)):
+        if cnt[i] == 0:
+            lines.append(Line(0.0, float('nan'), float('nan'), 0, 0))
+        else:
+            lines.append(Line(float(slope[i]), float(intercept[i]), float(error[i]), int(touches[i]), int(cnt[i])))
+    return lines
+
+
+def fit_line(x, y, touch_tol: float = 0.01) -> Line:
+    return fit_lines(x, y, touch_tol)[0]
+
+
+def fit_bars(*series, touch_tol: float = 0.01) -> List[Line]:
+    """Fit setiap deret (panjang sama) atas indeks bar 0..m-1; pengganti np.polyfit(arange, s, 1)"""
+    Y = np.vstack([np.asarray(s, dtype=float) for s in series])
+    return fit_lines(np.arange(Y.shape[1]), Y, touch_tol)
+
+
+def pivot_line(idx: Sequence[int], values, touch_tol: float = 0.01) -> Line:
+    """Garis yang di-fit melalui pivot `idx` pada deret `values` (x = indeks bar)"""
+    idx = np.asarray(idx, dtype=int)
+    if len(idx) == 0:
+        return Line(0.0, float('nan'), float('nan'), 0, 0)
+    return fit_line(idx, np.asarray(values, dtype=float)[idx], touch_tol)
+
+
+def channel(highs, lows, peaks: Optional[Sequence[int]] = None, troughs: Optional[Sequence[int]] = None,
+            touch_tol: float = 0.01) -> Tuple[Line, Line]:
+    """
+    (upper, lower) untuk sebuah jendela. Dengan pivot, upper di-fit lewat
+    peaks dan lower lewat troughs; tanpa pivot, keduanya di-fit atas semua
+    bar dalam satu panggilan fit_lines.
+    """
+    if peaks is None or troughs is None:
+        upper, lower = fit_bars(highs, lows, touch_tol=touch_tol)
+        return upper, lower
+    return pivot_line(peaks, highs, touch_tol), pivot_line(troughs, lows, touch_tol)
+
+
+def converging(upper: Line, lower: Line) -> bool:
+    """Jarak upper-lower menyempit seiring waktu (triangle, wedge, pennant)"""
+    return upper.slope < lower.slope
+
+
+def apex(upper: Line, lower: Line) -> Optional[float]:
+    """Indeks bar (pecahan) tempat kedua garis bertemu; None jika sejajar"""
+    ds = upper.slope - lower.slope
+    if ds == 0:
+        return None
+    return (lower.intercept - upper.intercept) / ds
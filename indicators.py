@@ -0,0 +1,439 @@
+"""
+Shared indicator bundle for UltraPatternDetector.
+
+Semua detektor dulu menghitung ulang EMA/SMA/ATR/RSI/MACD/Bollinger/VWMA
+dari deret yang sama. Modul ini menghitung setiap indikator sekali per deret
+(symbol, timeframe, candle tertutup terakhir) lalu membagikannya ke semua
+detektor sebagai array read-only.
+"""
+
+import logging
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+import kernels
+import rolling
+import talib_backend
+from pivots import find_pivots, zigzag
+
+logger = logging.getLogger(__name__)
+
+
+# ================== INDICATOR FUNCTIONS ==================
+
+def _as_float(x) -> np.ndarray:
+    return np.asarray(x, dtype=float)
+
+
+def ema(x, period: int) -> np.ndarray:
+    """EMA dengan alpha 2/(n+1), di-seed dengan nilai pertama (tanpa warm-up NaN)"""
+    return kernels.ema(_as_float(x), period)
+
+
+def sma(x, period: int) -> np.ndarray:
+    """SMA trailing, NaN untuk period-1 bar pertama"""
+    return rolling.rolling_mean(x, period)
+
+
+def rolling_std(x, period: int) -> np.ndarray:
+    """Standar deviasi populasi (ddof=0) trailing, NaN untuk period-1 bar pertama"""
+    return rolling.rolling_std(x, period)
+
+
+def true_range(highs, lows, closes) -> np.ndarray:
+    """True range; bar pertama memakai high-low karena belum ada close sebelumnya"""
+    return kernels.true_range(highs, lows, closes)
+
+
+def _wilder(x: np.ndarray, period: int) -> np.ndarray:
+    """Wilder/RMA smoothing (alpha 1/n) di-seed dengan rata-rata n nilai pertama"""
+    return kernels.wilder(x, period)
+
+
+def atr(highs, lows, closes, period: int = 14, method: str = 'wilder') -> np.ndarray:
+    """
+    Average True Range.
+    method: 'wilder' (RMA, seed SMA), 'sma' (rata-rata TR biasa), 'ema' (EMA dari TR)
+    """
+    tr = true_range(highs, lows, closes)
+    if method == 'wilder':
+        return _wilder(tr, period)
+    if method == 'sma':
+        return sma(tr, period)
+    if method == 'ema':
+        return ema(tr, period)
+    raise ValueError(f"Unknown ATR method: {method}")
+
+
+def rsi(x, period: int = 14, method: str = 'wilder') -> np.ndarray:
+    """
+    Relative Strength Index.
+    method: 'wilder' (RMA gain/loss), 'sma' (rata-rata gain/loss biasa),
+            'ema' (EMA gain/loss dengan alpha 2/(n+1))
+    """
+    x = _as_float(x)
+    if method in ('wilder', 'ema'):
+        return kernels.rsi(x, period, smoothing=method)
+    if method != 'sma':
+        raise ValueError(f"Unknown RSI method: {method}")
+    out = np.full_like(x, np.nan)
+    if len(x) <= period:
+        return out
+    d = np.diff(x, prepend=x[0])
+    gain = np.where(d > 0, d, 0.0)
+    loss = np.where(d < 0, -d, 0.0)
+    ag = np.full_like(x, np.nan); al = np.full_like(x, np.nan)
+    ag[1:] = sma(gain[1:], period)
+    al[1:] = sma(loss[1:], period)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rs = ag / al
+        out = 100.0 - 100.0 / (1.0 + rs)
+    # tanpa loss sama sekali -> RSI 100
+    out = np.where((al == 0) & np.isfinite(ag), 100.0, out)
+    return out
+
+
+def macd(x, fast: int = 12, slow: int = 26, signal: int = 9) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """MACD line, signal line, histogram"""
+    line = ema(x, fast) - ema(x, slow)
+    sig = ema(line, signal)
+    return line, sig, line - sig
+
+
+def bollinger(x, period: int = 20, k: float = 2.0) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Bollinger Bands: mid, upper, lower, stddev"""
+    mid = sma(x, period)
+    sd = rolling_std(x, period)
+    return mid, mid + k * sd, mid - k * sd, sd
+
+
+def keltner(highs, lows, closes, period: int = 20, mult: float = 1.5,
+            atr_method: str = 'wilder') -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Keltner Channel: mid (EMA), upper, lower, ATR"""
+    mid = ema(closes, period)
+    xatr = atr(highs, lows, closes, period, atr_method)
+    return mid, mid + mult * xatr, mid - mult * xatr, xatr
+
+
+def vwma(closes, volumes, period: int = 20) -> np.ndarray:
+    """Volume Weighted Moving Average, NaN jika total volume jendela nol"""
+    c, v = _as_float(closes), _as_float(volumes)
+    pv = rolling.rolling_sum(c * v, period)
+    vv = rolling.rolling_sum(v, period)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(vv != 0, pv / vv, np.nan)
+
+
+def obv(closes, volumes) -> np.ndarray:
+    """On Balance Volume"""
+    c, v = _as_float(closes), _as_float(volumes)
+    if len(c) == 0:
+        return np.empty(0)
+    direction = np.sign(np.diff(c, prepend=c[0]))
+    return np.cumsum(direction * v)
+
+
+# ================== BUNDLE ==================
+
+class IndicatorBundle:
+    """
+    Indikator yang dihitung lazily untuk satu deret OHLCV.
+
+    Setiap hasil di-memo berdasarkan (nama, parameter) dan dikembalikan
+    sebagai array read-only, sehingga aman dibagikan ke semua detektor.
+    Detektor yang butuh versi berbeda harus menyalin (np.array(x)) dulu.
+
+    Jika `stream` (StreamingIndicators) sinkron dengan deret ini (candle terakhir
+    sama di `last_ts` dan history stream persis deret ini, lihat covers()),
+    indikator yang dilacak stream diambil dari ekornya tanpa dihitung ulang
+    dari seluruh history. Ekor itu disalin sebelum di-memo: view ring buffer
+    ditimpa update() berikutnya, sedangkan bundle bisa hidup lebih lama
+    (IndicatorCache, detektor yang masih berjalan).
+
+    Dengan backend talib aktif (talib_backend.enabled()), EMA, Wilder ATR/RSI,
+    MACD, Bollinger dan Stochastic dihitung TA-Lib dan ekor stream tidak dipakai
+    untuk indikator tersebut, supaya semua nilai konsisten satu backend.
+    """
+
+    SOURCES = ('open', 'high', 'low', 'close', 'volume')
+
+    def __init__(self, opens=None, highs=None, lows=None, closes=None, volumes=None,
+                 stream=None, last_ts=None):
+        self._series: Dict[str, Optional[np.ndarray]] = {}
+        for name, values in zip(self.SOURCES, (opens, highs, lows, closes, volumes)):
+            self._series[name] = self._own(values) if values is not None else None
+        self._memo: Dict[Tuple, object] = {}
+        self._stream = stream
+        self.last_ts = last_ts
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def _own(cls, values) -> np.ndarray:
+        # view read-only float64 (mis. segmen shared memory) dipakai tanpa salinan;
+        # selain itu disalin dulu supaya caller tetap bebas menulis ke array-nya
+        if isinstance(values, np.ndarray) and values.dtype == np.float64 and not values.flags.writeable:
+            return values
+        return cls._freeze(np.array(values, dtype=float))
+
+    @staticmethod
+    def _freeze(value):
+        if isinstance(value, np.ndarray):
+            value.flags.writeable = False
+        elif isinstance(value, tuple):
+            for item in value:
+                if isinstance(item, np.ndarray):
+                    item.flags.writeable = False
+        return value
+
+    def __len__(self) -> int:
+        closes = self._series.get('close')
+        return len(closes) if closes is not None else 0
+
+    def series(self, source: str = 'close') -> np.ndarray:
+        values = self._series.get(source)
+        if values is None:
+            raise KeyError(f"Series '{source}' not available in bundle")
+        return values
+
+    def matches(self, closes) -> bool:
+        """True jika bundle ini dibangun dari deret close yang sama"""
+        own = self._series.get('close')
+        if own is None or closes is None or len(own) != len(closes):
+            return False
+        return len(own) == 0 or (own[-1] == closes[-1] and own[0] == closes[0])
+
+    def _streamed(self, kind: str, period: Optional[int] = None, method: str = 'wilder',
+                  source: str = 'close') -> Optional[np.ndarray]:
+        """Ekor dari streaming state jika tersedia dan sinkron, selain itu None"""
+        stream = self._indicator_stream()
+        if stream is None or source != 'close' or not stream.covers(len(self), self.last_ts):
+            return None
+        name = stream.name_for(kind, period, method)
+        if name is None or name not in stream:
+            return None
+        return self._tail(stream, name)
+
+    def _tail(self, stream, name: str) -> np.ndarray:
+        # salinan, bukan view ring buffer (lihat docstring kelas)
+        return np.array(stream.tail(name, len(self)))
+
+    def _indicator_stream(self):
+        return None if talib_backend.enabled() else self._stream
+
+    def _get(self, key: Tuple, compute):
+        if key in self._memo:
+            self.hits += 1
+            return self._memo[key]
+        self.misses += 1
+        # setdefault: dua thread pipeline yang menghitung key sama tetap berbagi satu array
+        return self._memo.setdefault(key, self._freeze(compute()))
+
+    # ---- moving averages ----
+    def sma(self, period: int, source: str = 'close') -> np.ndarray:
+        def compute():
+            streamed = self._streamed('sma', period, source=source)
+            return streamed if streamed is not None else sma(self.series(source), period)
+        return self._get(('sma', source, period), compute)
+
+    def ema(self, period: int, source: str = 'close') -> np.ndarray:
+        def compute():
+            if talib_backend.enabled():
+                return talib_backend.ema(self.series(source), period)
+            streamed = self._streamed('ema', period, source=source)
+            return streamed if streamed is not None else ema(self.series(source), period)
+        return self._get(('ema', source, period), compute)
+
+    def vwma(self, period: int = 20) -> np.ndarray:
+        def compute():
+            streamed = self._streamed('vwma', period)
+            return streamed if streamed is not None else vwma(self.series('close'), self.series('volume'), period)
+        return self._get(('vwma', period), compute)
+
+    def stddev(self, period: int = 20, source: str = 'close') -> np.ndarray:
+        return self._get(('stddev', source, period), lambda: rolling_std(self.series(source), period))
+
+    # ---- volatility ----
+    def true_range(self) -> np.ndarray:
+        return self._get(('true_range',), lambda: true_range(self.series('high'), self.series('low'), self.series('close')))
+
+    def atr(self, period: int = 14, method: str = 'wilder') -> np.ndarray:
+        def compute():
+            if method == 'wilder' and talib_backend.enabled():
+                return talib_backend.atr(self.series('high'), self.series('low'), self.series('close'), period)
+            streamed = self._streamed('atr', period, method)
+            if streamed is not None:
+                return streamed
+            tr = self.true_range()
+            if method == 'wilder':
+                return _wilder(tr, period)
+            if method == 'sma':
+                return sma(tr, period)
+            if method == 'ema':
+                return ema(tr, period)
+            raise ValueError(f"Unknown ATR method: {method}")
+        return self._get(('atr', period, method), compute)
+
+    def bollinger(self, period: int = 20, k: float = 2.0):
+        def compute():
+            if talib_backend.enabled():
+                return talib_backend.bollinger(self.series('close'), period, k)
+            stream = self._indicator_stream()
+            if (stream is not None and stream.bb_period == period and stream.bb_k == k
+                    and stream.covers(len(self), self.last_ts)):
+                return tuple(self._tail(stream, name) for name in ('bb_mid', 'bb_up', 'bb_dn', 'bb_sd'))
+            mid = self.sma(period); sd = self.stddev(period)
+            return mid, mid + k * sd, mid - k * sd, sd
+        return self._get(('bollinger', period, k), compute)
+
+    def keltner(self, period: int = 20, mult: float = 1.5, atr_method: str = 'wilder'):
+        def compute():
+            mid = self.ema(period); xatr = self.atr(period, atr_method)
+            return mid, mid + mult * xatr, mid - mult * xatr, xatr
+        return self._get(('keltner', period, mult, atr_method), compute)
+
+    def highest(self, period: int, source: str = 'high') -> np.ndarray:
+        return self._get(('highest', source, period), lambda: rolling.rolling_max(self.series(source), period))
+
+    def lowest(self, period: int, source: str = 'low') -> np.ndarray:
+        return self._get(('lowest', source, period), lambda: rolling.rolling_min(self.series(source), period))
+
+    def donchian(self, period: int = 20):
+        return self._get(('donchian', period),
+                         lambda: rolling.donchian(self.series('high'), self.series('low'), period))
+
+    def ichimoku(self, tenkan: int = 9, kijun: int = 26, senkou_b: int = 52):
+        """Tenkan, Kijun, Senkou A, Senkou B (tanpa displacement, lihat rolling.ichimoku)"""
+        def compute():
+            return rolling.ichimoku(self.series('high'), self.series('low'), tenkan, kijun, senkou_b)
+        return self._get(('ichimoku', tenkan, kijun, senkou_b), compute)
+
+    # ---- momentum ----
+    def stochastic(self, k_period: int = 14, d_period: int = 3, smooth_k: int = 1):
+        def compute():
+            if talib_backend.enabled():
+                return talib_backend.stochastic(self.series('high'), self.series('low'), self.series('close'),
+                                                k_period, d_period, smooth_k)
+            return rolling.stochastic(self.series('high'), self.series('low'), self.series('close'),
+                                      k_period, d_period, smooth_k)
+        return self._get(('stochastic', k_period, d_period, smooth_k), compute)
+
+    def williams_r(self, period: int = 14) -> np.ndarray:
+        def compute():
+            return rolling.williams_r(self.series('high'), self.series('low'), self.series('close'), period)
+        return self._get(('williams_r', period), compute)
+
+    def rsi(self, period: int = 14, method: str = 'wilder', source: str = 'close') -> np.ndarray:
+        def compute():
+            if method == 'wilder' and talib_backend.enabled():
+                return talib_backend.rsi(self.series(source), period)
+            streamed = self._streamed('rsi', period, method, source)
+            return streamed if streamed is not None else rsi(self.series(source), period, method)
+        return self._get(('rsi', source, period, method), compute)
+
+    def macd(self, fast: int = 12, slow: int = 26, signal: int = 9):
+        def compute():
+            if talib_backend.enabled():
+                return talib_backend.macd(self.series('close'), fast, slow, signal)
+            stream = self._indicator_stream()
+            if (stream is not None and stream.macd_params == (fast, slow, signal)
+                    and stream.covers(len(self), self.last_ts)):
+                return tuple(self._tail(stream, name) for name in ('macd', 'macd_signal', 'macd_hist'))
+            line = self.ema(fast) - self.ema(slow)
+            sig = ema(line, signal)
+            return line, sig, line - sig
+        return self._get(('macd', fast, slow, signal), compute)
+
+    # ---- volume ----
+    def obv(self) -> np.ndarray:
+        def compute():
+            streamed = self._streamed('obv')
+            if streamed is not None and len(streamed):
+                # akumulator stream berjalan sejak awal; geser supaya mulai 0 seperti versi batch
+                return streamed - streamed[0]
+            return obv(self.series('close'), self.series('volume'))
+        return self._get(('obv',), compute)
+
+    # ---- candle ----
+    def candle_parts(self):
+        """Body, range, upper shadow, lower shadow untuk setiap bar"""
+        def compute():
+            o, h, l, c = (self.series(s) for s in ('open', 'high', 'low', 'close'))
+            top = np.maximum(o, c); bottom = np.minimum(o, c)
+            return np.abs(c - o), h - l, h - top, bottom - l
+        return self._get(('candle_parts',), compute)
+
+    def cdl(self, name: str) -> Optional[np.ndarray]:
+        """Recognizer TA-Lib CDL* (100/-100/0 per bar), atau None jika backend talib tidak aktif"""
+        if not talib_backend.enabled():
+            return None
+        return self._get(('cdl', name), lambda: talib_backend.cdl(
+            name, self.series('open'), self.series('high'), self.series('low'), self.series('close')))
+
+    # ---- swing / pivot ----
+    def pivots(self, kind: str = 'high', left: int = 3, right: int = 3, source: Optional[str] = None,
+               prominence: Optional[float] = None, min_distance: Optional[int] = None) -> np.ndarray:
+        """Indeks swing high/low (lihat pivots.find_pivots); source default high/low sesuai kind"""
+        src = source or kind
+        def compute():
+            stream = self._stream
+            if stream is not None and stream.covers(len(self), self.last_ts):
+                key = stream.pivots.key_for(kind, left, right, src, prominence, min_distance)
+                if key is not None:
+                    # dipelihara incremental per candle, tanpa scan ulang seluruh deret
+                    return stream.pivots.indices(key, len(self))
+            return find_pivots(self.series(src), left, right, kind, prominence, min_distance)
+        return self._get(('pivots', src, left, right, kind, prominence, min_distance), compute)
+
+    def zigzag(self, pct: float = 0.03, backstep: int = 3, source: str = 'close') -> Tuple:
+        def compute():
+            return tuple(zigzag(self.series(source), pct, backstep))
+        return self._get(('zigzag', source, pct, backstep), compute)
+
+
+def ensure_bundle(indicators: Optional[IndicatorBundle], opens=None, highs=None, lows=None,
+                  closes=None, volumes=None) -> IndicatorBundle:
+    """Pakai bundle dari caller jika cocok dengan deretnya, jika tidak bangun bundle lokal"""
+    if indicators is not None and indicators.matches(closes):
+        return indicators
+    return IndicatorBundle(opens, highs, lows, closes, volumes)
+
+
+# ================== CACHE ==================
+
+class IndicatorCache:
+    """
+    LRU cache IndicatorBundle per (symbol, timeframe, timestamp candle tertutup terakhir).
+    Candle baru -> key baru, jadi bundle lama otomatis tidak terpakai lagi.
+    """
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str, int], IndicatorBundle]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, symbol: str, timeframe: str, last_ts: int,
+            opens, highs, lows, closes, volumes, stream=None) -> IndicatorBundle:
+        key = (symbol, timeframe, int(last_ts))
+        bundle = self._entries.get(key)
+        if bundle is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return bundle
+
+        self.misses += 1
+        bundle = IndicatorBundle(opens, highs, lows, closes, volumes, stream=stream, last_ts=last_ts)
+        self._entries[key] = bundle
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return bundle
+
+    def invalidate(self, symbol: str, timeframe: Optional[str] = None):
+        for key in [k for k in self._entries if k[0] == symbol and (timeframe is None or k[1] == timeframe)]:
+            del self._entries[key]
+
+    def stats(self) -> Dict[str, int]:
+        return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
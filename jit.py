@@ -0,0 +1,89 @@
+"""
+Optional JIT backend (numba) for sequential detector helpers.
+
+Helper yang pada dasarnya loop sekuensial (zigzag walk, filter swing
+berselang-seling dengan ambang adaptif ATR) ditulis dalam subset Python
+yang bisa di-compile numba. Jika numba tidak terpasang, atau dimatikan lewat
+env CPD_DISABLE_JIT=1, fungsi yang sama dijalankan sebagai Python/NumPy biasa.
+warmup() meng-compile semua kernel saat startup supaya siklus live pertama
+tidak menanggung latensi compile.
+"""
+
+import logging
+import os
+import time
+from typing import Callable, Dict, List
+
+logger = logging.getLogger(__name__)
+
+try:
+    import numba
+    from numba.core.errors import NumbaError
+except ImportError:  # numba opsional
+    numba = None
+    NumbaError = None
+
+JIT_ENABLED = numba is not None and os.environ.get('CPD_DISABLE_JIT', '').lower() not in ('1', 'true', 'yes')
+
+
+class Kernel:
+    """
+    Fungsi yang di-compile numba jika tersedia, selain itu dijalankan apa adanya.
+    Jika compile gagal (mis. tipe input tidak didukung), kernel pindah permanen
+    ke versi Python supaya detektor tetap jalan.
+    """
+
+    def __init__(self, func: Callable, sample: Callable[[], tuple]):
+        self.__name__ = func.__name__
+        self.__doc__ = func.__doc__
+        self.py_func = func
+        self.sample = sample
+        self.func = func
+        if JIT_ENABLED:
+            try:
+                self.func = numba.njit(cache=True, nogil=True)(func)
+            except Exception as e:
+                logger.debug(f"JIT disabled for {func.__name__}: {e}")
+
+    @property
+    def compiled(self) -> bool:
+        return self.func is not self.py_func
+
+    def __call__(self, *args):
+        if not self.compiled:
+            return self.py_func(*args)
+        try:
+            return self.func(*args)
+        except NumbaError as e:
+            logger.debug(f"JIT fallback to Python for {self.__name__}: {e}")
+            self.func = self.py_func
+            return self.py_func(*args)
+
+
+_KERNELS: List[Kernel] = []
+
+
+def kernel(sample: Callable[[], tuple]):
+    """Decorator kernel; `sample()` mengembalikan argumen kecil untuk warmup()"""
+    def wrap(func: Callable) -> Kernel:
+        k = Kernel(func, sample)
+        _KERNELS.append(k)
+        return k
+    return wrap
+
+
+def backend() -> str:
+    return 'numba' if JIT_ENABLED else 'python'
+
+
+def warmup() -> Dict[str, float]:
+    """Compile (atau panggil sekali) semua kernel terdaftar; kembalikan durasi per kernel (detik)"""
+    timings: Dict[str, float] = {}
+    for k in _KERNELS:
+        t0 = time.perf_counter()
+        try:
+            k(*k.sample())
+        except Exception as e:
+            logger.debug(f"JIT warmup failed for {k.__name__}: {e}")
+        timings[k.__name__] = time.perf_counter() - t0
+    return timings
@@ -0,0 +1,140 @@
+"""
+Vectorized recursive-filter kernels (EMA, Wilder/RMA, ATR, RSI).
+
+Rekursi y[t] = alpha*x[t] + (1-alpha)*y[t-1] dijalankan lewat
+pandas ewm(adjust=False) yang diimplementasikan di C, bukan loop Python
+per elemen. Semua fungsi menerima array 1-D (satu deret) atau 2-D
+(satu deret per baris) sehingga banyak simbol bisa dihitung sekaligus.
+
+NaN di depan deret (warm-up indikator sumber) tetap NaN: setiap baris
+dihitung mulai dari bar pertama yang finite, sama dengan loop lama yang
+dijalankan pada ekor valid deret tersebut.
+"""
+
+import logging
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+def _rows(x):
+    """Kembalikan (array 2-D float, flag apakah input 1-D)"""
+    arr = np.asarray(x, dtype=float)
+    if arr.ndim > 2:
+        raise ValueError(f"Expected 1-D or 2-D input, got {arr.ndim}-D")
+    return np.atleast_2d(arr), arr.ndim == 1
+
+
+def _restore(out: np.ndarray, squeeze: bool) -> np.ndarray:
+    return out[0] if squeeze else out
+
+
+def _from_first_valid(func, *arrays) -> np.ndarray:
+    """
+    func(*arrays) per baris mulai dari bar pertama yang finite di semua input;
+    posisi sebelumnya NaN. Baris dengan offset yang sama dihitung sekaligus.
+    """
+    finite = np.logical_and.reduce([np.isfinite(a) for a in arrays])
+    n = arrays[0].shape[1]
+    if n == 0:
+        return func(*arrays)
+    first = np.where(finite.any(axis=1), finite.argmax(axis=1), n)
+    if not first.any():
+        return func(*arrays)
+    out = np.full(arrays[0].shape, np.nan)
+    for off in np.unique(first):
+        if off < n:
+            sel = first == off
+            out[sel, off:] = func(*(a[sel, off:] for a in arrays))
+    return out
+
+
+def recursive_filter(x, alpha: float, start: int = 0) -> np.ndarray:
+    """
+    y[t] = alpha*x[t] + (1-alpha)*y[t-1] sepanjang axis terakhir, dengan y[start] = x[start].
+    Posisi sebelum `start` bernilai NaN. Input tidak boleh mengandung NaN setelah `start`
+    (ewm akan melewati NaN, sedangkan loop biasa akan merambatkannya).
+    """
+    rows, squeeze = _rows(x)
+    out = np.full_like(rows, np.nan)
+    if rows.shape[1] > start:
+        frame = pd.DataFrame(rows[:, start:].T)
+        out[:, start:] = frame.ewm(alpha=alpha, adjust=False).mean().to_numpy().T
+    return _restore(out, squeeze)
+
+
+def ema(x, period: int) -> np.ndarray:
+    """EMA dengan alpha 2/(n+1), di-seed dengan nilai pertama (ewm sudah melewati NaN di depan)"""
+    return recursive_filter(x, 2.0 / (period + 1.0))
+
+
+def _wilder(rows: np.ndarray, period: int) -> np.ndarray:
+    out = np.full_like(rows, np.nan)
+    if period <= 0 or rows.shape[1] < period:
+        return out
+    seeded = rows[:, period-1:].copy()
+    seeded[:, 0] = rows[:, :period].mean(axis=1)
+    out[:, period-1:] = recursive_filter(seeded, 1.0 / period)
+    return out
+
+
+def wilder(x, period: int) -> np.ndarray:
+    """Wilder/RMA (alpha 1/n) di-seed dengan rata-rata n nilai pertama, NaN sebelumnya"""
+    rows, squeeze = _rows(x)
+    return _restore(_from_first_valid(lambda r: _wilder(r, period), rows), squeeze)
+
+
+def _true_range(h: np.ndarray, l: np.ndarray, c: np.ndarray) -> np.ndarray:
+    if c.shape[1] == 0:
+        return np.empty_like(c)
+    prev_c = np.concatenate([c[:, :1], c[:, :-1]], axis=1)
+    return np.maximum(h - l, np.maximum(np.abs(h - prev_c), np.abs(l - prev_c)))
+
+
+def true_range(highs, lows, closes) -> np.ndarray:
+    """True range; bar pertama memakai high-low karena belum ada close sebelumnya"""
+    h, squeeze = _rows(highs)
+    l, _ = _rows(lows)
+    c, _ = _rows(closes)
+    return _restore(_from_first_valid(_true_range, h, l, c), squeeze)
+
+
+def atr(highs, lows, closes, period: int = 14) -> np.ndarray:
+    """Wilder ATR"""
+    return wilder(true_range(highs, lows, closes), period)
+
+
+def rsi(x, period: int = 14, smoothing: str = 'wilder') -> np.ndarray:
+    """
+    RSI dengan smoothing 'wilder' (RMA mulai bar ke-1) atau 'ema' (alpha 2/(n+1),
+    bar pertama dihitung sebagai perubahan nol). NaN selama warm-up.
+    """
+    if smoothing not in ('wilder', 'ema'):
+        raise ValueError(f"Unknown RSI smoothing: {smoothing}")
+    rows, squeeze = _rows(x)
+    return _restore(_from_first_valid(lambda r: _rsi(r, period, smoothing), rows), squeeze)
+
+
+def _rsi(rows: np.ndarray, period: int, smoothing: str) -> np.ndarray:
+    out = np.full_like(rows, np.nan)
+    if rows.shape[1] <= period:
+        return out
+
+    d = np.diff(rows, axis=1, prepend=rows[:, :1])
+    gain = np.where(d > 0, d, 0.0)
+    loss = np.where(d < 0, -d, 0.0)
+    if smoothing == 'wilder':
+        ag = np.full_like(rows, np.nan); al = np.full_like(rows, np.nan)
+        ag[:, 1:] = wilder(gain[:, 1:], period)
+        al[:, 1:] = wilder(loss[:, 1:], period)
+    elif smoothing == 'ema':
+        ag = ema(gain, period); al = ema(loss, period)
+    else:
+        raise ValueError(f"Unknown RSI smoothing: {smoothing}")
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        out = 100.0 - 100.0 / (1.0 + ag / al)
+    # tanpa loss sama sekali -> RSI 100
+    return np.where((al == 0) & np.isfinite(ag), 100.0, out)
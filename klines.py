@@ -0,0 +1,197 @@
+"""
+Bulk decoding of Binance /api/v3/klines responses.
+
+Response klines adalah array JSON baris [open time, "open", "high", "low",
+"close", "volume", close time, "quote volume", trades, ...] dengan harga
+sebagai string. Jalur lama (json.loads lalu int()/float() per field ke enam
+list) membuat objek Python untuk setiap field dan mengonversinya satu per
+satu. decode() mengubah body mentah langsung menjadi kolom bertipe:
+
+  numba   satu kernel memindai byte body sekali dan mem-parse field 0-6
+          setiap baris (angka / string angka) ke float64 (lihat jit.py);
+          field sesudahnya (quote volume, trades, ...) hanya dilewati. Token
+          yang mantissa-nya melebihi presisi float64 diparse ulang dengan
+          float() supaya hasil identik dengan jalur lama
+  lainnya orjson (jika terpasang, selain itu json) lalu konversi per kolom
+          oleh numpy
+
+Body yang bukan array baris angka yang seragam (mis. pesan error
+{"code": ..., "msg": ...}) selalu lewat parser JSON, yang memunculkan
+ValueError berisi payload-nya.
+"""
+
+import json
+import logging
+import time
+from typing import Optional, Tuple
+
+import numpy as np
+
+import jit
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+except ImportError:  # orjson opsional, json bawaan sebagai fallback
+    orjson = None
+
+# (timestamps int64, opens, highs, lows, closes, volumes float64)
+Columns = Tuple[np.ndarray, ...]
+
+_OPEN_TIME, _CLOSE_TIME = 0, 6
+_MIN_FIELDS = 7
+_POW10 = np.array([10.0 ** k for k in range(23)])     # 10^k persis di float64 sampai k = 22
+_POW10_INT = np.array([10 ** k for k in range(19)], dtype=np.int64)
+
+
+def _scan_sample():
+    return (np.frombuffer(b'[[1,"2.5","3","1.25","2","10.0",59,"0",1,"0","0","0"]]', dtype=np.uint8),)
+
+
+@jit.kernel(_scan_sample)
+def _scan(buf):
+    """
+    Parse field 0..6 setiap baris body array-of-rows ke satu array datar
+    (_MIN_FIELDS nilai per baris); field sesudahnya hanya dilewati.
+    Kembalikan (nilai, posisi + byte awal/akhir token yang harus diparse
+    ulang dengan float(), jumlah field per baris, ok); ok False jika ada byte
+    di luar angka / tanda baca JSON atau panjang baris tidak seragam.
+    """
+    n = buf.shape[0]
+    vals = np.empty(n // 2 + 1, dtype=np.float64)
+    slow = np.empty((n // 2 + 1, 3), dtype=np.int64)
+    count = 0
+    n_slow = 0
+    depth = 0
+    row_fields = 0
+    row_len = -1
+    i = 0
+    while i < n:
+        ch = buf[i]
+        if ch == 44 or ch == 34 or ch == 32 or ch == 9 or ch == 10 or ch == 13:   # , " whitespace
+            i += 1
+        elif ch == 45 or 48 <= ch <= 57:            # - / digit
+            if depth != 2:
+                return vals[:0], slow[:0], 0, False
+            if row_fields >= _MIN_FIELDS:
+                # field yang tidak dipakai: cukup lewati karakter angkanya
+                while i < n and (buf[i] == 101 or buf[i] == 69 or buf[i] == 43 or buf[i] == 45 or
+                                 buf[i] == 46 or 48 <= buf[i] <= 57):
+                    i += 1
+                row_fields += 1
+                continue
+            start = i
+            neg = ch == 45
+            if neg:
+                i += 1
+            mant = 0
+            digits = 0          # digit signifikan di mantissa
+            frac = 0            # digit di belakang koma yang sudah masuk mantissa
+            exact = True
+            while i < n:
+                d = np.int64(buf[i]) - 48
+                if d < 0 or d > 9:
+                    break
+                if digits < 18:
+                    mant = mant * 10 + d
+                    if mant:
+                        digits += 1
+                else:
+                    exact = False
+                i += 1
+            if i < n and buf[i] == 46:              # .
+                i += 1
+                zeros = 0       # nol di belakang koma yang belum masuk (nol di ujung dibuang)
+                while i < n:
+                    d = np.int64(buf[i]) - 48
+                    if d < 0 or d > 9:
+                        break
+                    if d == 0:
+                        zeros += 1
+                    elif digits + zeros >= 18:
+                        exact = False
+                    else:
+                        mant = mant * _POW10_INT[zeros + 1] + d
+                        frac += zeros + 1
+                        digits = digits + zeros + 1 if digits else 1
+                        zeros = 0
+                    i += 1
+            while i < n and (buf[i] == 101 or buf[i] == 69 or buf[i] == 43 or buf[i] == 45 or
+                             buf[i] == 46 or 48 <= buf[i] <= 57):     # eksponen dsb.
+                exact = False
+                i += 1
+            if exact and mant < 9007199254740992 and frac <= 22:
+                v = mant / _POW10[frac]
+                vals[count] = -v if neg else v
+            else:
+                vals[count] = np.nan
+                slow[n_slow, 0] = count
+                slow[n_slow, 1] = start
+                slow[n_slow, 2] = i
+                n_slow += 1
+            count += 1
+            row_fields += 1
+        elif ch == 91:                              # [
+            depth += 1
+            if depth > 2:
+                return vals[:0], slow[:0], 0, False
+            row_fields = 0
+            i += 1
+        elif ch == 93:                              # ]
+            if depth == 2:
+                if row_len < 0:
+                    row_len = row_fields
+                elif row_fields != row_len:
+                    return vals[:0], slow[:0], 0, False
+            depth -= 1
+            i += 1
+        else:
+            return vals[:0], slow[:0], 0, False
+    if depth != 0 or row_len < 0:
+        return vals[:0], slow[:0], 0, False
+    return vals[:count], slow[:n_slow], row_len, True
+
+
+def loads(body):
+    """Parse JSON dengan orjson jika tersedia"""
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(body)
+
+
+def _from_rows(data, now_ms: int) -> Columns:
+    if not isinstance(data, list):
+        raise ValueError(f"Unexpected klines payload: {str(data)[:200]}")
+    if not data:
+        return _empty()
+    cols = list(zip(*data))
+    if len(cols) < _MIN_FIELDS:
+        raise ValueError(f"Kline rows have {len(cols)} fields, expected at least {_MIN_FIELDS}")
+    closed = np.array(cols[_CLOSE_TIME], dtype=np.int64) < now_ms
+    return (np.array(cols[_OPEN_TIME], dtype=np.int64)[closed],) + tuple(
+        np.array(cols[i], dtype=np.float64)[closed] for i in range(1, 6))
+
+
+def _empty() -> Columns:
+    return (np.empty(0, dtype=np.int64),) + tuple(np.empty(0, dtype=np.float64) for _ in range(5))
+
+
+def decode(body, now_ms: Optional[int] = None) -> Columns:
+    """
+    Body response klines (bytes / str) -> (timestamps, opens, highs, lows,
+    closes, volumes), hanya candle yang sudah tertutup (close time < now_ms).
+    """
+    now_ms = int(time.time() * 1000) if now_ms is None else int(now_ms)
+    raw = body.encode() if isinstance(body, str) else bytes(body)
+    if _scan.compiled:
+        vals, slow, row_len, ok = _scan(np.frombuffer(raw, dtype=np.uint8))
+        if ok and row_len >= _MIN_FIELDS and len(vals) % _MIN_FIELDS == 0:
+            # token di luar presisi fast path: parse persis seperti float()
+            for pos, start, end in slow.tolist():
+                vals[pos] = float(raw[start:end])
+            rows = vals.reshape(-1, _MIN_FIELDS)
+            rows = rows[rows[:, _CLOSE_TIME] < now_ms]
+            return (rows[:, _OPEN_TIME].astype(np.int64),) + tuple(
+                np.ascontiguousarray(rows[:, i]) for i in range(1, 6))
+    return _from_rows(loads(raw), now_ms)
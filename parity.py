@@ -0,0 +1,103 @@
+"""
+Parity report for reduced-precision OHLCV storage.
+
+Menjalankan graf detektor dua kali atas deret yang sama: float64 asli dan
+versi yang di-roundtrip lewat dtype penyimpanan (CPD_STORAGE_DTYPE, mis.
+float32), lalu membandingkan output per detektor: pola yang hilang / muncul
+dan selisih relatif terbesar entry/target/stop/confidence pada pola yang sama.
+Dipakai bot sekali saat startup atas sampel history REST jika penyimpanan
+bukan float64, untuk melihat detektor mana yang sensitif terhadap presisi.
+"""
+
+import logging
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List
+
+import numpy as np
+
+import pipeline
+from indicators import IndicatorBundle
+from pattern_detector import UltraPatternDetector, UltraPatternResult
+
+logger = logging.getLogger(__name__)
+
+_FIELDS = ('entry_price', 'target_price', 'stop_loss', 'confidence')
+
+
+@dataclass
+class NodeParity:
+    detector: str
+    reference: int                                  # jumlah pola dari deret float64
+    candidate: int                                  # jumlah pola dari deret dtype penyimpanan
+    missing: List[str] = field(default_factory=list)    # hanya muncul di float64
+    extra: List[str] = field(default_factory=list)      # hanya muncul di dtype penyimpanan
+    max_rel_diff: float = 0.0
+    tol: float = 1e-4
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.missing or self.extra or self.max_rel_diff > self.tol)
+
+
+def roundtrip(values, dtype) -> np.ndarray:
+    """Deret seperti yang akan dibaca kembali dari penyimpanan `dtype`, sebagai float64"""
+    return np.asarray(values, dtype=np.float64).astype(dtype).astype(np.float64)
+
+
+def _rel(a: float, b: float) -> float:
+    if not (np.isfinite(a) and np.isfinite(b)):
+        return 0.0 if (np.isnan(a) and np.isnan(b)) or a == b else float('inf')
+    return abs(a - b) / max(abs(a), abs(b), 1e-12)
+
+
+def _compare(method: str, ref: List[UltraPatternResult], cand: List[UltraPatternResult], tol: float) -> NodeParity:
+    ref_names, cand_names = Counter(p.name for p in ref), Counter(p.name for p in cand)
+    report = NodeParity(method, len(ref), len(cand), tol=tol)
+    report.missing = sorted((ref_names - cand_names).elements())
+    report.extra = sorted((cand_names - ref_names).elements())
+    # pasangkan pola bernama sama sesuai urutan kemunculan
+    by_name: Dict[str, List[UltraPatternResult]] = {}
+    for p in cand:
+        by_name.setdefault(p.name, []).append(p)
+    for p in ref:
+        bucket = by_name.get(p.name)
+        if not bucket:
+            continue
+        q = bucket.pop(0)
+        for attr in _FIELDS:
+            report.max_rel_diff = max(report.max_rel_diff,
+                                      _rel(float(getattr(p, attr)), float(getattr(q, attr))))
+    return report
+
+
+def parity_report(detector: UltraPatternDetector, opens, highs, lows, closes, volumes,
+                  current_price: float, timeframe: str, dtype=np.float32,
+                  tol: float = 1e-4) -> List[NodeParity]:
+    """Perbandingan output per detektor antara deret float64 dan deret hasil roundtrip `dtype`"""
+    ref_cols = [np.asarray(x, dtype=np.float64) for x in (opens, highs, lows, closes, volumes)]
+    cand_cols = [roundtrip(x, dtype) for x in ref_cols]
+    cand_price = float(roundtrip([current_price], dtype)[0])
+
+    outputs = []
+    for cols, price in ((ref_cols, float(current_price)), (cand_cols, cand_price)):
+        bundle = IndicatorBundle(*cols)
+        series = dict(zip('ohlcv', (bundle.series(k) for k in IndicatorBundle.SOURCES)))
+        outputs.append(pipeline.run_nodes(detector, series, price, timeframe, indicators=bundle))
+    ref, cand = outputs
+    return [_compare(method, ref[method], cand[method], tol) for method in ref]
+
+
+def parity_summary(reports: Iterable[List[NodeParity]]) -> Dict[str, str]:
+    """Per detektor: berapa deret yang outputnya berubah dari yang diperiksa"""
+    checked: Dict[str, int] = {}
+    changed: Dict[str, int] = {}
+    worst: Dict[str, float] = {}
+    for report in reports:
+        for node in report:
+            label = node.detector.replace('_patterns_stable', '').replace('_detect_', '').lstrip('_')
+            checked[label] = checked.get(label, 0) + 1
+            changed[label] = changed.get(label, 0) + int(node.changed)
+            worst[label] = max(worst.get(label, 0.0), node.max_rel_diff)
+    return {label: f"{changed[label]}/{checked[label]} changed (max rel diff {worst[label]:.2e})"
+            for label in checked}
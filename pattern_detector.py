@@ -5,6 +5,16 @@ from typing import List, Dict, Optional, Tuple
 from dataclasses import dataclass
 import logging
 
+import kernels
+from indicators import ensure_bundle
+from rolling import rolling_mean, rolling_sum, rolling_wma
+from geometry import channel, converging, fit_bars, line_through, pivot_line
+from detector_helpers import (
+    atr_stop, crossed_above, crossed_below, last_close_above, last_close_below, linreg_slope, near,
+    rough_poc, swing_high, swing_low, vol_climax, vol_dryup, vol_spike, volume_contract, volume_surge,
+)
+from pivots import alternating_swings, find_pivots, in_window
+
 logger = logging.getLogger(__name__)
 
 @dataclass
@@ -576,11 +586,24 @@ class UltraPatternDetector:
             }
         }
     
+    # ---------- shared context helpers (dulu closure di tiap detektor) ----------
+    def _pattern_meta(self, category: str, name: str, success_rate: float = 75.0,
+                      reliability: float = 0.75, avg_gain: float = 15.0) -> Tuple[float, float, float]:
+        """(success_rate, reliability, avg_gain) pola dari ultra_patterns, dengan default per kategori"""
+        meta = self.ultra_patterns.get(category, {}).get('patterns', {}).get(name, {})
+        return (float(meta.get('success_rate', success_rate)),
+                float(meta.get('reliability', reliability)),
+                float(meta.get('avg_gain', avg_gain)))
+
+    def _min_target_ok(self, target: float, price: float) -> bool:
+        target_pct = abs((target - price) / max(price, 1e-12)) * 100.0
+        return target_pct >= self.ultra_config.get('min_target_percentage', 3.0)
+
     # PLACE ALL YOUR PATTERN DETECTION METHODS HERE
     # Copy all your _detect_*_patterns_stable methods from the original script
     
     # For example:
-    def _detect_perfect_patterns_stable(self, opens, highs, lows, closes, volumes, current_price, tf) -> List[UltraPatternResult]:
+    def _detect_perfect_patterns_stable(self, opens, highs, lows, closes, volumes, current_price, tf, indicators=None) -> List[UltraPatternResult]:
         """STABLE perfect patterns detection - ALL 8 IMPLEMENTED
         Seluruh helper, perhitungan, dan logika berada di dalam fungsi ini."""
         patterns: List[UltraPatternResult] = []
@@ -593,105 +616,22 @@ class UltraPatternDetector:
             n = len(c)
             if n < 30:
                 return patterns
+            ind = ensure_bundle(indicators, opens, h, l, c, v)
 
             # ======================= Helpers (semua di dalam fungsi) =======================
             def _percent_diff(a, b):
                 base = max(1e-12, abs(b))
                 return abs(a - b) / base
 
-            def _ema(arr, period):
-                a = np.asarray(arr, dtype=float)
-                if len(a) == 0:
-                    return a
-                alpha = 2.0 / (period + 1)
-                ema = np.empty_like(a)
-                ema[:] = np.nan
-                ema = a
-                for i in range(1, len(a)):
-                    ema[i] = alpha * a[i] + (1 - alpha) * ema[i-1]
-                return ema
-
-            def _atr(highs_, lows_, closes_, period=14):
-                H = np.asarray(highs_, dtype=float)
-                L = np.asarray(lows_, dtype=float)
-                C = np.asarray(closes_, dtype=float)
-                tr = np.empty_like(H)
-                tr = H - L
-                for i in range(1, len(H)):
-                    tr[i] = max(H[i] - L[i], abs(H[i] - C[i-1]), abs(L[i] - C[i-1]))
-                atr_ = np.empty_like(tr)
-                atr_[:] = np.nan
-                if len(tr) >= period:
-                    atr_[period-1] = np.mean(tr[:period])
-                    for i in range(period, len(tr)):
-                        atr_[i] = (atr_[i-1] * (period - 1) + tr[i]) / period
-                return atr_
-
-            def _rolling_mean(arr, period):
-                a = np.asarray(arr, dtype=float)
-                out = np.full_like(a, np.nan)
-                if period <= 0:
-                    return out
-                for i in range(len(a)):
-                    if i + 1 >= period:
-                        out[i] = np.mean(a[i-period+1:i+1])
-                return out
-
-            def _find_swings(arr, left=3, right=3, kind='high', min_distance=5, prominence_tol=0.005):
-                a = np.asarray(arr, dtype=float)
-                n_ = len(a)
-                idxs = []
-                for i in range(left, n_ - right):
-                    win = a[i-left:i+right+1]
-                    if kind == 'high':
-                        if a[i] == np.max(win):
-                            if prominence_tol is not None:
-                                left_max = np.max(a[max(0, i-left):i]) if left > 0 else a[i]
-                                right_max = np.max(a[i+1:i+1+right]) if right > 0 else a[i]
-                                prom = a[i] - max(left_max, right_max)
-                                base = max(1e-12, max(left_max, right_max))
-                                if prom / base < prominence_tol:
-                                    continue
-                            idxs.append(i)
-                    else:
-                        if a[i] == np.min(win):
-                            if prominence_tol is not None:
-                                left_min = np.min(a[max(0, i-left):i]) if left > 0 else a[i]
-                                right_min = np.min(a[i+1:i+1+right]) if right > 0 else a[i]
-                                prom = min(left_min, right_min) - a[i]
-                                base = max(1e-12, min(left_min, right_min))
-                                if prom / base < prominence_tol:
-                                    continue
-                            idxs.append(i)
-                # enforce min_distance & keep most extreme in cluster
-                dedup = []
-                last = -10**9
-                for i in idxs:
-                    if i - last >= min_distance:
-                        dedup.append(i)
-                        last = i
-                    else:
-                        if dedup:
-                            j = dedup[-1]
-                            if kind == 'high':
-                                if a[i] > a[j]:
-                                    dedup[-1] = i
-                                    last = i
-                            else:
-                                if a[i] < a[j]:
-                                    dedup[-1] = i
-                                    last = i
-                return dedup
-
-            def _is_uptrend(closes_, fast=50, slow=200):
-                ef = _ema(closes_, fast)
-                es = _ema(closes_, slow)
+            def _is_uptrend(fast=50, slow=200):
+                ef = ind.ema(fast)
+                es = ind.ema(slow)
                 if np.isnan(ef[-1]) or np.isnan(es[-1]): return False
                 return ef[-1] > es[-1]
 
-            def _is_downtrend(closes_, fast=50, slow=200):
-                ef = _ema(closes_, fast)
-                es = _ema(closes_, slow)
+            def _is_downtrend(fast=50, slow=200):
+                ef = ind.ema(fast)
+                es = ind.ema(slow)
                 if np.isnan(ef[-1]) or np.isnan(es[-1]): return False
                 return ef[-1] < es[-1]
 
@@ -708,22 +648,16 @@ class UltraPatternDetector:
                 else:
                     return np.all(c_[-k:] < lvl[-k:])
 
-            def _volume_confirmation(volumes_, ma_period=20, multiplier=1.35):
-                v_ = np.asarray(volumes_, dtype=float)
-                vma = _rolling_mean(v_, ma_period)
+            def _volume_confirmation(ma_period=20, multiplier=1.35):
+                vma = ind.sma(ma_period, 'volume')
                 if np.isnan(vma[-1]): return False
-                return v_[-1] >= multiplier * vma[-1]
-
-            def _line_value_at(x, x1, y1, x2, y2):
-                if x2 == x1: return y1
-                m = (y2 - y1) / (x2 - x1)
-                return y1 + m * (x - x1)
+                return v[-1] >= multiplier * vma[-1]
 
             def _pattern_name(base: str, direction: str) -> str:
                 return f"{base}_{direction.upper()}"
 
             # Risk engine (ATR)
-            atr = _atr(h, l, c, period=14)
+            atr = ind.atr(14)
 
             def atr_stop(entry, side, mult=2.0, struct_level=None):
                 a = atr[-1]
@@ -738,12 +672,12 @@ class UltraPatternDetector:
                 return raw
 
             # Swing indices
-            peak_idx = _find_swings(h, left=3, right=3, kind='high', min_distance=5, prominence_tol=0.005)
-            trough_idx = _find_swings(l, left=3, right=3, kind='low',  min_distance=5, prominence_tol=0.005)
+            peak_idx = ind.pivots('high', 3, 3, prominence=0.005, min_distance=5).tolist()
+            trough_idx = ind.pivots('low', 3, 3, prominence=0.005, min_distance=5).tolist()
 
             # ======================= 1) PERFECT_HEAD_SHOULDERS (BEARISH) =======================
             try:
-                if len(peak_idx) >= 3 and _is_uptrend(c):
+                if len(peak_idx) >= 3 and _is_uptrend():
                     i1, i2, i3 = peak_idx[-3], peak_idx[-2], peak_idx[-1]
                     left_s = (i1, h[i1]); head = (i2, h[i2]); right_s = (i3, h[i3])
                     shoulders_close = _percent_diff(left_s[21], right_s[21]) <= 0.05
@@ -752,12 +686,13 @@ class UltraPatternDetector:
                     left_tr = [t for t in trough_idx if left_s < t < head]
                     right_tr = [t for t in trough_idx if head < t < right_s]
                     if left_tr and right_tr and shoulders_close and head_above and ordered:
-                        lt, rt = left_tr[-1], right_tr
-                        neckline_series = np.array([_line_value_at(x, lt, l[lt], rt, l[rt]) for x in range(n)])
-                        has_break = _confirm_breakout_close(c, neckline_series, direction='down', min_closes=1)
-                        vol_ok = _volume_confirmation(v, ma_period=20, multiplier=1.35)
+                        lt, rt = left_tr[-1], right_tr[0]
+                        # neckline cukup dievaluasi di bar konfirmasi, bukan sepanjang n bar
+                        neck_tail = line_through(lt, l[lt], rt, l[rt]).at(np.arange(n - 1, n))
+                        has_break = _confirm_breakout_close(c, neck_tail, direction='down', min_closes=1)
+                        vol_ok = _volume_confirmation(ma_period=20, multiplier=1.35)
                         if has_break and vol_ok:
-                            neck_now = neckline_series[-1]
+                            neck_now = float(neck_tail[-1])
                             height = head[21] - neck_now
                             target_price = neck_now - height
                             target_pct = abs((target_price - current_price) / current_price) * 100.0
@@ -779,7 +714,7 @@ class UltraPatternDetector:
 
             # ======================= 2) PERFECT_DOUBLE_BOTTOM (BULLISH) =======================
             try:
-                if len(trough_idx) >= 2 and _is_downtrend(c):
+                if len(trough_idx) >= 2 and _is_downtrend():
                     b1_i, b2_i = trough_idx[-2], trough_idx[-1]
                     b1, b2 = (b1_i, l[b1_i]), (b2_i, l[b2_i])
                     similar = _percent_diff(b1[21], b2[21]) <= 0.04
@@ -787,7 +722,7 @@ class UltraPatternDetector:
                     if similar and spaced and b2 > b1:
                         neckline = np.max(h[b1:b2+1])
                         has_break = _confirm_breakout_close(c, neckline, direction='up', min_closes=1)
-                        vol_ok = _volume_confirmation(v, ma_period=20, multiplier=1.3)
+                        vol_ok = _volume_confirmation(ma_period=20, multiplier=1.3)
                         if has_break and vol_ok:
                             base = min(b1[21], b2[21])
                             height = neckline - base
@@ -811,7 +746,7 @@ class UltraPatternDetector:
 
             # ======================= 3) PERFECT_TRIPLE_BOTTOM (BULLISH) =======================
             try:
-                if len(trough_idx) >= 3 and _is_downtrend(c):
+                if len(trough_idx) >= 3 and _is_downtrend():
                     b1_i, b2_i, b3_i = trough_idx[-3], trough_idx[-2], trough_idx[-1]
                     b1, b2, b3 = (b1_i, l[b1_i]), (b2_i, l[b2_i]), (b3_i, l[b3_i])
                     tol = 0.05
@@ -820,7 +755,7 @@ class UltraPatternDetector:
                     if similar and ordered:
                         neckline = np.max(h[b1:b3+1])
                         has_break = _confirm_breakout_close(c, neckline, direction='up', min_closes=1)
-                        vol_ok = _volume_confirmation(v, ma_period=20, multiplier=1.3)
+                        vol_ok = _volume_confirmation(ma_period=20, multiplier=1.3)
                         if has_break and vol_ok:
                             base = min(b1[21], b2[21], b3[21])
                             height = neckline - base
@@ -844,7 +779,7 @@ class UltraPatternDetector:
 
             # ======================= 4) PERFECT_INV_H_S (BULLISH) =======================
             try:
-                if len(trough_idx) >= 3 and _is_downtrend(c):
+                if len(trough_idx) >= 3 and _is_downtrend():
                     i1, i2, i3 = trough_idx[-3], trough_idx[-2], trough_idx[-1]
                     left_s = (i1, l[i1]); head = (i2, l[i2]); right_s = (i3, l[i3])
                     shoulders_close = _percent_diff(left_s[21], right_s[21]) <= 0.05
@@ -853,12 +788,12 @@ class UltraPatternDetector:
                     left_peaks  = [p for p in peak_idx if left_s < p < head]
                     right_peaks = [p for p in peak_idx if head < p < right_s]
                     if left_peaks and right_peaks and shoulders_close and head_below and ordered:
-                        lp, rp = left_peaks[-1], right_peaks
-                        neckline_series = np.array([_line_value_at(x, lp, h[lp], rp, h[rp]) for x in range(n)])
-                        has_break = _confirm_breakout_close(c, neckline_series, direction='up', min_closes=1)
-                        vol_ok = _volume_confirmation(v, ma_period=20, multiplier=1.35)
+                        lp, rp = left_peaks[-1], right_peaks[0]
+                        neck_tail = line_through(lp, h[lp], rp, h[rp]).at(np.arange(n - 1, n))
+                        has_break = _confirm_breakout_close(c, neck_tail, direction='up', min_closes=1)
+                        vol_ok = _volume_confirmation(ma_period=20, multiplier=1.35)
                         if has_break and vol_ok:
-                            neck_now = neckline_series[-1]
+                            neck_now = float(neck_tail[-1])
                             height = neck_now - head[21]
                             target_price = neck_now + height
                             target_pct = ((target_price - current_price) / current_price) * 100.0
@@ -894,7 +829,7 @@ class UltraPatternDetector:
                         handle_depth = (handle_high - handle_low) / max(1e-12, handle_high)
                         if handle_depth <= cup_depth * 0.5:
                             has_break = _confirm_breakout_close(c, handle_high, direction='up', min_closes=1)
-                            vol_ok = _volume_confirmation(v, ma_period=20, multiplier=1.35)
+                            vol_ok = _volume_confirmation(ma_period=20, multiplier=1.35)
                             if has_break and vol_ok:
                                 cup_rim = max(cup_high_left, cup_high_right)
                                 target_price = cup_rim + (cup_rim - cup_low)
@@ -928,7 +863,7 @@ class UltraPatternDetector:
                     if res_touches >= 3 and sup_touches >= 3:
                         height = resistance_level - support_level
                         # Bullish breakout
-                        bull_break = _confirm_breakout_close(c, resistance_level, direction='up', min_closes=1) and _volume_confirmation(v, 20, 1.3)
+                        bull_break = _confirm_breakout_close(c, resistance_level, direction='up', min_closes=1) and _volume_confirmation(20, 1.3)
                         if bull_break:
                             target_price = resistance_level + height
                             target_pct = ((target_price - current_price) / current_price) * 100.0
@@ -946,7 +881,7 @@ class UltraPatternDetector:
                                     fibonacci_confluence=True, smart_money_flow=86.0
                                 ))
                         # Bearish breakout
-                        bear_break = _confirm_breakout_close(c, support_level, direction='down', min_closes=1) and _volume_confirmation(v, 20, 1.3)
+                        bear_break = _confirm_breakout_close(c, support_level, direction='down', min_closes=1) and _volume_confirmation(20, 1.3)
                         if bear_break:
                             target_price = support_level - height
                             target_pct = abs((target_price - current_price) / current_price) * 100.0
@@ -972,19 +907,13 @@ class UltraPatternDetector:
                     window = 20
                     rh = h[-window:]; rl = l[-window:]
                     resistance_level = np.max(rh)
-                    troughs_local = [i for i in range(window) if rl[i] == np.min(rl[max(0, i-2):i+3])]
+                    troughs_local = find_pivots(rl, 2, 2, 'low', edges=True).tolist()
                     if len(troughs_local) >= 3:
-                        asc = all(rl[troughs_local[i]] <= rl[troughs_local[i+1]] for i in range(len(troughs_local)-1))
-                        if asc:
+                        sup_line = pivot_line(troughs_local, rl)
+                        if sup_line.slope >= 0 and sup_line.error <= 0.02:
                             # measured move: tinggi segitiga (resistance - support trendline) diproyeksikan dari breakout
-                            t1, t2 = troughs_local, troughs_local[-1]
-                            def support_line_at(j):
-                                x1, y1 = t1, rl[t1]; x2, y2 = t2, rl[t2]
-                                if x2 == x1: return y1
-                                m = (y2 - y1) / (x2 - x1)
-                                return y1 + m * (j - x1)
-                            height = max(0.0, resistance_level - support_line_at(window-1))
-                            bull_break = _confirm_breakout_close(c, resistance_level, direction='up', min_closes=1) and _volume_confirmation(v, 20, 1.3)
+                            height = max(0.0, resistance_level - sup_line.at(window-1))
+                            bull_break = _confirm_breakout_close(c, resistance_level, direction='up', min_closes=1) and _volume_confirmation(20, 1.3)
                             if bull_break:
                                 target_price = resistance_level + height
                                 target_pct = ((target_price - current_price) / current_price) * 100.0
@@ -1010,18 +939,12 @@ class UltraPatternDetector:
                     window = 20
                     rh = h[-window:]; rl = l[-window:]
                     support_level = np.min(rl)
-                    peaks_local = [i for i in range(window) if rh[i] == np.max(rh[max(0, i-2):i+3])]
+                    peaks_local = find_pivots(rh, 2, 2, 'high', edges=True).tolist()
                     if len(peaks_local) >= 3:
-                        desc = all(rh[peaks_local[i]] >= rh[peaks_local[i+1]] for i in range(len(peaks_local)-1))
-                        if desc:
-                            p1, p2 = peaks_local, peaks_local[-1]
-                            def resistance_line_at(j):
-                                x1, y1 = p1, rh[p1]; x2, y2 = p2, rh[p2]
-                                if x2 == x1: return y1
-                                m = (y2 - y1) / (x2 - x1)
-                                return y1 + m * (j - x1)
-                            height = max(0.0, resistance_line_at(window-1) - support_level)
-                            bear_break = _confirm_breakout_close(c, support_level, direction='down', min_closes=1) and _volume_confirmation(v, 20, 1.3)
+                        res_line = pivot_line(peaks_local, rh)
+                        if res_line.slope <= 0 and res_line.error <= 0.02:
+                            height = max(0.0, res_line.at(window-1) - support_level)
+                            bear_break = _confirm_breakout_close(c, support_level, direction='down', min_closes=1) and _volume_confirmation(20, 1.3)
                             if bear_break:
                                 target_price = support_level - height
                                 target_pct = abs((target_price - current_price) / current_price) * 100.0
@@ -1045,7 +968,7 @@ class UltraPatternDetector:
             logger.debug(f"Perfect pattern detection error: {e}")
 
         return patterns
-    def _most_perfect_patterns_stable(self, opens, highs, lows, closes, volumes, current_price, tf) -> List[UltraPatternResult]:
+    def _most_perfect_patterns_stable(self, opens, highs, lows, closes, volumes, current_price, tf, indicators=None) -> List[UltraPatternResult]:
         """TIER_SSS Ultra Elite patterns detection - enhanced stability, volume+ATR confirmed, bullish/bearish naming"""
         patterns = []
         try:
@@ -1064,34 +987,7 @@ class UltraPatternDetector:
             n = len(closes_arr)
             if n < 30:
                 return patterns
-
-            def sma(x, p):
-                if len(x) < p:
-                    return np.full_like(x, np.nan)
-                w = np.ones(p)/p
-                out = np.convolve(x, w, mode='full')[:len(x)]
-                out[:p-1] = np.nan
-                return out
-
-            def atr(highs, lows, closes, period=14):
-                h = _np(highs); l = _np(lows); c = _np(closes)
-                prev_c = np.concatenate([[c], c[:-1]])
-                tr = np.maximum(h - l, np.maximum(np.abs(h - prev_c), np.abs(l - prev_c)))
-                atr_arr = sma(tr, period)
-                return atr_arr
-
-            def linreg_slope(y, window=20):
-                if len(y) < window:
-                    return 0.0
-                x = np.arange(window)
-                yy = y[-window:]
-                x_mean = x.mean()
-                y_mean = np.nanmean(yy)
-                denom = ((x - x_mean)**2).sum()
-                if denom == 0 or np.isnan(y_mean):
-                    return 0.0
-                num = ((x - x_mean) * (yy - y_mean)).sum()
-                return float(num / denom)
+            ind = ensure_bundle(indicators, opens_arr, highs_arr, lows_arr, closes_arr, vols_arr)
 
             def pct_diff(a, b):
                 m = 0.5 * (abs(a) + abs(b))
@@ -1102,65 +998,23 @@ class UltraPatternDetector:
             def equal_within(a, b, tol=0.03):
                 return pct_diff(a, b) <= tol
 
-            def last_close_above(level, k=1, margin=0.002):
-                if n < k:
-                    return False
-                sub = closes_arr[-k:]
-                return np.all(sub >= level * (1 + margin))
-
-            def last_close_below(level, k=1, margin=0.002):
-                if n < k:
-                    return False
-                sub = closes_arr[-k:]
-                return np.all(sub <= level * (1 - margin))
-
-            def volume_surge(factor=1.5, lookback=30):
-                if n < lookback + 1:
-                    return False
-                base = vols_arr[-(lookback+1):-1]
-                if np.isnan(base).any():
-                    return False
-                return vols_arr[-1] >= factor * (base.mean())
-
-            def volume_contract(lookback=30):
-                # approximate contraction: recent stdev < prior stdev
-                if n < lookback * 2:
-                    return False
-                recent = vols_arr[-lookback:]
-                prior = vols_arr[-2*lookback:-lookback]
-                r_std = np.nanstd(recent)
-                p_std = np.nanstd(prior)
-                return r_std < p_std
-
             def count_touches(series, level, tol=0.01):
                 s = _np(series)
                 return int(np.sum(np.abs(s - level) / np.maximum(level, 1e-12) <= tol))
 
             def recent_trend_is_up():
                 # up if 50-sma rising and slope positive
-                ma = sma(closes_arr, 50)
+                ma = ind.sma(50)
                 if np.isnan(ma[-2]) or np.isnan(ma[-1]):
                     return False
                 return ma[-1] > ma[-2] and linreg_slope(closes_arr, 40) > 0
 
             def recent_trend_is_down():
-                ma = sma(closes_arr, 50)
+                ma = ind.sma(50)
                 if np.isnan(ma[-2]) or np.isnan(ma[-1]):
                     return False
                 return ma[-1] < ma[-2] and linreg_slope(closes_arr, 40) < 0
 
-            def rsi(series, period=14):
-                s = _np(series)
-                if len(s) < period + 1:
-                    return np.full_like(s, np.nan)
-                delta = np.diff(s, prepend=s)
-                gain = np.where(delta > 0, delta, 0.0)
-                loss = np.where(delta < 0, -delta, 0.0)
-                avg_gain = sma(gain, period)
-                avg_loss = sma(loss, period)
-                rs = np.where(avg_loss == 0, np.nan, avg_gain / avg_loss)
-                return 100 - (100 / (1 + rs))
-
             def fib_confluence(level, swing_high, swing_low, tol=0.01):
                 if swing_high <= swing_low:
                     return False
@@ -1175,16 +1029,10 @@ class UltraPatternDetector:
                 return (to_level + dist) if direction_up else (to_level - dist)
 
             # precompute indicators
-            atr_arr = atr(highs_arr, lows_arr, closes_arr, period=14)
+            atr_arr = ind.atr(14, method='sma')
             curr_atr = float(atr_arr[-1]) if not np.isnan(atr_arr[-1]) else max(1e-6, np.nanmean(atr_arr[-20:]))
             avg_vol = float(np.nanmean(vols_arr[-30:])) if n >= 30 else float(np.nanmean(vols_arr))
-            rsi_arr = rsi(closes_arr, 14)
-
-            def atr_stop(entry, direction_up=True, mult=2.5):
-                if direction_up:
-                    return entry - mult * curr_atr
-                else:
-                    return entry + mult * curr_atr
+            rsi_arr = ind.rsi(14, method='sma')
 
             def add_pattern(name_base, success_rate, entry_price, target_price, stop_loss, tf, bullish, volume_ok, ms_score, conf=None, sig=None, fib_ok=False, smf=80.0):
                 name = f"{name_base}_{'BULLISH' if bullish else 'BEARISH'}"
@@ -1207,10 +1055,6 @@ class UltraPatternDetector:
                     smart_money_flow=float(smf),
                 ))
 
-            def min_target_ok(tp, cp):
-                target_pct = abs((tp - cp) / max(cp, 1e-12)) * 100.0
-                return target_pct >= self.ultra_config.get('min_target_percentage', 3.0)
-
             # -------- 1) Head & Shoulders (bearish) --------
             # Uptrend precondition, shoulders ~ equal, head higher, confirm close below neckline + volume surge.
             if n >= 60:
@@ -1221,7 +1065,7 @@ class UltraPatternDetector:
                         H = highs_arr[-w:]
                         L = lows_arr[-w:]
                         # coarse peaks: top-3 local maxima separated
-                        loc_peaks = [i for i in range(3, len(H)-3) if H[i] == max(H[i-3:i+4])]
+                        loc_peaks = in_window(ind.pivots('high'), n, w, 3, 3)
                         if len(loc_peaks) >= 3:
                             l_s, head, r_s = loc_peaks[-3], loc_peaks[-2], loc_peaks[-1]
                             head_ok = (H[head] > H[l_s] * 1.02) and (H[head] > H[r_s] * 1.02)
@@ -1234,13 +1078,13 @@ class UltraPatternDetector:
                                 nl = np.nanmin(L)
                             if head_ok and shoulder_sym and np.isfinite(nl):
                                 # confirmation: close below neckline with volume surge
-                                if last_close_below(nl, k=1, margin=0.0015) and volume_surge(factor=1.5, lookback=30):
+                                if last_close_below(closes_arr, nl, k=1, margin=0.0015) and volume_surge(vols_arr, factor=1.5, lookback=30):
                                     # target = neckline - 0.7*(head - neckline), ATR SL above right shoulder or ATR
                                     tgt = measured_move_target(H[head], nl, direction_up=False, ratio=0.7)
                                     ent = nl * 0.998
                                     sl = max(H[l_s], H[r_s]) * 1.01
-                                    sl = min(sl, atr_stop(ent, direction_up=False, mult=2.5))
-                                    if min_target_ok(tgt, current_price):
+                                    sl = min(sl, atr_stop(ent, curr_atr, long=False, mult=2.5))
+                                    if self._min_target_ok(tgt, current_price):
                                         fib_ok = fib_confluence(nl, swing_high=H[head], swing_low=min(L[left_arm:right_arm+1]), tol=0.02)
                                         add_pattern("HEAD_SHOULDERS", 92.0, ent, tgt, sl, tf, bullish=False,
                                                     volume_ok=True, ms_score=88.0, fib_ok=fib_ok, smf=85.0)
@@ -1254,7 +1098,7 @@ class UltraPatternDetector:
                         w = min(60, n)
                         H = highs_arr[-w:]
                         L = lows_arr[-w:]
-                        loc_troughs = [i for i in range(3, len(L)-3) if L[i] == min(L[i-3:i+4])]
+                        loc_troughs = in_window(ind.pivots('low'), n, w, 3, 3)
                         if len(loc_troughs) >= 3:
                             l_s, head, r_s = loc_troughs[-3], loc_troughs[-2], loc_troughs[-1]
                             head_ok = (L[head] < L[l_s] * 0.98) and (L[head] < L[r_s] * 0.98)
@@ -1265,12 +1109,12 @@ class UltraPatternDetector:
                             else:
                                 nl = np.nanmax(H)
                             if head_ok and shoulder_sym and np.isfinite(nl):
-                                if last_close_above(nl, k=1, margin=0.0015) and volume_surge(factor=1.5, lookback=30):
+                                if last_close_above(closes_arr, nl, k=1, margin=0.0015) and volume_surge(vols_arr, factor=1.5, lookback=30):
                                     tgt = measured_move_target(L[head], nl, direction_up=True, ratio=0.7)
                                     ent = nl * 1.002
                                     sl = L[head] * 0.99
-                                    sl = max(sl, atr_stop(ent, direction_up=True, mult=2.5))
-                                    if min_target_ok(tgt, current_price):
+                                    sl = max(sl, atr_stop(ent, curr_atr, long=True, mult=2.5))
+                                    if self._min_target_ok(tgt, current_price):
                                         fib_ok = fib_confluence(nl, swing_high=max(H[left_arm:right_arm+1]), swing_low=L[head], tol=0.02)
                                         add_pattern("INV_HEAD_SHOULDERS", 92.0, ent, tgt, sl, tf, bullish=True,
                                                     volume_ok=True, ms_score=88.0, fib_ok=fib_ok, smf=85.0)
@@ -1283,19 +1127,19 @@ class UltraPatternDetector:
                     w = min(80, n)
                     L = lows_arr[-w:]
                     H = highs_arr[-w:]
-                    troughs = [i for i in range(3, len(L)-3) if L[i] == min(L[i-3:i+4])]
+                    troughs = in_window(ind.pivots('low'), n, w, 3, 3)
                     if len(troughs) >= 2:
                         b1, b2 = troughs[-2], troughs[-1]
                         if equal_within(L[b1], L[b2], 0.05):
                             left = int(min(b1, b2)); right = int(max(b1, b2))
                             res = max(H[left:right+1]) if right - left >= 2 else np.nanmax(H)
-                            if np.isfinite(res) and last_close_above(res, k=1, margin=0.0015) and volume_surge(1.5, 30):
+                            if np.isfinite(res) and last_close_above(closes_arr, res, k=1, margin=0.0015) and volume_surge(vols_arr, 1.5, 30):
                                 height = res - (L[b1] + L[b2]) / 2.0
                                 tgt = res + 0.7 * height
                                 ent = res * 1.002
                                 sl = ((L[b1] + L[b2]) / 2.0) - 0.5 * curr_atr
-                                sl = max(sl, atr_stop(ent, direction_up=True, mult=2.0))
-                                if min_target_ok(tgt, current_price):
+                                sl = max(sl, atr_stop(ent, curr_atr, long=True, mult=2.0))
+                                if self._min_target_ok(tgt, current_price):
                                     fib_ok = fib_confluence(res, swing_high=res, swing_low=min(L[b1], L[b2]), tol=0.02)
                                     add_pattern("DOUBLE_BOTTOM", 91.0, ent, tgt, sl, tf, bullish=True,
                                                 volume_ok=True, ms_score=87.0, fib_ok=fib_ok, smf=84.0)
@@ -1308,20 +1152,20 @@ class UltraPatternDetector:
                     w = min(100, n)
                     L = lows_arr[-w:]
                     H = highs_arr[-w:]
-                    troughs = [i for i in range(3, len(L)-3) if L[i] == min(L[i-3:i+4])]
+                    troughs = in_window(ind.pivots('low'), n, w, 3, 3)
                     if len(troughs) >= 3:
                         b1, b2, b3 = troughs[-3], troughs[-2], troughs[-1]
                         if equal_within(L[b1], L[b2], 0.06) and equal_within(L[b2], L[b3], 0.06):
                             left = int(min(b1, b3)); right = int(max(b1, b3))
                             res = max(H[left:right+1]) if right - left >= 2 else np.nanmax(H)
-                            if np.isfinite(res) and last_close_above(res, 1, 0.0015) and volume_surge(1.5, 30):
+                            if np.isfinite(res) and last_close_above(closes_arr, res, 1, 0.0015) and volume_surge(vols_arr, 1.5, 30):
                                 base = (L[b1] + L[b2] + L[b3]) / 3.0
                                 height = res - base
                                 tgt = res + 0.75 * height
                                 ent = res * 1.002
                                 sl = base - 0.75 * curr_atr
-                                sl = max(sl, atr_stop(ent, True, 2.0))
-                                if min_target_ok(tgt, current_price):
+                                sl = max(sl, atr_stop(ent, curr_atr, True, 2.0))
+                                if self._min_target_ok(tgt, current_price):
                                     add_pattern("TRIPLE_BOTTOM", 90.0, ent, tgt, sl, tf, bullish=True,
                                                 volume_ok=True, ms_score=86.0, fib_ok=True, smf=83.0)
                 except Exception:
@@ -1332,19 +1176,19 @@ class UltraPatternDetector:
                 try:
                     w = min(80, n)
                     H = highs_arr[-w:]; L = lows_arr[-w:]
-                    peaks = [i for i in range(3, len(H)-3) if H[i] == max(H[i-3:i+4])]
+                    peaks = in_window(ind.pivots('high'), n, w, 3, 3)
                     if len(peaks) >= 2:
                         p1, p2 = peaks[-2], peaks[-1]
                         if equal_within(H[p1], H[p2], 0.05):
                             left = int(min(p1, p2)); right = int(max(p1, p2))
                             supp = min(L[left:right+1]) if right - left >= 2 else np.nanmin(L)
-                            if np.isfinite(supp) and last_close_below(supp, 1, 0.0015) and volume_surge(1.5, 30):
+                            if np.isfinite(supp) and last_close_below(closes_arr, supp, 1, 0.0015) and volume_surge(vols_arr, 1.5, 30):
                                 height = (H[p1] + H[p2]) / 2.0 - supp
                                 tgt = supp - 0.7 * height
                                 ent = supp * 0.998
                                 sl = max(H[p1], H[p2]) * 1.01
-                                sl = min(sl, atr_stop(ent, False, 2.0))
-                                if min_target_ok(tgt, current_price):
+                                sl = min(sl, atr_stop(ent, curr_atr, False, 2.0))
+                                if self._min_target_ok(tgt, current_price):
                                     add_pattern("DOUBLE_TOP", 88.0, ent, tgt, sl, tf, bullish=False,
                                                 volume_ok=True, ms_score=84.0, fib_ok=True, smf=81.0)
                 except Exception:
@@ -1355,19 +1199,19 @@ class UltraPatternDetector:
                 try:
                     w = min(100, n)
                     H = highs_arr[-w:]; L = lows_arr[-w:]
-                    peaks = [i for i in range(3, len(H)-3) if H[i] == max(H[i-3:i+4])]
+                    peaks = in_window(ind.pivots('high'), n, w, 3, 3)
                     if len(peaks) >= 3:
                         p1, p2, p3 = peaks[-3], peaks[-2], peaks[-1]
                         if equal_within(H[p1], H[p2], 0.06) and equal_within(H[p2], H[p3], 0.06):
                             left = int(min(p1, p3)); right = int(max(p1, p3))
                             supp = min(L[left:right+1]) if right - left >= 2 else np.nanmin(L)
-                            if np.isfinite(supp) and last_close_below(supp, 1, 0.0015) and volume_surge(1.5, 30):
+                            if np.isfinite(supp) and last_close_below(closes_arr, supp, 1, 0.0015) and volume_surge(vols_arr, 1.5, 30):
                                 height = (H[p1] + H[p2] + H[p3]) / 3.0 - supp
                                 tgt = supp - 0.75 * height
                                 ent = supp * 0.998
                                 sl = max(H[p1], H[p2], H[p3]) * 1.01
-                                sl = min(sl, atr_stop(ent, False, 2.2))
-                                if min_target_ok(tgt, current_price):
+                                sl = min(sl, atr_stop(ent, curr_atr, False, 2.2))
+                                if self._min_target_ok(tgt, current_price):
                                     add_pattern("TRIPLE_TOP", 87.0, ent, tgt, sl, tf, bullish=False,
                                                 volume_ok=True, ms_score=83.0, fib_ok=True, smf=80.0)
                 except Exception:
@@ -1379,16 +1223,16 @@ class UltraPatternDetector:
                     w = min(80, n)
                     H = highs_arr[-w:]; L = lows_arr[-w:]; C = closes_arr[-w:]
                     resistance = np.nanmax(H[-30:])
-                    # rising lows: each successive swing low higher
-                    troughs = [i for i in range(3, len(L)-3) if L[i] == min(L[i-3:i+4])]
+                    # rising lows: support line lewat 2-3 swing low terakhir naik dan fit rapat
+                    troughs = in_window(ind.pivots('low'), n, w, 3, 3)
                     rising = False
                     if len(troughs) >= 2:
-                        recent = troughs[-min(3, len(troughs)):]
-                        rising = all(L[recent[i]] < L[recent[i+1]] for i in range(len(recent)-1))
+                        sup_line = pivot_line(troughs[-3:], L)
+                        rising = sup_line.slope > 0 and sup_line.error <= 0.02
                     touches_res = count_touches(H[-30:], resistance, tol=0.01)
-                    if rising and touches_res >= 2 and volume_contract(30):
+                    if rising and touches_res >= 2 and volume_contract(vols_arr, 30):
                         # bullish breakout
-                        if last_close_above(resistance, 1, 0.002) and volume_surge(1.6, 30):
+                        if last_close_above(closes_arr, resistance, 1, 0.002) and volume_surge(vols_arr, 1.6, 30):
                             # height approx
                             last_trough = troughs[-1]
                             base = L[last_trough]
@@ -1396,19 +1240,19 @@ class UltraPatternDetector:
                             tgt = resistance + (1.08 if tf in ['1w', '1M'] else 1.0) * 0.08 * resistance if height <= 0 else resistance + 0.8 * height
                             ent = resistance * 1.002
                             sl = base - 0.5 * curr_atr
-                            sl = max(sl, atr_stop(ent, True, 2.0))
-                            if min_target_ok(tgt, current_price):
+                            sl = max(sl, atr_stop(ent, curr_atr, True, 2.0))
+                            if self._min_target_ok(tgt, current_price):
                                 add_pattern("ASCENDING_TRIANGLE", 86.0, ent, tgt, sl, tf, bullish=True,
                                             volume_ok=True, ms_score=82.0, fib_ok=True, smf=79.0)
                         # failed upward, breakdown -> bearish label
                         support = np.nanmin(L[-30:])
-                        if last_close_below(support, 1, 0.002) and volume_surge(1.6, 30):
+                        if last_close_below(closes_arr, support, 1, 0.002) and volume_surge(vols_arr, 1.6, 30):
                             height = resistance - support
                             tgt = support - 0.6 * height
                             ent = support * 0.998
                             sl = resistance * 1.01
-                            sl = min(sl, atr_stop(ent, False, 2.0))
-                            if min_target_ok(tgt, current_price):
+                            sl = min(sl, atr_stop(ent, curr_atr, False, 2.0))
+                            if self._min_target_ok(tgt, current_price):
                                 add_pattern("ASCENDING_TRIANGLE", 86.0, ent, tgt, sl, tf, bullish=False,
                                             volume_ok=True, ms_score=78.0, fib_ok=False, smf=76.0)
                 except Exception:
@@ -1420,33 +1264,33 @@ class UltraPatternDetector:
                     w = min(80, n)
                     H = highs_arr[-w:]; L = lows_arr[-w:]
                     support = np.nanmin(L[-30:])
-                    peaks = [i for i in range(3, len(H)-3) if H[i] == max(H[i-3:i+4])]
+                    peaks = in_window(ind.pivots('high'), n, w, 3, 3)
                     falling = False
                     if len(peaks) >= 2:
-                        recent = peaks[-min(3, len(peaks)):]
-                        falling = all(H[recent[i]] > H[recent[i+1]] for i in range(len(recent)-1))
+                        res_line = pivot_line(peaks[-3:], H)
+                        falling = res_line.slope < 0 and res_line.error <= 0.02
                     touches_sup = count_touches(L[-30:], support, tol=0.01)
-                    if falling and touches_sup >= 2 and volume_contract(30):
+                    if falling and touches_sup >= 2 and volume_contract(vols_arr, 30):
                         # bearish breakdown
-                        if last_close_below(support, 1, 0.002) and volume_surge(1.6, 30):
+                        if last_close_below(closes_arr, support, 1, 0.002) and volume_surge(vols_arr, 1.6, 30):
                             res = np.nanmax(H[-30:])
                             height = res - support
                             tgt = support - (0.85 if tf in ['1w', '1M'] else 0.7) * height
                             ent = support * 0.998
                             sl = res * 1.01
-                            sl = min(sl, atr_stop(ent, False, 2.2))
-                            if min_target_ok(tgt, current_price):
+                            sl = min(sl, atr_stop(ent, curr_atr, False, 2.2))
+                            if self._min_target_ok(tgt, current_price):
                                 add_pattern("DESCENDING_TRIANGLE", 89.0, ent, tgt, sl, tf, bullish=False,
                                             volume_ok=True, ms_score=85.0, fib_ok=True, smf=82.0)
                         # upward break -> bullish label
                         res = np.nanmax(H[-30:])
-                        if last_close_above(res, 1, 0.002) and volume_surge(1.6, 30):
+                        if last_close_above(closes_arr, res, 1, 0.002) and volume_surge(vols_arr, 1.6, 30):
                             height = res - support
                             tgt = res + 0.6 * height
                             ent = res * 1.002
                             sl = support - 0.5 * curr_atr
-                            sl = max(sl, atr_stop(ent, True, 2.0))
-                            if min_target_ok(tgt, current_price):
+                            sl = max(sl, atr_stop(ent, curr_atr, True, 2.0))
+                            if self._min_target_ok(tgt, current_price):
                                 add_pattern("DESCENDING_TRIANGLE", 89.0, ent, tgt, sl, tf, bullish=True,
                                             volume_ok=True, ms_score=80.0, fib_ok=False, smf=78.0)
                 except Exception:
@@ -1458,33 +1302,32 @@ class UltraPatternDetector:
                     w = min(80, n)
                     H = highs_arr[-w:]; L = lows_arr[-w:]
                     # two lower highs, two lower lows and wedge narrowing
-                    peaks = [i for i in range(3, len(H)-3) if H[i] == max(H[i-3:i+4])]
-                    troughs = [i for i in range(3, len(L)-3) if L[i] == min(L[i-3:i+4])]
+                    peaks = in_window(ind.pivots('high'), n, w, 3, 3)
+                    troughs = in_window(ind.pivots('low'), n, w, 3, 3)
                     if len(peaks) >= 2 and len(troughs) >= 2:
                         ph1, ph2 = peaks[-2], peaks[-1]
                         tl1, tl2 = troughs[-2], troughs[-1]
-                        peak_decline = (H[ph1] - H[ph2]) / max(H[ph1], 1e-12)
-                        trough_decline = (L[tl1] - L[tl2]) / max(L[tl1], 1e-12)
-                        if peak_decline > 0 and trough_decline > 0 and peak_decline > trough_decline and volume_contract(30):
+                        upper, lower = channel(H, L, peaks[-3:], troughs[-3:])
+                        if upper.slope < 0 and lower.slope < 0 and converging(upper, lower) and volume_contract(vols_arr, 30):
                             wedge_high = H[ph1]
                             # bullish breakout
                             line_res = max(H[min(ph1, ph2):max(ph1, ph2)+1])
-                            if last_close_above(line_res, 1, 0.002) and volume_surge(1.6, 30):
+                            if last_close_above(closes_arr, line_res, 1, 0.002) and volume_surge(vols_arr, 1.6, 30):
                                 tgt = wedge_high * (1.12 if tf in ['1w','1M'] else 1.08)
                                 ent = closes_arr[-1] * 1.002
                                 sl = min(L[tl1], L[tl2]) - 0.5 * curr_atr
-                                sl = max(sl, atr_stop(ent, True, 2.0))
-                                if min_target_ok(tgt, current_price):
+                                sl = max(sl, atr_stop(ent, curr_atr, True, 2.0))
+                                if self._min_target_ok(tgt, current_price):
                                     add_pattern("FALLING_WEDGE_SSS", 89.0, ent, tgt, sl, tf, bullish=True,
                                                 volume_ok=True, ms_score=85.0, fib_ok=True, smf=82.0)
                             # failed upward -> bearish
                             line_sup = min(L[min(tl1, tl2):max(tl1, tl2)+1])
-                            if last_close_below(line_sup, 1, 0.002) and volume_surge(1.6, 30):
+                            if last_close_below(closes_arr, line_sup, 1, 0.002) and volume_surge(vols_arr, 1.6, 30):
                                 tgt = line_sup * 0.92
                                 ent = closes_arr[-1] * 0.998
                                 sl = wedge_high * 1.01
-                                sl = min(sl, atr_stop(ent, False, 2.2))
-                                if min_target_ok(tgt, current_price):
+                                sl = min(sl, atr_stop(ent, curr_atr, False, 2.2))
+                                if self._min_target_ok(tgt, current_price):
                                     add_pattern("FALLING_WEDGE_SSS", 89.0, ent, tgt, sl, tf, bullish=False,
                                                 volume_ok=True, ms_score=78.0, fib_ok=False, smf=78.0)
                 except Exception:
@@ -1495,33 +1338,32 @@ class UltraPatternDetector:
                 try:
                     w = min(80, n)
                     H = highs_arr[-w:]; L = lows_arr[-w:]
-                    peaks = [i for i in range(3, len(H)-3) if H[i] == max(H[i-3:i+4])]
-                    troughs = [i for i in range(3, len(L)-3) if L[i] == min(L[i-3:i+4])]
+                    peaks = in_window(ind.pivots('high'), n, w, 3, 3)
+                    troughs = in_window(ind.pivots('low'), n, w, 3, 3)
                     if len(peaks) >= 2 and len(troughs) >= 2:
                         ph1, ph2 = peaks[-2], peaks[-1]
                         tl1, tl2 = troughs[-2], troughs[-1]
-                        peak_rise = (H[ph2] - H[ph1]) / max(H[ph1], 1e-12)
-                        trough_rise = (L[tl2] - L[tl1]) / max(L[tl1], 1e-12)
-                        if peak_rise > 0 and trough_rise > 0 and trough_rise > peak_rise and volume_contract(30):
+                        upper, lower = channel(H, L, peaks[-3:], troughs[-3:])
+                        if upper.slope > 0 and lower.slope > 0 and converging(upper, lower) and volume_contract(vols_arr, 30):
                             wedge_low = L[tl1]
                             # bearish breakdown
                             line_sup = min(L[min(tl1, tl2):max(tl1, tl2)+1])
-                            if last_close_below(line_sup, 1, 0.002) and volume_surge(1.6, 30):
+                            if last_close_below(closes_arr, line_sup, 1, 0.002) and volume_surge(vols_arr, 1.6, 30):
                                 tgt = wedge_low * (0.88 if tf in ['1w','1M'] else 0.92)
                                 ent = closes_arr[-1] * 0.998
                                 sl = max(H[ph1], H[ph2]) * 1.02
-                                sl = min(sl, atr_stop(ent, False, 2.2))
-                                if min_target_ok(tgt, current_price):
+                                sl = min(sl, atr_stop(ent, curr_atr, False, 2.2))
+                                if self._min_target_ok(tgt, current_price):
                                     add_pattern("RISING_WEDGE_SSS", 88.0, ent, tgt, sl, tf, bullish=False,
                                                 volume_ok=True, ms_score=84.0, fib_ok=True, smf=81.0)
                             # failed breakdown -> bullish
                             line_res = max(H[min(ph1, ph2):max(ph1, ph2)+1])
-                            if last_close_above(line_res, 1, 0.002) and volume_surge(1.6, 30):
+                            if last_close_above(closes_arr, line_res, 1, 0.002) and volume_surge(vols_arr, 1.6, 30):
                                 tgt = line_res * 1.06
                                 ent = closes_arr[-1] * 1.002
                                 sl = wedge_low - 0.5 * curr_atr
-                                sl = max(sl, atr_stop(ent, True, 2.0))
-                                if min_target_ok(tgt, current_price):
+                                sl = max(sl, atr_stop(ent, curr_atr, True, 2.0))
+                                if self._min_target_ok(tgt, current_price):
                                     add_pattern("RISING_WEDGE_SSS", 88.0, ent, tgt, sl, tf, bullish=True,
                                                 volume_ok=True, ms_score=79.0, fib_ok=False, smf=78.0)
                 except Exception:
@@ -1545,12 +1387,12 @@ class UltraPatternDetector:
                             handle_high = np.nanmax(H[-15:])
                             handle_low = np.nanmin(L[-15:])
                             handle_depth = (handle_high - handle_low) / max(handle_high, 1e-12)
-                            if handle_depth < depth * 0.5 and last_close_above(cup_high_left, 1, 0.002) and volume_surge(1.6, 30):
+                            if handle_depth < depth * 0.5 and last_close_above(closes_arr, cup_high_left, 1, 0.002) and volume_surge(vols_arr, 1.6, 30):
                                 tgt = cup_high_left + 0.6 * (cup_high_left - cup_low)
                                 ent = handle_high * 1.002
                                 sl = handle_low - 0.5 * curr_atr
-                                sl = max(sl, atr_stop(ent, True, 2.0))
-                                if min_target_ok(tgt, current_price):
+                                sl = max(sl, atr_stop(ent, curr_atr, True, 2.0))
+                                if self._min_target_ok(tgt, current_price):
                                     add_pattern("CUP_HANDLE", 88.0, ent, tgt, sl, tf, bullish=True,
                                                 volume_ok=True, ms_score=84.0, fib_ok=True, smf=81.0)
                 except Exception:
@@ -1571,20 +1413,20 @@ class UltraPatternDetector:
                         height = diamond_high - diamond_low
                         center = 0.5 * (diamond_high + diamond_low)
                         # breakout direction with volume
-                        if closes_arr[-1] > center and last_close_above(diamond_high, 1, 0.002) and volume_surge(1.6, 30):
+                        if closes_arr[-1] > center and last_close_above(closes_arr, diamond_high, 1, 0.002) and volume_surge(vols_arr, 1.6, 30):
                             tgt = diamond_high + 0.6 * height
                             ent = closes_arr[-1] * 1.002
                             sl = diamond_low - 0.5 * curr_atr
-                            sl = max(sl, atr_stop(ent, True, 2.2))
-                            if min_target_ok(tgt, current_price):
+                            sl = max(sl, atr_stop(ent, curr_atr, True, 2.2))
+                            if self._min_target_ok(tgt, current_price):
                                 add_pattern("DIAMOND_REVERSAL", 87.0, ent, tgt, sl, tf, bullish=True,
                                             volume_ok=True, ms_score=83.0, fib_ok=True, smf=80.0)
-                        elif closes_arr[-1] < center and last_close_below(diamond_low, 1, 0.002) and volume_surge(1.6, 30):
+                        elif closes_arr[-1] < center and last_close_below(closes_arr, diamond_low, 1, 0.002) and volume_surge(vols_arr, 1.6, 30):
                             tgt = diamond_low - 0.6 * height
                             ent = closes_arr[-1] * 0.998
                             sl = diamond_high * 1.02
-                            sl = min(sl, atr_stop(ent, False, 2.2))
-                            if min_target_ok(tgt, current_price):
+                            sl = min(sl, atr_stop(ent, curr_atr, False, 2.2))
+                            if self._min_target_ok(tgt, current_price):
                                 add_pattern("DIAMOND_REVERSAL", 87.0, ent, tgt, sl, tf, bullish=False,
                                             volume_ok=True, ms_score=83.0, fib_ok=True, smf=80.0)
                 except Exception:
@@ -1593,7 +1435,7 @@ class UltraPatternDetector:
         except Exception as e:
             logger.debug(f"Most perfect patterns detection error: {e}")
         return patterns
-    def _detect_classic_patterns_stable(self, opens, highs, lows, closes, volumes, current_price, tf) -> List[UltraPatternResult]:
+    def _detect_classic_patterns_stable(self, opens, highs, lows, closes, volumes, current_price, tf, indicators=None) -> List[UltraPatternResult]:
         """Stable classic patterns - enhanced: breakout+volume confirmation, ATR stops, measured moves, bullish/bearish naming"""
         patterns = []
         try:
@@ -1611,62 +1453,7 @@ class UltraPatternDetector:
             n = len(C)
             if n < 30:
                 return patterns
-
-            def sma(x, p):
-                x = _np(x)
-                if len(x) < p:
-                    out = np.full_like(x, np.nan)
-                    return out
-                w = np.ones(p)/p
-                out = np.convolve(x, w, mode='full')[:len(x)]
-                out[:p-1] = np.nan
-                return out
-
-            def atr(highs, lows, closes, period=14):
-                h = _np(highs); l = _np(lows); c = _np(closes)
-                prev_c = np.concatenate([[c], c[:-1]])
-                tr = np.maximum(h - l, np.maximum(np.abs(h - prev_c), np.abs(l - prev_c)))
-                return sma(tr, period)
-
-            def linreg_slope(y, window=20):
-                if len(y) < window:
-                    return 0.0
-                x = np.arange(window)
-                yy = _np(y)[-window:]
-                x_mean = x.mean()
-                y_mean = np.nanmean(yy)
-                denom = ((x - x_mean)**2).sum()
-                if denom == 0 or np.isnan(y_mean):
-                    return 0.0
-                num = ((x - x_mean) * (yy - y_mean)).sum()
-                return float(num / denom)
-
-            def last_close_above(level, k=1, margin=0.002):
-                if n < k:
-                    return False
-                sub = C[-k:]
-                return np.all(sub >= level * (1 + margin))
-
-            def last_close_below(level, k=1, margin=0.002):
-                if n < k:
-                    return False
-                sub = C[-k:]
-                return np.all(sub <= level * (1 - margin))
-
-            def volume_surge(factor=1.5, lookback=30):
-                if n < lookback + 1:
-                    return False
-                base = V[-(lookback+1):-1]
-                if np.isnan(base).any():
-                    return False
-                return V[-1] >= factor * (np.nanmean(base))
-
-            def volume_contract(lookback=30):
-                if n < lookback * 2:
-                    return False
-                recent = V[-lookback:]
-                prior = V[-2*lookback:-lookback]
-                return np.nanstd(recent) < np.nanstd(prior)
+            ind = ensure_bundle(indicators, O, H, L, C, V)
 
             def touches(arr, level, tol=0.01):
                 a = _np(arr)
@@ -1683,23 +1470,20 @@ class UltraPatternDetector:
                 return breakout_level + dist if up else breakout_level - dist
 
             def recent_uptrend(window=50):
-                ma = sma(C, window)
+                ma = ind.sma(window)
                 if np.isnan(ma[-2]) or np.isnan(ma[-1]):
                     return False
                 return ma[-1] > ma[-2] and linreg_slope(C, min(40, window)) > 0
 
             def recent_downtrend(window=50):
-                ma = sma(C, window)
+                ma = ind.sma(window)
                 if np.isnan(ma[-2]) or np.isnan(ma[-1]):
                     return False
                 return ma[-1] < ma[-2] and linreg_slope(C, min(40, window)) < 0
 
-            atr_arr = atr(H, L, C, 14)
+            atr_arr = ind.atr(14, method='sma')
             curr_atr = float(atr_arr[-1]) if not np.isnan(atr_arr[-1]) else max(1e-6, np.nanmean(atr_arr[-20:]))
 
-            def atr_stop(entry, long=True, mult=2.0):
-                return (entry - mult * curr_atr) if long else (entry + mult * curr_atr)
-
             def add(name_base, sr, entry, target, stop, bullish, ms, fib_ok=False, vol_ok=True, grade="SS", smf=78.0, conf=None, sig=None):
                 name = f"{name_base}_{'BULLISH' if bullish else 'BEARISH'}"
                 confidence = conf if conf is not None else sr
@@ -1720,37 +1504,32 @@ class UltraPatternDetector:
                         return True
                 return False
 
-            def min_target_ok(tp):
-                return abs((tp - current_price) / max(1e-12, current_price)) * 100 >= self.ultra_config.get('min_target_percentage', 3.0)
-
             # ---------- 1) FALLING_WEDGE (bias bullish) ----------
             try:
                 if n >= 40:
                     w = min(80, n)
                     h = H[-w:]; l = L[-w:]
-                    x = np.arange(len(h))
-                    hs = np.polyfit(x, h, 1)
-                    ls = np.polyfit(x, l, 1)
+                    hs, ls = (ln.slope for ln in fit_bars(h, l))
                     narrowing = (np.nanstd(h[-20:]) + np.nanstd(l[-20:])) < (np.nanstd(h[:20]) + np.nanstd(l[:20])) if len(h) >= 40 else True
-                    if hs < 0 and ls < 0 and abs(hs) > abs(ls) and narrowing and volume_contract(30):
+                    if hs < 0 and ls < 0 and abs(hs) > abs(ls) and narrowing and volume_contract(V, 30):
                         res = np.nanmax(h[-30:])
                         sup = np.nanmin(l[-30:])
                         # bullish breakout
-                        if last_close_above(res, 1, 0.002) and volume_surge(1.5, 30):
+                        if last_close_above(C, res, 1, 0.002) and volume_surge(V, 1.5, 30):
                             height = res - sup
                             ratio = 1.12 if tf in ['1w', '1M'] else 1.08
                             tgt = measured_from_height(height, res, up=True, ratio=0.6) if height > 0 else res * ratio
                             ent = res * 1.002
-                            sl = max(sup - 0.5 * curr_atr, atr_stop(ent, True, 2.2))
-                            if min_target_ok(tgt):
+                            sl = max(sup - 0.5 * curr_atr, atr_stop(ent, curr_atr, True, 2.2))
+                            if self._min_target_ok(tgt, current_price):
                                 add("FALLING_WEDGE", 85.0, ent, tgt, sl, True, 82.0, fib_ok=True, smf=80.0)
                         # failed upward -> bearish
-                        if last_close_below(sup, 1, 0.002) and volume_surge(1.5, 30):
+                        if last_close_below(C, sup, 1, 0.002) and volume_surge(V, 1.5, 30):
                             height = res - sup
                             tgt = measured_from_height(height, sup, up=False, ratio=0.6)
                             ent = sup * 0.998
-                            sl = min(res * 1.01, atr_stop(ent, False, 2.2))
-                            if min_target_ok(tgt):
+                            sl = min(res * 1.01, atr_stop(ent, curr_atr, False, 2.2))
+                            if self._min_target_ok(tgt, current_price):
                                 add("FALLING_WEDGE", 85.0, ent, tgt, sl, False, 78.0, fib_ok=False, smf=76.0)
             except Exception:
                 pass
@@ -1760,29 +1539,27 @@ class UltraPatternDetector:
                 if n >= 40:
                     w = min(80, n)
                     h = H[-w:]; l = L[-w:]
-                    x = np.arange(len(h))
-                    hs = np.polyfit(x, h, 1)
-                    ls = np.polyfit(x, l, 1)
+                    hs, ls = (ln.slope for ln in fit_bars(h, l))
                     narrowing = (np.nanstd(h[-20:]) + np.nanstd(l[-20:])) < (np.nanstd(h[:20]) + np.nanstd(l[:20])) if len(h) >= 40 else True
-                    if hs > 0 and ls > 0 and abs(ls) > abs(hs) and narrowing and volume_contract(30):
+                    if hs > 0 and ls > 0 and abs(ls) > abs(hs) and narrowing and volume_contract(V, 30):
                         res = np.nanmax(h[-30:])
                         sup = np.nanmin(l[-30:])
                         # bearish breakdown
-                        if last_close_below(sup, 1, 0.002) and volume_surge(1.5, 30):
+                        if last_close_below(C, sup, 1, 0.002) and volume_surge(V, 1.5, 30):
                             height = res - sup
                             ratio = 0.88 if tf in ['1w', '1M'] else 0.92
                             tgt = measured_from_height(height, sup, up=False, ratio=0.6) if height > 0 else sup * ratio
                             ent = sup * 0.998
-                            sl = min(res * 1.02, atr_stop(ent, False, 2.2))
-                            if min_target_ok(tgt):
+                            sl = min(res * 1.02, atr_stop(ent, curr_atr, False, 2.2))
+                            if self._min_target_ok(tgt, current_price):
                                 add("RISING_WEDGE", 84.0, ent, tgt, sl, False, 80.0, fib_ok=True, smf=78.0)
                         # failed breakdown -> bullish
-                        if last_close_above(res, 1, 0.002) and volume_surge(1.5, 30):
+                        if last_close_above(C, res, 1, 0.002) and volume_surge(V, 1.5, 30):
                             height = res - sup
                             tgt = measured_from_height(height, res, up=True, ratio=0.4)
                             ent = res * 1.002
-                            sl = max(sup - 0.5 * curr_atr, atr_stop(ent, True, 2.0))
-                            if min_target_ok(tgt):
+                            sl = max(sup - 0.5 * curr_atr, atr_stop(ent, curr_atr, True, 2.0))
+                            if self._min_target_ok(tgt, current_price):
                                 add("RISING_WEDGE", 84.0, ent, tgt, sl, True, 76.0, fib_ok=False, smf=75.0)
             except Exception:
                 pass
@@ -1802,21 +1579,21 @@ class UltraPatternDetector:
                         # rectangle top tipikal setelah uptrend
                         if prior_up:
                             # bearish break
-                            if last_close_below(sup, 1, 0.002) and volume_surge(1.5, 30):
+                            if last_close_below(C, sup, 1, 0.002) and volume_surge(V, 1.5, 30):
                                 height = res - sup
                                 ratio = 0.85 if tf in ['1w', '1M'] else 0.90
                                 tgt = measured_from_height(height, sup, up=False, ratio=0.6) if height > 0 else sup * ratio
                                 ent = sup * 0.998
-                                sl = min(res * 1.02, atr_stop(ent, False, 2.0))
-                                if min_target_ok(tgt):
+                                sl = min(res * 1.02, atr_stop(ent, curr_atr, False, 2.0))
+                                if self._min_target_ok(tgt, current_price):
                                     add("RECTANGLE_TOP", 88.0, ent, tgt, sl, False, 84.0, fib_ok=True, smf=82.0)
                             # upward throwback -> bullish
-                            if last_close_above(res, 1, 0.002) and volume_surge(1.5, 30):
+                            if last_close_above(C, res, 1, 0.002) and volume_surge(V, 1.5, 30):
                                 height = res - sup
                                 tgt = measured_from_height(height, res, up=True, ratio=0.6)
                                 ent = res * 1.002
-                                sl = max(sup - 0.5 * curr_atr, atr_stop(ent, True, 2.0))
-                                if min_target_ok(tgt):
+                                sl = max(sup - 0.5 * curr_atr, atr_stop(ent, curr_atr, True, 2.0))
+                                if self._min_target_ok(tgt, current_price):
                                     add("RECTANGLE_TOP", 88.0, ent, tgt, sl, True, 80.0, fib_ok=False, smf=78.0)
             except Exception:
                 pass
@@ -1835,21 +1612,21 @@ class UltraPatternDetector:
                         prior_down = recent_downtrend(50)
                         if prior_down:
                             # bullish break
-                            if last_close_above(res, 1, 0.002) and volume_surge(1.5, 30):
+                            if last_close_above(C, res, 1, 0.002) and volume_surge(V, 1.5, 30):
                                 height = res - sup
                                 ratio = 1.15 if tf in ['1w', '1M'] else 1.10
                                 tgt = measured_from_height(height, res, up=True, ratio=0.6) if height > 0 else res * (ratio - 1 + 1)
                                 ent = res * 1.002
-                                sl = max(sup - 0.5 * curr_atr, atr_stop(ent, True, 2.0))
-                                if min_target_ok(tgt):
+                                sl = max(sup - 0.5 * curr_atr, atr_stop(ent, curr_atr, True, 2.0))
+                                if self._min_target_ok(tgt, current_price):
                                     add("RECTANGLE_BOTTOM", 86.0, ent, tgt, sl, True, 82.0, fib_ok=True, smf=80.0)
                             # failed -> bearish
-                            if last_close_below(sup, 1, 0.002) and volume_surge(1.5, 30):
+                            if last_close_below(C, sup, 1, 0.002) and volume_surge(V, 1.5, 30):
                                 height = res - sup
                                 tgt = measured_from_height(height, sup, up=False, ratio=0.5)
                                 ent = sup * 0.998
-                                sl = min(res * 1.02, atr_stop(ent, False, 2.0))
-                                if min_target_ok(tgt):
+                                sl = min(res * 1.02, atr_stop(ent, curr_atr, False, 2.0))
+                                if self._min_target_ok(tgt, current_price):
                                     add("RECTANGLE_BOTTOM", 86.0, ent, tgt, sl, False, 78.0, fib_ok=False, smf=76.0)
             except Exception:
                 pass
@@ -1861,17 +1638,16 @@ class UltraPatternDetector:
                     pole_gain = (C[-1] - C[-pole_win]) / max(1e-12, C[-pole_win]) if n >= pole_win+1 else 0
                     # channel kecil menurun (flag)
                     flag_h = H[-15:]; flag_l = L[-15:]
-                    x = np.arange(len(flag_h))
-                    sh = np.polyfit(x, flag_h, 1); slw = np.polyfit(x, flag_l, 1)
-                    if pole_gain > 0.08 and sh < 0 and slw < 0 and volume_contract(30):
+                    sh, slw = (ln.slope for ln in fit_bars(flag_h, flag_l))
+                    if pole_gain > 0.08 and sh < 0 and slw < 0 and volume_contract(V, 30):
                         flag_top = np.nanmax(flag_h)
                         flag_bot = np.nanmin(flag_l)
-                        if last_close_above(flag_top, 1, 0.002) and volume_surge(1.5, 30):
+                        if last_close_above(C, flag_top, 1, 0.002) and volume_surge(V, 1.5, 30):
                             pole_height = (np.nanmax(H[-(pole_win+15):-15]) - np.nanmin(L[-(pole_win+15):-15])) if n >= pole_win+15 else (C[-1]-C[-pole_win])
                             tgt = measured_from_height(max(0.0, pole_height), flag_top, up=True, ratio=1.0)
                             ent = flag_top * 1.002
-                            sl = max(flag_bot - 0.5 * curr_atr, atr_stop(ent, True, 2.0))
-                            if min_target_ok(tgt):
+                            sl = max(flag_bot - 0.5 * curr_atr, atr_stop(ent, curr_atr, True, 2.0))
+                            if self._min_target_ok(tgt, current_price):
                                 add("BULL_FLAG", 85.0, ent, tgt, sl, True, 82.0, fib_ok=True, smf=80.0)
             except Exception:
                 pass
@@ -1882,17 +1658,16 @@ class UltraPatternDetector:
                     pole_win = 20
                     pole_drop = (C[-1] - C[-pole_win]) / max(1e-12, C[-pole_win]) if n >= pole_win+1 else 0
                     flag_h = H[-15:]; flag_l = L[-15:]
-                    x = np.arange(len(flag_h))
-                    sh = np.polyfit(x, flag_h, 1); slw = np.polyfit(x, flag_l, 1)
-                    if pole_drop < -0.08 and sh > 0 and slw > 0 and volume_contract(30):
+                    sh, slw = (ln.slope for ln in fit_bars(flag_h, flag_l))
+                    if pole_drop < -0.08 and sh > 0 and slw > 0 and volume_contract(V, 30):
                         flag_top = np.nanmax(flag_h)
                         flag_bot = np.nanmin(flag_l)
-                        if last_close_below(flag_bot, 1, 0.002) and volume_surge(1.5, 30):
+                        if last_close_below(C, flag_bot, 1, 0.002) and volume_surge(V, 1.5, 30):
                             pole_height = (np.nanmax(H[-(pole_win+15):-15]) - np.nanmin(L[-(pole_win+15):-15])) if n >= pole_win+15 else abs(C[-1]-C[-pole_win])
                             tgt = measured_from_height(max(0.0, pole_height), flag_bot, up=False, ratio=1.0)
                             ent = flag_bot * 0.998
-                            sl = min(flag_top * 1.02, atr_stop(ent, False, 2.2))
-                            if min_target_ok(tgt):
+                            sl = min(flag_top * 1.02, atr_stop(ent, curr_atr, False, 2.2))
+                            if self._min_target_ok(tgt, current_price):
                                 add("BEAR_FLAG", 84.0, ent, tgt, sl, False, 80.0, fib_ok=True, smf=78.0)
             except Exception:
                 pass
@@ -1903,16 +1678,15 @@ class UltraPatternDetector:
                     pole_win = 20
                     pole_gain = (C[-1] - C[-pole_win]) / max(1e-12, C[-pole_win]) if n >= pole_win+1 else 0
                     tri_h = H[-20:]; tri_l = L[-20:]
-                    sh = np.polyfit(np.arange(20), tri_h, 1)
-                    slw = np.polyfit(np.arange(20), tri_l, 1)
-                    if pole_gain > 0.08 and sh < 0 and slw > 0 and volume_contract(30):
+                    sh, slw = (ln.slope for ln in fit_bars(tri_h, tri_l))
+                    if pole_gain > 0.08 and sh < 0 and slw > 0 and volume_contract(V, 30):
                         res = np.nanmax(tri_h)
-                        if last_close_above(res, 1, 0.002) and volume_surge(1.6, 30):
+                        if last_close_above(C, res, 1, 0.002) and volume_surge(V, 1.6, 30):
                             pole_height = (np.nanmax(H[-(pole_win+20):-20]) - np.nanmin(L[-(pole_win+20):-20])) if n >= pole_win+20 else (C[-1]-C[-pole_win])
                             tgt = measured_from_height(max(0.0, pole_height), res, up=True, ratio=1.0)
                             ent = res * 1.002
-                            sl = max(np.nanmin(tri_l) - 0.5 * curr_atr, atr_stop(ent, True, 2.0))
-                            if min_target_ok(tgt):
+                            sl = max(np.nanmin(tri_l) - 0.5 * curr_atr, atr_stop(ent, curr_atr, True, 2.0))
+                            if self._min_target_ok(tgt, current_price):
                                 add("BULL_PENNANT", 83.0, ent, tgt, sl, True, 79.0, fib_ok=True, smf=77.0)
             except Exception:
                 pass
@@ -1923,16 +1697,15 @@ class UltraPatternDetector:
                     pole_win = 20
                     pole_drop = (C[-1] - C[-pole_win]) / max(1e-12, C[-pole_win]) if n >= pole_win+1 else 0
                     tri_h = H[-20:]; tri_l = L[-20:]
-                    sh = np.polyfit(np.arange(20), tri_h, 1)
-                    slw = np.polyfit(np.arange(20), tri_l, 1)
-                    if pole_drop < -0.08 and sh > 0 and slw < 0 and volume_contract(30):
+                    sh, slw = (ln.slope for ln in fit_bars(tri_h, tri_l))
+                    if pole_drop < -0.08 and sh > 0 and slw < 0 and volume_contract(V, 30):
                         sup = np.nanmin(tri_l)
-                        if last_close_below(sup, 1, 0.002) and volume_surge(1.6, 30):
+                        if last_close_below(C, sup, 1, 0.002) and volume_surge(V, 1.6, 30):
                             pole_height = (np.nanmax(H[-(pole_win+20):-20]) - np.nanmin(L[-(pole_win+20):-20])) if n >= pole_win+20 else abs(C[-1]-C[-pole_win])
                             tgt = measured_from_height(max(0.0, pole_height), sup, up=False, ratio=1.0)
                             ent = sup * 0.998
-                            sl = min(np.nanmax(tri_h) * 1.02, atr_stop(ent, False, 2.2))
-                            if min_target_ok(tgt):
+                            sl = min(np.nanmax(tri_h) * 1.02, atr_stop(ent, curr_atr, False, 2.2))
+                            if self._min_target_ok(tgt, current_price):
                                 add("BEAR_PENNANT", 82.0, ent, tgt, sl, False, 78.0, fib_ok=True, smf=76.0)
             except Exception:
                 pass
@@ -1942,28 +1715,27 @@ class UltraPatternDetector:
                 if n >= 50:
                     w = 30
                     tri_h = H[-w:]; tri_l = L[-w:]
-                    sh = np.polyfit(np.arange(w), tri_h, 1)
-                    slw = np.polyfit(np.arange(w), tri_l, 1)
+                    sh, slw = (ln.slope for ln in fit_bars(tri_h, tri_l))
                     converging = sh < 0 and slw > 0 and abs(abs(sh) - abs(slw)) < 0.05
-                    if converging and volume_contract(30):
+                    if converging and volume_contract(V, 30):
                         res = np.nanmax(tri_h)
                         sup = np.nanmin(tri_l)
                         height = res - sup
                         # up
-                        if last_close_above(res, 1, 0.002) and volume_surge(1.5, 30):
+                        if last_close_above(C, res, 1, 0.002) and volume_surge(V, 1.5, 30):
                             ratio = 1.06 if tf in ['1w', '1M'] else 1.04
                             tgt = measured_from_height(height, res, up=True, ratio=0.6) if height > 0 else res * ratio
                             ent = res * 1.002
-                            sl = max(sup - 0.5 * curr_atr, atr_stop(ent, True, 2.0))
-                            if min_target_ok(tgt):
+                            sl = max(sup - 0.5 * curr_atr, atr_stop(ent, curr_atr, True, 2.0))
+                            if self._min_target_ok(tgt, current_price):
                                 add("SYMMETRICAL_TRIANGLE", 81.0, ent, tgt, sl, True, 78.0, fib_ok=True, smf=75.0)
                         # down
-                        if last_close_below(sup, 1, 0.002) and volume_surge(1.5, 30):
+                        if last_close_below(C, sup, 1, 0.002) and volume_surge(V, 1.5, 30):
                             ratio = 0.94 if tf in ['1w', '1M'] else 0.96
                             tgt = measured_from_height(height, sup, up=False, ratio=0.6) if height > 0 else sup * ratio
                             ent = sup * 0.998
-                            sl = min(res * 1.02, atr_stop(ent, False, 2.0))
-                            if min_target_ok(tgt):
+                            sl = min(res * 1.02, atr_stop(ent, curr_atr, False, 2.0))
+                            if self._min_target_ok(tgt, current_price):
                                 add("SYMMETRICAL_TRIANGLE", 81.0, ent, tgt, sl, False, 78.0, fib_ok=True, smf=75.0)
             except Exception:
                 pass
@@ -1976,26 +1748,25 @@ class UltraPatternDetector:
                     # expanding: range bertambah
                     exp_ok = (np.nanmax(bw_h[-30:]) - np.nanmin(bw_l[-30:])) > (np.nanmax(bw_h[:30]) - np.nanmin(bw_l[:30])) if w >= 60 else True
                     # slope arah sama (wedge broadening)
-                    sh = np.polyfit(np.arange(w), bw_h, 1)
-                    slw = np.polyfit(np.arange(w), bw_l, 1)
+                    sh, slw = (ln.slope for ln in fit_bars(bw_h, bw_l))
                     same_dir = (sh > 0 and slw > 0) or (sh < 0 and slw < 0)
                     if exp_ok and same_dir:
                         res = np.nanmax(bw_h[-30:])
                         sup = np.nanmin(bw_l[-30:])
                         height = res - sup
                         # up
-                        if last_close_above(res, 1, 0.002) and volume_surge(1.5, 30):
+                        if last_close_above(C, res, 1, 0.002) and volume_surge(V, 1.5, 30):
                             tgt = measured_from_height(height, res, up=True, ratio=0.6)
                             ent = res * 1.002
-                            sl = max(sup - 0.5 * curr_atr, atr_stop(ent, True, 2.2))
-                            if min_target_ok(tgt):
+                            sl = max(sup - 0.5 * curr_atr, atr_stop(ent, curr_atr, True, 2.2))
+                            if self._min_target_ok(tgt, current_price):
                                 add("BROADENING_WEDGE", 83.0, ent, tgt, sl, True, 80.0, fib_ok=False, smf=78.0)
                         # down
-                        if last_close_below(sup, 1, 0.002) and volume_surge(1.5, 30):
+                        if last_close_below(C, sup, 1, 0.002) and volume_surge(V, 1.5, 30):
                             tgt = measured_from_height(height, sup, up=False, ratio=0.6)
                             ent = sup * 0.998
-                            sl = min(res * 1.02, atr_stop(ent, False, 2.2))
-                            if min_target_ok(tgt):
+                            sl = min(res * 1.02, atr_stop(ent, curr_atr, False, 2.2))
+                            if self._min_target_ok(tgt, current_price):
                                 add("BROADENING_WEDGE", 83.0, ent, tgt, sl, False, 80.0, fib_ok=False, smf=78.0)
             except Exception:
                 pass
@@ -2005,28 +1776,27 @@ class UltraPatternDetector:
                 if n >= 40:
                     w = 40
                     ch_h = H[-w:]; ch_l = L[-w:]
-                    sh = np.polyfit(np.arange(w), ch_h, 1)
-                    slw = np.polyfit(np.arange(w), ch_l, 1)
+                    sh, slw = (ln.slope for ln in fit_bars(ch_h, ch_l))
                     parallel = abs((sh - slw)) < 0.05 and sh > 0 and slw > 0
                     res = np.nanmax(ch_h)
                     sup = np.nanmin(ch_l)
                     # breakout ke atas channel
-                    if parallel and last_close_above(res, 1, 0.002) and volume_surge(1.4, 30):
+                    if parallel and last_close_above(C, res, 1, 0.002) and volume_surge(V, 1.4, 30):
                         height = res - sup
                         ratio = 1.06 if tf in ['1w', '1M'] else 1.04
                         tgt = measured_from_height(height, res, up=True, ratio=0.4) if height > 0 else res * ratio
                         ent = res * 1.002
-                        sl = max(sup - 0.5 * curr_atr, atr_stop(ent, True, 2.0))
-                        if min_target_ok(tgt):
+                        sl = max(sup - 0.5 * curr_atr, atr_stop(ent, curr_atr, True, 2.0))
+                        if self._min_target_ok(tgt, current_price):
                             add("CHANNEL_UP", 82.0, ent, tgt, sl, True, 78.0, fib_ok=False, smf=76.0)
                     # breakdown dari channel naik
-                    if parallel and last_close_below(sup, 1, 0.002) and volume_surge(1.4, 30):
+                    if parallel and last_close_below(C, sup, 1, 0.002) and volume_surge(V, 1.4, 30):
                         height = res - sup
                         ratio = 0.94 if tf in ['1w', '1M'] else 0.96
                         tgt = measured_from_height(height, sup, up=False, ratio=0.4) if height > 0 else sup * ratio
                         ent = sup * 0.998
-                        sl = min(res * 1.02, atr_stop(ent, False, 2.0))
-                        if min_target_ok(tgt):
+                        sl = min(res * 1.02, atr_stop(ent, curr_atr, False, 2.0))
+                        if self._min_target_ok(tgt, current_price):
                             add("CHANNEL_UP", 82.0, ent, tgt, sl, False, 76.0, fib_ok=False, smf=75.0)
             except Exception:
                 pass
@@ -2036,28 +1806,27 @@ class UltraPatternDetector:
                 if n >= 40:
                     w = 40
                     ch_h = H[-w:]; ch_l = L[-w:]
-                    sh = np.polyfit(np.arange(w), ch_h, 1)
-                    slw = np.polyfit(np.arange(w), ch_l, 1)
+                    sh, slw = (ln.slope for ln in fit_bars(ch_h, ch_l))
                     parallel = abs((sh - slw)) < 0.05 and sh < 0 and slw < 0
                     res = np.nanmax(ch_h)
                     sup = np.nanmin(ch_l)
                     # breakdown ke bawah channel turun
-                    if parallel and last_close_below(sup, 1, 0.002) and volume_surge(1.4, 30):
+                    if parallel and last_close_below(C, sup, 1, 0.002) and volume_surge(V, 1.4, 30):
                         height = res - sup
                         ratio = 0.94 if tf in ['1w', '1M'] else 0.96
                         tgt = measured_from_height(height, sup, up=False, ratio=0.4) if height > 0 else sup * ratio
                         ent = sup * 0.998
-                        sl = min(res * 1.02, atr_stop(ent, False, 2.0))
-                        if min_target_ok(tgt):
+                        sl = min(res * 1.02, atr_stop(ent, curr_atr, False, 2.0))
+                        if self._min_target_ok(tgt, current_price):
                             add("CHANNEL_DOWN", 81.0, ent, tgt, sl, False, 77.0, fib_ok=False, smf=75.0)
                     # break ke atas channel turun
-                    if parallel and last_close_above(res, 1, 0.002) and volume_surge(1.4, 30):
+                    if parallel and last_close_above(C, res, 1, 0.002) and volume_surge(V, 1.4, 30):
                         height = res - sup
                         ratio = 1.06 if tf in ['1w', '1M'] else 1.04
                         tgt = measured_from_height(height, res, up=True, ratio=0.4) if height > 0 else res * ratio
                         ent = res * 1.002
-                        sl = max(sup - 0.5 * curr_atr, atr_stop(ent, True, 2.0))
-                        if min_target_ok(tgt):
+                        sl = max(sup - 0.5 * curr_atr, atr_stop(ent, curr_atr, True, 2.0))
+                        if self._min_target_ok(tgt, current_price):
                             add("CHANNEL_DOWN", 81.0, ent, tgt, sl, True, 77.0, fib_ok=False, smf=75.0)
             except Exception:
                 pass
@@ -2068,19 +1837,19 @@ class UltraPatternDetector:
                     w = 50
                     segment_L = L[-w:]
                     # cari dua spike rendah signifikan
-                    idxs = [i for i in range(2, w-2) if segment_L[i] == np.min(segment_L[i-2:i+3])]
+                    idxs = in_window(ind.pivots('low', 2, 2), n, w, 2, 2)
                     if len(idxs) >= 2:
                         b1, b2 = idxs[-2], idxs[-1]
                         if abs(segment_L[b1] - segment_L[b2]) / max(1e-12, 0.5*(abs(segment_L[b1])+abs(segment_L[b2]))) <= 0.03:
                             mid_high = np.nanmax(H[-w+b1:-w+b2]) if b2 > b1 and ( -w+b1 >= -n and -w+b2 >= -n) else np.nanmax(H[-w:])
                             res = max(mid_high, np.nanmax(H[-20:]))
-                            if last_close_above(res, 1, 0.002) and volume_surge(1.5, 30):
+                            if last_close_above(C, res, 1, 0.002) and volume_surge(V, 1.5, 30):
                                 low_pt = min(segment_L[b1], segment_L[b2])
                                 height = res - low_pt
                                 tgt = measured_from_height(height, res, up=True, ratio=0.6)
                                 ent = res * 1.002
-                                sl = max(low_pt - 0.5 * curr_atr, atr_stop(ent, True, 2.2))
-                                if min_target_ok(tgt):
+                                sl = max(low_pt - 0.5 * curr_atr, atr_stop(ent, curr_atr, True, 2.2))
+                                if self._min_target_ok(tgt, current_price):
                                     add("PIPE_BOTTOM", 84.0, ent, tgt, sl, True, 80.0, fib_ok=False, smf=78.0)
             except Exception:
                 pass
@@ -2090,19 +1859,19 @@ class UltraPatternDetector:
                 if n >= 60:
                     w = 50
                     segment_H = H[-w:]
-                    idxs = [i for i in range(2, w-2) if segment_H[i] == np.max(segment_H[i-2:i+3])]
+                    idxs = in_window(ind.pivots('high', 2, 2), n, w, 2, 2)
                     if len(idxs) >= 2:
                         p1, p2 = idxs[-2], idxs[-1]
                         if abs(segment_H[p1] - segment_H[p2]) / max(1e-12, 0.5*(abs(segment_H[p1])+abs(segment_H[p2]))) <= 0.03:
                             mid_low = np.nanmin(L[-w+p1:-w+p2]) if p2 > p1 and ( -w+p1 >= -n and -w+p2 >= -n) else np.nanmin(L[-w:])
                             sup = min(mid_low, np.nanmin(L[-20:]))
-                            if last_close_below(sup, 1, 0.002) and volume_surge(1.5, 30):
+                            if last_close_below(C, sup, 1, 0.002) and volume_surge(V, 1.5, 30):
                                 high_pt = max(segment_H[p1], segment_H[p2])
                                 height = high_pt - sup
                                 tgt = measured_from_height(height, sup, up=False, ratio=0.6)
                                 ent = sup * 0.998
-                                sl = min(high_pt * 1.02, atr_stop(ent, False, 2.2))
-                                if min_target_ok(tgt):
+                                sl = min(high_pt * 1.02, atr_stop(ent, curr_atr, False, 2.2))
+                                if self._min_target_ok(tgt, current_price):
                                     add("PIPE_TOP", 83.0, ent, tgt, sl, False, 79.0, fib_ok=False, smf=77.0)
             except Exception:
                 pass
@@ -2114,15 +1883,15 @@ class UltraPatternDetector:
                     subL = L[-w:]
                     mid = w // 2
                     # bentuk U: titik tengah lebih rendah dan tepi kiri/kanan naik
-                    if subL[mid] == np.nanmin(subL) and subL > subL[mid] and subL[-1] > subL[mid] and volume_contract(30):
+                    if subL[mid] == np.nanmin(subL) and subL > subL[mid] and subL[-1] > subL[mid] and volume_contract(V, 30):
                         rim_res = max(np.nanmax(H[-w:-w//2]), np.nanmax(H[-w//2:]))
-                        if last_close_above(rim_res, 1, 0.002) and volume_surge(1.5, 30):
+                        if last_close_above(C, rim_res, 1, 0.002) and volume_surge(V, 1.5, 30):
                             height = rim_res - subL[mid]
                             ratio = 1.10 if tf in ['1w', '1M'] else 1.06
                             tgt = measured_from_height(height, rim_res, up=True, ratio=0.6) if height > 0 else rim_res * ratio
                             ent = rim_res * 1.002
-                            sl = max(subL[mid] - 0.5 * curr_atr, atr_stop(ent, True, 2.0))
-                            if min_target_ok(tgt):
+                            sl = max(subL[mid] - 0.5 * curr_atr, atr_stop(ent, curr_atr, True, 2.0))
+                            if self._min_target_ok(tgt, current_price):
                                 add("ROUNDING_BOTTOM", 82.0, ent, tgt, sl, True, 78.0, fib_ok=True, smf=76.0)
             except Exception:
                 pass
@@ -2133,7 +1902,7 @@ class UltraPatternDetector:
 
         
         return patterns    
-    def _detect_harmonic_patterns_stable(self, highs, lows, closes, current_price, tf) -> List[UltraPatternResult]:
+    def _detect_harmonic_patterns_stable(self, highs, lows, closes, current_price, tf, indicators=None) -> List[UltraPatternResult]:
         """Stable harmonic patterns - Enhanced accuracy with ATR-ZigZag, PRZ confluence, time-symmetry, RSI, and dynamic tolerances - ALL 20 IMPLEMENTED"""
         patterns: List[UltraPatternResult] = []
 
@@ -2144,71 +1913,16 @@ class UltraPatternDetector:
             n = len(closes)
             if n < 50:
                 return patterns  # need enough bars to derive robust swings
+            ind = ensure_bundle(indicators, None, highs, lows, closes, None)
 
             # -----------------------------
             # Helpers
             # -----------------------------
-            def ema(series, period):
-                if len(series) < period:
-                    return [series[-1]] * len(series)
-                k = 2 / (period + 1.0)
-                out = []
-                ema_val = series
-                for v in series:
-                    ema_val = v * k + ema_val * (1 - k)
-                    out.append(ema_val)
-                return out
-
-            def rsi(series, period=14):
-                if len(series) < period + 1:
-                    return [50.0] * len(series)
-                gains = [0.0]
-                losses = [0.0]
-                for i in range(1, len(series)):
-                    ch = series[i] - series[i-1]
-                    gains.append(max(ch, 0.0))
-                    losses.append(abs(min(ch, 0.0)))
-                # Wilder smoothing
-                avg_gain = sum(gains[1:period+1]) / period
-                avg_loss = sum(losses[1:period+1]) / period
-                rsis = [50.0]*period
-                for i in range(period+1, len(series)):
-                    avg_gain = (avg_gain*(period-1) + gains[i]) / period
-                    avg_loss = (avg_loss*(period-1) + losses[i]) / period
-                    if avg_loss == 0:
-                        rs = float('inf')
-                    else:
-                        rs = avg_gain / avg_loss
-                    val = 100 - (100 / (1 + rs))
-                    rsis.append(val)
-                # pad to length
-                while len(rsis) < len(series):
-                    rsis.insert(0, 50.0)
-                return rsis[:len(series)]
-
-            def true_range(h, l, c):
-                trs = [h - l]
-                for i in range(1, len(c)):
-                    trs.append(max(h[i]-l[i], abs(h[i]-c[i-1]), abs(l[i]-c[i-1])))
-                return trs
-
-            def atr(h, l, c, period=14):
-                trs = true_range(h, l, c)
-                if len(trs) < period:
-                    return [trs[-1]] * len(trs)
-                # Wilder ATR
-                atr_vals = [sum(trs[:period]) / period]
-                for i in range(period, len(trs)):
-                    atr_vals.append((atr_vals[-1]*(period-1) + trs[i]) / period)
-                # pad
-                pad = [atr_vals]*(len(trs)-len(atr_vals))
-                return pad + atr_vals
-
             def pct(x):
                 return abs(x) / max(1e-9, current_price)
 
             # ATR-based dynamic tolerance scaling
-            atr14 = atr(highs, lows, closes, 14)
+            atr14 = ind.atr(14)
             curr_atr = atr14[-1]
             atr_pct = curr_atr / max(1e-9, current_price)
             # base ratio tolerance widened by volatility
@@ -2218,22 +1932,13 @@ class UltraPatternDetector:
 
             # Build a lightweight, adaptive ZigZag to get robust swings
             def build_swings(h, l, depth_left=3, depth_right=3, min_dev=0.015):
-                swings: List[Tuple[str, int, float]] = []
                 nbar = min(len(h), len(l))
                 # minimum price move threshold also adapts to volatility
                 min_move = max(min_dev, atr_pct * 2.0)
-                for i in range(depth_left, nbar - depth_right):
-                    local_high = max(h[i - depth_left:i + depth_right + 1])
-                    local_low = min(l[i - depth_left:i + depth_right + 1])
-                    if h[i] == local_high:
-                        if not swings or swings[-1] == 'L':
-                            # check significance
-                            if len(swings) == 0 or abs(h[i] - swings[-1][2]) / max(1e-9, swings[-1][2]) >= min_move:
-                                swings.append(('H', i, h[i]))
-                    if l[i] == local_low:
-                        if not swings or swings[-1] == 'H':
-                            if len(swings) == 0 or abs(l[i] - swings[-1][2]) / max(1e-9, swings[-1][2]) >= min_move:
-                                swings.append(('L', i, l[i]))
+                peaks = ind.pivots('high', depth_left, depth_right)
+                troughs = ind.pivots('low', depth_left, depth_right)
+                swings = alternating_swings(peaks[peaks < nbar], troughs[troughs < nbar],
+                                            h[:nbar], l[:nbar], min_move)
                 # keep only last ~30 swings for performance
                 return swings[-30:]
 
@@ -2307,7 +2012,7 @@ class UltraPatternDetector:
                 return pD == 'L' and pA == 'H' and pC == 'H'
 
             # Compute RSI for confirmation
-            rsi14 = rsi(closes, 14)
+            rsi14 = np.nan_to_num(ind.rsi(14), nan=50.0)  # warm-up dianggap netral
 
             # Pattern specifications (ratio windows); names kept EXACTLY as requested
             # Windows get expanded lightly by tol.
@@ -2412,7 +2117,7 @@ class UltraPatternDetector:
                         rsi_ok = last_rsi >= 45  # not oversold for bearish reversal
 
                 # EMA trend context
-                ema50 = ema(closes, 50)
+                ema50 = ind.ema(50)
                 ema_slope = ema50[-1] - ema50[-5] if len(ema50) >= 5 else 0.0
 
                 # Try each pattern spec in both BULL/BEAR orientation
@@ -2575,7 +2280,7 @@ class UltraPatternDetector:
             logger.debug(f"Harmonic pattern detection error: {e}")
 
         return patterns
-    def _detect_elliott_wave_patterns_stable(self, closes, current_price, tf) -> List[UltraPatternResult]:
+    def _detect_elliott_wave_patterns_stable(self, closes, current_price, tf, indicators=None) -> List[UltraPatternResult]:
         """
         Stable Elliott Wave patterns - ALL 18 IMPLEMENTED (Enhanced with ZigZag, Fibonacci, RSI, and structural validation)
         - Nama pola dipertahankan, ditambah suffix _BULLISH/_BEARISH sesuai implikasi arah sinyal.
@@ -2589,104 +2294,7 @@ class UltraPatternDetector:
         def ema(series, period):
             if len(series) < period or period <= 1:
                 return sum(series) / len(series)
-            k = 2.0 / (period + 1.0)
-            e = series
-            for x in series[1:]:
-                e = x * k + e * (1 - k)
-            return e
-
-        def rsi(series, period=14):
-            if len(series) < period + 1:
-                return [50.0] * len(series)
-            gains = [0.0]
-            losses = [0.0]
-            for i in range(1, len(series)):
-                ch = series[i] - series[i-1]
-                gains.append(max(ch, 0.0))
-                losses.append(max(-ch, 0.0))
-            avg_gain = sum(gains[1:period+1]) / period
-            avg_loss = sum(losses[1:period+1]) / period
-            rsis = [50.0] * (period)
-            for i in range(period+1, len(series)):
-                avg_gain = (avg_gain * (period - 1) + gains[i]) / period
-                avg_loss = (avg_loss * (period - 1) + losses[i]) / period
-                if avg_loss == 0:
-                    rs = float('inf')
-                else:
-                    rs = avg_gain / avg_loss
-                r = 100 - (100 / (1 + rs))
-                rsis.append(r)
-            # pad front
-            pad = [50.0] * (len(series) - len(rsis))
-            return pad + rsis
-
-        def zigzag_pivots(series, pct=0.03, backstep=3):
-            # Adaptive threshold via recent volatility scaling
-            if len(series) < 10:
-                return []
-            import math
-            # scale threshold with rolling stddev
-            window = min(20, len(series))
-            mean = sum(series[-window:]) / window
-            std = (sum((x - mean) ** 2 for x in series[-window:]) / window) ** 0.5
-            base_pct = pct
-            if mean > 0:
-                vol_pct = min(0.08, max(0.008, std / mean))
-                thr = max(base_pct, vol_pct * 0.8)
-            else:
-                thr = base_pct
-
-            pivots = []
-            last_pivot_idx = 0
-            last_pivot_price = series
-            mode = 0  # 1 up, -1 down
-            for i in range(1, len(series)):
-                chg = (series[i] - last_pivot_price) / (last_pivot_price if last_pivot_price != 0 else 1e-9)
-                if mode >= 0 and chg >= thr:
-                    # new high pivot
-                    # confirm last pivot low
-                    # find lowest in [last_pivot_idx, i]
-                    low_idx = max(last_pivot_idx, i - backstep)
-                    low_price = min(series[low_idx:i+1])
-                    low_idx = series[low_idx:i+1].index(low_price) + low_idx
-                    if not pivots or pivots[-1][2] != 'L':
-                        pivots.append((low_idx, low_price, 'L'))
-                    last_pivot_idx = i
-                    last_pivot_price = series[i]
-                    mode = -1
-                elif mode <= 0 and chg <= -thr:
-                    # new low pivot
-                    high_idx = max(last_pivot_idx, i - backstep)
-                    high_price = max(series[high_idx:i+1])
-                    high_idx = series[high_idx:i+1].index(high_price) + high_idx
-                    if not pivots or pivots[-1][2] != 'H':
-                        pivots.append((high_idx, high_price, 'H'))
-                    last_pivot_idx = i
-                    last_pivot_price = series[i]
-                    mode = 1
-                else:
-                    # extend extreme
-                    if mode >= 0 and series[i] > last_pivot_price:
-                        last_pivot_idx = i
-                        last_pivot_price = series[i]
-                    elif mode <= 0 and series[i] < last_pivot_price:
-                        last_pivot_idx = i
-                        last_pivot_price = series[i]
-            # finalize last pivot
-            if pivots:
-                last = pivots[-1]
-                if last[2] == 'H' and series[-1] < last[1]:
-                    pivots.append((len(series)-1, series[-1], 'L'))
-                elif last[2] == 'L' and series[-1] > last[1]:
-                    pivots.append((len(series)-1, series[-1], 'H'))
-            # keep uniqueness by index
-            uniq = []
-            seen = set()
-            for p in pivots:
-                if p not in seen:
-                    uniq.append(p)
-                    seen.add(p)
-            return uniq
+            return float(kernels.ema(series, period)[-1])
 
         def retrace_ratio(high_price, low_price, price):
             # Return retrace % of move high->low (if up move) or low->high (if down move) normalized to 0..1
@@ -2768,12 +2376,13 @@ class UltraPatternDetector:
             n = len(closes)
             if n < 40:
                 return patterns
+            ind = ensure_bundle(indicators, closes=closes)
 
             # Core context
             dir_trend = trend_direction(closes)
             dir_label_default = "BULLISH" if dir_trend >= 0 else "BEARISH"
-            rsi_vals = rsi(closes, 14)
-            pivots = zigzag_pivots(closes, pct=0.02, backstep=3)  # adaptive
+            rsi_vals = np.nan_to_num(ind.rsi(14), nan=50.0)  # warm-up dianggap netral
+            pivots = list(ind.zigzag(pct=0.02, backstep=3))  # adaptive
             last_price = current_price
 
             # quick helpers for pivot refs
@@ -2888,10 +2497,7 @@ class UltraPatternDetector:
             # ============= 5. PERFECT_DIAGONAL_TRIANGLE (ending/leading diagonal convergence) =============
             # Check convergence of last 2-3 highs and lows
             def slope(a, b):
-                (i1,p1),(i2,p2) = a,b
-                if i2 == i1:
-                    return 0.0
-                return (p2 - p1) / (i2 - i1)
+                return line_through(a[0], a[1], b[0], b[1]).slope
 
             if len(highs) >= 3 and len(lows) >= 3:
                 uh = slope(highs[-3], highs[-1])
@@ -3126,7 +2732,7 @@ class UltraPatternDetector:
             if tpct >= self.ultra_config.get('min_target_percentage', 1.0):
                 out.append(p)
         return out
-    def _detect_wyckoff_patterns_stable(self, opens, highs, lows, closes, volumes, current_price, tf) -> List[UltraPatternResult]:
+    def _detect_wyckoff_patterns_stable(self, opens, highs, lows, closes, volumes, current_price, tf, indicators=None) -> List[UltraPatternResult]:
         """Stable Wyckoff patterns - enhanced structure, creek/ice, volume EVR, ATR stops, bullish/bearish naming"""
         patterns = []
         try:
@@ -3144,49 +2750,7 @@ class UltraPatternDetector:
             n = len(C)
             if n < 50:
                 return patterns
-
-            def sma(x, p):
-                x = _np(x)
-                if len(x) < p:
-                    out = np.full_like(x, np.nan)
-                    return out
-                w = np.ones(p)/p
-                out = np.convolve(x, w, mode='full')[:len(x)]
-                out[:p-1] = np.nan
-                return out
-
-            def atr(HH, LL, CC, period=14):
-                prev_c = np.concatenate([[CC], CC[:-1]])
-                tr = np.maximum(HH - LL, np.maximum(np.abs(HH - prev_c), np.abs(LL - prev_c)))
-                return sma(tr, period)
-
-            def linreg_slope(y, window=30):
-                if len(y) < window:
-                    return 0.0
-                x = np.arange(window)
-                yy = _np(y)[-window:]
-                xm, ym = x.mean(), np.nanmean(yy)
-                denom = ((x - xm)**2).sum()
-                if denom == 0 or np.isnan(ym):
-                    return 0.0
-                num = ((x - xm) * (yy - ym)).sum()
-                return float(num/denom)
-
-            def last_close_above(level, k=1, margin=0.002):
-                if n < k:
-                    return False
-                return np.all(C[-k:] >= level * (1 + margin))
-
-            def last_close_below(level, k=1, margin=0.002):
-                if n < k:
-                    return False
-                return np.all(C[-k:] <= level * (1 - margin))
-
-            def volume_surge(factor=1.5, lookback=30):
-                if n < lookback + 1:
-                    return False
-                base = V[-(lookback+1):-1]
-                return V[-1] >= factor * (np.nanmean(base))
+            ind = ensure_bundle(indicators, O, H, L, C, V)
 
             def volume_dryup(factor=0.7, lookback=20):
                 if n < lookback*2:
@@ -3244,12 +2808,9 @@ class UltraPatternDetector:
                 base = upper if up else lower
                 return base + ratio*width if up else base - ratio*width
 
-            atr_arr = atr(H, L, C, 14)
+            atr_arr = ind.atr(14, method='sma')
             curr_atr = float(atr_arr[-1]) if not np.isnan(atr_arr[-1]) else max(1e-6, np.nanmean(atr_arr[-20:]))
 
-            def atr_stop(entry, long=True, mult=2.2):
-                return (entry - mult * curr_atr) if long else (entry + mult * curr_atr)
-
             # ---------- precompute TR context ----------
             U, D, w = find_trading_range(lookback=100)
             creek = creek_level(lookback=100)
@@ -3265,7 +2826,7 @@ class UltraPatternDetector:
                 if climax:
                     tgt = width_projection(U, D, ratio=0.6, up=True)
                     ent = C[-1] * 1.002
-                    sl = atr_stop(ent, True, 2.5)
+                    sl = atr_stop(ent, curr_atr, True, 2.5)
                     if abs((tgt - current_price)/max(1e-12,current_price))*100 >= self.ultra_config.get('min_target_percentage',3.0):
                         add("PERFECT_ACCUMULATION_PHASE_A", 92.0, ent, tgt, sl, True, 88.0, vol_ok=True, smf=86.0)
             except Exception:
@@ -3279,7 +2840,7 @@ class UltraPatternDetector:
                 if side_range < 0.12 and vol_cv < 0.5 and volume_dryup(0.75, 20):
                     tgt = width_projection(U, D, 0.6, up=True)
                     ent = C[-1] * 1.002
-                    sl = atr_stop(ent, True, 2.2)
+                    sl = atr_stop(ent, curr_atr, True, 2.2)
                     if abs((tgt - current_price)/current_price)*100 >= self.ultra_config.get('min_target_percentage',3.0):
                         add("PERFECT_ACCUMULATION_PHASE_B", 91.0, ent, tgt, sl, True, 87.0, vol_ok=True, smf=85.0)
             except Exception:
@@ -3290,11 +2851,11 @@ class UltraPatternDetector:
                 # Spring: penetrasi di bawah support (ice) lalu cepat kembali dengan volume rendah (test)
                 broke_ice = np.nanmin(C[-10:]) < D * 0.998
                 low_vol_test = np.nanmean(V[-5:]) < 0.7 * np.nanmean(V[-30:])
-                if broke_ice and low_vol_test and last_close_above(D, 1, 0.002):
+                if broke_ice and low_vol_test and last_close_above(C, D, 1, 0.002):
                     tgt = width_projection(U, D, 0.6, up=True)
                     ent = max(C[-1], D) * 1.002
                     sl = min(D, np.nanmin(L[-10:])) - 0.5 * curr_atr
-                    sl = min(sl, atr_stop(ent, True, 2.2))  # gunakan yang lebih ketat
+                    sl = min(sl, atr_stop(ent, curr_atr, True, 2.2))  # gunakan yang lebih ketat
                     if abs((tgt - current_price)/current_price)*100 >= self.ultra_config.get('min_target_percentage',3.0):
                         add("PERFECT_ACCUMULATION_PHASE_C", 90.0, ent, tgt, sl, True, 86.0, vol_ok=True, smf=84.0)
             except Exception:
@@ -3303,14 +2864,14 @@ class UltraPatternDetector:
             # ---------- 4) PERFECT_ACCUMULATION_PHASE_D (SOS/LPS) ----------
             try:
                 # SOS: jump of the creek + BUEC (backup) dengan dry-up
-                jump = last_close_above(creek, 1, 0.002) and volume_surge(1.3, 30)
+                jump = last_close_above(C, creek, 1, 0.002) and volume_surge(V, 1.3, 30)
                 if jump:
                     # tunggu backup kering ke atas creek (tidak turun lagi ke dalam)
                     backup_ok = volume_dryup(0.75, 10) and (np.nanmin(L[-5:]) >= creek*0.995)
                     if backup_ok:
                         tgt = width_projection(U, D, 0.7, up=True)
                         ent = max(C[-1], creek) * 1.002
-                        sl = atr_stop(ent, True, 2.0)
+                        sl = atr_stop(ent, curr_atr, True, 2.0)
                         if abs((tgt - current_price)/current_price)*100 >= self.ultra_config.get('min_target_percentage',3.0):
                             add("PERFECT_ACCUMULATION_PHASE_D", 89.0, ent, tgt, sl, True, 85.0, vol_ok=True, smf=83.0)
             except Exception:
@@ -3320,10 +2881,10 @@ class UltraPatternDetector:
             try:
                 strength = (current_price - np.nanmin(C[-20:])) / max(1e-12, np.nanmin(C[-20:]))
                 vol_conf = np.nanmean(V[-3:]) > 1.2 * np.nanmean(V[-20:])
-                if strength > 0.08 and vol_conf and last_close_above(U, 1, 0.002):
+                if strength > 0.08 and vol_conf and last_close_above(C, U, 1, 0.002):
                     tgt = width_projection(U, D, 0.8, up=True)
                     ent = C[-1] * 1.002
-                    sl = atr_stop(ent, True, 2.2)
+                    sl = atr_stop(ent, curr_atr, True, 2.2)
                     if abs((tgt - current_price)/current_price)*100 >= self.ultra_config.get('min_target_percentage',3.0):
                         add("PERFECT_ACCUMULATION_PHASE_E", 88.0, ent, tgt, sl, True, 84.0, vol_ok=True, smf=82.0)
             except Exception:
@@ -3336,7 +2897,7 @@ class UltraPatternDetector:
                 if advance > 0.20 and vol_climax:
                     tgt = width_projection(U, D, 0.6, up=False)
                     ent = C[-1] * 0.998
-                    sl = atr_stop(ent, False, 2.5)
+                    sl = atr_stop(ent, curr_atr, False, 2.5)
                     if abs((tgt - current_price)/current_price)*100 >= self.ultra_config.get('min_target_percentage',3.0):
                         add("PERFECT_DISTRIBUTION_PHASE_A", 88.0, ent, tgt, sl, False, 84.0, vol_ok=True, smf=82.0)
             except Exception:
@@ -3350,7 +2911,7 @@ class UltraPatternDetector:
                     tgt = width_projection(U, D, 0.6, up=False)
                     ent = C[-1] * 0.998
                     sl = (np.nanmax(C[-20:]) * 1.04)
-                    sl = min(sl, atr_stop(ent, False, 2.2))
+                    sl = min(sl, atr_stop(ent, curr_atr, False, 2.2))
                     if abs((tgt - current_price)/current_price)*100 >= self.ultra_config.get('min_target_percentage',3.0):
                         add("PERFECT_DISTRIBUTION_PHASE_B", 87.0, ent, tgt, sl, False, 83.0, vol_ok=True, smf=81.0)
             except Exception:
@@ -3365,7 +2926,7 @@ class UltraPatternDetector:
                     tgt = width_projection(U, D, 0.6, up=False)
                     ent = min(C[-1], U) * 0.998
                     sl = np.nanmax(C[-10:]) * 1.06
-                    sl = min(sl, atr_stop(ent, False, 2.5))
+                    sl = min(sl, atr_stop(ent, curr_atr, False, 2.5))
                     if abs((tgt - current_price)/current_price)*100 >= self.ultra_config.get('min_target_percentage',3.0):
                         add("PERFECT_DISTRIBUTION_PHASE_C", 86.0, ent, tgt, sl, False, 82.0, vol_ok=True, smf=80.0)
             except Exception:
@@ -3373,14 +2934,14 @@ class UltraPatternDetector:
 
             # ---------- 9) PERFECT_DISTRIBUTION_PHASE_D (SOW/LPSY) ----------
             try:
-                sow = last_close_below(ice, 1, 0.002) and volume_surge(1.3, 30)
+                sow = last_close_below(C, ice, 1, 0.002) and volume_surge(V, 1.3, 30)
                 if sow:
                     # LPSY: throwback lemah ke bawah upper TR
                     lpsy = (np.nanmax(H[-5:]) <= U * 1.005) and volume_dryup(0.8, 10)
                     if lpsy or True:
                         tgt = width_projection(U, D, 0.7, up=False)
                         ent = C[-1] * 0.998
-                        sl = atr_stop(ent, False, 2.0)
+                        sl = atr_stop(ent, curr_atr, False, 2.0)
                         if abs((tgt - current_price)/current_price)*100 >= self.ultra_config.get('min_target_percentage',3.0):
                             add("PERFECT_DISTRIBUTION_PHASE_D", 85.0, ent, tgt, sl, False, 81.0, vol_ok=True, smf=79.0)
             except Exception:
@@ -3390,10 +2951,10 @@ class UltraPatternDetector:
             try:
                 breakdown = (np.nanmax(C[-20:]) - current_price) / max(1e-12, np.nanmax(C[-20:])) > 0.12
                 vol_inc = np.nanmean(V[-3:]) > 1.3 * np.nanmean(V[-20:])
-                if breakdown and vol_inc and last_close_below(D, 1, 0.002):
+                if breakdown and vol_inc and last_close_below(C, D, 1, 0.002):
                     tgt = width_projection(U, D, 0.8, up=False)
                     ent = C[-1] * 0.998
-                    sl = atr_stop(ent, False, 2.2)
+                    sl = atr_stop(ent, curr_atr, False, 2.2)
                     if abs((tgt - current_price)/current_price)*100 >= self.ultra_config.get('min_target_percentage',3.0):
                         add("PERFECT_DISTRIBUTION_PHASE_E", 84.0, ent, tgt, sl, False, 80.0, vol_ok=True, smf=78.0)
             except Exception:
@@ -3408,7 +2969,7 @@ class UltraPatternDetector:
                     tgt = width_projection(U, D, 0.7, up=True)
                     ent = max(C[-1], D) * 1.002
                     sl = np.nanmin(L[-5:]) - 0.5 * curr_atr
-                    sl = min(sl, atr_stop(ent, True, 2.2))
+                    sl = min(sl, atr_stop(ent, curr_atr, True, 2.2))
                     if abs((tgt - current_price)/current_price)*100 >= self.ultra_config.get('min_target_percentage',3.0):
                         add("PERFECT_SPRING_TEST", 90.0, ent, tgt, sl, True, 86.0, vol_ok=True, smf=84.0)
             except Exception:
@@ -3423,7 +2984,7 @@ class UltraPatternDetector:
                     tgt = width_projection(U, D, 0.7, up=False)
                     ent = min(C[-1], U) * 0.998
                     sl = np.nanmax(C[-5:]) * 1.04
-                    sl = min(sl, atr_stop(ent, False, 2.2))
+                    sl = min(sl, atr_stop(ent, curr_atr, False, 2.2))
                     if abs((tgt - current_price)/current_price)*100 >= self.ultra_config.get('min_target_percentage',3.0):
                         add("PERFECT_UPTHRUST_ACTION", 89.0, ent, tgt, sl, False, 85.0, vol_ok=True, smf=83.0)
             except Exception:
@@ -3431,7 +2992,7 @@ class UltraPatternDetector:
 
             # ---------- 13) PERFECT_BACKUP_TO_CREEK ----------
             try:
-                jumped = last_close_above(creek, 1, 0.002) and volume_surge(1.2, 30)
+                jumped = last_close_above(C, creek, 1, 0.002) and volume_surge(V, 1.2, 30)
                 if jumped:
                     # backup kering, spread menyempit, tidak masuk kembali ke creek
                     dry = volume_dryup(0.75, 10)
@@ -3439,7 +3000,7 @@ class UltraPatternDetector:
                     if dry and hold_above:
                         tgt = width_projection(U, D, 0.8, up=True)
                         ent = C[-1] * 1.002
-                        sl = atr_stop(ent, True, 2.0)
+                        sl = atr_stop(ent, curr_atr, True, 2.0)
                         if abs((tgt - current_price)/current_price)*100 >= self.ultra_config.get('min_target_percentage',3.0):
                             add("PERFECT_BACKUP_TO_CREEK", 88.0, ent, tgt, sl, True, 84.0, vol_ok=True, smf=82.0)
             except Exception:
@@ -3450,10 +3011,10 @@ class UltraPatternDetector:
                 # jump kuat di atas creek + sustain + volume dukung
                 sustain = (C[-1] > np.nanmax(C[-23:-3])) if n >= 23 else True
                 vol_sup = np.nanmean(V[-3:]) > 1.1 * np.nanmean(V[-20:])
-                if last_close_above(creek, 1, 0.002) and sustain and vol_sup:
+                if last_close_above(C, creek, 1, 0.002) and sustain and vol_sup:
                     tgt = width_projection(U, D, 0.8, up=True)
                     ent = max(C[-1], creek) * 1.002
-                    sl = atr_stop(ent, True, 2.2)
+                    sl = atr_stop(ent, curr_atr, True, 2.2)
                     if abs((tgt - current_price)/current_price)*100 >= self.ultra_config.get('min_target_percentage',3.0):
                         add("PERFECT_JUMP_CREEK", 87.0, ent, tgt, sl, True, 83.0, vol_ok=True, smf=81.0)
             except Exception:
@@ -3467,7 +3028,7 @@ class UltraPatternDetector:
                 if body and vhi and higher:
                     tgt = width_projection(U, D, 0.6, up=True)
                     ent = C[-1] * 1.002
-                    sl = atr_stop(ent, True, 2.0)
+                    sl = atr_stop(ent, curr_atr, True, 2.0)
                     if abs((tgt - current_price)/current_price)*100 >= self.ultra_config.get('min_target_percentage',3.0):
                         add("PERFECT_SIGN_OF_STRENGTH", 86.0, ent, tgt, sl, True, 82.0, vol_ok=True, smf=80.0)
             except Exception:
@@ -3481,7 +3042,7 @@ class UltraPatternDetector:
                 if body and vhi and lower:
                     tgt = width_projection(U, D, 0.6, up=False)
                     ent = C[-1] * 0.998
-                    sl = atr_stop(ent, False, 2.0)
+                    sl = atr_stop(ent, curr_atr, False, 2.0)
                     if abs((tgt - current_price)/current_price)*100 >= self.ultra_config.get('min_target_percentage',3.0):
                         add("PERFECT_SIGN_OF_WEAKNESS", 85.0, ent, tgt, sl, False, 81.0, vol_ok=True, smf=79.0)
             except Exception:
@@ -3496,7 +3057,7 @@ class UltraPatternDetector:
                     tgt = width_projection(U, D, 0.6, up=True)
                     ent = C[-1] * 1.002
                     sl = np.nanmin(C[-10:]) - 0.5 * curr_atr
-                    sl = min(sl, atr_stop(ent, True, 2.0))
+                    sl = min(sl, atr_stop(ent, curr_atr, True, 2.0))
                     if abs((tgt - current_price)/current_price)*100 >= self.ultra_config.get('min_target_percentage',3.0):
                         add("PERFECT_LAST_POINT_SUPPORT", 84.0, ent, tgt, sl, True, 80.0, vol_ok=True, smf=78.0)
             except Exception:
@@ -3511,7 +3072,7 @@ class UltraPatternDetector:
                     tgt = width_projection(U, D, 0.6, up=False)
                     ent = C[-1] * 0.998
                     sl = np.nanmax(C[-10:]) * 1.04
-                    sl = min(sl, atr_stop(ent, False, 2.0))
+                    sl = min(sl, atr_stop(ent, curr_atr, False, 2.0))
                     if abs((tgt - current_price)/current_price)*100 >= self.ultra_config.get('min_target_percentage',3.0):
                         add("PERFECT_LAST_POINT_SUPPLY", 83.0, ent, tgt, sl, False, 79.0, vol_ok=True, smf=77.0)
             except Exception:
@@ -3525,7 +3086,7 @@ class UltraPatternDetector:
                 if uptrend and side and vol_drop:
                     tgt = width_projection(U, D, 0.6, up=True)
                     ent = C[-1] * 1.002
-                    sl = atr_stop(ent, True, 2.0)
+                    sl = atr_stop(ent, curr_atr, True, 2.0)
                     if abs((tgt - current_price)/current_price)*100 >= self.ultra_config.get('min_target_percentage',3.0):
                         add("WYCKOFF_REACCUMULATION", 86.0, ent, tgt, sl, True, 82.0, vol_ok=True, smf=80.0)
             except Exception:
@@ -3539,7 +3100,7 @@ class UltraPatternDetector:
                 if prior_up and high_range and ir_vol:
                     tgt = width_projection(U, D, 0.6, up=False)
                     ent = C[-1] * 0.998
-                    sl = atr_stop(ent, False, 2.0)
+                    sl = atr_stop(ent, curr_atr, False, 2.0)
                     if abs((tgt - current_price)/current_price)*100 >= self.ultra_config.get('min_target_percentage',3.0):
                         add("WYCKOFF_REDISTRIBUTION", 85.0, ent, tgt, sl, False, 81.0, vol_ok=True, smf=79.0)
             except Exception:
@@ -3553,7 +3114,7 @@ class UltraPatternDetector:
                 if inst_buy and strength and steady:
                     tgt = width_projection(U, D, 0.8, up=True)
                     ent = C[-1] * 1.002
-                    sl = atr_stop(ent, True, 2.2)
+                    sl = atr_stop(ent, curr_atr, True, 2.2)
                     if abs((tgt - current_price)/current_price)*100 >= self.ultra_config.get('min_target_percentage',3.0):
                         add("COMPOSITE_MAN_BULL", 84.0, ent, tgt, sl, True, 80.0, vol_ok=True, smf=88.0)
             except Exception:
@@ -3567,7 +3128,7 @@ class UltraPatternDetector:
                 if inst_sell and weak and steady_d:
                     tgt = width_projection(U, D, 0.8, up=False)
                     ent = C[-1] * 0.998
-                    sl = atr_stop(ent, False, 2.2)
+                    sl = atr_stop(ent, curr_atr, False, 2.2)
                     if abs((tgt - current_price)/current_price)*100 >= self.ultra_config.get('min_target_percentage',3.0):
                         add("COMPOSITE_MAN_BEAR", 82.0, ent, tgt, sl, False, 78.0, vol_ok=True, smf=86.0)
             except Exception:
@@ -3576,7 +3137,7 @@ class UltraPatternDetector:
         except Exception as e:
             logger.debug(f"Wyckoff detection error: {e}")
         return patterns
-    def _detect_volume_patterns_stable(self, closes, volumes, current_price, tf) -> List[UltraPatternResult]:
+    def _detect_volume_patterns_stable(self, closes, volumes, current_price, tf, indicators=None) -> List[UltraPatternResult]:
         """Stable Volume patterns - Enhanced accuracy with z-score, Wyckoff confirmations, OBV divergence, and adaptive thresholds - ALL 16 IMPLEMENTED"""
         patterns: List[UltraPatternResult] = []
 
@@ -3585,6 +3146,7 @@ class UltraPatternDetector:
             n = len(closes)
             if n < 30 or len(volumes) < 30:
                 return patterns
+            ind = ensure_bundle(indicators, closes=closes, volumes=volumes)
 
             # -----------------------------
             # Helpers (inner functions)
@@ -3635,17 +3197,6 @@ class UltraPatternDetector:
                     return 0.0
                 return arr[-1] - arr[-1 - lookback]
 
-            def obv_series(cl, vol):
-                obv = [0.0]
-                for i in range(1, len(cl)):
-                    if cl[i] > cl[i - 1]:
-                        obv.append(obv[-1] + vol[i])
-                    elif cl[i] < cl[i - 1]:
-                        obv.append(obv[-1] - vol[i])
-                    else:
-                        obv.append(obv[-1])
-                return obv
-
             def vol_oscillator(vol, short=5, long=14):
                 if len(vol) < max(short, long):
                     return 0.0
@@ -3677,7 +3228,7 @@ class UltraPatternDetector:
             rng30 = pct_change(max_in(closes, n - 30, n), min_in(closes, n - 30, n))
 
             # OBV
-            obv = obv_series(closes, volumes)
+            obv = ind.obv()
             obv_slope_10 = slope(obv, 10)
             price_slope_10 = slope(closes, 10)
 
@@ -3883,21 +3434,15 @@ class UltraPatternDetector:
             try:
                 if n >= 26:
                     # Volume-weighted moving averages (proxy)
-                    def vwma(vals, vols, period):
-                        if len(vals) < period:
-                            return mean(vals[-period:]) if period <= len(vals) else mean(vals)
-                        w = 0.0
-                        v = 0.0
-                        for i in range(len(vals) - period, len(vals)):
-                            w += vals[i] * vols[i]
-                            v += vols[i]
-                        return (w / v) if v > 0 else mean(vals[-period:])
-
-                    vwm_12 = vwma(closes, volumes, 12)
-                    vwm_26 = vwma(closes, volumes, 26)
+                    def vwma(period):
+                        val = ind.vwma(period)[-1]
+                        return float(val) if np.isfinite(val) else mean(closes[-period:])
+
+                    vwm_12 = vwma(12)
+                    vwm_26 = vwma(26)
                     vw_macd = vwm_12 - vwm_26
                     # signal proxy as 9-period simple on closes weighted by volume
-                    vwm_9 = vwma(closes, volumes, 9)
+                    vwm_9 = vwma(9)
                     vw_hist = vw_macd - (vwm_12 - vwm_9)
 
                     if abs(vw_hist / max(1e-9, current_price)) > 0.01:
@@ -4007,13 +3552,14 @@ class UltraPatternDetector:
             logger.debug(f"Volume pattern detection error: {e}")
 
         return patterns
-    def _detect_fibonacci_patterns_stable(self, highs, lows, closes, current_price, tf) -> List[UltraPatternResult]:
+    def _detect_fibonacci_patterns_stable(self, highs, lows, closes, current_price, tf, indicators=None) -> List[UltraPatternResult]:
         """Stable Fibonacci patterns - Enhanced accuracy, bullish/bearish variants, all logic inside."""
         patterns = []
         try:
             n = len(closes)
             if n < 30 or len(highs) != n or len(lows) != n:
                 return patterns
+            ind = ensure_bundle(indicators, None, highs, lows, closes, None)
 
             # ============ Inline helpers (kept inside this function) ============
             def sma(seq, p):
@@ -4022,36 +3568,6 @@ class UltraPatternDetector:
                     return sum(seq) / max(1, len(seq))
                 return sum(seq[-p:]) / float(p)
 
-            def calc_atr(highs_, lows_, closes_, period=14):
-                trs = []
-                for i in range(1, len(closes_)):
-                    tr = max(
-                        highs_[i] - lows_[i],
-                        abs(highs_[i] - closes_[i - 1]),
-                        abs(lows_[i] - closes_[i - 1]),
-                    )
-                    trs.append(tr)
-                use = min(period, len(trs))
-                if use == 0:
-                    return 0.0
-                return sum(trs[-use:]) / float(use)
-
-            def calc_rsi(closes_, period=14):
-                gains, losses = [], []
-                for i in range(1, len(closes_)):
-                    ch = closes_[i] - closes_[i - 1]
-                    gains.append(max(ch, 0.0))
-                    losses.append(max(-ch, 0.0))
-                use = min(period, len(gains))
-                if use == 0:
-                    return 50.0
-                avg_gain = sum(gains[-use:]) / float(use)
-                avg_loss = sum(losses[-use:]) / float(use)
-                if avg_loss == 0:
-                    return 100.0
-                rs = avg_gain / avg_loss
-                return 100.0 - (100.0 / (1.0 + rs))
-
             def recent_pivots(highs_, lows_, window=5, max_lookback=120):
                 # Return last pivot high and low (index, value) using local extrema logic
                 start = max(window, len(highs_) - max_lookback)
@@ -4059,31 +3575,22 @@ class UltraPatternDetector:
                 last_high_idx = None
                 last_low = None
                 last_low_idx = None
-                for i in range(start, len(highs_) - window):
-                    hi = highs_[i]
-                    lo = lows_[i]
-                    ph = True
-                    pl = True
-                    for j in range(i - window, i + window + 1):
-                        if j < 0 or j >= len(highs_):
-                            continue
-                        if highs_[j] > hi:
-                            ph = False
-                        if lows_[j] < lo:
-                            pl = False
-                        if not ph and not pl:
-                            break
-                    if ph:
-                        last_high = hi
-                        last_high_idx = i
-                    if pl:
-                        last_low = lo
-                        last_low_idx = i
+                ph = ind.pivots('high', window, window)
+                pl = ind.pivots('low', window, window)
+                ph = ph[ph >= start]
+                pl = pl[pl >= start]
+                if len(ph):
+                    last_high_idx = int(ph[-1])
+                    last_high = highs_[last_high_idx]
+                if len(pl):
+                    last_low_idx = int(pl[-1])
+                    last_low = lows_[last_low_idx]
                 return last_high_idx, last_high, last_low_idx, last_low
             # ====================================================================
 
-            atr = calc_atr(highs, lows, closes, 14)
-            rsi = calc_rsi(closes, 14)
+            # n >= 30, jadi nilai terakhir SMA-14 dari TR/gain/loss selalu terdefinisi
+            atr = float(ind.atr(14, method='sma')[-1])
+            rsi = float(ind.rsi(14, method='sma')[-1])
             sma_fast = sma(closes, 20)
             sma_slow = sma(closes, 50)
             sma_trend = "UP" if sma_fast > sma_slow else ("DOWN" if sma_fast < sma_slow else "NEUTRAL")
@@ -4302,7 +3809,7 @@ class UltraPatternDetector:
             logger.debug(f"Fibonacci pattern detection error: {e}")
 
         return patterns
-    def _detect_candlestick_patterns_stable(self, opens, highs, lows, closes, current_price, tf) -> List[UltraPatternResult]:
+    def _detect_candlestick_patterns_stable(self, opens, highs, lows, closes, current_price, tf, indicators=None) -> List[UltraPatternResult]:
         """Stable Candlestick patterns - enhanced: strict shape checks, trend filters, ATR stops, bullish/bearish naming"""
         patterns = []
         try:
@@ -4315,57 +3822,43 @@ class UltraPatternDetector:
             n = len(C)
             if n < 8:
                 return patterns
+            ind = ensure_bundle(indicators, O, H, L, C, None)
 
             # ---------- helpers (semua di dalam fungsi ini) ----------
-            def sma(x, p):
-                if len(x) < p:
-                    return np.full_like(x, np.nan)
-                w = np.ones(p) / p
-                out = np.convolve(x, w, mode='full')[:len(x)]
-                out[:p-1] = np.nan
-                return out
-
-            def atr(HH, LL, CC, period=14):
-                prev_c = np.concatenate([[CC], CC[:-1]])
-                tr = np.maximum(HH - LL, np.maximum(np.abs(HH - prev_c), np.abs(LL - prev_c)))
-                return sma(tr, period)
-
-            def linreg_slope(y, window=20):
-                if len(y) < window:
-                    return 0.0
-                x = np.arange(window)
-                yy = np.asarray(y)[-window:]
-                xm, ym = x.mean(), np.nanmean(yy)
-                denom = ((x - xm)**2).sum()
-                if denom == 0 or np.isnan(ym):
-                    return 0.0
-                num = ((x - xm) * (yy - ym)).sum()
-                return float(num / denom)
 
             def is_uptrend():
-                ma = sma(C, 20)
+                ma = ind.sma(20)
                 return (not np.isnan(ma[-1]) and not np.isnan(ma[-2])) and ma[-1] > ma[-2] and linreg_slope(C, 30) > 0
 
             def is_downtrend():
-                ma = sma(C, 20)
+                ma = ind.sma(20)
                 return (not np.isnan(ma[-1]) and not np.isnan(ma[-2])) and ma[-1] < ma[-2] and linreg_slope(C, 30) < 0
 
+            # geometri candle dihitung sekali per deret (vektorisasi di bundle)
+            body_arr, range_arr, upper_arr, lower_arr = ind.candle_parts()
+
             def body(i):
-                return abs(C[i] - O[i])
+                return body_arr[i]
 
             def candle_range(i):
-                return H[i] - L[i]
+                return range_arr[i]
 
             def upper_shadow(i):
-                return H[i] - max(O[i], C[i])
+                return upper_arr[i]
 
             def lower_shadow(i):
-                return min(O[i], C[i]) - L[i]
+                return lower_arr[i]
+
+            def shape(func, sign, fallback):
+                # backend talib: bentuk ditentukan recognizer CDL* di bar terakhir; selain itu cek manual
+                sig = ind.cdl(func)
+                if sig is None:
+                    return bool(fallback)
+                v = sig[i]
+                return v > 0 if sign > 0 else (v < 0 if sign < 0 else v != 0)
 
-            atr_arr = atr(H, L, C, 14)
+            atr_arr = ind.atr(14, method='sma')
             curr_atr = float(atr_arr[-1]) if not np.isnan(atr_arr[-1]) else max(1e-6, float(np.nanmean(atr_arr[-20:])))
-            def atr_stop(entry, long=True, mult=2.0):
-                return entry - mult * curr_atr if long else entry + mult * curr_atr
 
             def add(name_base, success_rate, entry, target, stop, bullish, ms, grade="A", conf=None, sig=None, fib_ok=True, smf=75.0):
                 name = f"{name_base}_{'BULLISH' if bullish else 'BEARISH'}"
@@ -4388,9 +3881,6 @@ class UltraPatternDetector:
                     smart_money_flow=float(smf),
                 ))
 
-            def min_target_ok(tp):
-                return abs((tp - current_price) / max(1e-12, current_price)) * 100 >= self.ultra_config.get('min_target_percentage', 3.0)
-
             # Timeframe targets (sesuai basis, disetel konservatif)
             def tf_mult(up=True, base_s=0.04, base_m=0.06, base_l=0.10):
                 if tf in ['1w', '1M']:
@@ -4408,21 +3898,21 @@ class UltraPatternDetector:
                 rng = candle_range(i)
                 if rng > 0:
                     body_ratio = body(i) / rng
-                    if body_ratio < 0.15:
+                    if shape('CDLDOJI', 0, body_ratio < 0.15):
                         mid = (H[i] + L[i]) / 2.0
                         if is_downtrend() and C[i] > mid:
                             mult = tf_mult(up=True)
                             tp = current_price * mult
                             en = max(current_price, H[i]) * 1.001
-                            sl = min(L[i] - 0.2 * curr_atr, atr_stop(en, True, 2.0))
-                            if min_target_ok(tp):
+                            sl = min(L[i] - 0.2 * curr_atr, atr_stop(en, curr_atr, True, 2.0))
+                            if self._min_target_ok(tp, current_price):
                                 add("PERFECT_DOJI_REVERSAL", 85.0, en, tp, sl, True, 79.0)
                         elif is_uptrend() and C[i] < mid:
                             mult = tf_mult(up=False)
                             tp = current_price * mult
                             en = min(current_price, L[i]) * 0.999
-                            sl = min(H[i] * 1.01, atr_stop(en, False, 2.0))
-                            if min_target_ok(tp):
+                            sl = min(H[i] * 1.01, atr_stop(en, curr_atr, False, 2.0))
+                            if self._min_target_ok(tp, current_price):
                                 add("PERFECT_DOJI_REVERSAL", 85.0, en, tp, sl, False, 79.0)
             except Exception:
                 pass  # [1][48]
@@ -4433,12 +3923,12 @@ class UltraPatternDetector:
                     b = body(i); rng = candle_range(i)
                     if rng > 0:
                         ls = lower_shadow(i); us = upper_shadow(i)
-                        if ls >= 2.0 * b and us <= 0.2 * b:
+                        if shape('CDLHAMMER', 1, ls >= 2.0 * b and us <= 0.2 * b):
                             mult = tf_mult(up=True, base_s=0.05)
                             tp = current_price * mult
                             en = max(current_price, H[i]) * 1.001
-                            sl = min(L[i] - 0.3 * curr_atr, atr_stop(en, True, 2.2))
-                            if min_target_ok(tp):
+                            sl = min(L[i] - 0.3 * curr_atr, atr_stop(en, curr_atr, True, 2.2))
+                            if self._min_target_ok(tp, current_price):
                                 add("PERFECT_HAMMER_REVERSAL", 84.0, en, tp, sl, True, 78.0)
             except Exception:
                 pass  # [17][15]
@@ -4449,12 +3939,12 @@ class UltraPatternDetector:
                     b = body(i); rng = candle_range(i)
                     if rng > 0:
                         us = upper_shadow(i); ls = lower_shadow(i)
-                        if us >= 2.0 * b and ls <= 0.2 * b:
+                        if shape('CDLSHOOTINGSTAR', -1, us >= 2.0 * b and ls <= 0.2 * b):
                             mult = tf_mult(up=False, base_s=0.05)
                             tp = current_price * mult
                             en = min(current_price, L[i]) * 0.999
-                            sl = min(H[i] * 1.02, atr_stop(en, False, 2.2))
-                            if min_target_ok(tp):
+                            sl = min(H[i] * 1.02, atr_stop(en, curr_atr, False, 2.2))
+                            if self._min_target_ok(tp, current_price):
                                 add("PERFECT_SHOOTING_STAR", 83.0, en, tp, sl, False, 77.0)
             except Exception:
                 pass  # [2][3]
@@ -4465,12 +3955,12 @@ class UltraPatternDetector:
                     p = i - 1
                     prev_bear = C[p] < O[p]
                     curr_bull = C[i] > O[i]
-                    if prev_bear and curr_bull and O[i] <= C[p] and C[i] >= O[p]:
+                    if shape('CDLENGULFING', 1, prev_bear and curr_bull and O[i] <= C[p] and C[i] >= O[p]):
                         mult = tf_mult(up=True, base_s=0.06)
                         tp = current_price * mult
                         en = max(current_price, H[i]) * 1.001
-                        sl = min(min(L[p], L[i]) - 0.2 * curr_atr, atr_stop(en, True, 2.0))
-                        if min_target_ok(tp):
+                        sl = min(min(L[p], L[i]) - 0.2 * curr_atr, atr_stop(en, curr_atr, True, 2.0))
+                        if self._min_target_ok(tp, current_price):
                             add("PERFECT_ENGULFING_BULL", 82.0, en, tp, sl, True, 76.0)
             except Exception:
                 pass  # [15][6]
@@ -4481,12 +3971,12 @@ class UltraPatternDetector:
                     p = i - 1
                     prev_bull = C[p] > O[p]
                     curr_bear = C[i] < O[i]
-                    if prev_bull and curr_bear and O[i] >= C[p] and C[i] <= O[p]:
+                    if shape('CDLENGULFING', -1, prev_bull and curr_bear and O[i] >= C[p] and C[i] <= O[p]):
                         mult = tf_mult(up=False, base_s=0.06)
                         tp = current_price * mult
                         en = min(current_price, L[i]) * 0.999
-                        sl = min(max(H[p], H[i]) * 1.02, atr_stop(en, False, 2.0))
-                        if min_target_ok(tp):
+                        sl = min(max(H[p], H[i]) * 1.02, atr_stop(en, curr_atr, False, 2.0))
+                        if self._min_target_ok(tp, current_price):
                             add("PERFECT_ENGULFING_BEAR", 81.0, en, tp, sl, False, 75.0)
             except Exception:
                 pass  # [18][9]
@@ -4498,12 +3988,12 @@ class UltraPatternDetector:
                     first_bear = C[c1] < O[c1]
                     second_small = body(c2) <= 0.5 * body(c1)
                     third_bull = C[c3] > O[c3]
-                    if first_bear and second_small and third_bull and C[c3] >= (O[c1] + C[c1]) / 2.0:
+                    if shape('CDLMORNINGSTAR', 1, first_bear and second_small and third_bull and C[c3] >= (O[c1] + C[c1]) / 2.0):
                         mult = tf_mult(up=True, base_s=0.08)
                         tp = current_price * mult
                         en = max(current_price, H[c3]) * 1.001
-                        sl = min(min(L[c1], L[c2], L[c3]) - 0.2 * curr_atr, atr_stop(en, True, 2.2))
-                        if min_target_ok(tp):
+                        sl = min(min(L[c1], L[c2], L[c3]) - 0.2 * curr_atr, atr_stop(en, curr_atr, True, 2.2))
+                        if self._min_target_ok(tp, current_price):
                             add("PERFECT_MORNING_STAR", 80.0, en, tp, sl, True, 74.0)
             except Exception:
                 pass  # [10][15]
@@ -4515,12 +4005,12 @@ class UltraPatternDetector:
                     first_bull = C[c1] > O[c1]
                     second_small = body(c2) <= 0.5 * body(c1)
                     third_bear = C[c3] < O[c3]
-                    if first_bull and second_small and third_bear and C[c3] <= (O[c1] + C[c1]) / 2.0:
+                    if shape('CDLEVENINGSTAR', -1, first_bull and second_small and third_bear and C[c3] <= (O[c1] + C[c1]) / 2.0):
                         mult = tf_mult(up=False, base_s=0.08)
                         tp = current_price * mult
                         en = min(current_price, L[c3]) * 0.999
-                        sl = min(max(H[c1], H[c2], H[c3]) * 1.03, atr_stop(en, False, 2.2))
-                        if min_target_ok(tp):
+                        sl = min(max(H[c1], H[c2], H[c3]) * 1.03, atr_stop(en, curr_atr, False, 2.2))
+                        if self._min_target_ok(tp, current_price):
                             add("PERFECT_EVENING_STAR", 79.0, en, tp, sl, False, 73.0)
             except Exception:
                 pass  # [13][7]
@@ -4531,12 +4021,12 @@ class UltraPatternDetector:
                     b = body(i); rng = candle_range(i)
                     if rng > 0:
                         ls = lower_shadow(i); us = upper_shadow(i)
-                        if ls >= 2.0 * b and us <= 0.2 * b:
+                        if shape('CDLHANGINGMAN', -1, ls >= 2.0 * b and us <= 0.2 * b):
                             mult = tf_mult(up=False, base_s=0.06)
                             tp = current_price * mult
                             en = min(current_price, L[i]) * 0.999
-                            sl = min(H[i] * 1.02, atr_stop(en, False, 2.0))
-                            if min_target_ok(tp):
+                            sl = min(H[i] * 1.02, atr_stop(en, curr_atr, False, 2.0))
+                            if self._min_target_ok(tp, current_price):
                                 add("PERFECT_HANGING_MAN", 78.0, en, tp, sl, False, 72.0)
             except Exception:
                 pass  # [18][1]
@@ -4547,12 +4037,12 @@ class UltraPatternDetector:
                     b = body(i); rng = candle_range(i)
                     if rng > 0:
                         us = upper_shadow(i); ls = lower_shadow(i)
-                        if us >= 2.0 * b and ls <= 0.2 * b:
+                        if shape('CDLINVERTEDHAMMER', 1, us >= 2.0 * b and ls <= 0.2 * b):
                             mult = tf_mult(up=True, base_s=0.06)
                             tp = current_price * mult
                             en = max(current_price, H[i]) * 1.001
-                            sl = min(L[i] - 0.2 * curr_atr, atr_stop(en, True, 2.0))
-                            if min_target_ok(tp):
+                            sl = min(L[i] - 0.2 * curr_atr, atr_stop(en, curr_atr, True, 2.0))
+                            if self._min_target_ok(tp, current_price):
                                 add("PERFECT_INVERTED_HAMMER", 77.0, en, tp, sl, True, 71.0)
             except Exception:
                 pass  # [2][5]
@@ -4565,12 +4055,12 @@ class UltraPatternDetector:
                     curr_bear = C[i] < O[i]
                     mid_prev = (O[p] + C[p]) / 2.0
                     # toleransi gap untuk pasar tanpa gap penuh
-                    if prev_bull and curr_bear and O[i] >= C[p] and C[i] <= mid_prev:
+                    if shape('CDLDARKCLOUDCOVER', -1, prev_bull and curr_bear and O[i] >= C[p] and C[i] <= mid_prev):
                         mult = tf_mult(up=False, base_s=0.05)
                         tp = current_price * mult
                         en = min(current_price, L[i]) * 0.999
-                        sl = min(max(H[p], H[i]) * 1.02, atr_stop(en, False, 2.0))
-                        if min_target_ok(tp):
+                        sl = min(max(H[p], H[i]) * 1.02, atr_stop(en, curr_atr, False, 2.0))
+                        if self._min_target_ok(tp, current_price):
                             add("PERFECT_DARK_CLOUD_COVER", 76.0, en, tp, sl, False, 70.0)
             except Exception:
                 pass  # [53][47]
@@ -4582,12 +4072,12 @@ class UltraPatternDetector:
                     prev_bear = C[p] < O[p]
                     curr_bull = C[i] > O[i]
                     mid_prev = (O[p] + C[p]) / 2.0
-                    if prev_bear and curr_bull and O[i] <= C[p] and C[i] >= mid_prev:
+                    if shape('CDLPIERCING', 1, prev_bear and curr_bull and O[i] <= C[p] and C[i] >= mid_prev):
                         mult = tf_mult(up=True, base_s=0.05)
                         tp = current_price * mult
                         en = max(current_price, H[i]) * 1.001
-                        sl = min(min(L[p], L[i]) - 0.2 * curr_atr, atr_stop(en, True, 2.0))
-                        if min_target_ok(tp):
+                        sl = min(min(L[p], L[i]) - 0.2 * curr_atr, atr_stop(en, curr_atr, True, 2.0))
+                        if self._min_target_ok(tp, current_price):
                             add("PERFECT_PIERCING_PATTERN", 75.0, en, tp, sl, True, 69.0)
             except Exception:
                 pass  # [53][15]
@@ -4599,12 +4089,12 @@ class UltraPatternDetector:
                     prev_bear = C[p] < O[p]
                     curr_small = body(i) <= 0.5 * body(p)
                     inside = min(O[i], C[i]) >= C[p] and max(O[i], C[i]) <= O[p] if O[p] > C[p] else min(O[i], C[i]) >= O[p] and max(O[i], C[i]) <= C[p]
-                    if prev_bear and curr_small and inside:
+                    if shape('CDLHARAMI', 1, prev_bear and curr_small and inside):
                         mult = tf_mult(up=True, base_s=0.04)
                         tp = current_price * mult
                         en = max(current_price, H[i]) * 1.001
-                        sl = min(L[p] - 0.2 * curr_atr, atr_stop(en, True, 2.0))
-                        if min_target_ok(tp):
+                        sl = min(L[p] - 0.2 * curr_atr, atr_stop(en, curr_atr, True, 2.0))
+                        if self._min_target_ok(tp, current_price):
                             add("PERFECT_HARAMI_BULL", 74.0, en, tp, sl, True, 68.0)
             except Exception:
                 pass  # [15][1]
@@ -4616,12 +4106,12 @@ class UltraPatternDetector:
                     prev_bull = C[p] > O[p]
                     curr_small = body(i) <= 0.5 * body(p)
                     inside = min(O[i], C[i]) >= O[p] and max(O[i], C[i]) <= C[p] if C[p] > O[p] else min(O[i], C[i]) >= C[p] and max(O[i], C[i]) <= O[p]
-                    if prev_bull and curr_small and inside:
+                    if shape('CDLHARAMI', -1, prev_bull and curr_small and inside):
                         mult = tf_mult(up=False, base_s=0.04)
                         tp = current_price * mult
                         en = min(current_price, L[i]) * 0.999
-                        sl = min(H[p] * 1.02, atr_stop(en, False, 2.0))
-                        if min_target_ok(tp):
+                        sl = min(H[p] * 1.02, atr_stop(en, curr_atr, False, 2.0))
+                        if self._min_target_ok(tp, current_price):
                             add("PERFECT_HARAMI_BEAR", 73.0, en, tp, sl, False, 67.0)
             except Exception:
                 pass  # [18][1]
@@ -4634,12 +4124,12 @@ class UltraPatternDetector:
                     small_wicks = upper_shadow(c1) <= body(c1)*0.3 and upper_shadow(c2) <= body(c2)*0.3 and upper_shadow(c3) <= body(c3)*0.3
                     inside_opens = O[c2] >= O[c1] and O[c2] <= C[c1] and O[c3] >= O[c2] and O[c3] <= C[c2]
                     higher_closes = C[c1] < C[c2] < C[c3]
-                    if b1 and b2 and b3 and small_wicks and inside_opens and higher_closes:
+                    if shape('CDL3WHITESOLDIERS', 1, b1 and b2 and b3 and small_wicks and inside_opens and higher_closes):
                         mult = tf_mult(up=True, base_s=0.06)
                         tp = current_price * mult
                         en = max(current_price, H[c3]) * 1.001
-                        sl = min(min(L[c1], L[c2], L[c3]) - 0.3 * curr_atr, atr_stop(en, True, 2.2))
-                        if min_target_ok(tp):
+                        sl = min(min(L[c1], L[c2], L[c3]) - 0.3 * curr_atr, atr_stop(en, curr_atr, True, 2.2))
+                        if self._min_target_ok(tp, current_price):
                             add("PERFECT_THREE_WHITE_SOLDIERS", 72.0, en, tp, sl, True, 66.0)
             except Exception:
                 pass  # [21][22]
@@ -4652,12 +4142,12 @@ class UltraPatternDetector:
                     small_wicks = lower_shadow(c1) <= body(c1)*0.3 and lower_shadow(c2) <= body(c2)*0.3 and lower_shadow(c3) <= body(c3)*0.3
                     inside_opens = O[c2] <= O[c1] and O[c2] >= C[c1] and O[c3] <= O[c2] and O[c3] >= C[c2]
                     lower_closes = C[c1] > C[c2] > C[c3]
-                    if b1 and b2 and b3 and small_wicks and inside_opens and lower_closes:
+                    if shape('CDL3BLACKCROWS', -1, b1 and b2 and b3 and small_wicks and inside_opens and lower_closes):
                         mult = tf_mult(up=False, base_s=0.06)
                         tp = current_price * mult
                         en = min(current_price, L[c3]) * 0.999
-                        sl = min(max(H[c1], H[c2], H[c3]) * 1.03, atr_stop(en, False, 2.2))
-                        if min_target_ok(tp):
+                        sl = min(max(H[c1], H[c2], H[c3]) * 1.03, atr_stop(en, curr_atr, False, 2.2))
+                        if self._min_target_ok(tp, current_price):
                             add("PERFECT_THREE_BLACK_CROWS", 71.0, en, tp, sl, False, 65.0)
             except Exception:
                 pass  # [28][34]
@@ -4665,20 +4155,20 @@ class UltraPatternDetector:
             # 16) PERFECT_SPINNING_TOP (arah berlawanan tren)
             try:
                 b = body(i); us = upper_shadow(i); ls = lower_shadow(i)
-                if b > 0 and us > b and ls > b:
+                if shape('CDLSPINNINGTOP', 0, b > 0 and us > b and ls > b):
                     if is_downtrend():
                         mult = tf_mult(up=True, base_s=0.02)
                         tp = current_price * mult
                         en = max(current_price, H[i]) * 1.001
-                        sl = min(L[i] - 0.2 * curr_atr, atr_stop(en, True, 2.0))
-                        if min_target_ok(tp):
+                        sl = min(L[i] - 0.2 * curr_atr, atr_stop(en, curr_atr, True, 2.0))
+                        if self._min_target_ok(tp, current_price):
                             add("PERFECT_SPINNING_TOP", 70.0, en, tp, sl, True, 64.0)
                     elif is_uptrend():
                         mult = tf_mult(up=False, base_s=0.02)
                         tp = current_price * mult
                         en = min(current_price, L[i]) * 0.999
-                        sl = min(H[i] * 1.01, atr_stop(en, False, 2.0))
-                        if min_target_ok(tp):
+                        sl = min(H[i] * 1.01, atr_stop(en, curr_atr, False, 2.0))
+                        if self._min_target_ok(tp, current_price):
                             add("PERFECT_SPINNING_TOP", 70.0, en, tp, sl, False, 64.0)
             except Exception:
                 pass  # [1][2]
@@ -4688,12 +4178,12 @@ class UltraPatternDetector:
                 rng = candle_range(i)
                 if rng > 0:
                     bull_full = C[i] > O[i] and (C[i] - O[i]) / rng >= 0.95
-                    if bull_full:
+                    if shape('CDLMARUBOZU', 1, bull_full):
                         mult = tf_mult(up=True, base_s=0.04)
                         tp = current_price * mult
                         en = max(current_price, H[i]) * 1.001
-                        sl = min(L[i] - 0.2 * curr_atr, atr_stop(en, True, 2.0))
-                        if min_target_ok(tp):
+                        sl = min(L[i] - 0.2 * curr_atr, atr_stop(en, curr_atr, True, 2.0))
+                        if self._min_target_ok(tp, current_price):
                             add("PERFECT_MARUBOZU_BULL", 75.0, en, tp, sl, True, 69.0)
             except Exception:
                 pass  # [46][55]
@@ -4703,12 +4193,12 @@ class UltraPatternDetector:
                 rng = candle_range(i)
                 if rng > 0:
                     bear_full = C[i] < O[i] and (O[i] - C[i]) / rng >= 0.95
-                    if bear_full:
+                    if shape('CDLMARUBOZU', -1, bear_full):
                         mult = tf_mult(up=False, base_s=0.04)
                         tp = current_price * mult
                         en = min(current_price, L[i]) * 0.999
-                        sl = min(H[i] * 1.02, atr_stop(en, False, 2.0))
-                        if min_target_ok(tp):
+                        sl = min(H[i] * 1.02, atr_stop(en, curr_atr, False, 2.0))
+                        if self._min_target_ok(tp, current_price):
                             add("PERFECT_MARUBOZU_BEAR", 74.0, en, tp, sl, False, 68.0)
             except Exception:
                 pass  # [49][43]
@@ -4722,8 +4212,8 @@ class UltraPatternDetector:
                         mult = tf_mult(up=False, base_s=0.03)
                         tp = current_price * mult
                         en = min(current_price, L[i]) * 0.999
-                        sl = min(max(H[p], H[i]) * 1.01, atr_stop(en, False, 2.0))
-                        if min_target_ok(tp):
+                        sl = min(max(H[p], H[i]) * 1.01, atr_stop(en, curr_atr, False, 2.0))
+                        if self._min_target_ok(tp, current_price):
                             add("PERFECT_TWEEZER_TOP", 73.0, en, tp, sl, False, 67.0)
             except Exception:
                 pass  # [26][29]
@@ -4737,8 +4227,8 @@ class UltraPatternDetector:
                         mult = tf_mult(up=True, base_s=0.03)
                         tp = current_price * mult
                         en = max(current_price, H[i]) * 1.001
-                        sl = min(min(L[p], L[i]) - 0.2 * curr_atr, atr_stop(en, True, 2.0))
-                        if min_target_ok(tp):
+                        sl = min(min(L[p], L[i]) - 0.2 * curr_atr, atr_stop(en, curr_atr, True, 2.0))
+                        if self._min_target_ok(tp, current_price):
                             add("PERFECT_TWEEZER_BOTTOM", 72.0, en, tp, sl, True, 66.0)
             except Exception:
                 pass  # [26][35]
@@ -4746,7 +4236,7 @@ class UltraPatternDetector:
         except Exception as e:
             logger.debug(f"Candlestick pattern detection error: {e}")
         return patterns
-    def _detect_oscillator_patterns_stable(self, opens, highs, lows, closes, current_price, tf) -> List[UltraPatternResult]:
+    def _detect_oscillator_patterns_stable(self, opens, highs, lows, closes, current_price, tf, indicators=None) -> List[UltraPatternResult]:
         """Stable Momentum Oscillator (15 pola) - RSI, MACD, Stochastic, Williams %R, CCI"""
         patterns = []
         try:
@@ -4759,81 +4249,11 @@ class UltraPatternDetector:
 
             if len(closes) < 30 or len(highs) < 20 or len(lows) < 20:
                 return patterns
+            ind = ensure_bundle(indicators, opens, highs, lows, closes, None)
 
             min_target_pct = float(self.ultra_config.get('min_target_percentage', 3.0))
 
-            # ---------------- Indicator helpers (EMA/RSI/MACD/Stoch/%R/CCI) ----------------
-            def ema(x, n):
-                x = np.asarray(x, dtype=float)
-                if len(x) < n:
-                    return np.array(x, dtype=float)
-                alpha = 2.0 / (n + 1.0)
-                out = np.zeros_like(x, dtype=float)
-                out[:n] = np.mean(x[:n])
-                for i in range(n, len(x)):
-                    out[i] = alpha * x[i] + (1 - alpha) * out[i-1]
-                return out
-
-            def rsi14(x):
-                x = np.asarray(x, dtype=float)
-                if len(x) < 15:
-                    return np.zeros_like(x)
-                delta = np.diff(x, prepend=x)
-                gain = np.where(delta > 0, delta, 0.0)
-                loss = np.where(delta < 0, -delta, 0.0)
-                avg_gain = ema(gain, 14)
-                avg_loss = ema(loss, 14)
-                eps = 1e-10
-                rs = np.where(avg_loss == 0, np.inf, avg_gain / (avg_loss + eps))
-                rsi = 100.0 - (100.0 / (1.0 + rs))
-                return rsi
-
-            def macd_12_26_9(x):
-                fast = ema(x, 12)
-                slow = ema(x, 26)
-                macd_line = fast - slow
-                signal = ema(macd_line, 9)
-                hist = macd_line - signal
-                return macd_line, signal, hist
-
-            def rolling_max(arr, n):
-                out = np.full_like(arr, np.nan, dtype=float)
-                for i in range(len(arr)):
-                    j0 = max(0, i - n + 1)
-                    out[i] = np.max(arr[j0:i+1])
-                return out
-
-            def rolling_min(arr, n):
-                out = np.full_like(arr, np.nan, dtype=float)
-                for i in range(len(arr)):
-                    j0 = max(0, i - n + 1)
-                    out[i] = np.min(arr[j0:i+1])
-                return out
-
-            def stochastic_14_3(h, l, c):
-                hh = rolling_max(h, 14)
-                ll = rolling_min(l, 14)
-                denom = (hh - ll)
-                denom[denom == 0] = np.nan
-                k = (c - ll) / denom * 100.0
-                # simple smoothing %D 3
-                d = np.copy(k)
-                for i in range(len(k)):
-                    j0 = max(0, i - 2)
-                    d[i] = np.nanmean(k[j0:i+1])
-                k = np.nan_to_num(k, nan=50.0)
-                d = np.nan_to_num(d, nan=50.0)
-                return k, d
-
-            def williams_r_14(h, l, c):
-                hh = rolling_max(h, 14)
-                ll = rolling_min(l, 14)
-                denom = (hh - ll)
-                denom[denom == 0] = np.nan
-                wr = -100.0 * (hh - c) / denom
-                wr = np.nan_to_num(wr, nan=-50.0)
-                return wr  # 0..-100
-
+            # ---------------- Indicator helpers (CCI; RSI, MACD, Stoch & %R dari bundle) ----------------
             def cci_20(h, l, c):
                 tp = (h + l + c) / 3.0
                 cci = np.zeros_like(tp)
@@ -4849,30 +4269,11 @@ class UltraPatternDetector:
                     cci[i] = (tp[i] - sma) / denom
                 return cci
 
-            def crossed_above(a, b):
-                return len(a) >= 2 and len(b) >= 2 and a[-2] <= b[-2] and a[-1] > b[-1]
-
-            def crossed_below(a, b):
-                return len(a) >= 2 and len(b) >= 2 and a[-2] >= b[-2] and a[-1] < b[-1]
-
-            def vol_spike(vol, factor=1.1, n=20):
-                if len(vol) < 2:
-                    return False
-                base = np.mean(vol[-min(n, len(vol)-1)-1:-1]) if len(vol) > 1 else np.mean(vol)
-                return vol[-1] > factor * base
-
             def local_extrema(series, lookback=80, w=3, mode='min'):
                 n = len(series)
                 start = max(0, n - lookback)
-                idxs = []
-                for i in range(start + w, n - w):
-                    window = series[i-w:i+w+1]
-                    if mode == 'min':
-                        if series[i] == np.min(window):
-                            idxs.append(i)
-                    else:
-                        if series[i] == np.max(window):
-                            idxs.append(i)
+                idxs = find_pivots(series, w, w, 'low' if mode == 'min' else 'high')
+                idxs = idxs[idxs >= start + w].tolist()
                 return idxs[-2:] if len(idxs) >= 2 else []
 
             def bullish_div(price, osc):
@@ -4905,24 +4306,19 @@ class UltraPatternDetector:
                 return cp * (1.0 + (pct/100.0)) if bull else cp * (1.0 - (pct/100.0))
 
             # compute indicators
-            rsi = rsi14(closes)
-            macd_line, macd_signal, macd_hist = macd_12_26_9(closes)
-            k, d = stochastic_14_3(highs, lows, closes)
-            wr = williams_r_14(highs, lows, closes)
+            rsi = ind.rsi(14, method='ema')
+            macd_line, macd_signal, macd_hist = ind.macd(12, 26, 9)
+            k, d = ind.stochastic(14, 3)
+            k = np.nan_to_num(k, nan=50.0)  # warm-up / range nol dianggap netral
+            d = np.nan_to_num(d, nan=50.0)
+            wr = np.nan_to_num(ind.williams_r(14), nan=-50.0)  # 0..-100
             cci = cci_20(highs, lows, closes)
 
             swing_low  = last_swing_low(lows, 30)
             swing_high = last_swing_high(highs, 30)
 
-            def get_cfg(name):
-                meta = self.ultra_patterns.get('MOMENTUM_OSCILLATOR_ULTRA', {}).get('patterns', {}).get(name, {})
-                sr  = float(meta.get('success_rate', 75))
-                rel = float(meta.get('reliability', 0.75))
-                avg = float(meta.get('avg_gain', 15))
-                return sr, rel, avg
-
             def append_result(name, bull, entry_mul_up=1.001, entry_mul_dn=0.999, sl_pad_up=0.98, sl_pad_dn=1.02, vol_ok=True):
-                sr, rel, avg = get_cfg(name)
+                sr, rel, avg = self._pattern_meta('MOMENTUM_OSCILLATOR_ULTRA', name)
                 target = pct_target(current_price, avg, bull=bull)
                 target_pct = abs((target - current_price) / current_price * 100.0)
                 if target_pct >= min_target_pct:
@@ -5096,7 +4492,7 @@ class UltraPatternDetector:
         except Exception as e:
             logger.debug(f"Oscillator detection error: {e}")
         return patterns
-    def _detect_moving_patterns_stable(self, opens, highs, lows, closes, volumes, current_price, tf) -> List[UltraPatternResult]:
+    def _detect_moving_patterns_stable(self, opens, highs, lows, closes, volumes, current_price, tf, indicators=None) -> List[UltraPatternResult]:
         """Stable Moving Average patterns (12) - SMA, EMA, ALMA, HMA, VWMA, LWMA"""
         patterns = []
         try:
@@ -5110,38 +4506,13 @@ class UltraPatternDetector:
 
             if len(closes) < 210 or len(volumes) < 50:
                 return patterns
+            ind = ensure_bundle(indicators, opens, highs, lows, closes, volumes)
 
             min_target_pct = float(self.ultra_config.get('min_target_percentage', 3.0))
 
-            # ---------------- helpers ----------------
-            def sma(x, n):
-                if len(x) < n:
-                    return np.full_like(x, np.nan, dtype=float)
-                out = np.full_like(x, np.nan, dtype=float)
-                w = np.ones(n) / n
-                out[n-1:] = np.convolve(x, w, mode='valid')
-                return out
-
-            def ema(x, n):
-                x = np.asarray(x, dtype=float)
-                if len(x) == 0:
-                    return x
-                alpha = 2.0 / (n + 1.0)
-                out = np.zeros_like(x, dtype=float)
-                out = x
-                for i in range(1, len(x)):
-                    out[i] = alpha * x[i] + (1 - alpha) * out[i-1]
-                return out
-
+            # ---------------- helpers (SMA/EMA/VWMA dari bundle) ----------------
             def wma(x, n):
-                if len(x) < n:
-                    return np.full_like(x, np.nan, dtype=float)
-                out = np.full_like(x, np.nan, dtype=float)
-                weights = np.arange(1, n+1, dtype=float)
-                for i in range(n-1, len(x)):
-                    window = x[i-n+1:i+1]
-                    out[i] = np.dot(window, weights) / weights.sum()
-                return out
+                return rolling_wma(x, n)
 
             def hma(x, n=55):
                 # HMA = WMA(2*WMA(n/2) - WMA(n), sqrt(n))
@@ -5164,49 +4535,11 @@ class UltraPatternDetector:
                     out[i] = np.dot(w, window_vals)
                 return out
 
-            def vwma(c, v, n):
-                if len(c) < n or len(v) < n:
-                    return np.full_like(c, np.nan, dtype=float)
-                out = np.full_like(c, np.nan, dtype=float)
-                for i in range(n-1, len(c)):
-                    pc = c[i-n+1:i+1]
-                    pv = v[i-n+1:i+1]
-                    denom = pv.sum()
-                    out[i] = (pc * pv).sum() / denom if denom != 0 else np.nan
-                return out
-
-            def crossed_above(a, b):
-                return len(a) >= 2 and len(b) >= 2 and a[-2] <= b[-2] and a[-1] > b[-1]
-
-            def crossed_below(a, b):
-                return len(a) >= 2 and len(b) >= 2 and a[-2] >= b[-2] and a[-1] < b[-1]
-
-            def vol_spike(v, factor=1.2, n=20):
-                base = np.mean(v[-n-1:-1]) if len(v) > n else np.mean(v)
-                return v[-1] > factor * base
-
-            def vol_dryup(v, factor=0.8, n=20):
-                base = np.mean(v[-n-1:-1]) if len(v) > n else np.mean(v)
-                return v[-1] < factor * base
-
-            def swing_low(lw, lookback=30):
-                return float(np.min(lw[-lookback:]))
-
-            def swing_high(hh, lookback=30):
-                return float(np.max(hh[-lookback:]))
-
-            def get_cfg(name):
-                meta = self.ultra_patterns.get('MOVING_AVERAGE_ULTRA', {}).get('patterns', {}).get(name, {})
-                sr  = float(meta.get('success_rate', 75))
-                rel = float(meta.get('reliability', 0.75))
-                avg = float(meta.get('avg_gain', 15))
-                return sr, rel, avg
-
             def target_from_avg(cp, avg, bull=True):
                 return cp * (1.0 + avg/100.0) if bull else cp * (1.0 - avg/100.0)
 
             def append_result(name, bull, entry_mul_up=1.001, entry_mul_dn=0.999, sl_pad_up=0.98, sl_pad_dn=1.02, grade="Triple_Kill"):
-                sr, rel, avg = get_cfg(name)
+                sr, rel, avg = self._pattern_meta('MOVING_AVERAGE_ULTRA', name)
                 tgt = target_from_avg(current_price, avg, bull=bull)
                 tgt_pct = abs((tgt - current_price) / current_price * 100.0)
                 if tgt_pct >= min_target_pct:
@@ -5232,16 +4565,16 @@ class UltraPatternDetector:
                     ))
 
             # ---------------- precompute common MAs ----------------
-            SMA50  = sma(closes, 50)
-            SMA200 = sma(closes, 200)
-            EMA8   = ema(closes, 8)
-            EMA12  = ema(closes, 12)
-            EMA21  = ema(closes, 21)
-            EMA26  = ema(closes, 26)
-            EMA50  = ema(closes, 50)
-            EMA55  = ema(closes, 55)
-            VWMA20 = vwma(closes, volumes, 20)
-            VWMA50 = vwma(closes, volumes, 50)
+            SMA50  = ind.sma(50)
+            SMA200 = ind.sma(200)
+            EMA8   = ind.ema(8)
+            EMA12  = ind.ema(12)
+            EMA21  = ind.ema(21)
+            EMA26  = ind.ema(26)
+            EMA50  = ind.ema(50)
+            EMA55  = ind.ema(55)
+            VWMA20 = ind.vwma(20)
+            VWMA50 = ind.vwma(50)
             LWMA20 = wma(closes, 20)
             HMA55  = hma(closes, 55)
             ALMA9  = alma(closes, 9, offset=0.85, sigma=6)
@@ -5375,7 +4708,7 @@ class UltraPatternDetector:
         except Exception as e:
             logger.debug(f"Moving Average detection error: {e}")
         return patterns
-    def _detect_volatility_patterns_stable(self, opens, highs, lows, closes, volumes, current_price, tf) -> List[UltraPatternResult]:
+    def _detect_volatility_patterns_stable(self, opens, highs, lows, closes, volumes, current_price, tf, indicators=None) -> List[UltraPatternResult]:
         """Stable Volatility Band patterns (10) - Bollinger, Keltner, Donchian, ATR, StdDev"""
         patterns = []
         try:
@@ -5390,103 +4723,17 @@ class UltraPatternDetector:
             n = len(closes)
             if n < 60:
                 return patterns
+            ind = ensure_bundle(indicators, opens, highs, lows, closes, volumes)
 
             min_target_pct = float(self.ultra_config.get('min_target_percentage', 3.0))
 
-            # ---------------- helpers ----------------
-            def sma(x, p):
-                if len(x) < p:
-                    return np.full_like(x, np.nan, dtype=float)
-                out = np.full_like(x, np.nan, dtype=float)
-                w = np.ones(p)/p
-                out[p-1:] = np.convolve(x, w, mode='valid')
-                return out
-
-            def ema(x, p):
-                x = np.asarray(x, dtype=float)
-                if len(x) == 0:
-                    return x
-                alpha = 2.0 / (p + 1.0)
-                out = np.zeros_like(x, dtype=float)
-                out = x
-                for i in range(1, len(x)):
-                    out[i] = alpha * x[i] + (1 - alpha) * out[i-1]
-                return out
-
-            def true_range(h, l, c):
-                prev_c = np.roll(c, 1)
-                prev_c = c
-                tr1 = h - l
-                tr2 = np.abs(h - prev_c)
-                tr3 = np.abs(l - prev_c)
-                return np.maximum(tr1, np.maximum(tr2, tr3))
-
-            def atr(x_h, x_l, x_c, p=14):
-                tr = true_range(x_h, x_l, x_c)
-                return ema(tr, p)
-
-            def stddev(x, p=20):
-                if len(x) < p:
-                    return np.full_like(x, np.nan, dtype=float)
-                out = np.full_like(x, np.nan, dtype=float)
-                for i in range(p-1, len(x)):
-                    out[i] = np.std(x[i-p+1:i+1], ddof=0)
-                return out
-
-            def bollinger(c, p=20, k=2.0):
-                mid = sma(c, p)
-                sd  = stddev(c, p)
-                upper = mid + k * sd
-                lower = mid - k * sd
-                return mid, upper, lower, sd
-
-            def keltner(h, l, c, p=20, m=1.5):
-                mid = ema(c, p)
-                xatr = atr(h, l, c, p)
-                upper = mid + m * xatr
-                lower = mid - m * xatr
-                return mid, upper, lower, xatr
-
-            def donchian(h, l, p=20):
-                if len(h) < p or len(l) < p:
-                    up = np.full_like(h, np.nan, dtype=float)
-                    dn = np.full_like(l, np.nan, dtype=float)
-                    md = np.full_like(h, np.nan, dtype=float)
-                    return up, dn, md
-                up = np.full_like(h, np.nan, dtype=float)
-                dn = np.full_like(l, np.nan, dtype=float)
-                for i in range(p-1, len(h)):
-                    up[i] = np.max(h[i-p+1:i+1])
-                    dn[i] = np.min(l[i-p+1:i+1])
-                md = (up + dn) / 2.0
-                return up, dn, md
-
-            def crossed_above(a, b):
-                return len(a) >= 2 and len(b) >= 2 and a[-2] <= b[-2] and a[-1] > b[-1]
-
-            def crossed_below(a, b):
-                return len(a) >= 2 and len(b) >= 2 and a[-2] >= b[-2] and a[-1] < b[-1]
-
-            def vol_spike(v, factor=1.2, p=20):
-                base = np.mean(v[-p-1:-1]) if len(v) > p else np.mean(v)
-                return v[-1] > factor * base
-
-            def vol_dryup(v, factor=0.8, p=20):
-                base = np.mean(v[-p-1:-1]) if len(v) > p else np.mean(v)
-                return v[-1] < factor * base
-
-            def get_cfg(name):
-                meta = self.ultra_patterns.get('VOLATILITY_BAND_ULTRA', {}).get('patterns', {}).get(name, {})
-                sr  = float(meta.get('success_rate', 75))
-                rel = float(meta.get('reliability', 0.75))
-                avg = float(meta.get('avg_gain', 15))
-                return sr, rel, avg
+            # ---------------- helpers (Bollinger/Keltner/ATR dari bundle) ----------------
 
             def tprice(cp, pct, bull=True):
                 return cp * (1.0 + pct/100.0) if bull else cp * (1.0 - pct/100.0)
 
             def append_result(name, bull, entry_mul_up=1.001, entry_mul_dn=0.999, sl_pad_up=0.98, sl_pad_dn=1.02, grade="Killing_Spree"):
-                sr, rel, avg = get_cfg(name)
+                sr, rel, avg = self._pattern_meta('VOLATILITY_BAND_ULTRA', name)
                 tgt = tprice(current_price, avg, bull=bull)
                 tgt_pct = abs((tgt - current_price) / current_price * 100.0)
                 if tgt_pct >= min_target_pct:
@@ -5512,10 +4759,10 @@ class UltraPatternDetector:
                     ))
 
             # ---------------- precompute bands ----------------
-            BB_mid, BB_up, BB_dn, BB_sd = bollinger(closes, 20, 2.0)
-            KC_mid, KC_up, KC_dn, ATR20 = keltner(highs, lows, closes, 20, 1.5)
-            DC_up, DC_dn, DC_mid = donchian(highs, lows, 20)
-            ATR14 = atr(highs, lows, closes, 14)
+            BB_mid, BB_up, BB_dn, BB_sd = ind.bollinger(20, 2.0)
+            KC_mid, KC_up, KC_dn, ATR20 = ind.keltner(20, 1.5, atr_method='ema')
+            DC_up, DC_dn, DC_mid = ind.donchian(20)
+            ATR14 = ind.atr(14, method='ema')
 
             # BandWidth (persentase)
             BBW = (BB_up - BB_dn) / np.where(BB_mid != 0, BB_mid, np.nan)
@@ -5681,7 +4928,7 @@ class UltraPatternDetector:
             logger.debug(f"Volatility Band detection error: {e}")
         return patterns
     def _detect_combination_patterns_stable(self,
-        opens, highs, lows, closes, volumes, current_price, tf, base_patterns) -> List[UltraPatternResult]:
+        opens, highs, lows, closes, volumes, current_price, tf, base_patterns, indicators=None) -> List[UltraPatternResult]:
         """Stable Combination Patterns (20) - Confluence across categories"""
         patterns = []
         try:
@@ -5696,67 +4943,10 @@ class UltraPatternDetector:
             if len(closes) < 60:
                 return patterns
 
+            ind = ensure_bundle(indicators, opens, highs, lows, closes, volumes)
             min_target_pct = float(self.ultra_config.get('min_target_percentage', 3.0))
 
             # ---------- helpers ----------
-            def ema(x, n):
-                x = np.asarray(x, dtype=float)
-                if len(x) == 0:
-                    return x
-                alpha = 2.0 / (n + 1.0)
-                out = np.zeros_like(x, dtype=float)
-                out = x
-                for i in range(1, len(x)):
-                    out[i] = alpha * x[i] + (1 - alpha) * out[i-1]
-                return out
-
-            def rsi14(x):
-                x = np.asarray(x, dtype=float)
-                if len(x) < 15:
-                    return np.zeros_like(x)
-                d = np.diff(x, prepend=x)
-                gain = np.where(d > 0, d, 0.0)
-                loss = np.where(d < 0, -d, 0.0)
-                ag = ema(gain, 14)
-                al = ema(loss, 14)
-                eps = 1e-10
-                rs = np.where(al == 0, np.inf, ag / (al + eps))
-                return 100.0 - (100.0 / (1.0 + rs))
-
-            def macd_12_26_9(x):
-                fast = ema(x, 12); slow = ema(x, 26)
-                macd = fast - slow
-                sig  = ema(macd, 9)
-                hist = macd - sig
-                return macd, sig, hist
-
-            def bollinger(c, p=20, k=2.0):
-                if len(c) < p:
-                    mid = np.full_like(c, np.nan)
-                    sd  = np.full_like(c, np.nan)
-                else:
-                    mid = np.convolve(c, np.ones(p)/p, mode='same')
-                    # simple running std
-                    sd = np.full_like(c, np.nan, dtype=float)
-                    half = p//2
-                    for i in range(len(c)):
-                        j0 = max(0, i-half); j1 = min(len(c), i+half+1)
-                        sd[i] = np.std(c[j0:j1]) if j1-j0>1 else 0.0
-                up = mid + k*sd
-                dn = mid - k*sd
-                return mid, up, dn, sd
-
-            def atr(h, l, c, p=14):
-                prev_c = np.roll(c, 1); prev_c=c
-                tr = np.maximum(h-l, np.maximum(np.abs(h-prev_c), np.abs(l-prev_c)))
-                # Wilder EMA approximation
-                alpha = 1.0/p
-                out = np.zeros_like(tr, dtype=float)
-                out = tr
-                for i in range(1, len(tr)):
-                    out[i] = out[i-1] + alpha*(tr[i] - out[i-1])
-                return out
-
             def fib_levels(hh, ll):
                 rng = hh - ll
                 return {
@@ -5769,73 +4959,35 @@ class UltraPatternDetector:
                     '1618': hh + 0.618*rng
                 }
 
-            def near(a, b, tol=0.01):
-                return abs(a-b)/max(1e-12, abs(b)) <= tol
-
-            def crossed_above(a, b):
-                return len(a)>=2 and len(b)>=2 and a[-2]<=b[-2] and a[-1]>b[-1]
-
-            def crossed_below(a, b):
-                return len(a)>=2 and len(b)>=2 and a[-2]>=b[-2] and a[-1]<b[-1]
-
-            def vol_spike(v, factor=1.2, n=20):
-                base = np.mean(v[-n-1:-1]) if len(v)>n else np.mean(v)
-                return v[-1] > factor*base
-
-            def swing_low(lw, lookback=30):
-                return float(np.min(lw[-lookback:]))
-
-            def swing_high(hh, lookback=30):
-                return float(np.max(hh[-lookback:]))
-
             # Mini Ichimoku (untuk Kumo breakout konfirmasi arah)
             def ichimoku_cloud(h, l, c, tenkan=9, kijun=26, spanb=52):
-                conv = (np.max(h[-tenkan:]) + np.min(l[-tenkan:]))/2.0 if len(c)>=tenkan else c[-1]
-                base = (np.max(h[-kijun:]) + np.min(l[-kijun:]))/2.0 if len(c)>=kijun else c[-1]
+                tk, kj, _, sb = ind.ichimoku(tenkan, kijun, spanb)
+                conv = tk[-1] if len(c)>=tenkan else c[-1]
+                base = kj[-1] if len(c)>=kijun else c[-1]
                 spanA = (conv + base)/2.0
-                spanB = (np.max(h[-spanb:]) + np.min(l[-spanb:]))/2.0 if len(c)>=spanb else c[-1]
+                spanB = sb[-1] if len(c)>=spanb else c[-1]
                 cloud_top = max(spanA, spanB)
                 cloud_bot = min(spanA, spanB)
                 return conv, base, cloud_top, cloud_bot
 
             # Volume Profile POC sederhana (histogram volume-by-price kasar)
-            def rough_poc(close, vol, bins=24, lookback=120):
-                xs = close[-lookback:]; vs = vol[-lookback:]
-                if len(xs) < 10: return None
-                lo, hi = np.min(xs), np.max(xs)
-                if hi <= lo: return None
-                edges = np.linspace(lo, hi, bins+1)
-                idxs = np.digitize(xs, edges) - 1
-                acc = np.zeros(bins, dtype=float)
-                for i,ix in enumerate(idxs):
-                    if 0<=ix<bins: acc[ix]+=vs[i]
-                m = np.argmax(acc)
-                poc_price = (edges[m] + edges[m+1])/2.0
-                return poc_price
 
             # Parse base patterns presence
             have = set(p.name for p in base_patterns)
 
             # Compute indicators
-            RSI  = rsi14(closes)
-            MACD, MACDsig, MACDhist = macd_12_26_9(closes)
-            BBmid, BBup, BBdn, BBsd = bollinger(closes, 20, 2.0)
-            ATR14 = atr(highs, lows, closes, 14)
+            RSI  = ind.rsi(14, method='ema')
+            MACD, MACDsig, MACDhist = ind.macd(12, 26, 9)
+            BBmid, BBup, BBdn, BBsd = ind.bollinger(20, 2.0)
+            ATR14 = ind.atr(14)
             conv, base, kumo_top, kumo_bot = ichimoku_cloud(highs, lows, closes)
             POC = rough_poc(closes, volumes, bins=24, lookback=150)
 
-            def get_cfg(name):
-                meta = self.ultra_patterns.get('PATTERN_COMBINATION_ULTRA', {}).get('patterns', {}).get(name, {})
-                sr  = float(meta.get('success_rate', 75))
-                rel = float(meta.get('reliability', 0.75))
-                avg = float(meta.get('avg_gain', 15))
-                return sr, rel, avg
-
             def tgt_from_avg(avg, bull=True):
                 return current_price * (1.0 + avg/100.0) if bull else current_price * (1.0 - avg/100.0)
 
             def put(name, bull, entry_up=1.001, entry_dn=0.999, sl_up=0.98, sl_dn=1.02, grade="ULTIMATE"):
-                sr, rel, avg = get_cfg(name)
+                sr, rel, avg = self._pattern_meta('PATTERN_COMBINATION_ULTRA', name)
                 tgt = tgt_from_avg(avg, bull=bull)
                 tpct = abs((tgt - current_price)/current_price*100.0)
                 if tpct >= min_target_pct:
@@ -5913,7 +5065,7 @@ class UltraPatternDetector:
             try:
                 hs_present = any("HEAD_SHOULDERS" in n for n in have)
                 # gunakan ema 50/200 sebagai proxy MA cross arah
-                EMA50 = ema(closes, 50); EMA200 = ema(closes, 200)
+                EMA50 = ind.ema(50); EMA200 = ind.ema(200)
                 cross_up = crossed_above(EMA50, EMA200)
                 cross_dn = crossed_below(EMA50, EMA200)
                 if hs_present and (cross_up or cross_dn):
@@ -5975,7 +5127,7 @@ class UltraPatternDetector:
                 macd_bull = crossed_above(MACD, MACDsig)
                 macd_bear = crossed_below(MACD, MACDsig)
                 if macd_bull:
-                    sr, rel, avg = get_cfg('PERFECT_MULTI_TF_RISK_ADJUSTED')
+                    sr, rel, avg = self._pattern_meta('PATTERN_COMBINATION_ULTRA', 'PERFECT_MULTI_TF_RISK_ADJUSTED')
                     tgt = tgt_from_avg(avg, bull=True)
                     if abs((tgt-current_price)/current_price*100) >= min_target_pct:
                         patterns.append(UltraPatternResult(
@@ -5986,7 +5138,7 @@ class UltraPatternDetector:
                             pattern_grade="ULTIMATE", market_structure_score=94.0, fibonacci_confluence=True, smart_money_flow=88.0
                         ))
                 elif macd_bear:
-                    sr, rel, avg = get_cfg('PERFECT_MULTI_TF_RISK_ADJUSTED')
+                    sr, rel, avg = self._pattern_meta('PATTERN_COMBINATION_ULTRA', 'PERFECT_MULTI_TF_RISK_ADJUSTED')
                     tgt = tgt_from_avg(avg, bull=False)
                     if abs((tgt-current_price)/current_price*100) >= min_target_pct:
                         patterns.append(UltraPatternResult(
@@ -6016,7 +5168,7 @@ class UltraPatternDetector:
                 macd_bull = crossed_above(MACD, MACDsig)
                 macd_bear = crossed_below(MACD, MACDsig)
                 if macd_bull or macd_bear:
-                    sr, rel, avg = get_cfg('PERFECT_ADAPTIVE_STOP_COMBO')
+                    sr, rel, avg = self._pattern_meta('PATTERN_COMBINATION_ULTRA', 'PERFECT_ADAPTIVE_STOP_COMBO')
                     tgt = tgt_from_avg(avg, bull=macd_bull)
                     if abs((tgt-current_price)/current_price*100) >= min_target_pct:
                         sl = current_price - 1.8*ATR14[-1] if macd_bull else current_price + 1.8*ATR14[-1]
@@ -6103,7 +5255,7 @@ class UltraPatternDetector:
             logger.debug(f"Combination detection error: {e}")
         return patterns
     def _detect_godlike_patterns_stable(self,
-        opens, highs, lows, closes, volumes, current_price, tf, base_patterns) -> List[UltraPatternResult]:
+        opens, highs, lows, closes, volumes, current_price, tf, base_patterns, indicators=None) -> List[UltraPatternResult]:
         """Stable GODLIKE Combinations (17) - puncak konfluensi multi-kategori"""
         patterns = []
         try:
@@ -6118,178 +5270,49 @@ class UltraPatternDetector:
             if len(closes) < 120 or len(volumes) < 60:
                 return patterns
 
+            ind = ensure_bundle(indicators, opens, highs, lows, closes, volumes)
             min_target_pct = float(self.ultra_config.get('min_target_percentage', 3.0))
 
             # ---------------- helpers umum ----------------
-            def ema(x, n):
-                x = np.asarray(x, dtype=float)
-                if len(x) == 0:
-                    return x
-                alpha = 2.0 / (n + 1.0)
-                out = np.zeros_like(x, dtype=float)
-                out = x
-                for i in range(1, len(x)):
-                    out[i] = alpha * x[i] + (1 - alpha) * out[i-1]
-                return out
-
-            def sma(x, n):
-                if len(x) < n:
-                    return np.full_like(x, np.nan, dtype=float)
-                out = np.full_like(x, np.nan, dtype=float)
-                w = np.ones(n)/n
-                out[n-1:] = np.convolve(x, w, mode='valid')
-                return out
-
-            def rsi14(x):
-                x = np.asarray(x, dtype=float)
-                if len(x) < 15:
-                    return np.zeros_like(x)
-                d = np.diff(x, prepend=x)
-                gain = np.where(d > 0, d, 0.0)
-                loss = np.where(d < 0, -d, 0.0)
-                ag, al = ema(gain, 14), ema(loss, 14)
-                eps = 1e-10
-                rs = np.where(al == 0, np.inf, ag / (al + eps))
-                return 100.0 - (100.0 / (1.0 + rs))
-
-            def macd_12_26_9(x):
-                fast, slow = ema(x, 12), ema(x, 26)
-                macd = fast - slow
-                sig  = ema(macd, 9)
-                hist = macd - sig
-                return macd, sig, hist
-
-            def true_range(h, l, c):
-                prev_c = np.roll(c, 1); prev_c = c
-                return np.maximum(h-l, np.maximum(np.abs(h-prev_c), np.abs(l-prev_c)))
-
-            def atr(h, l, c, p=14):
-                tr = true_range(h, l, c)
-                # Wilder EMA
-                alpha = 1.0/p
-                out = np.zeros_like(tr, dtype=float)
-                out = tr
-                for i in range(1, len(tr)):
-                    out[i] = out[i-1] + alpha*(tr[i] - out[i-1])
-                return out
-
-            def stddev(x, p=20):
-                if len(x) < p:
-                    return np.full_like(x, np.nan, dtype=float)
-                out = np.full_like(x, np.nan, dtype=float)
-                for i in range(p-1, len(x)):
-                    out[i] = np.std(x[i-p+1:i+1], ddof=0)
-                return out
-
-            def bollinger(c, p=20, k=2.0):
-                mid = sma(c, p)
-                sd  = stddev(c, p)
-                up  = mid + k*sd
-                dn  = mid - k*sd
-                return mid, up, dn, sd
-
-            def keltner(h, l, c, p=20, m=1.5):
-                mid = ema(c, p)
-                xatr = atr(h, l, c, p)
-                up = mid + m*xatr
-                dn = mid - m*xatr
-                return mid, up, dn, xatr
-
             def vwap_rolling(tp, v, n=20):
                 # VWAP intraday didefinisikan harian, namun untuk proxy deteksi kita gunakan rolling n-bar (aman untuk multi-timeframe) [1][5]
                 if len(tp) < n or np.sum(v[-n:]) == 0:
                     return np.full_like(tp, np.nan, dtype=float)
-                out = np.full_like(tp, np.nan, dtype=float)
-                cum_pv = 0.0; cum_v = 0.0
-                for i in range(len(tp)):
-                    j0 = max(0, i-n+1)
-                    pv = np.sum(tp[j0:i+1] * v[j0:i+1])
-                    vv = np.sum(v[j0:i+1])
-                    out[i] = pv/vv if vv > 0 else np.nan
-                return out
-
-            def vwma(c, v, n=20):
-                if len(c) < n:
-                    return np.full_like(c, np.nan, dtype=float)
-                out = np.full_like(c, np.nan, dtype=float)
-                for i in range(n-1, len(c)):
-                    pc = c[i-n+1:i+1]; pv = v[i-n+1:i+1]
-                    denom = pv.sum()
-                    out[i] = (pc*pv).sum()/denom if denom != 0 else np.nan
-                return out
+                pv = rolling_sum(tp * v, n, min_periods=1)
+                vv = rolling_sum(v, n, min_periods=1)
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    return np.where(vv > 0, pv / vv, np.nan)
 
             def ichimoku_cloud(h, l, c, tenkan=9, kijun=26, spanb=52):
-                conv = (np.max(h[-tenkan:]) + np.min(l[-tenkan:]))/2.0 if len(c)>=tenkan else c[-1]
-                base = (np.max(h[-kijun:]) + np.min(l[-kijun:]))/2.0 if len(c)>=kijun else c[-1]
+                tk, kj, _, sb = ind.ichimoku(tenkan, kijun, spanb)
+                conv = tk[-1] if len(c)>=tenkan else c[-1]
+                base = kj[-1] if len(c)>=kijun else c[-1]
                 spanA = (conv + base)/2.0
-                spanB = (np.max(h[-spanb:]) + np.min(l[-spanb:]))/2.0 if len(c)>=spanb else c[-1]
+                spanB = sb[-1] if len(c)>=spanb else c[-1]
                 return conv, base, max(spanA, spanB), min(spanA, spanB)
 
-            def rough_poc(close, vol, bins=24, lookback=200):
-                xs = close[-lookback:]; vs = vol[-lookback:]
-                if len(xs) < 10: return None
-                lo, hi = np.min(xs), np.max(xs)
-                if hi <= lo: return None
-                edges = np.linspace(lo, hi, bins+1)
-                idxs = np.digitize(xs, edges) - 1
-                acc = np.zeros(bins, dtype=float)
-                for i,ix in enumerate(idxs):
-                    if 0<=ix<bins: acc[ix]+=vs[i]
-                m = np.argmax(acc)
-                return (edges[m] + edges[m+1])/2.0
-
-            def crossed_above(a, b):
-                return len(a)>=2 and len(b)>=2 and a[-2]<=b[-2] and a[-1]>b[-1]
-
-            def crossed_below(a, b):
-                return len(a)>=2 and len(b)>=2 and a[-2]>=b[-2] and a[-1]<b[-1]
-
-            def near(a, b, tol=0.015):
-                return np.isfinite(a) and np.isfinite(b) and abs(a-b)/max(1e-12, abs(b)) <= tol
-
-            def vol_spike(v, factor=1.2, n=20):
-                base = np.mean(v[-n-1:-1]) if len(v)>n else np.mean(v)
-                return v[-1] > factor * base
-
-            def vol_climax(v, factor=1.5, n=20):
-                base = np.mean(v[-n-1:-1]) if len(v)>n else np.mean(v)
-                return v[-1] > factor * base
-
-            def swing_low(lw, lookback=40):
-                return float(np.min(lw[-lookback:]))
-
-            def swing_high(hh, lookback=40):
-                return float(np.max(hh[-lookback:]))
-
             # ---------------- indikator & level ----------------
             tp      = (highs + lows + closes)/3.0
             VWAP20  = vwap_rolling(tp, volumes, 20)  # proxy VWAP rolling (VWAP asli bersifat intraday/reset per sesi) [1][5]
-            VWMA20  = vwma(closes, volumes, 20)      # VWMA sebagai MA berbobot volume [17]
-            EMA8, EMA21, EMA55, EMA200 = ema(closes, 8), ema(closes, 21), ema(closes, 55), ema(closes, 200)
-            RSI     = rsi14(closes)
-            MACD, MACDsig, MACDhist = macd_12_26_9(closes)
-            BBmid, BBup, BBdn, BBsd = bollinger(closes, 20, 2.0)  # squeeze/ekstrem BB [22]
-            KCmid, KCup, KCdn, ATR20 = keltner(highs, lows, closes, 20, 1.5)  # Keltner breakout [23]
-            ATR14   = atr(highs, lows, closes, 14)  # ATR volatility [21]
+            VWMA20  = ind.vwma(20)      # VWMA sebagai MA berbobot volume [17]
+            EMA8, EMA21, EMA55, EMA200 = ind.ema(8), ind.ema(21), ind.ema(55), ind.ema(200)
+            RSI     = ind.rsi(14, method='ema')
+            MACD, MACDsig, MACDhist = ind.macd(12, 26, 9)
+            BBmid, BBup, BBdn, BBsd = ind.bollinger(20, 2.0)  # squeeze/ekstrem BB [22]
+            KCmid, KCup, KCdn, ATR20 = ind.keltner(20, 1.5)  # Keltner breakout [23]
+            ATR14   = ind.atr(14)  # ATR volatility [21]
             conv, base, kumo_top, kumo_bot = ichimoku_cloud(highs, lows, closes)  # mini-kumo untuk breakout [24]
             POC     = rough_poc(closes, volumes, bins=24, lookback=200)  # Volume Profile POC proxy [25]
 
             have = set(p.name for p in base_patterns)
 
-            def get_cfg(name):
-                meta = self.ultra_patterns.get('ULTIMATE_GODLIKE_COMBINATIONS', {}).get('patterns', {}).get(name, {})
-                sr  = float(meta.get('success_rate', 88))
-                rel = float(meta.get('reliability', 0.88))
-                avg = float(meta.get('avg_gain', 60))
-                return sr, rel, avg
-
             def put(name, bull, entry_up=1.002, entry_dn=0.998, sl_up=0.985, sl_dn=1.025, grade="GODLIKE"):
-                sr, rel, avg = get_cfg(name)
+                sr, rel, avg = self._pattern_meta('ULTIMATE_GODLIKE_COMBINATIONS', name, 88.0, 0.88, 60.0)
                 tgt = current_price * (1.0 + avg/100.0) if bull else current_price * (1.0 - avg/100.0)
                 tpct = abs((tgt - current_price)/current_price*100.0)
                 if tpct >= min_target_pct:
                     entry = current_price*(entry_up if bull else entry_dn)
-                    stop  = min(swing_low(lows), current_price*sl_up) if bull else max(swing_high(highs), current_price*sl_dn)
+                    stop  = min(swing_low(lows, 40), current_price*sl_up) if bull else max(swing_high(highs, 40), current_price*sl_dn)
                     patterns.append(UltraPatternResult(
                         name=name, success_rate=sr, reliability=rel, avg_gain=avg,
                         confidence=rel*100.0, signal_strength=min(0.99, rel+0.1),
@@ -6417,7 +5440,7 @@ class UltraPatternDetector:
 
             # 12) PERFECT_MOVING_AVERAGE_CONSTELLATION: Golden Cross + EMA Cloud + VWAP alignment
             try:
-                SMA50, SMA200 = sma(closes, 50), sma(closes, 200)
+                SMA50, SMA200 = ind.sma(50), ind.sma(200)
                 golden = crossed_above(SMA50, SMA200)
                 cloud  = (EMA8[-1] > EMA21[-1] > EMA55[-1])
                 vwap_a = np.isfinite(VWAP20[-1]) and (closes[-1] > VWAP20[-1])
@@ -6478,7 +5501,7 @@ class UltraPatternDetector:
             logger.debug(f"GODLIKE combinations detection error: {e}")
         return patterns
     def _detect_legendary_patterns_stable(self,
-        opens, highs, lows, closes, volumes, current_price, tf, base_patterns) -> List[UltraPatternResult]:
+        opens, highs, lows, closes, volumes, current_price, tf, base_patterns, indicators=None) -> List[UltraPatternResult]:
         """Stable LEGENDARY Combinations (17) - Volume-Price, MSS, Liquidity, Volatility Compression"""
         patterns = []
         try:
@@ -6493,20 +5516,10 @@ class UltraPatternDetector:
             if len(closes) < 80 or len(volumes) < 40:
                 return patterns
 
+            ind = ensure_bundle(indicators, opens, highs, lows, closes, volumes)
             min_target_pct = float(self.ultra_config.get('min_target_percentage', 3.0))
 
             # ------------- helpers -------------
-            def ema(x, n):
-                x = np.asarray(x, dtype=float)
-                if len(x) == 0:
-                    return x
-                alpha = 2.0/(n+1.0)
-                out = np.zeros_like(x, dtype=float)
-                out = x
-                for i in range(1, len(x)):
-                    out[i] = alpha*x[i] + (1-alpha)*out[i-1]
-                return out
-
             def sma(x, n):
                 if len(x) < n:
                     return np.full_like(x, np.nan, dtype=float)
@@ -6515,105 +5528,10 @@ class UltraPatternDetector:
                 out[n-1:] = np.convolve(x, w, mode='valid')
                 return out
 
-            def rsi14(x):
-                d = np.diff(x, prepend=x)
-                gain = np.where(d>0, d, 0.0); loss = np.where(d<0, -d, 0.0)
-                ag = ema(gain, 14); al = ema(loss, 14)
-                eps = 1e-10
-                rs = np.where(al == 0, np.inf, ag / (al + eps))
-                return 100.0 - 100.0/(1.0+rs)
-
-            def macd_12_26_9(x):
-                f, s = ema(x, 12), ema(x, 26)
-                m = f - s
-                sig = ema(m, 9)
-                return m, sig, m - sig
-
-            def true_range(h, l, c):
-                prev = np.roll(c, 1); prev=c
-                return np.maximum(h-l, np.maximum(np.abs(h-prev), np.abs(l-prev)))
-
-            def atr(h, l, c, p=14):
-                tr = true_range(h, l, c)
-                alpha = 1.0/p
-                out = np.zeros_like(tr, dtype=float)
-                out = tr
-                for i in range(1, len(tr)):
-                    out[i] = out[i-1] + alpha*(tr[i]-out[i-1])
-                return out
-
-            def stddev(x, p=20):
-                if len(x)<p:
-                    return np.full_like(x, np.nan, dtype=float)
-                out = np.full_like(x, np.nan, dtype=float)
-                for i in range(p-1, len(x)):
-                    out[i] = np.std(x[i-p+1:i+1], ddof=0)
-                return out
-
-            def bollinger(c, p=20, k=2.0):
-                mid = sma(c, p); sd = stddev(c, p)
-                up = mid + k*sd; dn = mid - k*sd
-                return mid, up, dn, sd
-
-            def keltner(h, l, c, p=20, m=1.5):
-                mid = ema(c, p); xatr = atr(h, l, c, p)
-                up = mid + m*xatr; dn = mid - m*xatr
-                return mid, up, dn, xatr
-
-            def vwma(c, v, n=20):
-                if len(c)<n:
-                    return np.full_like(c, np.nan, dtype=float)
-                out = np.full_like(c, np.nan, dtype=float)
-                for i in range(n-1, len(c)):
-                    pc = c[i-n+1:i+1]; pv = v[i-n+1:i+1]
-                    denom = pv.sum()
-                    out[i] = (pc*pv).sum()/denom if denom!=0 else np.nan
-                return out
-
-            def obv(c, v):
-                ob = np.zeros_like(c, dtype=float)
-                for i in range(1, len(c)):
-                    if c[i] > c[i-1]: ob[i] = ob[i-1] + v[i]
-                    elif c[i] < c[i-1]: ob[i] = ob[i-1] - v[i]
-                    else: ob[i] = ob[i-1]
-                return ob
-
-            def rough_poc(close, vol, bins=24, lookback=150):
-                xs = close[-lookback:]; vs = vol[-lookback:]
-                if len(xs)<10: return None
-                lo, hi = np.min(xs), np.max(xs)
-                if hi<=lo: return None
-                edges = np.linspace(lo, hi, bins+1)
-                idxs = np.digitize(xs, edges) - 1
-                acc = np.zeros(bins, dtype=float)
-                for i,ix in enumerate(idxs):
-                    if 0<=ix<bins: acc[ix]+=vs[i]
-                m = np.argmax(acc)
-                return (edges[m]+edges[m+1])/2.0
-
-            def crossed_above(a, b):
-                return len(a)>=2 and len(b)>=2 and a[-2]<=b[-2] and a[-1]>b[-1]
-
-            def crossed_below(a, b):
-                return len(a)>=2 and len(b)>=2 and a[-2]>=b[-2] and a[-1]<b[-1]
-
-            def near(a, b, tol=0.01):
-                return np.isfinite(a) and np.isfinite(b) and abs(a-b)/max(1e-12, abs(b)) <= tol
-
-            def vol_spike(v, factor=1.2, n=20):
-                base = np.mean(v[-n-1:-1]) if len(v)>n else np.mean(v)
-                return v[-1] > factor*base
-
-            def vol_climax(v, factor=1.5, n=20):
-                base = np.mean(v[-n-1:-1]) if len(v)>n else np.mean(v)
-                return v[-1] > factor*base
-
             def swing_highs_lows(h, l, look=5):
                 # fractal sederhana: high[i] lebih tinggi dari look tetangga, low[i] lebih rendah
-                hs = []; ls=[]
-                for i in range(look, len(h)-look):
-                    if h[i] == np.max(h[i-look:i+look+1]): hs.append(i)
-                    if l[i] == np.min(l[i-look:i+look+1]): ls.append(i)
+                hs = ind.pivots('high', look, look).tolist()
+                ls = ind.pivots('low', look, look).tolist()
                 return hs, ls
 
             def put(name, bull, entry_up=1.001, entry_dn=0.999, sl_up=0.985, sl_dn=1.02, grade="LEGENDARY"):
@@ -6636,14 +5554,14 @@ class UltraPatternDetector:
                     ))
 
             # ------------- precompute -------------
-            EMA8, EMA21, EMA55, EMA200 = ema(closes,8), ema(closes,21), ema(closes,55), ema(closes,200)
-            RSI = rsi14(closes)
-            MACD, MACDsig, MACDhist = macd_12_26_9(closes)
-            BBmid, BBup, BBdn, BBsd = bollinger(closes, 20, 2.0)
-            KCmid, KCup, KCdn, ATR20 = keltner(highs, lows, closes, 20, 1.5)
-            ATR14 = atr(highs, lows, closes, 14)
-            VWMA20 = vwma(closes, volumes, 20)
-            OBV = obv(closes, volumes)
+            EMA8, EMA21, EMA55, EMA200 = ind.ema(8), ind.ema(21), ind.ema(55), ind.ema(200)
+            RSI = ind.rsi(14, method='ema')
+            MACD, MACDsig, MACDhist = ind.macd(12, 26, 9)
+            BBmid, BBup, BBdn, BBsd = ind.bollinger(20, 2.0)
+            KCmid, KCup, KCdn, ATR20 = ind.keltner(20, 1.5)
+            ATR14 = ind.atr(14)
+            VWMA20 = ind.vwma(20)
+            OBV = ind.obv()
             POC = rough_poc(closes, volumes, bins=24, lookback=150)
             have = set(p.name for p in base_patterns)
 
@@ -6660,17 +5578,11 @@ class UltraPatternDetector:
             try:
                 # proxy Stoch %K/%D dan Williams %R, CCI 20
                 def stoch(h,l,c,n=14):
-                    hh = np.maximum.accumulate(h[-n:])[-1] if len(h)>=n else np.max(h)
-                    ll = np.minimum.accumulate(l[-n:])[-1] if len(l)>=n else np.min(l)
-                    rng = max(hh-ll, 1e-12)
-                    k = (c[-1]-ll)/rng*100.0
-                    d = (np.mean([(c[i]-min(l[i-n+1:i+1]))/max(1e-12,(max(h[i-n+1:i+1])-min(l[i-n+1:i+1])))*100.0
-                                for i in range(len(c)-n+1, len(c))])) if len(c)>=n+3 else k
-                    return k, d
+                    # len(closes) >= 80 di sini; range nol -> close == low jendela -> %K 0
+                    k_arr = np.nan_to_num(ind.stochastic(n)[0], nan=0.0)
+                    return float(k_arr[-1]), float(np.mean(k_arr[-(n-1):]))
                 def willr(h,l,c,n=14):
-                    hh = np.max(h[-n:]); ll = np.min(l[-n:])
-                    rng = max(hh-ll, 1e-12)
-                    return -100.0 * (hh - c[-1]) / rng
+                    return float(np.nan_to_num(ind.williams_r(n)[-1], nan=0.0))
                 def cci(h,l,c,n=20):
                     tp = (h+l+c)/3.0
                     sma_tp = sma(tp, n)
@@ -6850,7 +5762,7 @@ class UltraPatternDetector:
             logger.debug(f"LEGENDARY combinations detection error: {e}")
         return patterns
     def _detect_master_patterns_stable(self,
-        opens, highs, lows, closes, volumes, current_price, tf, base_patterns) -> List[UltraPatternResult]:
+        opens, highs, lows, closes, volumes, current_price, tf, base_patterns, indicators=None) -> List[UltraPatternResult]:
         """Stable MASTER Combinations (16) - fokus integrasi TWAP/VWAP/POC, Fib extension, siklus waktu, korelasi, dan proxy feed"""
         patterns = []
         try:
@@ -6865,104 +5777,12 @@ class UltraPatternDetector:
             if n < 80:
                 return patterns
 
+            ind = ensure_bundle(indicators, opens, highs, lows, closes, volumes)
             min_target_pct = float(self.ultra_config.get('min_target_percentage', 3.0))
 
             # ---------- helpers ----------
-            def ema(x, p):
-                x = np.asarray(x, dtype=float)
-                if len(x)==0: return x
-                a = 2.0/(p+1.0)
-                out = np.zeros_like(x, dtype=float); out=x
-                for i in range(1,len(x)):
-                    out[i]=a*x[i]+(1-a)*out[i-1]
-                return out
-
-            def sma(x, p):
-                if len(x)<p: return np.full_like(x, np.nan, dtype=float)
-                out = np.full_like(x, np.nan, dtype=float)
-                w = np.ones(p)/p
-                out[p-1:] = np.convolve(x, w, mode='valid')
-                return out
-
-            def rsi14(x):
-                d = np.diff(x, prepend=x)
-                g = np.where(d>0, d, 0.0); l = np.where(d<0, -d, 0.0)
-                ag = ema(g,14); al = ema(l,14)
-                eps = 1e-10
-                rs = np.where(al == 0, np.inf, ag / (al + eps))
-                return 100.0 - 100.0/(1.0+rs)
-
-            def macd_12_26_9(x):
-                f, s = ema(x,12), ema(x,26)
-                m = f - s; sig = ema(m,9)
-                return m, sig, m - sig
-
-            def true_range(h,l,c):
-                prev = np.roll(c,1); prev=c
-                return np.maximum(h-l, np.maximum(np.abs(h-prev), np.abs(l-prev)))
-
-            def atr(h,l,c,p=14):
-                tr = true_range(h,l,c)
-                a = 1.0/p
-                out = np.zeros_like(tr, dtype=float); out=tr
-                for i in range(1,len(tr)):
-                    out[i] = out[i-1] + a*(tr[i]-out[i-1])
-                return out
-
-            def stddev(x, p=20):
-                if len(x)<p: return np.full_like(x, np.nan, dtype=float)
-                out = np.full_like(x, np.nan, dtype=float)
-                for i in range(p-1,len(x)):
-                    out[i] = np.std(x[i-p+1:i+1], ddof=0)
-                return out
-
-            def bollinger(c,p=20,k=2.0):
-                mid = sma(c,p); sd = stddev(c,p)
-                up = mid + k*sd; dn = mid - k*sd
-                return mid,up,dn,sd
-
-            def keltner(h,l,c,p=20,m=1.5):
-                mid = ema(c,p); xatr = atr(h,l,c,p)
-                up = mid + m*xatr; dn = mid - m*xatr
-                return mid,up,dn,xatr
-
-            def vwma(c,v,p=20):
-                if len(c)<p: return np.full_like(c, np.nan, dtype=float)
-                out = np.full_like(c, np.nan, dtype=float)
-                for i in range(p-1,len(c)):
-                    pc=c[i-p+1:i+1]; pv=v[i-p+1:i+1]
-                    denom = pv.sum()
-                    out[i] = (pc*pv).sum()/denom if denom!=0 else np.nan
-                return out
-
             def twap_proxy(c, p=20):
-                if len(c)<p: return np.full_like(c, np.nan, dtype=float)
-                out = np.full_like(c, np.nan, dtype=float)
-                for i in range(p-1,len(c)):
-                    out[i] = np.mean(c[i-p+1:i+1])
-                return out
-
-            def rough_poc(close, vol, bins=24, lookback=150):
-                xs = close[-lookback:]; vs = vol[-lookback:]
-                if len(xs)<10: return None
-                lo,hi = np.min(xs), np.max(xs)
-                if hi<=lo: return None
-                edges = np.linspace(lo,hi,bins+1)
-                idxs = np.digitize(xs, edges)-1
-                acc = np.zeros(bins, dtype=float)
-                for i,ix in enumerate(idxs):
-                    if 0<=ix<bins: acc[ix]+=vs[i]
-                m = np.argmax(acc)
-                return (edges[m]+edges[m+1])/2.0
-
-            def near(a,b,tol=0.01):
-                return np.isfinite(a) and np.isfinite(b) and abs(a-b)/max(1e-12,abs(b))<=tol
-
-            def crossed_above(a,b):
-                return len(a)>=2 and len(b)>=2 and a[-2]<=b[-2] and a[-1]>b[-1]
-
-            def crossed_below(a,b):
-                return len(a)>=2 and len(b)>=2 and a[-2]>=b[-2] and a[-1]<b[-1]
+                return rolling_mean(c, p)
 
             def put(name, bull, entry_up=1.001, entry_dn=0.999, sl_up=0.985, sl_dn=1.02, grade="ULTIMATE"):
                 meta = self.ultra_patterns.get('ULTIMATE_MASTER_COMBINATIONS', {}).get('patterns', {}).get(name, {})
@@ -6984,13 +5804,13 @@ class UltraPatternDetector:
                     ))
 
             # ---------- precompute ----------
-            EMA8, EMA21, EMA55 = ema(closes,8), ema(closes,21), ema(closes,55)
-            RSI = rsi14(closes)
-            MACD, MACDsig, MACDhist = macd_12_26_9(closes)
-            BBmid, BBup, BBdn, BBsd = bollinger(closes, 20, 2.0)
-            KCmid, KCup, KCdn, ATR20 = keltner(highs, lows, closes, 20, 1.5)
-            ATR14 = atr(highs, lows, closes, 14)
-            VWMA20 = vwma(closes, volumes, 20)
+            EMA8, EMA21, EMA55 = ind.ema(8), ind.ema(21), ind.ema(55)
+            RSI = ind.rsi(14, method='ema')
+            MACD, MACDsig, MACDhist = ind.macd(12, 26, 9)
+            BBmid, BBup, BBdn, BBsd = ind.bollinger(20, 2.0)
+            KCmid, KCup, KCdn, ATR20 = ind.keltner(20, 1.5)
+            ATR14 = ind.atr(14)
+            VWMA20 = ind.vwma(20)
             TWAP20 = twap_proxy(closes, 20)
             POC = rough_poc(closes, volumes, bins=24, lookback=150)
             have = set(p.name for p in base_patterns)
@@ -7142,7 +5962,7 @@ class UltraPatternDetector:
             logger.debug(f"MASTER combinations detection error: {e}")
         return patterns
     def _detect_blockchain_patterns_stable(self,
-        opens, highs, lows, closes, volumes, current_price, tf, base_patterns) -> List[UltraPatternResult]:
+        opens, highs, lows, closes, volumes, current_price, tf, base_patterns, indicators=None) -> List[UltraPatternResult]:
         """Stable Blockchain Technical Fusion (5) - On-chain/DeFi/NFT + teknikal terkonfirmasi"""
         patterns = []
         try:
@@ -7157,86 +5977,10 @@ class UltraPatternDetector:
             if len(closes) < 120 or len(volumes) < 60:
                 return patterns
 
+            ind = ensure_bundle(indicators, opens, highs, lows, closes, volumes)
             min_target_pct = float(self.ultra_config.get('min_target_percentage', 3.0))
 
             # ---------- helpers ----------
-            def ema(x, p):
-                x = np.asarray(x, dtype=float)
-                if len(x)==0: return x
-                a = 2.0/(p+1.0)
-                out = np.zeros_like(x, dtype=float); out=x
-                for i in range(1,len(x)):
-                    out[i]=a*x[i]+(1-a)*out[i-1]
-                return out
-
-            def rsi14(x):
-                d = np.diff(x, prepend=x)
-                g = np.where(d>0, d, 0.0); l = np.where(d<0, -d, 0.0)
-                ag = ema(g,14); al = ema(l,14)
-                eps = 1e-10
-                rs = np.where(al == 0, np.inf, ag / (al + eps))
-                return 100.0 - 100.0/(1.0+rs)
-
-            def macd_12_26_9(x):
-                f, s = ema(x,12), ema(x,26)
-                m = f - s; sig = ema(m,9)
-                return m, sig, m - sig
-
-            def true_range(h,l,c):
-                prev = np.roll(c,1); prev=c
-                return np.maximum(h-l, np.maximum(np.abs(h-prev), np.abs(l-prev)))
-
-            def atr(h,l,c,p=14):
-                tr = true_range(h,l,c)
-                a = 1.0/p
-                out = np.zeros_like(tr, dtype=float); out=tr
-                for i in range(1,len(tr)):
-                    out[i] = out[i-1] + a*(tr[i]-out[i-1])
-                return out
-
-            def stddev(x, p=20):
-                if len(x)<p: return np.full_like(x, np.nan, dtype=float)
-                out = np.full_like(x, np.nan, dtype=float)
-                for i in range(p-1,len(x)):
-                    out[i] = np.std(x[i-p+1:i+1], ddof=0)
-                return out
-
-            def sma(x, p):
-                if len(x)<p: return np.full_like(x, np.nan, dtype=float)
-                out = np.full_like(x, np.nan, dtype=float)
-                w = np.ones(p)/p
-                out[p-1:] = np.convolve(x, w, mode='valid')
-                return out
-
-            def bollinger(c,p=20,k=2.0):
-                mid = sma(c,p); sd = stddev(c,p)
-                up = mid + k*sd; dn = mid - k*sd
-                return mid,up,dn,sd
-
-            def vwma(c, v, p=20):
-                if len(c)<p: return np.full_like(c, np.nan, dtype=float)
-                out = np.full_like(c, np.nan, dtype=float)
-                for i in range(p-1,len(c)):
-                    pc=c[i-p+1:i+1]; pv=v[i-p+1:i+1]
-                    denom = pv.sum()
-                    out[i] = (pc*pv).sum()/denom if denom!=0 else np.nan
-                return out
-
-            def rough_poc(close, vol, bins=24, lookback=200):
-                xs = close[-lookback:]; vs = vol[-lookback:]
-                if len(xs)<10: return None
-                lo,hi = np.min(xs), np.max(xs)
-                if hi<=lo: return None
-                edges = np.linspace(lo,hi,bins+1)
-                idxs = np.digitize(xs, edges)-1
-                acc = np.zeros(bins, dtype=float)
-                for i,ix in enumerate(idxs):
-                    if 0<=ix<bins: acc[ix]+=vs[i]
-                m = np.argmax(acc)
-                return (edges[m]+edges[m+1])/2.0
-
-            def near(a,b,tol=0.01):
-                return np.isfinite(a) and np.isfinite(b) and abs(a-b)/max(1e-12,abs(b))<=tol
 
             def put(name, bull, entry_up=1.002, entry_dn=0.998, sl_up=0.985, sl_dn=1.025, grade="BLOCKCHAIN_ELITE"):
                 meta = self.ultra_patterns.get('BLOCKCHAIN_TECHNICAL_FUSION', {}).get('patterns', {}).get(name, {})
@@ -7258,12 +6002,12 @@ class UltraPatternDetector:
                     ))
 
             # ---------- precompute ----------
-            EMA8, EMA21, EMA55 = ema(closes,8), ema(closes,21), ema(closes,55)
-            RSI = rsi14(closes)
-            MACD, MACDsig, MACDhist = macd_12_26_9(closes)
-            BBmid, BBup, BBdn, BBsd = bollinger(closes,20,2.0)
-            ATR14 = atr(highs, lows, closes, 14)
-            VWMA20 = vwma(closes, volumes, 20)
+            EMA8, EMA21, EMA55 = ind.ema(8), ind.ema(21), ind.ema(55)
+            RSI = ind.rsi(14, method='ema')
+            MACD, MACDsig, MACDhist = ind.macd(12, 26, 9)
+            BBmid, BBup, BBdn, BBsd = ind.bollinger(20, 2.0)
+            ATR14 = ind.atr(14)
+            VWMA20 = ind.vwma(20)
             POC = rough_poc(closes, volumes, bins=24, lookback=200)
             have = set(p.name for p in base_patterns)
 
@@ -7348,7 +6092,7 @@ class UltraPatternDetector:
             logger.debug(f"Blockchain Technical Fusion detection error: {e}")
         return patterns
     def _detect_cross_patterns_stable(self,
-        opens, highs, lows, closes, volumes, current_price, tf, base_patterns) -> List[UltraPatternResult]:
+        opens, highs, lows, closes, volumes, current_price, tf, base_patterns, indicators=None) -> List[UltraPatternResult]:
         """Stable CROSS MARKET (5) - DXY/SPX/Gold/Bond Yields/VIX + konfirmasi teknikal"""
         patterns = []
         try:
@@ -7363,70 +6107,10 @@ class UltraPatternDetector:
             if len(closes) < 80:
                 return patterns
 
+            ind = ensure_bundle(indicators, opens, highs, lows, closes, volumes)
             min_target_pct = float(self.ultra_config.get('min_target_percentage', 3.0))
 
             # ------ helpers teknikal ------
-            def ema(x, p):
-                x = np.asarray(x, dtype=float); 
-                if len(x)==0: return x
-                a = 2.0/(p+1.0)
-                out = np.zeros_like(x, dtype=float); out=x
-                for i in range(1,len(x)): out[i]=a*x[i]+(1-a)*out[i-1]
-                return out
-
-            def rsi14(x):
-                d = np.diff(x, prepend=x)
-                g = np.where(d>0, d, 0.0); l = np.where(d<0, -d, 0.0)
-                ag = ema(g,14); al = ema(l,14)
-                eps = 1e-10
-                rs = np.where(al == 0, np.inf, ag / (al + eps))
-                return 100.0 - 100.0/(1.0+rs)
-
-            def macd_12_26_9(x):
-                f, s = ema(x,12), ema(x,26)
-                m = f - s; sig = ema(m,9)
-                return m, sig, m - sig
-
-            def true_range(h,l,c):
-                prev = np.roll(c,1); prev=c
-                return np.maximum(h-l, np.maximum(np.abs(h-prev), np.abs(l-prev)))
-
-            def atr(h,l,c,p=14):
-                tr = true_range(h,l,c)
-                a = 1.0/p
-                out = np.zeros_like(tr, dtype=float); out=tr
-                for i in range(1,len(tr)):
-                    out[i] = out[i-1] + a*(tr[i]-out[i-1])
-                return out
-
-            def vwma(c, v, p=20):
-                if len(c)<p: return np.full_like(c, np.nan, dtype=float)
-                out = np.full_like(c, np.nan, dtype=float)
-                for i in range(p-1,len(c)):
-                    pc=c[i-p+1:i+1]; pv=v[i-p+1:i+1]
-                    denom = pv.sum()
-                    out[i] = (pc*pv).sum()/denom if denom!=0 else np.nan
-                return out
-
-            def sma(x, p):
-                if len(x)<p: return np.full_like(x, np.nan, dtype=float)
-                out = np.full_like(x, np.nan, dtype=float)
-                w = np.ones(p)/p
-                out[p-1:] = np.convolve(x, w, mode='valid')
-                return out
-
-            def stddev(x, p=20):
-                if len(x)<p: return np.full_like(x, np.nan, dtype=float)
-                out = np.full_like(x, np.nan, dtype=float)
-                for i in range(p-1,len(x)):
-                    out[i] = np.std(x[i-p+1:i+1], ddof=0)
-                return out
-
-            def bollinger(c,p=20,k=2.0):
-                mid = sma(c,p); sd = stddev(c,p)
-                up = mid + k*sd; dn = mid - k*sd
-                return mid,up,dn,sd
-
             def put(name, bull, entry_up=1.002, entry_dn=0.998, sl_up=0.985, sl_dn=1.025, grade="CROSS_MARKET_ELITE"):
                 meta = self.ultra_patterns.get('CROSS_MARKET_ULTRA', {}).get('patterns', {}).get(name, {})
                 sr  = float(meta.get('success_rate', 82))
@@ -7447,12 +6131,12 @@ class UltraPatternDetector:
                     ))
 
             # ------ precompute teknikal lokal ------
-            EMA21, EMA55 = ema(closes,21), ema(closes,55)
-            RSI = rsi14(closes)
-            MACD, MACDsig, MACDhist = macd_12_26_9(closes)
-            BBmid, BBup, BBdn, BBsd = bollinger(closes,20,2.0)
-            ATR14 = atr(highs, lows, closes, 14)
-            VWMA20 = vwma(closes, volumes, 20)
+            EMA21, EMA55 = ind.ema(21), ind.ema(55)
+            RSI = ind.rsi(14, method='ema')
+            MACD, MACDsig, MACDhist = ind.macd(12, 26, 9)
+            BBmid, BBup, BBdn, BBsd = ind.bollinger(20, 2.0)
+            ATR14 = ind.atr(14)
+            VWMA20 = ind.vwma(20)
 
             # ------ flag/feed lintas pasar (dipasok pipeline makro) ------
             # USD / DXY
@@ -7534,7 +6218,7 @@ class UltraPatternDetector:
             logger.debug(f"Cross-market detection error: {e}")
         return patterns
     def _detect_real_patterns_stable(self,
-        opens, highs, lows, closes, volumes, current_price, tf, base_patterns) -> List[UltraPatternResult]:
+        opens, highs, lows, closes, volumes, current_price, tf, base_patterns, indicators=None) -> List[UltraPatternResult]:
         """Stable REAL-TIME EVENT (5) — News/Regulation/Adoption/Partnership/Earnings + teknikal/volatilitas"""
         patterns = []
         try:
@@ -7549,63 +6233,10 @@ class UltraPatternDetector:
             if len(closes) < 60 or len(volumes) < 30:
                 return patterns
 
+            ind = ensure_bundle(indicators, opens, highs, lows, closes, volumes)
             min_target_pct = float(self.ultra_config.get('min_target_percentage', 3.0))
 
             # -------- helpers --------
-            def ema(x, p):
-                x = np.asarray(x, dtype=float)
-                if len(x)==0: return x
-                a = 2.0/(p+1.0)
-                out = np.zeros_like(x, dtype=float); out=x
-                for i in range(1,len(x)): out[i]=a*x[i]+(1-a)*out[i-1]
-                return out
-
-            def rsi14(x):
-                d = np.diff(x, prepend=x)
-                g = np.where(d>0, d, 0.0); l = np.where(d<0, -d, 0.0)
-                ag = ema(g,14); al = ema(l,14)
-                eps = 1e-10
-                rs = np.where(al == 0, np.inf, ag / (al + eps))
-                return 100.0 - 100.0/(1.0+rs)
-
-            def macd_12_26_9(x):
-                f, s = ema(x,12), ema(x,26)
-                m = f - s; sig = ema(m,9)
-                return m, sig, m - sig
-
-            def true_range(h,l,c):
-                prev = np.roll(c,1); prev=c
-                return np.maximum(h-l, np.maximum(np.abs(h-prev), np.abs(l-prev)))
-
-            def atr(h,l,c,p=14):
-                tr = true_range(h,l,c)
-                a = 1.0/p
-                out = np.zeros_like(tr, dtype=float); out=tr
-                for i in range(1,len(tr)): out[i] = out[i-1] + a*(tr[i]-out[i-1])
-                return out
-
-            def sma(x, p):
-                if len(x)<p: return np.full_like(x, np.nan, dtype=float)
-                out = np.full_like(x, np.nan, dtype=float)
-                w = np.ones(p)/p
-                out[p-1:] = np.convolve(x, w, mode='valid')
-                return out
-
-            def stddev(x, p=20):
-                if len(x)<p: return np.full_like(x, np.nan, dtype=float)
-                out = np.full_like(x, np.nan, dtype=float)
-                for i in range(p-1,len(x)):
-                    out[i] = np.std(x[i-p+1:i+1], ddof=0)
-                return out
-
-            def bollinger(c,p=20,k=2.0):
-                mid = sma(c,p); sd = stddev(c,p)
-                up = mid + k*sd; dn = mid - k*sd
-                return mid,up,dn,sd
-
-            def vol_spike(v, factor=1.2, n=20):
-                base = np.mean(v[-n-1:-1]) if len(v)>n else np.mean(v)
-                return v[-1] > factor*base
 
             def put(name, bull, entry_up=1.002, entry_dn=0.998, sl_up=0.985, sl_dn=1.025, grade="EVENT_MASTER"):
                 meta = self.ultra_patterns.get('REAL_TIME_EVENT_ULTRA', {}).get('patterns', {}).get(name, {})
@@ -7627,11 +6258,11 @@ class UltraPatternDetector:
                     ))
 
             # -------- precompute teknikal --------
-            EMA21, EMA55 = ema(closes,21), ema(closes,55)
-            RSI = rsi14(closes)
-            MACD, MACDsig, MACDhist = macd_12_26_9(closes)
-            BBmid, BBup, BBdn, BBsd = bollinger(closes,20,2.0)
-            ATR14 = atr(highs, lows, closes, 14)
+            EMA21, EMA55 = ind.ema(21), ind.ema(55)
+            RSI = ind.rsi(14, method='ema')
+            MACD, MACDsig, MACDhist = ind.macd(12, 26, 9)
+            BBmid, BBup, BBdn, BBsd = ind.bollinger(20, 2.0)
+            ATR14 = ind.atr(14)
 
             # “reaction speed” proxy: candle body vs ATR (1–3 bar terakhir)
             rng = highs - lows
@@ -7704,7 +6335,7 @@ class UltraPatternDetector:
             logger.debug(f"Real-time event detection error: {e}")
         return patterns
     def _detect_quantum_patterns_stable(self,
-        opens, highs, lows, closes, volumes, current_price, tf, base_patterns) -> List[UltraPatternResult]:
+        opens, highs, lows, closes, volumes, current_price, tf, base_patterns, indicators=None) -> List[UltraPatternResult]:
         """Stable QUANTUM COMPUTING (5) - analogi kuantum -> proxy teknikal & feed kuantum/PQC"""
         patterns = []
         try:
@@ -7719,84 +6350,10 @@ class UltraPatternDetector:
             if len(closes) < 120 or len(volumes) < 60:
                 return patterns
 
+            ind = ensure_bundle(indicators, opens, highs, lows, closes, volumes)
             min_target_pct = float(self.ultra_config.get('min_target_percentage', 3.0))
 
             # -------- helpers umum --------
-            def ema(x, p):
-                x = np.asarray(x, dtype=float)
-                if len(x)==0: return x
-                a = 2.0/(p+1.0)
-                out = np.zeros_like(x, dtype=float); out=x
-                for i in range(1,len(x)): out[i]=a*x[i]+(1-a)*out[i-1]
-                return out
-
-            def sma(x, p):
-                if len(x)<p: return np.full_like(x, np.nan, dtype=float)
-                out = np.full_like(x, np.nan, dtype=float)
-                w = np.ones(p)/p
-                out[p-1:] = np.convolve(x, w, mode='valid')
-                return out
-
-            def rsi14(x):
-                d = np.diff(x, prepend=x)
-                g = np.where(d>0, d, 0.0); l = np.where(d<0, -d, 0.0)
-                ag = ema(g,14); al = ema(l,14)
-                eps = 1e-10
-                rs = np.where(al == 0, np.inf, ag / (al + eps))
-                return 100.0 - 100.0/(1.0+rs)
-
-            def macd_12_26_9(x):
-                f, s = ema(x,12), ema(x,26)
-                m = f - s; sig = ema(m,9)
-                return m, sig, m - sig
-
-            def true_range(h,l,c):
-                prev = np.roll(c,1); prev=c
-                return np.maximum(h-l, np.maximum(np.abs(h-prev), np.abs(l-prev)))
-
-            def atr(h,l,c,p=14):
-                tr = true_range(h,l,c)
-                a = 1.0/p
-                out = np.zeros_like(tr, dtype=float); out=tr
-                for i in range(1,len(tr)): out[i] = out[i-1] + a*(tr[i]-out[i-1])
-                return out
-
-            def stddev(x, p=20):
-                if len(x)<p: return np.full_like(x, np.nan, dtype=float)
-                out = np.full_like(x, np.nan, dtype=float)
-                for i in range(p-1,len(x)):
-                    out[i] = np.std(x[i-p+1:i+1], ddof=0)
-                return out
-
-            def bollinger(c,p=20,k=2.0):
-                mid = sma(c,p); sd = stddev(c,p)
-                up = mid + k*sd; dn = mid - k*sd
-                return mid,up,dn,sd
-
-            def vwma(c, v, p=20):
-                if len(c)<p: return np.full_like(c, np.nan, dtype=float)
-                out = np.full_like(c, np.nan, dtype=float)
-                for i in range(p-1,len(c)):
-                    pc=c[i-p+1:i+1]; pv=v[i-p+1:i+1]
-                    denom = pv.sum()
-                    out[i] = (pc*pv).sum()/denom if denom!=0 else np.nan
-                return out
-
-            def rough_poc(close, vol, bins=24, lookback=200):
-                xs = close[-lookback:]; vs = vol[-lookback:]
-                if len(xs)<10: return None
-                lo,hi = np.min(xs), np.max(xs)
-                if hi<=lo: return None
-                edges = np.linspace(lo,hi,bins+1)
-                idxs = np.digitize(xs, edges)-1
-                acc = np.zeros(bins, dtype=float)
-                for i,ix in enumerate(idxs):
-                    if 0<=ix<bins: acc[ix]+=vs[i]
-                m = np.argmax(acc)
-                return (edges[m]+edges[m+1])/2.0
-
-            def near(a,b,tol=0.01):
-                return np.isfinite(a) and np.isfinite(b) and abs(a-b)/max(1e-12,abs(b))<=tol
 
             def put(name, bull, entry_up=1.002, entry_dn=0.998, sl_up=0.985, sl_dn=1.025, grade="QUANTUM_GODLIKE"):
                 meta = self.ultra_patterns.get('QUANTUM_COMPUTING_ULTRA', {}).get('patterns', {}).get(name, {})
@@ -7818,12 +6375,12 @@ class UltraPatternDetector:
                     ))
 
             # -------- precompute & flags --------
-            EMA21, EMA55 = ema(closes,21), ema(closes,55)
-            RSI = rsi14(closes)
-            MACD, MACDsig, MACDhist = macd_12_26_9(closes)
-            BBmid, BBup, BBdn, BBsd = bollinger(closes, 20, 2.0)
-            ATR14 = atr(highs, lows, closes, 14)
-            VWMA20 = vwma(closes, volumes, 20)
+            EMA21, EMA55 = ind.ema(21), ind.ema(55)
+            RSI = ind.rsi(14, method='ema')
+            MACD, MACDsig, MACDhist = ind.macd(12, 26, 9)
+            BBmid, BBup, BBdn, BBsd = ind.bollinger(20, 2.0)
+            ATR14 = ind.atr(14)
+            VWMA20 = ind.vwma(20)
             POC = rough_poc(closes, volumes, bins=24, lookback=200)
             have = set(p.name for p in base_patterns)
 
@@ -7930,7 +6487,7 @@ class UltraPatternDetector:
             logger.debug(f"Quantum computing detection error: {e}")
         return patterns
     def _detect_microstructur_patterns_stable(self,
-        opens, highs, lows, closes, volumes, current_price, tf, base_patterns) -> List[UltraPatternResult]:
+        opens, highs, lows, closes, volumes, current_price, tf, base_patterns, indicators=None) -> List[UltraPatternResult]:
         """Stable MICROSTRUCTURE (5) — OFI/orderbook, latency-arb, maker behavior, HFT footprints, AMM/DEX dynamics"""
         patterns = []
         try:
@@ -7945,69 +6502,10 @@ class UltraPatternDetector:
             if len(closes) < 60 or len(volumes) < 30:
                 return patterns
 
+            ind = ensure_bundle(indicators, opens, highs, lows, closes, volumes)
             min_target_pct = float(self.ultra_config.get('min_target_percentage', 3.0))
 
             # ----- helpers teknikal ringan -----
-            def ema(x, p):
-                x = np.asarray(x, dtype=float)
-                if len(x)==0: return x
-                a = 2.0/(p+1.0)
-                out = np.zeros_like(x, dtype=float); out=x
-                for i in range(1,len(x)): out[i]=a*x[i]+(1-a)*out[i-1]
-                return out
-
-            def rsi14(x):
-                d = np.diff(x, prepend=x)
-                g = np.where(d>0, d, 0.0); l = np.where(d<0, -d, 0.0)
-                ag = ema(g,14); al = ema(l,14)
-                eps = 1e-10
-                rs = np.where(al == 0, np.inf, ag / (al + eps))
-                return 100.0 - 100.0/(1.0+rs)
-
-            def macd_12_26_9(x):
-                f, s = ema(x,12), ema(x,26)
-                m = f - s; sig = ema(m,9)
-                return m, sig, m - sig
-
-            def true_range(h,l,c):
-                prev = np.roll(c,1); prev=c
-                return np.maximum(h-l, np.maximum(np.abs(h-prev), np.abs(l-prev)))
-
-            def atr(h,l,c,p=14):
-                tr = true_range(h,l,c)
-                a = 1.0/p
-                out = np.zeros_like(tr, dtype=float); out=tr
-                for i in range(1,len(tr)): out[i] = out[i-1] + a*(tr[i]-out[i-1])
-                return out
-
-            def sma(x, p):
-                if len(x)<p: return np.full_like(x, np.nan, dtype=float)
-                out = np.full_like(x, np.nan, dtype=float)
-                w = np.ones(p)/p
-                out[p-1:] = np.convolve(x, w, mode='valid')
-                return out
-
-            def stddev(x, p=20):
-                if len(x)<p: return np.full_like(x, np.nan, dtype=float)
-                out = np.full_like(x, np.nan, dtype=float)
-                for i in range(p-1,len(x)):
-                    out[i] = np.std(x[i-p+1:i+1], ddof=0)
-                return out
-
-            def bollinger(c,p=20,k=2.0):
-                mid = sma(c,p); sd = stddev(c,p)
-                up = mid + k*sd; dn = mid - k*sd
-                return mid,up,dn,sd
-
-            def vwma(c, v, p=20):
-                if len(c)<p: return np.full_like(c, np.nan, dtype=float)
-                out = np.full_like(c, np.nan, dtype=float)
-                for i in range(p-1,len(c)):
-                    pc=c[i-p+1:i+1]; pv=v[i-p+1:i+1]
-                    denom = pv.sum()
-                    out[i] = (pc*pv).sum()/denom if denom!=0 else np.nan
-                return out
-
             def put(name, bull, entry_up=1.001, entry_dn=0.999, sl_up=0.985, sl_dn=1.02, grade="MICRO_ELITE"):
                 meta = self.ultra_patterns.get('MICROSTRUCTURE_ULTRA', {}).get('patterns', {}).get(name, {})
                 sr  = float(meta.get('success_rate', 82))
@@ -8028,12 +6526,12 @@ class UltraPatternDetector:
                     ))
 
             # ----- precompute teknikal -----
-            EMA21, EMA55 = ema(closes,21), ema(closes,55)
-            RSI = rsi14(closes)
-            MACD, MACDsig, MACDhist = macd_12_26_9(closes)
-            BBmid, BBup, BBdn, BBsd = bollinger(closes,20,2.0)
-            ATR14 = atr(highs, lows, closes, 14)
-            VWMA20 = vwma(closes, volumes, 20)
+            EMA21, EMA55 = ind.ema(21), ind.ema(55)
+            RSI = ind.rsi(14, method='ema')
+            MACD, MACDsig, MACDhist = ind.macd(12, 26, 9)
+            BBmid, BBup, BBdn, BBsd = ind.bollinger(20, 2.0)
+            ATR14 = ind.atr(14)
+            VWMA20 = ind.vwma(20)
 
             # ----- flags mikrostruktur (dipasok pipeline) -----
             # OFI / orderbook
@@ -8120,7 +6618,7 @@ class UltraPatternDetector:
             logger.debug(f"Microstructure detection error: {e}")
         return patterns
     def _detect_seasonal_patterns_stable(self,
-        opens, highs, lows, closes, volumes, current_price, tf, base_patterns) -> List[UltraPatternResult]:
+        opens, highs, lows, closes, volumes, current_price, tf, base_patterns, indicators=None) -> List[UltraPatternResult]:
         """Stable SEASONAL & CYCLICAL (5) — Halving, Winter/Spring, Altseason, Quarterly Expiry, Holiday"""
         patterns = []
         try:
@@ -8135,72 +6633,10 @@ class UltraPatternDetector:
             if len(closes) < 180 or tf not in ("1d", "1D", "1d "):
                 return patterns  # fokus timeframe harian untuk siklus [14]
 
+            ind = ensure_bundle(indicators, opens, highs, lows, closes, volumes)
             min_target_pct = float(self.ultra_config.get('min_target_percentage', 3.0))
 
             # ---------- helpers ----------
-            def ema(x, p):
-                x = np.asarray(x, dtype=float)
-                if len(x)==0: return x
-                a = 2.0/(p+1.0)
-                out = np.zeros_like(x, dtype=float); out = x
-                for i in range(1, len(x)):
-                    out[i] = a*x[i] + (1-a)*out[i-1]
-                return out
-
-            def rsi14(x):
-                d = np.diff(x, prepend=x)
-                g = np.where(d>0, d, 0.0); l = np.where(d<0, -d, 0.0)
-                ag = ema(g,14); al = ema(l,14)
-                eps = 1e-10
-                rs = np.where(al == 0, np.inf, ag / (al + eps))
-                return 100.0 - 100.0/(1.0+rs)
-
-            def macd_12_26_9(x):
-                f, s = ema(x,12), ema(x,26)
-                m = f - s; sig = ema(m,9)
-                return m, sig, m - sig
-
-            def sma(x, p):
-                if len(x) < p: return np.full_like(x, np.nan, dtype=float)
-                out = np.full_like(x, np.nan, dtype=float)
-                w = np.ones(p)/p
-                out[p-1:] = np.convolve(x, w, mode='valid')
-                return out
-
-            def stddev(x, p=20):
-                if len(x) < p: return np.full_like(x, np.nan, dtype=float)
-                out = np.full_like(x, np.nan, dtype=float)
-                for i in range(p-1, len(x)):
-                    out[i] = np.std(x[i-p+1:i+1], ddof=0)
-                return out
-
-            def bollinger(c, p=20, k=2.0):
-                mid = sma(c, p); sd = stddev(c, p)
-                up = mid + k*sd; dn = mid - k*sd
-                return mid, up, dn, sd
-
-            def true_range(h, l, c):
-                prev = np.roll(c, 1); prev = c
-                return np.maximum(h-l, np.maximum(np.abs(h-prev), np.abs(l-prev)))
-
-            def atr(h, l, c, p=14):
-                tr = true_range(h, l, c)
-                a = 1.0/p
-                out = np.zeros_like(tr, dtype=float); out = tr
-                for i in range(1, len(tr)):
-                    out[i] = out[i-1] + a*(tr[i]-out[i-1])
-                return out
-
-            def vol_spike(v, factor=1.2, n=20):
-                base = np.mean(v[-n-1:-1]) if len(v)>n else np.mean(v)
-                return v[-1] > factor*base
-
-            def vol_dryup(v, factor=0.8, n=20):
-                base = np.mean(v[-n-1:-1]) if len(v)>n else np.mean(v)
-                return v[-1] < factor*base
-
-            def near(a,b,tol=0.01):
-                return np.isfinite(a) and np.isfinite(b) and abs(a-b)/max(1e-12,abs(b)) <= tol
 
             def put(name, bull, entry_up=1.001, entry_dn=0.999, sl_up=0.985, sl_dn=1.02, grade="SEASONAL_MASTER"):
                 meta = self.ultra_patterns.get('SEASONAL_CYCLICAL_ULTRA', {}).get('patterns', {}).get(name, {})
@@ -8222,11 +6658,11 @@ class UltraPatternDetector:
                     ))
 
             # ---------- precompute ----------
-            EMA21, EMA55, EMA200 = ema(closes,21), ema(closes,55), ema(closes,200)
-            RSI = rsi14(closes)
-            MACD, MACDsig, MACDhist = macd_12_26_9(closes)
-            BBmid, BBup, BBdn, BBsd = bollinger(closes, 20, 2.0)
-            ATR14 = atr(highs, lows, closes, 14)
+            EMA21, EMA55, EMA200 = ind.ema(21), ind.ema(55), ind.ema(200)
+            RSI = ind.rsi(14, method='ema')
+            MACD, MACDsig, MACDhist = ind.macd(12, 26, 9)
+            BBmid, BBup, BBdn, BBsd = ind.bollinger(20, 2.0)
+            ATR14 = ind.atr(14)
 
             # ---------- flags kalender & feed siklikal (dipasok pipeline) ----------
             # Halving
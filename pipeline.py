@@ -0,0 +1,255 @@
+"""
+Detector pipeline declared as a dependency graph.
+
+Setiap Node adalah satu method _detect_*_stable dengan input eksplisit:
+deret OHLCV yang dioper (`inputs`, huruf dari 'ohlcv') dan, untuk detektor
+gabungan, node mana saja yang polanya dibaca sebagai `base_patterns`
+(`after`). Node tanpa dependensi yang belum selesai dijalankan bersamaan di
+thread pool; node gabungan mulai begitu input yang dideklarasikannya siap.
+
+Dependensi mengikuti apa yang benar-benar dibaca dari base_patterns:
+  combination  semua detektor dasar
+  godlike      dasar + combination (cek nama + len(base_patterns))
+  master       dasar + combination + godlike + legendary (hitung nama PERFECT_*)
+  lainnya      tidak membaca base_patterns -> hanya butuh OHLCV
+sehingga setiap node melihat daftar pola yang sama seperti eksekusi
+berurutan lama, dan hasil akhir disusun dalam urutan PIPELINE (identik
+dengan urutan lama, berapa pun jumlah thread). Detektor yang mulai membaca
+base_patterns harus menambahkan sumbernya ke `after`.
+
+Setiap node juga terikat ke satu tier katalog UltraPatternDetector.ultra_patterns
+(`tier`). Tabel gating dibangun sekali dari katalog: per timeframe, node
+yang min_timeframe tier-nya <= timeframe tersebut beserta nama pola yang
+boleh muncul. Node yang tidak eligible tidak dijalankan sama sekali (outputnya
+kosong bagi node yang bergantung padanya), dan pola dari tier yang tidak
+eligible dibuang dari hasil. Bot memakai eligible() untuk melewati timeframe
+tanpa detektor sebelum membuat frame / menjadwalkan job.
+
+Jumlah thread per proses diatur lewat configure() (lihat DetectorPool dan
+env CPD_PIPELINE_THREADS); 1 = berurutan di thread pemanggil.
+"""
+
+import logging
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+from pattern_detector import UltraPatternDetector, UltraPatternResult
+from timeframes import TIMEFRAME_MS, period_ms
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Node:
+    method: str                     # method detektor di UltraPatternDetector
+    inputs: str = 'ohlcv'           # deret yang dioper, urut sesuai signature
+    after: Tuple[str, ...] = ()     # node yang polanya dioper sebagai base_patterns
+    composite: bool = False         # detektor gabungan (menerima base_patterns)
+    tier: str = ''                  # kategori ultra_patterns yang min_timeframe-nya berlaku
+
+
+BASE_NODES: Tuple[Node, ...] = (
+    Node('_detect_perfect_patterns_stable', 'ohlcv', tier='TIER_PERFECT'),
+    Node('_most_perfect_patterns_stable', 'ohlcv', tier='TIER_SSS'),
+    Node('_detect_classic_patterns_stable', 'ohlcv', tier='TIER_SS'),
+    Node('_detect_harmonic_patterns_stable', 'hlc', tier='HARMONIC_ULTRA'),
+    Node('_detect_elliott_wave_patterns_stable', 'c', tier='ELLIOTT_ULTRA'),
+    Node('_detect_wyckoff_patterns_stable', 'ohlcv', tier='WYCKOFF_ULTRA'),
+    Node('_detect_volume_patterns_stable', 'cv', tier='VOLUME_ULTRA'),
+    Node('_detect_fibonacci_patterns_stable', 'hlc', tier='FIBONACCI_ULTRA'),
+    Node('_detect_candlestick_patterns_stable', 'ohlc', tier='CANDLESTICK_ULTRA'),
+    Node('_detect_oscillator_patterns_stable', 'ohlc', tier='MOMENTUM_OSCILLATOR_ULTRA'),
+    Node('_detect_moving_patterns_stable', 'ohlcv', tier='MOVING_AVERAGE_ULTRA'),
+    Node('_detect_volatility_patterns_stable', 'ohlcv', tier='VOLATILITY_BAND_ULTRA'),
+)
+BASE = tuple(node.method for node in BASE_NODES)
+
+PIPELINE: Tuple[Node, ...] = BASE_NODES + (
+    Node('_detect_combination_patterns_stable', composite=True, tier='PATTERN_COMBINATION_ULTRA',
+         after=BASE),
+    Node('_detect_godlike_patterns_stable', composite=True, tier='ULTIMATE_GODLIKE_COMBINATIONS',
+         after=BASE + ('_detect_combination_patterns_stable',)),
+    Node('_detect_legendary_patterns_stable', composite=True, tier='ULTIMATE_LEGENDARY_COMBINATIONS'),
+    Node('_detect_master_patterns_stable', composite=True, tier='ULTIMATE_MASTER_COMBINATIONS',
+         after=BASE + ('_detect_combination_patterns_stable', '_detect_godlike_patterns_stable',
+                       '_detect_legendary_patterns_stable')),
+    Node('_detect_blockchain_patterns_stable', composite=True, tier='BLOCKCHAIN_TECHNICAL_FUSION'),
+    Node('_detect_cross_patterns_stable', composite=True, tier='CROSS_MARKET_ULTRA'),
+    Node('_detect_real_patterns_stable', composite=True, tier='REAL_TIME_EVENT_ULTRA'),
+    Node('_detect_quantum_patterns_stable', composite=True, tier='QUANTUM_COMPUTING_ULTRA'),
+    Node('_detect_microstructur_patterns_stable', composite=True, tier='MICROSTRUCTURE_ULTRA'),
+    Node('_detect_seasonal_patterns_stable', composite=True, tier='SEASONAL_CYCLICAL_ULTRA'),
+)
+
+
+def _validate(nodes: Tuple[Node, ...]) -> Dict[str, Tuple[str, ...]]:
+    """Dependensi per node dalam urutan PIPELINE; graf harus asiklik dan terurut topologis"""
+    position = {}
+    for i, node in enumerate(nodes):
+        if node.method in position:
+            raise ValueError(f"Duplicate pipeline node: {node.method}")
+        for dep in node.after:
+            if dep not in position:
+                raise ValueError(f"{node.method} depends on {dep}, which is not declared before it")
+        position[node.method] = i
+    return {node.method: tuple(sorted(set(node.after), key=position.get)) for node in nodes}
+
+
+DEPENDENCIES = _validate(PIPELINE)
+
+# ================== GATING ==================
+
+@dataclass(frozen=True)
+class Gate:
+    timeframe: str
+    nodes: FrozenSet[str]           # method detektor yang dijalankan di timeframe ini
+    tiers: FrozenSet[str]           # tier katalog yang eligible
+    patterns: FrozenSet[str]        # nama pola katalog yang eligible
+    blocked: FrozenSet[str]         # nama pola katalog dari tier yang belum eligible
+
+
+def _tier_allows(catalog: Dict, tier: str, timeframe: str) -> bool:
+    min_tf = catalog.get(tier, {}).get('min_timeframe') if tier else None
+    if min_tf is None:
+        return True
+    try:
+        return period_ms(timeframe) >= period_ms(min_tf)
+    except ValueError:
+        logger.debug(f"Unknown timeframe in gating ({timeframe} / {min_tf}), not gating {tier}")
+        return True
+
+
+def build_gating_table(catalog: Dict) -> Dict[str, Gate]:
+    """timeframe -> Gate, dari min_timeframe setiap tier di ultra_patterns"""
+    table: Dict[str, Gate] = {}
+    for tf in TIMEFRAME_MS:
+        tiers = frozenset(t for t in catalog if _tier_allows(catalog, t, tf))
+        nodes = frozenset(n.method for n in PIPELINE if _tier_allows(catalog, n.tier, tf))
+        patterns = frozenset(p for t in tiers for p in catalog[t].get('patterns', {}))
+        blocked = frozenset(p for t in catalog if t not in tiers
+                            for p in catalog[t].get('patterns', {})) - patterns
+        table[tf] = Gate(tf, nodes, tiers, patterns, blocked)
+    return table
+
+
+# id(katalog) -> (katalog, tabel); katalog ikut disimpan supaya id-nya tidak dipakai ulang
+_tables: Dict[int, Tuple[Dict, Dict[str, Gate]]] = {}
+
+
+def gating_table(detector: UltraPatternDetector) -> Dict[str, Gate]:
+    catalog = detector.ultra_patterns
+    entry = _tables.get(id(catalog))
+    if entry is None:
+        entry = _tables[id(catalog)] = (catalog, build_gating_table(catalog))
+    return entry[1]
+
+
+def gate(detector: UltraPatternDetector, timeframe: str) -> Optional[Gate]:
+    """Gate untuk timeframe; None jika timeframe tidak dikenal (semua detektor jalan)"""
+    return gating_table(detector).get(timeframe)
+
+
+def eligible(detector: UltraPatternDetector, timeframe: str) -> bool:
+    """True jika minimal satu detektor boleh jalan di timeframe ini"""
+    g = gate(detector, timeframe)
+    return g is None or bool(g.nodes)
+
+# ================== EXECUTOR ==================
+
+_threads = 1
+_pool: Optional[ThreadPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def configure(threads: int):
+    """Jumlah thread detektor per proses; pool lama dimatikan jika ukurannya berubah"""
+    global _threads, _pool
+    threads = max(1, int(threads))
+    with _pool_lock:
+        if threads == _threads:
+            return
+        _threads = threads
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False)
+
+
+def threads() -> int:
+    return _threads
+
+
+def _executor() -> Optional[ThreadPoolExecutor]:
+    global _pool
+    if _threads <= 1:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=_threads, thread_name_prefix='cpd-detector')
+        return _pool
+
+
+def run_pipeline(detector: UltraPatternDetector, series: Dict[str, object], current_price: float,
+                 timeframe: str, indicators=None, skip: FrozenSet[str] = frozenset()) -> List[UltraPatternResult]:
+    """
+    Jalankan semua node; `series` berisi deret per huruf ('o', 'h', 'l', 'c', 'v').
+    `skip`: node yang sudah pasti kosong menurut pre-screen (lihat prescreen.py).
+    """
+    outputs = run_nodes(detector, series, current_price, timeframe, indicators, skip)
+    return [p for found in outputs.values() for p in found]
+
+
+def run_nodes(detector: UltraPatternDetector, series: Dict[str, object], current_price: float,
+              timeframe: str, indicators=None,
+              skip: FrozenSet[str] = frozenset()) -> Dict[str, List[UltraPatternResult]]:
+    """Output per node (urutan PIPELINE, pola tier yang belum eligible sudah dibuang)"""
+    g = gate(detector, timeframe)
+    # node yang di-gate / di-skip tidak dijalankan; bagi node yang bergantung padanya, outputnya kosong
+    outputs: Dict[str, List[UltraPatternResult]] = {
+        node.method: [] for node in PIPELINE
+        if (g is not None and node.method not in g.nodes) or node.method in skip
+    }
+    active = [node for node in PIPELINE if node.method not in outputs]
+
+    def call(node: Node) -> List[UltraPatternResult]:
+        args = [series[k] for k in node.inputs]
+        method = getattr(detector, node.method)
+        if node.composite:
+            base = [p for dep in DEPENDENCIES[node.method] for p in outputs[dep]]
+            return method(*args, current_price, timeframe, base, indicators=indicators)
+        return method(*args, current_price, timeframe, indicators=indicators)
+
+    pool = _executor()
+    if pool is None:
+        for node in active:
+            outputs[node.method] = call(node)
+    else:
+        # outputs hanya ditulis di thread ini; node baru di-submit setelah semua dependensinya tercatat
+        waiting = {node.method: set(DEPENDENCIES[node.method]) - set(outputs) for node in active}
+        running: Dict[Future, str] = {}
+
+        def submit_ready():
+            for node in active:
+                deps = waiting.get(node.method)
+                if deps is not None and not deps:
+                    del waiting[node.method]
+                    running[pool.submit(call, node)] = node.method
+
+        submit_ready()
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    outputs[name] = future.result()
+                except Exception:
+                    for other in running:
+                        other.cancel()
+                    raise
+                for deps in waiting.values():
+                    deps.discard(name)
+            submit_ready()
+
+    blocked = g.blocked if g is not None else frozenset()
+    return {node.method: [p for p in outputs[node.method] if p.name not in blocked] for node in PIPELINE}
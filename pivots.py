@@ -0,0 +1,387 @@
+"""
+Unified swing / pivot engine.
+
+Menggantikan swing finder yang dulu ditulis ulang di tiap detektor
+(_find_swings, list comprehension max(H[i-3:i+4]), build_swings,
+recent_pivots, swing_highs_lows, local_extrema). Ekstrem berjendela
+dihitung vektorisasi dengan sliding_window_view; filter prominence dan
+de-duplikasi min_distance mengikuti aturan _find_swings di detektor perfect.
+Hasil untuk deret OHLCV di-memo oleh IndicatorBundle.pivots().
+
+StreamingPivots memelihara pivot yang sama secara incremental per candle
+tertutup: pivot di bar i baru terkonfirmasi `right` bar kemudian, dan aturan
+de-duplikasi min_distance hanya bisa mengganti pivot terakhir.
+"""
+
+import logging
+import math
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+import jit
+
+logger = logging.getLogger(__name__)
+
+
+def _padded(a: np.ndarray, left: int, right: int, kind: str) -> np.ndarray:
+    # padding -inf/+inf membuat jendela di tepi array otomatis terpotong (clipped)
+    fill = -np.inf if kind == 'high' else np.inf
+    return np.concatenate([np.full(left, fill), a, np.full(right, fill)])
+
+
+def _window_reduce(padded: np.ndarray, width: int, kind: str) -> np.ndarray:
+    win = sliding_window_view(padded, width)
+    return win.max(axis=1) if kind == 'high' else win.min(axis=1)
+
+
+def extrema_mask(arr, left: int = 3, right: int = 3, kind: str = 'high', edges: bool = False) -> np.ndarray:
+    """
+    Mask bar yang merupakan max (kind='high') / min (kind='low') dari a[i-left:i+right+1].
+    edges=False: hanya bar dengan jendela penuh (left <= i < n-right).
+    edges=True : bar di tepi ikut dinilai dengan jendela yang terpotong.
+    """
+    if kind not in ('high', 'low'):
+        raise ValueError(f"Unknown pivot kind: {kind}")
+    a = np.asarray(arr, dtype=float)
+    n = len(a)
+    mask = np.zeros(n, dtype=bool)
+    if n == 0:
+        return mask
+    ext = _window_reduce(_padded(a, left, right, kind), left + right + 1, kind)
+    mask = a == ext
+    if not edges:
+        mask[:min(left, n)] = False
+        if right > 0:
+            mask[max(0, n - right):] = False
+    return mask
+
+
+def _prominence_ok(a: np.ndarray, idx: np.ndarray, left: int, right: int, kind: str, tol: float) -> np.ndarray:
+    """Filter prominence relatif seperti _find_swings: jarak pivot ke ekstrem tetangga terdekat"""
+    padded = _padded(a, left, right, kind)
+    if left > 0:
+        side_l = _window_reduce(padded, left, kind)[idx]
+    else:
+        side_l = a[idx]
+    if right > 0:
+        side_r = _window_reduce(padded, right, kind)[idx + 1 + left]
+    else:
+        side_r = a[idx]
+    if kind == 'high':
+        ref = np.maximum(side_l, side_r)
+        prom = a[idx] - ref
+    else:
+        ref = np.minimum(side_l, side_r)
+        prom = ref - a[idx]
+    base = np.maximum(1e-12, ref)
+    return prom / base >= tol
+
+
+def _dedup(a: np.ndarray, idx: np.ndarray, kind: str, min_distance: int) -> List[int]:
+    """Pivot yang terlalu dekat digabung, yang paling ekstrem dipertahankan"""
+    dedup: List[int] = []
+    last = -10**9
+    for i in idx.tolist():
+        if i - last >= min_distance:
+            dedup.append(i)
+            last = i
+        elif dedup:
+            j = dedup[-1]
+            if (a[i] > a[j]) if kind == 'high' else (a[i] < a[j]):
+                dedup[-1] = i
+                last = i
+    return dedup
+
+
+def find_pivots(arr, left: int = 3, right: int = 3, kind: str = 'high',
+                prominence: Optional[float] = None, min_distance: Optional[int] = None,
+                edges: bool = False) -> np.ndarray:
+    """Indeks pivot (urut naik) setelah filter prominence dan de-duplikasi min_distance"""
+    a = np.asarray(arr, dtype=float)
+    idx = np.flatnonzero(extrema_mask(a, left, right, kind, edges))
+    if prominence is not None and len(idx):
+        idx = idx[_prominence_ok(a, idx, left, right, kind, prominence)]
+    if min_distance is not None and min_distance > 1 and len(idx):
+        idx = np.asarray(_dedup(a, idx, kind, min_distance), dtype=int)
+    return idx
+
+
+def in_window(idx, n: int, window: int, left: int = 0, right: int = 0) -> List[int]:
+    """
+    Petakan indeks pivot global ke indeks relatif jendela a[-window:].
+    Hanya pivot yang jendela left/right-nya utuh di dalam segmen yang dipakai,
+    sehingga hasilnya sama dengan mencari pivot langsung pada segmen tersebut.
+    """
+    offset = n - window
+    idx = np.asarray(idx, dtype=int)
+    sel = idx[(idx >= offset + left) & (idx < n - right)]
+    return (sel - offset).tolist()
+
+
+def _zigzag_sample():
+    return np.linspace(1.0, 2.0, 32) * (1.0 + 0.1 * np.sin(np.arange(32.0))), 0.03, 3
+
+
+@jit.kernel(_zigzag_sample)
+def _zigzag_walk(s, thr, backstep):
+    """Walk ZigZag sekuensial; kembalikan (indeks, arah) pivot dengan arah 1 = H, -1 = L"""
+    n = s.shape[0]
+    idx = np.empty(n, dtype=np.int64)
+    kind = np.empty(n, dtype=np.int64)
+    count = 0
+    last_pivot_idx = 0
+    last_pivot_price = s[0]
+    mode = 0  # 1 up, -1 down
+    for i in range(1, n):
+        price = s[i]
+        base = last_pivot_price if last_pivot_price != 0 else 1e-9
+        chg = (price - last_pivot_price) / base
+        if mode >= 0 and chg >= thr:
+            # konfirmasi pivot low terakhir di [max(last_pivot_idx, i-backstep), i]
+            j = max(last_pivot_idx, i - backstep)
+            for k in range(j + 1, i + 1):
+                if s[k] < s[j]:
+                    j = k
+            if count == 0 or kind[count - 1] != -1:
+                idx[count] = j
+                kind[count] = -1
+                count += 1
+            last_pivot_idx, last_pivot_price, mode = i, price, -1
+        elif mode <= 0 and chg <= -thr:
+            j = max(last_pivot_idx, i - backstep)
+            for k in range(j + 1, i + 1):
+                if s[k] > s[j]:
+                    j = k
+            if count == 0 or kind[count - 1] != 1:
+                idx[count] = j
+                kind[count] = 1
+                count += 1
+            last_pivot_idx, last_pivot_price, mode = i, price, 1
+        elif mode >= 0 and price > last_pivot_price:
+            last_pivot_idx, last_pivot_price = i, price
+        elif mode <= 0 and price < last_pivot_price:
+            last_pivot_idx, last_pivot_price = i, price
+    return idx[:count], kind[:count]
+
+
+def zigzag(series, pct: float = 0.03, backstep: int = 3) -> List[Tuple[int, float, str]]:
+    """
+    ZigZag berbasis threshold persentase (adaptif terhadap volatilitas 20 bar terakhir).
+    Mengembalikan list (index, price, 'H'/'L') yang berselang-seling.
+    """
+    s = np.ascontiguousarray(series, dtype=float)
+    n = len(s)
+    if n < 10:
+        return []
+
+    window = min(20, n)
+    recent = s[-window:]
+    mean = float(recent.mean())
+    std = float(recent.std())
+    thr = max(pct, min(0.08, max(0.008, std / mean)) * 0.8) if mean > 0 else pct
+
+    idx, kind = _zigzag_walk(s, float(thr), int(backstep))
+    pivots: List[Tuple[int, float, str]] = [
+        (int(i), float(s[i]), 'H' if k > 0 else 'L') for i, k in zip(idx.tolist(), kind.tolist())
+    ]
+
+    # finalize pivot terakhir
+    if pivots:
+        last = pivots[-1]
+        if last[2] == 'H' and s[-1] < last[1]:
+            pivots.append((n - 1, float(s[-1]), 'L'))
+        elif last[2] == 'L' and s[-1] > last[1]:
+            pivots.append((n - 1, float(s[-1]), 'H'))
+
+    uniq: List[Tuple[int, float, str]] = []
+    seen = set()
+    for p in pivots:
+        if p not in seen:
+            uniq.append(p)
+            seen.add(p)
+    return uniq
+
+
+def _alternating_sample():
+    h = np.array([1.0, 1.2, 1.1, 1.4, 1.0, 1.5])
+    return np.array([1, 2, 3, 4], dtype=np.int64), np.array([1, 0, 1, 0], dtype=np.int64), h, h - 0.1, 0.01
+
+
+@jit.kernel(_alternating_sample)
+def _alternating_walk(cand, cand_kind, h, l, min_move):
+    """
+    Saring kandidat pivot (urut indeks) menjadi swing H/L berselang-seling yang
+    bergerak minimal `min_move` (relatif) dari swing sebelumnya.
+    cand_kind: 1 = high saja, -1 = low saja, 0 = keduanya (outside bar).
+    """
+    m = cand.shape[0]
+    out_idx = np.empty(2 * m, dtype=np.int64)
+    out_kind = np.empty(2 * m, dtype=np.int64)
+    out_price = np.empty(2 * m, dtype=np.float64)
+    count = 0
+    for t in range(m):
+        i = cand[t]
+        ck = cand_kind[t]
+        if ck >= 0:
+            if count == 0 or out_kind[count - 1] == -1:
+                ok = True
+                if count > 0:
+                    prev = out_price[count - 1]
+                    ok = abs(h[i] - prev) / max(1e-9, prev) >= min_move
+                if ok:
+                    out_idx[count] = i
+                    out_kind[count] = 1
+                    out_price[count] = h[i]
+                    count += 1
+        if ck <= 0:
+            if count == 0 or out_kind[count - 1] == 1:
+                ok = True
+                if count > 0:
+                    prev = out_price[count - 1]
+                    ok = abs(l[i] - prev) / max(1e-9, prev) >= min_move
+                if ok:
+                    out_idx[count] = i
+                    out_kind[count] = -1
+                    out_price[count] = l[i]
+                    count += 1
+    return out_idx[:count], out_kind[:count], out_price[:count]
+
+
+def alternating_swings(peaks, troughs, highs, lows, min_move: float) -> List[Tuple[str, int, float]]:
+    """
+    Gabungkan indeks pivot high/low menjadi list ('H'/'L', index, price) berselang-seling,
+    dengan ambang gerak minimum (mis. adaptif ATR) terhadap swing sebelumnya.
+    Pada bar yang sekaligus pivot high dan low, high dinilai lebih dulu.
+    """
+    peaks = np.asarray(peaks, dtype=np.int64)
+    troughs = np.asarray(troughs, dtype=np.int64)
+    cand = np.union1d(peaks, troughs).astype(np.int64)
+    if len(cand) == 0:
+        return []
+    is_peak = np.isin(cand, peaks)
+    is_trough = np.isin(cand, troughs)
+    cand_kind = np.where(is_peak & is_trough, 0, np.where(is_peak, 1, -1)).astype(np.int64)
+    idx, kind, price = _alternating_walk(cand, cand_kind,
+                                         np.ascontiguousarray(highs, dtype=float),
+                                         np.ascontiguousarray(lows, dtype=float),
+                                         float(min_move))
+    return [('H' if k > 0 else 'L', int(i), float(p))
+            for i, k, p in zip(idx.tolist(), kind.tolist(), price.tolist())]
+
+
+# ================== INCREMENTAL ==================
+
+PivotKey = Tuple[str, int, int, Optional[float], Optional[int]]
+
+# konfigurasi yang dipakai detektor: (kind, left, right, prominence, min_distance)
+DEFAULT_PIVOT_CONFIGS: Tuple[PivotKey, ...] = (
+    ('high', 3, 3, 0.005, 5), ('low', 3, 3, 0.005, 5),   # perfect
+    ('high', 3, 3, None, None), ('low', 3, 3, None, None),  # most_perfect, harmonic
+    ('high', 2, 2, None, None), ('low', 2, 2, None, None),  # classic, legendary
+    ('high', 5, 5, None, None), ('low', 5, 5, None, None),  # fibonacci
+)
+
+
+class PivotTracker:
+    """
+    Pivot satu konfigurasi yang dimajukan satu bar per update().
+    Indeks yang disimpan absolut (jumlah bar sejak reset), bukan relatif deret.
+    """
+
+    def __init__(self, left: int = 3, right: int = 3, kind: str = 'high',
+                 prominence: Optional[float] = None, min_distance: Optional[int] = None,
+                 maxlen: int = 1000):
+        if kind not in ('high', 'low'):
+            raise ValueError(f"Unknown pivot kind: {kind}")
+        self.left = left
+        self.right = right
+        self.kind = kind
+        self.prominence = prominence
+        self.min_distance = min_distance
+        self._window: deque = deque(maxlen=left + right + 1)
+        self.confirmed: deque = deque(maxlen=maxlen)  # (abs_idx, price)
+        self.count = 0
+
+    def _extreme(self, values) -> float:
+        return max(values) if self.kind == 'high' else min(values)
+
+    def _more_extreme(self, a: float, b: float) -> bool:
+        return a > b if self.kind == 'high' else a < b
+
+    def update(self, x: float) -> Optional[int]:
+        """Tambah satu bar; kembalikan indeks absolut pivot yang baru terkonfirmasi/diganti, atau None"""
+        self._window.append(float(x))
+        self.count += 1
+        if len(self._window) < self._window.maxlen:
+            return None
+        vals = list(self._window)
+        if any(math.isnan(v) for v in vals):
+            return None  # sama dengan versi batch: max/min NaN tidak pernah == nilai
+        cand = vals[self.left]
+        if cand != self._extreme(vals):
+            return None
+
+        if self.prominence is not None:
+            side_l = self._extreme(vals[:self.left]) if self.left > 0 else cand
+            side_r = self._extreme(vals[self.left + 1:]) if self.right > 0 else cand
+            ref = self._extreme((side_l, side_r))
+            prom = cand - ref if self.kind == 'high' else ref - cand
+            if prom / max(1e-12, ref) < self.prominence:
+                return None
+
+        idx = self.count - 1 - self.right
+        md = self.min_distance
+        if md is None or md <= 1 or not self.confirmed or idx - self.confirmed[-1][0] >= md:
+            self.confirmed.append((idx, cand))
+        elif self._more_extreme(cand, self.confirmed[-1][1]):
+            self.confirmed[-1] = (idx, cand)
+        else:
+            return None
+        return idx
+
+
+class StreamingPivots:
+    """
+    Kumpulan PivotTracker per (symbol, timeframe), dimajukan dari candle high/low.
+    Dibaca lewat IndicatorBundle.pivots() ketika stream sinkron dengan bundle.
+    """
+
+    def __init__(self, configs=DEFAULT_PIVOT_CONFIGS, maxlen: int = 1000):
+        self.configs = tuple(configs)
+        self.maxlen = maxlen
+        self.reset()
+
+    def reset(self):
+        self._trackers: Dict[PivotKey, PivotTracker] = {
+            key: PivotTracker(key[1], key[2], key[0], key[3], key[4], maxlen=self.maxlen)
+            for key in self.configs
+        }
+        self.count = 0
+
+    def update(self, high: float, low: float):
+        for key, tracker in self._trackers.items():
+            tracker.update(high if key[0] == 'high' else low)
+        self.count += 1
+
+    def key_for(self, kind: str, left: int, right: int, source: str,
+                prominence: Optional[float] = None, min_distance: Optional[int] = None) -> Optional[PivotKey]:
+        """Key tracker yang setara dengan find_pivots(series(source), ...), atau None"""
+        if source != kind:
+            return None
+        if min_distance is not None and min_distance <= 1:
+            min_distance = None
+        key = (kind, left, right, prominence, min_distance)
+        return key if key in self._trackers else None
+
+    def indices(self, key: PivotKey, length: int) -> np.ndarray:
+        """
+        Indeks pivot relatif terhadap `length` bar terakhir. Pivot dengan jendela kiri
+        di luar deret dibuang supaya cocok dengan find_pivots(edges=False).
+        """
+        tracker = self._trackers[key]
+        offset = self.count - length
+        first = offset + tracker.left
+        return np.asarray([i - offset for i, _ in tracker.confirmed if i >= first], dtype=int)
@@ -0,0 +1,187 @@
+"""
+Cheap pre-screen stage before the full detectors.
+
+Banyak detektor menyiapkan indikator dan helper dulu, lalu baru menemukan
+prasyaratnya gagal. Pre-screen mengevaluasi syarat perlu yang murah per node
+pipeline sebelum detektor dikirim ke worker:
+
+  bars       jumlah bar minimum (early return detektor itu sendiri)
+  timeframe  timeframe yang dilayani (mis. seasonal hanya 1d)
+  swings     jumlah swing ZigZag minimum (harmonic), dari pivot/ATR yang
+             sudah di-memo di IndicatorBundle sehingga detektor memakai ulang
+
+Syarat bars/timeframe dievaluasi sekaligus untuk banyak deret (semua simbol
+saat sweep awal, semua timeframe satu job) dalam satu operasi vektor lewat
+screen(); deret yang tidak lolos satu node pun tidak dikirim ke worker.
+Syarat struktural dievaluasi di worker tepat sebelum pipeline berjalan
+(structural_skips()). Hanya syarat yang persis sama dengan early return
+detektor yang dipakai, jadi output detektor tidak berubah.
+
+Hit rate (lolos / diperiksa) per node dikumpulkan di LOCAL; worker
+mengembalikan delta-nya (drain()) bersama hasil deteksi supaya bot bisa
+melaporkan angka gabungan.
+"""
+
+import logging
+from dataclasses import dataclass
+from typing import Callable, Dict, FrozenSet, Hashable, Optional, Tuple
+
+import numpy as np
+
+import pipeline
+from pattern_detector import UltraPatternDetector
+from pivots import alternating_swings
+
+logger = logging.getLogger(__name__)
+
+
+def _harmonic_swings(series: Dict, current_price: float, ind) -> bool:
+    """Sama dengan build_swings() di _detect_harmonic_patterns_stable: butuh >= 7 swing"""
+    highs, lows = series['h'], series['l']
+    atr_pct = ind.atr(14)[-1] / max(1e-9, current_price)
+    min_move = max(0.012, atr_pct * 2.0)
+    nbar = min(len(highs), len(lows))
+    peaks = ind.pivots('high', 3, 3)
+    troughs = ind.pivots('low', 3, 3)
+    swings = alternating_swings(peaks[peaks < nbar], troughs[troughs < nbar], highs[:nbar], lows[:nbar], min_move)
+    return len(swings) >= 7
+
+
+@dataclass(frozen=True)
+class Screen:
+    min_bars: int = 0
+    timeframes: Tuple[str, ...] = ()                # kosong = semua timeframe
+    check: Optional[Callable] = None                # syarat struktural (series, price, bundle) -> bool
+    check_name: str = ''
+
+
+SCREENS: Dict[str, Screen] = {
+    '_detect_perfect_patterns_stable': Screen(30),
+    '_most_perfect_patterns_stable': Screen(30),
+    '_detect_classic_patterns_stable': Screen(30),
+    '_detect_harmonic_patterns_stable': Screen(50, check=_harmonic_swings, check_name='swings'),
+    '_detect_elliott_wave_patterns_stable': Screen(40),
+    '_detect_wyckoff_patterns_stable': Screen(50),
+    '_detect_volume_patterns_stable': Screen(30),
+    '_detect_fibonacci_patterns_stable': Screen(30),
+    '_detect_candlestick_patterns_stable': Screen(8),
+    '_detect_oscillator_patterns_stable': Screen(30),
+    '_detect_moving_patterns_stable': Screen(210),
+    '_detect_volatility_patterns_stable': Screen(60),
+    '_detect_combination_patterns_stable': Screen(60),
+    '_detect_godlike_patterns_stable': Screen(120),
+    '_detect_legendary_patterns_stable': Screen(80),
+    '_detect_master_patterns_stable': Screen(80),
+    '_detect_blockchain_patterns_stable': Screen(120),
+    '_detect_cross_patterns_stable': Screen(80),
+    '_detect_real_patterns_stable': Screen(60),
+    '_detect_quantum_patterns_stable': Screen(120),
+    '_detect_microstructur_patterns_stable': Screen(60),
+    '_detect_seasonal_patterns_stable': Screen(180, timeframes=('1d',)),
+}
+
+METHODS: Tuple[str, ...] = tuple(node.method for node in pipeline.PIPELINE)
+_missing = [m for m in METHODS if m not in SCREENS]
+if _missing:
+    raise ValueError(f"Pipeline nodes without a pre-screen entry: {_missing}")
+_MIN_BARS = np.array([SCREENS[m].min_bars for m in METHODS], dtype=np.int64)
+
+
+def _label(method: str) -> str:
+    # '_detect_harmonic_patterns_stable' -> 'harmonic'
+    return method.replace('_patterns_stable', '').replace('_detect_', '').lstrip('_')
+
+
+# ================== HIT RATE ==================
+
+class ScreenStats:
+    """Counter [diperiksa, lolos] per label ('harmonic', 'harmonic:swings', ...)"""
+
+    def __init__(self):
+        self.counts: Dict[str, list] = {}
+
+    def add(self, label: str, checked: int, passed: int):
+        entry = self.counts.setdefault(label, [0, 0])
+        entry[0] += int(checked)
+        entry[1] += int(passed)
+
+    def merge(self, counts: Dict[str, Tuple[int, int]]):
+        for label, (checked, passed) in (counts or {}).items():
+            self.add(label, checked, passed)
+
+    def drain(self) -> Dict[str, Tuple[int, int]]:
+        """Delta sejak drain terakhir (dikirim worker bersama hasil deteksi)"""
+        counts = {label: (c, p) for label, (c, p) in self.counts.items()}
+        self.counts.clear()
+        return counts
+
+    def stats(self) -> Dict[str, str]:
+        return {label: f"{p}/{c} ({100.0 * p / c:.0f}%)"
+                for label, (c, p) in sorted(self.counts.items()) if c}
+
+
+LOCAL = ScreenStats()
+
+# ================== BATCHED SCREEN ==================
+
+_tf_rows: Dict[Tuple[int, str], np.ndarray] = {}
+
+
+def _eligible_row(detector: UltraPatternDetector, timeframe: str) -> np.ndarray:
+    """Mask node yang lolos gating tier dan filter timeframe untuk satu timeframe (di-cache)"""
+    key = (id(pipeline.gating_table(detector)), timeframe)
+    row = _tf_rows.get(key)
+    if row is None:
+        g = pipeline.gate(detector, timeframe)
+        row = np.array([(g is None or m in g.nodes) and
+                        (not SCREENS[m].timeframes or timeframe in SCREENS[m].timeframes)
+                        for m in METHODS], dtype=bool)
+        _tf_rows[key] = row
+    return row
+
+
+def screen(detector: UltraPatternDetector, series: Dict[Hashable, Tuple[str, int]],
+           record: bool = True) -> Dict[Hashable, FrozenSet[str]]:
+    """
+    {key: (timeframe, jumlah bar)} -> {key: node yang lolos syarat murah}, untuk
+    semua key dalam satu operasi vektor. Key bebas, mis. timeframe satu job
+    atau (symbol, timeframe) untuk seluruh simbol.
+    """
+    keys = list(series)
+    if not keys:
+        return {}
+    lengths = np.array([series[k][1] for k in keys], dtype=np.int64)
+    eligible = np.vstack([_eligible_row(detector, series[k][0]) for k in keys])
+    passed = eligible & (lengths[:, None] >= _MIN_BARS[None, :])
+
+    if record:
+        checked_n, passed_n = eligible.sum(axis=0), passed.sum(axis=0)
+        for i, method in enumerate(METHODS):
+            if checked_n[i]:
+                LOCAL.add(_label(method), checked_n[i], passed_n[i])
+    methods = np.array(METHODS, dtype=object)
+    return {k: frozenset(methods[passed[i]]) for i, k in enumerate(keys)}
+
+
+def structural_skips(detector: UltraPatternDetector, series: Dict, current_price: float,
+                     timeframe: str, indicators=None) -> FrozenSet[str]:
+    """Node dengan syarat struktural yang gagal untuk deret ini (dievaluasi di worker)"""
+    if indicators is None:
+        return frozenset()
+    n = len(series['c'])
+    row = _eligible_row(detector, timeframe)
+    skips = set()
+    for i, method in enumerate(METHODS):
+        spec = SCREENS[method]
+        if spec.check is None or not row[i] or n < spec.min_bars:
+            continue
+        try:
+            ok = bool(spec.check(series, current_price, indicators))
+        except Exception as e:
+            # ragu -> jalankan detektornya
+            logger.debug(f"Pre-screen {spec.check_name} for {_label(method)} failed: {e}")
+            ok = True
+        LOCAL.add(f"{_label(method)}:{spec.check_name}", 1, int(ok))
+        if not ok:
+            skips.add(method)
+    return frozenset(skips)
@@ -0,0 +1,70 @@
+"""
+Fixed-capacity columnar ring buffer.
+
+Setiap field disimpan sebagai satu baris float64 kontigu dengan panjang
+2 x capacity; setiap nilai ditulis dua kali (di posisi i dan i + capacity).
+Dengan begitu `length` nilai terakhir selalu berada dalam satu potongan
+kontigu [pos + capacity - length, pos + capacity), sehingga view berurutan
+(paling lama dulu) bisa diberikan tanpa salinan dan tanpa compaction,
+sementara append tetap O(1).
+
+View menunjuk buffer yang sama: isinya valid sampai append berikutnya
+menimpa slot tertua. Pembaca yang perlu menyimpan data lebih lama harus
+menyalin (np.array(view)).
+"""
+
+import logging
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class RingColumns:
+    def __init__(self, fields: Sequence[str], capacity: int):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.fields = tuple(fields)
+        self.capacity = int(capacity)
+        self._index: Dict[str, int] = {name: i for i, name in enumerate(self.fields)}
+        self._buf = np.full((len(self.fields), 2 * self.capacity), np.nan, dtype=np.float64)
+        self._pos = 0       # slot berikutnya yang ditulis, 0..capacity-1
+        self._len = 0
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __contains__(self, field: str) -> bool:
+        return field in self._index
+
+    def append(self, values: Sequence[float]):
+        """Satu baris nilai dalam urutan `fields`; baris tertua keluar jika sudah penuh"""
+        pos = self._pos
+        self._buf[:, pos] = values
+        self._buf[:, pos + self.capacity] = values
+        self._pos = (pos + 1) % self.capacity
+        if self._len < self.capacity:
+            self._len += 1
+
+    def view(self, field: str, length: Optional[int] = None) -> np.ndarray:
+        """View read-only `length` nilai terakhir `field` (paling lama dulu), tanpa salinan"""
+        try:
+            row = self._index[field]
+        except KeyError:
+            raise KeyError(f"Field '{field}' is not tracked")
+        n = self._len if length is None else max(0, min(int(length), self._len))
+        end = self._pos + self.capacity
+        out = self._buf[row, end - n:end]
+        out.flags.writeable = False
+        return out
+
+    def last(self, field: str) -> float:
+        if not self._len:
+            return float('nan')
+        return float(self._buf[self._index[field], self._pos + self.capacity - 1])
+
+    def clear(self):
+        self._buf.fill(np.nan)
+        self._pos = 0
+        self._len = 0
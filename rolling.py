@@ -0,0 +1,208 @@
+"""
+Rolling-window statistics dalam waktu O(n) untuk semua panjang jendela.
+
+Sum/mean/std memakai cumulative sum (dengan penghitung NaN terpisah supaya
+satu NaN hanya merusak jendela yang memuatnya), max/min memakai algoritma
+van Herk / Gil-Werman: maksimum prefix & suffix per blok selebar jendela,
+yaitu versi vektorisasi dari monotonic deque. Stochastic, Williams %R,
+Donchian dan Ichimoku dibangun di atasnya.
+
+Semua fungsi bersifat trailing (jendela berakhir di bar i) dan mengembalikan
+NaN sebelum jendela terisi `min_periods` bar (default: penuh).
+"""
+
+import logging
+from typing import Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def _as_float(x) -> np.ndarray:
+    return np.asarray(x, dtype=float)
+
+
+def _window_counts(n: int, period: int) -> np.ndarray:
+    # jumlah bar di jendela (terpotong di awal deret)
+    return np.minimum(np.arange(1, n + 1), period).astype(float)
+
+
+def _windowed(csum: np.ndarray, period: int) -> np.ndarray:
+    """Selisih cumsum -> jumlah per jendela trailing (csum diawali 0)"""
+    n = len(csum) - 1
+    lo = np.maximum(np.arange(1, n + 1) - period, 0)
+    return csum[1:] - csum[lo]
+
+
+_CANCEL_EPS = 64 * np.finfo(float).eps
+
+
+def _min_periods(period: int, min_periods: Optional[int]) -> int:
+    return period if min_periods is None else max(1, min(min_periods, period))
+
+
+def _sums(x: np.ndarray, period: int, squares: bool = False):
+    """(sum, sum kuadrat atau None, jumlah NaN, batas galat sum kuadrat atau None) per jendela"""
+    nan = np.isnan(x)
+    clean = np.where(nan, 0.0, x)
+    if squares:
+        # geser ke rata-rata global supaya selisih cumsum kuadrat tidak kehilangan presisi
+        shift = float(clean[~nan].mean()) if (~nan).any() else 0.0
+        clean = np.where(nan, 0.0, x - shift)
+    zero = np.zeros(1)
+    total = _windowed(np.concatenate([zero, np.cumsum(clean)]), period)
+    total_sq = sq_err = None
+    if squares:
+        csum_sq = np.concatenate([zero, np.cumsum(clean * clean)])
+        total_sq = _windowed(csum_sq, period)
+        # selisih dua cumsum besar: galat pembulatan sebanding dengan cumsum di bar itu
+        sq_err = _CANCEL_EPS * csum_sq[1:]
+    nan_count = _windowed(np.concatenate([zero, np.cumsum(nan)]), period)
+    return total, total_sq, nan_count, sq_err
+
+
+def rolling_sum(x, period: int, min_periods: Optional[int] = None) -> np.ndarray:
+    x = _as_float(x)
+    out = np.full_like(x, np.nan)
+    if period <= 0 or len(x) == 0:
+        return out
+    total, _, nan_count, _ = _sums(x, period)
+    ready = (_window_counts(len(x), period) >= _min_periods(period, min_periods)) & (nan_count == 0)
+    out[ready] = total[ready]
+    return out
+
+
+def rolling_mean(x, period: int, min_periods: Optional[int] = None) -> np.ndarray:
+    x = _as_float(x)
+    out = np.full_like(x, np.nan)
+    if period <= 0 or len(x) == 0:
+        return out
+    total, _, nan_count, _ = _sums(x, period)
+    counts = _window_counts(len(x), period)
+    ready = (counts >= _min_periods(period, min_periods)) & (nan_count == 0)
+    out[ready] = total[ready] / counts[ready]
+    return out
+
+
+def rolling_std(x, period: int, ddof: int = 0, min_periods: Optional[int] = None) -> np.ndarray:
+    """Standar deviasi trailing (default populasi, ddof=0 seperti np.std)"""
+    x = _as_float(x)
+    out = np.full_like(x, np.nan)
+    if period <= 0 or len(x) == 0:
+        return out
+    total, total_sq, nan_count, sq_err = _sums(x, period, squares=True)
+    counts = _window_counts(len(x), period)
+    ready = (counts >= _min_periods(period, min_periods)) & (nan_count == 0) & (counts > ddof)
+    c = counts[ready]
+    dev_sq = total_sq[ready] - total[ready] * total[ready] / c
+    # di bawah galat pembulatan cumsum (mis. period=1 atau jendela datar) variansnya 0, bukan ~1e-7
+    dev_sq[dev_sq <= sq_err[ready]] = 0.0
+    out[ready] = np.sqrt(dev_sq / (c - ddof))
+    return out
+
+
+def rolling_wma(x, period: int) -> np.ndarray:
+    """WMA bobot linear 1..period (bobot terbesar di bar terbaru), lewat dua cumsum"""
+    x = _as_float(x)
+    n = len(x)
+    out = np.full_like(x, np.nan)
+    if period <= 0 or n < period:
+        return out
+    nan = np.isnan(x)
+    clean = np.where(nan, 0.0, x)
+    pos = np.arange(1, n + 1, dtype=float)
+    zero = np.zeros(1)
+    s0 = _windowed(np.concatenate([zero, np.cumsum(clean)]), period)
+    s1 = _windowed(np.concatenate([zero, np.cumsum(pos * clean)]), period)
+    nan_count = _windowed(np.concatenate([zero, np.cumsum(nan)]), period)
+    # bobot bar j pada jendela yang berakhir di i = j - (i - period)
+    wsum = (s1 - (pos - period) * s0) / (period * (period + 1) / 2.0)
+    ready = (pos >= period) & (nan_count == 0)
+    out[ready] = wsum[ready]
+    return out
+
+
+def _rolling_extreme(x, period: int, kind: str, min_periods: Optional[int]) -> np.ndarray:
+    x = _as_float(x)
+    n = len(x)
+    out = np.full_like(x, np.nan)
+    if period <= 0 or n == 0:
+        return out
+    op = np.maximum if kind == 'max' else np.minimum
+    fill = -np.inf if kind == 'max' else np.inf
+    width = min(period, n)
+
+    # blok selebar jendela: prefix extreme (kiri->kanan) dan suffix extreme (kanan->kiri)
+    blocks = -(-n // width)
+    padded = np.full(blocks * width, fill)
+    padded[:n] = x
+    grid = padded.reshape(blocks, width)
+    prefix = op.accumulate(grid, axis=1).ravel()
+    suffix = op.accumulate(grid[:, ::-1], axis=1)[:, ::-1].ravel()
+
+    if period <= n:
+        # jendela [i-period+1, i] = suffix blok kiri + prefix blok kanan
+        out[period-1:] = op(suffix[:n - period + 1], prefix[period-1:n])
+    # bar sebelum jendela penuh: extreme kumulatif (jendela terpotong)
+    head = min(period - 1, n)
+    if head > 0:
+        out[:head] = op.accumulate(x[:head])
+    mp = _min_periods(period, min_periods)
+    out[:mp - 1] = np.nan
+    return out
+
+
+def rolling_max(x, period: int, min_periods: Optional[int] = None) -> np.ndarray:
+    return _rolling_extreme(x, period, 'max', min_periods)
+
+
+def rolling_min(x, period: int, min_periods: Optional[int] = None) -> np.ndarray:
+    return _rolling_extreme(x, period, 'min', min_periods)
+
+
+# ================== INDIKATOR BERBASIS RANGE ==================
+
+def stochastic(highs, lows, closes, k_period: int = 14, d_period: int = 3,
+               smooth_k: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+    """Stochastic %K/%D (0..100); NaN jika range jendela nol"""
+    h, l, c = _as_float(highs), _as_float(lows), _as_float(closes)
+    hh = rolling_max(h, k_period)
+    ll = rolling_min(l, k_period)
+    rng = hh - ll
+    with np.errstate(divide='ignore', invalid='ignore'):
+        k = np.where(rng != 0, (c - ll) / rng * 100.0, np.nan)
+    if smooth_k > 1:
+        k = rolling_mean(k, smooth_k)
+    d = rolling_mean(k, d_period)
+    return k, d
+
+
+def williams_r(highs, lows, closes, period: int = 14) -> np.ndarray:
+    """Williams %R (0..-100); NaN jika range jendela nol"""
+    h, l, c = _as_float(highs), _as_float(lows), _as_float(closes)
+    hh = rolling_max(h, period)
+    ll = rolling_min(l, period)
+    rng = hh - ll
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(rng != 0, -100.0 * (hh - c) / rng, np.nan)
+
+
+def donchian(highs, lows, period: int = 20) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Donchian Channel: upper, lower, mid"""
+    up = rolling_max(highs, period)
+    dn = rolling_min(lows, period)
+    return up, dn, (up + dn) / 2.0
+
+
+def ichimoku(highs, lows, tenkan: int = 9, kijun: int = 26,
+             senkou_b: int = 52) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Tenkan, Kijun, Senkou A dan Senkou B pada bar tempat nilainya dihitung
+    (belum digeser ke depan `kijun` bar seperti plot Ichimoku standar).
+    """
+    def midpoint(p):
+        return (rolling_max(highs, p) + rolling_min(lows, p)) / 2.0
+    conv = midpoint(tenkan)
+    base = midpoint(kijun)
+    return conv, base, (conv + base) / 2.0, midpoint(senkou_b)
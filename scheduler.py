@@ -0,0 +1,179 @@
+"""
+Deadline-aware priority scheduler for analysis jobs.
+
+Satu job per simbol menggabungkan semua timeframe yang candle-nya tutup
+sejak analisis terakhir. Job diurutkan menurut:
+
+    1. deadline  -- close berikutnya dari timeframe dirty tercepat
+                    (next_close_ms), jadi job 1m selalu di depan job 1d
+    2. volume rank -- indeks simbol di top_symbols (0 = paling likuid)
+    3. volatilitas terkini -- lebih volatil lebih dulu
+
+Job yang selesai setelah deadline-nya dihitung sebagai deadline miss per
+kelas prioritas (grup timeframe bot: short / mid / long). Kedalaman antrean
+per kelas tersedia lewat depths() / stats() untuk monitoring.
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+from timeframes import next_close_ms
+
+logger = logging.getLogger(__name__)
+
+UNRANKED = 10_000
+
+
+def _now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+class AnalysisJob:
+    """Analisis satu simbol untuk timeframe yang dirty"""
+
+    __slots__ = ('symbol', 'timeframes', 'deadline_ms', 'priority', 'rank',
+                 'volatility', 'seq', 'queued', 'enqueued_ms', 'started_ms')
+
+    def __init__(self, symbol: str):
+        self.symbol = symbol
+        self.timeframes: Set[str] = set()
+        self.deadline_ms: Optional[int] = None
+        self.priority: Optional[str] = None
+        self.rank = UNRANKED
+        self.volatility = 0.0
+        self.seq = 0
+        self.queued = False
+        self.enqueued_ms = 0
+        self.started_ms = 0
+
+    def sort_key(self) -> Tuple[int, int, float]:
+        return self.deadline_ms, self.rank, -self.volatility
+
+
+class AnalysisScheduler:
+    """
+    Pengganti asyncio.Queue FIFO: mark() saat candle tutup (dengan debounce
+    supaya timeframe yang tutup bersamaan digabung), get() oleh worker, lalu
+    done() setelah analisis selesai.
+    """
+
+    def __init__(self, priority_classes: Dict[str, List[str]], debounce: float = 0.25):
+        self.debounce = debounce
+        self.classes = list(priority_classes)
+        self._class_of = {tf: name for name, tfs in priority_classes.items() for tf in tfs}
+        self._heap: List[Tuple] = []
+        self._jobs: Dict[str, AnalysisJob] = {}       # simbol -> job yang menunggu (debounce / antre)
+        self._running: Dict[str, AnalysisJob] = {}    # simbol -> job yang sedang dianalisis
+        self._debouncing: Set[str] = set()
+        self._ready = asyncio.Event()
+        self._seq = itertools.count(1)
+
+        # Statistik per kelas prioritas
+        self.completed = {name: 0 for name in self.classes}
+        self.misses = {name: 0 for name in self.classes}
+        self.worst_lateness_ms = {name: 0 for name in self.classes}
+
+    def _priority_of(self, timeframe: str) -> str:
+        return self._class_of.get(timeframe, self.classes[-1] if self.classes else 'default')
+
+    # ---------- producer ----------
+    def mark(self, symbol: str, timeframe: str, last_open_ts: Optional[int],
+             rank: int = UNRANKED, volatility: float = 0.0):
+        """Tandai (symbol, timeframe) dirty; deadline = close berikutnya dari timeframe itu"""
+        now = _now_ms()
+        try:
+            deadline = next_close_ms(last_open_ts, timeframe) if last_open_ts else now
+        except ValueError:
+            deadline = now
+        job = self._jobs.get(symbol)
+        if job is None:
+            job = self._jobs[symbol] = AnalysisJob(symbol)
+        job.timeframes.add(timeframe)
+        job.rank = rank
+        job.volatility = volatility
+        if job.deadline_ms is None or deadline < job.deadline_ms:
+            job.deadline_ms = deadline
+            job.priority = self._priority_of(timeframe)
+
+        if symbol in self._running or symbol in self._debouncing:
+            # dirilis saat debounce habis / analisis yang berjalan selesai
+            return
+        if job.queued:
+            # key berubah: push ulang, entri lama diabaikan saat di-pop (seq tidak cocok)
+            self._push(job)
+            return
+        self._debouncing.add(symbol)
+        asyncio.get_running_loop().call_later(self.debounce, self._release, symbol)
+
+    def _release(self, symbol: str):
+        self._debouncing.discard(symbol)
+        job = self._jobs.get(symbol)
+        if job is not None and symbol not in self._running:
+            self._push(job)
+
+    def _push(self, job: AnalysisJob):
+        job.seq = next(self._seq)
+        if not job.queued:
+            job.queued = True
+            job.enqueued_ms = _now_ms()
+        heapq.heappush(self._heap, (*job.sort_key(), job.seq, job.symbol))
+        self._ready.set()
+
+    # ---------- consumer ----------
+    async def get(self) -> AnalysisJob:
+        """Job dengan prioritas tertinggi (deadline paling dekat) yang siap dianalisis"""
+        while True:
+            while self._heap:
+                *_, seq, symbol = heapq.heappop(self._heap)
+                job = self._jobs.get(symbol)
+                if job is None or job.seq != seq:
+                    continue  # entri basi
+                del self._jobs[symbol]
+                job.queued = False
+                job.started_ms = _now_ms()
+                self._running[symbol] = job
+                return job
+            self._ready.clear()
+            await self._ready.wait()
+
+    def done(self, job: AnalysisJob):
+        """Catat selesai / deadline miss, lalu antrekan lagi candle yang tutup selama analisis berjalan"""
+        self._running.pop(job.symbol, None)
+        finished = _now_ms()
+        priority = job.priority or self._priority_of('')
+        self.completed[priority] = self.completed.get(priority, 0) + 1
+        late = finished - job.deadline_ms if job.deadline_ms is not None else 0
+        if late > 0:
+            self.misses[priority] = self.misses.get(priority, 0) + 1
+            self.worst_lateness_ms[priority] = max(self.worst_lateness_ms.get(priority, 0), late)
+            logger.warning(
+                f"Deadline miss: {job.symbol} [{priority}] {sorted(job.timeframes)} "
+                f"finished {late / 1000:.1f}s late (waited {(job.started_ms - job.enqueued_ms) / 1000:.1f}s)"
+            )
+
+        pending = self._jobs.get(job.symbol)
+        if pending is not None and not pending.queued and job.symbol not in self._debouncing:
+            self._push(pending)
+
+    # ---------- monitoring ----------
+    def depths(self) -> Dict[str, int]:
+        """Jumlah job yang menunggu di antrean per kelas prioritas"""
+        out = {name: 0 for name in self.classes}
+        for job in self._jobs.values():
+            if job.queued:
+                out[job.priority] = out.get(job.priority, 0) + 1
+        return out
+
+    def stats(self) -> Dict:
+        return {
+            'queued': self.depths(),
+            'debouncing': len(self._debouncing),
+            'running': len(self._running),
+            'completed': dict(self.completed),
+            'deadline_misses': dict(self.misses),
+            'worst_lateness_s': {k: round(v / 1000, 1) for k, v in self.worst_lateness_ms.items()},
+        }
@@ -0,0 +1,313 @@
+"""
+Shared-memory OHLCV blocks for detector worker processes.
+
+Setiap (symbol, timeframe) punya satu segmen multiprocessing.shared_memory:
+
+    header  int64[8]        seq, start, length, epoch, capacity, dtype
+    ts      int64[cap]      open time candle
+    cols    float[5,cap]    opens, highs, lows, closes, volumes (float64 / float32)
+
+Sisi ingest menulis langsung ke segmen (append / load), worker memetakan
+segmen yang sama dan menjalankan detektor di atas view read-only tanpa
+menyalin atau mem-pickle array. Kapasitas = 2 x maxlen: candle baru ditulis
+di belakang jendela yang terlihat, jadi baris yang sudah dibaca worker tidak
+pernah berubah, kecuali saat compaction (jendela digeser ke depan buffer)
+atau load() yang menaikkan `epoch`. Epoch dinaikkan SEBELUM baris lama
+ditimpa, jadi reader yang masih melihat epoch snapshot-nya setelah selesai
+membaca tahu datanya belum tersentuh.
+
+Konsistensi header memakai seqlock: writer membuat `seq` ganjil selama
+mengubah header dan genap setelahnya; reader mengulang sampai membaca `seq`
+genap yang sama sebelum dan sesudah. Reader yang memegang view lama
+memvalidasi `epoch` setelah selesai (lihat still_valid()).
+
+Mode penyimpanan diatur lewat env CPD_STORAGE_DTYPE: float64 (default) atau
+float32, yang memangkas memori kolom OHLCV menjadi separuh. float32 menyimpan
+~7 digit signifikan, cukup untuk harga pada resolusi tick pair USDT umum;
+deret dipromosikan sekali ke float64 oleh IndicatorBundle sebelum detektor
+dan kernel berjalan, jadi akumulasi tetap float64. Dampaknya ke output
+detektor bisa diperiksa dengan parity.parity_report().
+"""
+
+import itertools
+import logging
+import os
+import time
+from multiprocessing import shared_memory
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+COLUMNS = ('opens', 'highs', 'lows', 'closes', 'volumes')
+HEADER_SLOTS = 8
+_SEQ, _START, _LEN, _EPOCH, _CAP, _DTYPE = range(6)
+
+# kode dtype di header -> dtype kolom
+DTYPES = {0: np.dtype(np.float64), 1: np.dtype(np.float32)}
+_DTYPE_CODES = {dtype: code for code, dtype in DTYPES.items()}
+
+# (nama segmen, timestamp candle terakhir, start, length, epoch)
+Handle = Tuple[str, int, int, int, int]
+
+_names = itertools.count()
+_attached: Dict[str, "SharedOHLCV"] = {}
+
+
+def _layout_size(capacity: int, dtype=np.float64) -> int:
+    return 8 * (HEADER_SLOTS + capacity) + np.dtype(dtype).itemsize * len(COLUMNS) * capacity
+
+
+def storage_dtype(name: Optional[str] = None) -> np.dtype:
+    """dtype kolom dari nama / env CPD_STORAGE_DTYPE (float64 | float32)"""
+    name = (name or os.environ.get('CPD_STORAGE_DTYPE', 'float64')).strip().lower()
+    try:
+        dtype = np.dtype(name)
+    except TypeError:
+        dtype = None
+    if dtype not in _DTYPE_CODES:
+        logger.warning(f"Unsupported storage dtype '{name}', using float64")
+        return np.dtype(np.float64)
+    return dtype
+
+
+class SharedOHLCV:
+    """
+    Satu blok OHLCV. Juga bisa dipakai seperti dict market_data lama untuk
+    membaca: block['closes'], block['timestamps'], block['last_update'].
+    """
+
+    def __init__(self, maxlen: int = 1000, shared: bool = True, dtype=np.float64):
+        self.maxlen = maxlen
+        capacity = 2 * maxlen
+        dtype = np.dtype(dtype)
+        if dtype not in _DTYPE_CODES:
+            raise ValueError(f"Unsupported column dtype: {dtype}")
+        size = _layout_size(capacity, dtype)
+        self.shm: Optional[shared_memory.SharedMemory] = None
+        if shared:
+            name = f"cpd{os.getpid()}_{next(_names)}"
+            try:
+                self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+            except OSError as e:
+                # mis. /dev/shm tidak tersedia: tetap jalan dengan buffer lokal (frame dipickle)
+                logger.warning(f"Shared memory unavailable, using process-local buffer: {e}")
+        buf = self.shm.buf if self.shm is not None else bytearray(size)
+        self._bind(buf, capacity, dtype)
+        self.header[:] = 0
+        self.header[_CAP] = capacity
+        self.header[_DTYPE] = _DTYPE_CODES[dtype]
+        self.last_update = 0.0
+        self.owner = True
+        if self.shm is not None:
+            _attached[self.shm.name] = self
+
+    @classmethod
+    def attach(cls, name: str) -> "SharedOHLCV":
+        """Petakan segmen milik proses lain (worker); hasil di-cache per nama"""
+        block = _attached.get(name)
+        if block is not None:
+            return block
+        try:
+            shm = shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:  # Python < 3.13: lepas dari resource tracker supaya worker tidak meng-unlink
+            shm = shared_memory.SharedMemory(name=name)
+            try:
+                from multiprocessing import resource_tracker
+                resource_tracker.unregister(shm._name, 'shared_memory')
+            except Exception as e:
+                logger.debug(f"resource_tracker unregister failed for {name}: {e}")
+        block = cls.__new__(cls)
+        block.shm = shm
+        header = np.ndarray((HEADER_SLOTS,), np.int64, shm.buf, 0)
+        capacity, dtype = int(header[_CAP]), DTYPES[int(header[_DTYPE])]
+        del header
+        block._bind(shm.buf, capacity, dtype)
+        block.maxlen = capacity // 2
+        block.last_update = 0.0
+        block.owner = False
+        _attached[name] = block
+        return block
+
+    def _bind(self, buf, capacity: int, dtype):
+        self.header = np.ndarray((HEADER_SLOTS,), np.int64, buf, 0)
+        self.ts = np.ndarray((capacity,), np.int64, buf, 8 * HEADER_SLOTS)
+        self.cols = np.ndarray((len(COLUMNS), capacity), dtype, buf, 8 * (HEADER_SLOTS + capacity))
+
+    @property
+    def shared(self) -> bool:
+        return self.shm is not None
+
+    @property
+    def dtype(self) -> np.dtype:
+        return self.cols.dtype
+
+    @property
+    def nbytes(self) -> int:
+        return self.header.nbytes + self.ts.nbytes + self.cols.nbytes
+
+    @property
+    def closed(self) -> bool:
+        return self.header is None
+
+    def _check_open(self):
+        if self.header is None:
+            raise ValueError("Shared OHLCV block is closed")
+
+    @property
+    def name(self) -> Optional[str]:
+        return self.shm.name if self.shm is not None else None
+
+    # ---------- writer (proses ingest) ----------
+    def _begin(self):
+        self.header[_SEQ] += 1          # ganjil: header sedang diubah
+
+    def _end(self):
+        self.header[_SEQ] += 1          # genap: konsisten lagi
+
+    def load(self, timestamps, opens, highs, lows, closes, volumes):
+        """Ganti seluruh isi (history REST); hanya `maxlen` candle terakhir yang disimpan"""
+        self._check_open()
+        k = min(len(timestamps), self.maxlen)
+        self._begin()
+        try:
+            self.header[_EPOCH] += 1     # sebelum menimpa baris: view lama jadi tidak valid
+            if k:
+                self.ts[:k] = np.asarray(timestamps[-k:], dtype=np.int64)
+                for row, values in enumerate((opens, highs, lows, closes, volumes)):
+                    self.cols[row, :k] = np.asarray(values[-k:], dtype=float)
+            self.header[_START] = 0
+            self.header[_LEN] = k
+        finally:
+            self._end()
+        self.last_update = time.time()
+
+    def append(self, ts: int, o: float, h: float, l: float, c: float, v: float):
+        """Tambah satu candle tertutup; candle tertua keluar jika sudah `maxlen`"""
+        self._check_open()
+        start, length = int(self.header[_START]), int(self.header[_LEN])
+        end = start + length
+        if end >= len(self.ts):
+            # compaction: geser jendela ke depan buffer (view lama jadi tidak valid -> epoch naik)
+            keep = min(length, self.maxlen - 1)
+            self._begin()
+            try:
+                self.header[_EPOCH] += 1
+                self.ts[:keep] = self.ts[end - keep:end]
+                self.cols[:, :keep] = self.cols[:, end - keep:end]
+                self.header[_START] = start = 0
+                self.header[_LEN] = length = keep
+            finally:
+                self._end()
+            end = keep
+        # baris baru berada di luar jendela yang terlihat, jadi aman ditulis sebelum header
+        self.ts[end] = ts
+        self.cols[:, end] = (o, h, l, c, v)
+        self._begin()
+        try:
+            if length + 1 > self.maxlen:
+                self.header[_START] = start + 1
+            else:
+                self.header[_LEN] = length + 1
+        finally:
+            self._end()
+        self.last_update = time.time()
+
+    # ---------- reader ----------
+    def snapshot(self) -> Tuple[int, int, int]:
+        """(start, length, epoch) yang konsisten menurut seqlock"""
+        self._check_open()
+        while True:
+            seq = int(self.header[_SEQ])
+            if seq % 2:
+                time.sleep(0)
+                continue
+            start, length, epoch = int(self.header[_START]), int(self.header[_LEN]), int(self.header[_EPOCH])
+            if int(self.header[_SEQ]) == seq:
+                return start, length, epoch
+
+    def handle(self) -> Handle:
+        start, length, epoch = self.snapshot()
+        last_ts = int(self.ts[start + length - 1]) if length else 0
+        return self.name, last_ts, start, length, epoch
+
+    def views(self, start: int, length: int) -> Tuple[np.ndarray, ...]:
+        """View read-only (timestamps, opens, highs, lows, closes, volumes) tanpa salinan"""
+        out = [self.ts[start:start + length]]
+        out.extend(self.cols[row, start:start + length] for row in range(len(COLUMNS)))
+        for arr in out:
+            arr.flags.writeable = False
+        return tuple(out)
+
+    def still_valid(self, epoch: int) -> bool:
+        """True jika view dari snapshot `epoch` belum ditimpa compaction / load"""
+        return int(self.header[_EPOCH]) == epoch
+
+    def last_ts(self) -> Optional[int]:
+        start, length, _ = self.snapshot()
+        return int(self.ts[start + length - 1]) if length else None
+
+    def __len__(self) -> int:
+        return self.snapshot()[1]
+
+    def __getitem__(self, key: str):
+        if key == 'last_update':
+            return self.last_update
+        start, length, _ = self.snapshot()
+        if key == 'timestamps':
+            return self.views(start, length)[0]
+        if key in COLUMNS:
+            return self.views(start, length)[1 + COLUMNS.index(key)]
+        raise KeyError(key)
+
+    def close(self):
+        if self.shm is None:
+            return
+        _attached.pop(self.shm.name, None)
+        # unlink dulu: close() bisa gagal selama masih ada view numpy (exported pointers)
+        self.header = self.ts = self.cols = None
+        try:
+            if self.owner:
+                self.shm.unlink()
+            self.shm.close()
+        except Exception as e:
+            logger.debug(f"Error releasing shared memory {self.shm.name}: {e}")
+        self.shm = None
+
+
+def resolve(handle: Handle) -> Tuple[SharedOHLCV, Tuple[np.ndarray, ...]]:
+    """Block dan view read-only untuk sebuah handle (dipanggil di worker)"""
+    name, _, start, length, _ = handle
+    block = SharedOHLCV.attach(name)
+    return block, block.views(start, length)
+
+
+class SharedMarketStore:
+    """Pemilik semua blok OHLCV shared-memory bot, satu per (symbol, timeframe)"""
+
+    def __init__(self, maxlen: int = 1000, shared: bool = True, dtype=None):
+        self.maxlen = maxlen
+        self.shared = shared
+        self.dtype = storage_dtype() if dtype is None else np.dtype(dtype)
+        self._blocks: Dict[Tuple[str, str], SharedOHLCV] = {}
+
+    def block(self, symbol: str, timeframe: str) -> SharedOHLCV:
+        key = (symbol, timeframe)
+        block = self._blocks.get(key)
+        if block is None:
+            block = SharedOHLCV(self.maxlen, shared=self.shared, dtype=self.dtype)
+            self._blocks[key] = block
+        return block
+
+    def __len__(self) -> int:
+        return len(self._blocks)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(block.nbytes for block in self._blocks.values() if not block.closed)
+
+    def close(self):
+        for block in self._blocks.values():
+            block.close()
+        self._blocks.clear()
@@ -0,0 +1,278 @@
+"""
+Streaming indicator state per (symbol, timeframe).
+
+StreamingIndicators dimajukan tepat satu bar setiap candle tertutup
+(dipanggil dari process_kline_data), jadi biaya per candle konstan dan
+tidak bergantung pada panjang history. Nilai terkini dan ekor history
+pendek bisa dibaca detektor lewat IndicatorBundle.
+
+Ekor history semua nilai disimpan di satu RingColumns (float64 kontigu per
+nilai), jadi tail() mengembalikan view tanpa salinan, bukan array baru dari
+deque float Python setiap siklus analisis.
+"""
+
+import logging
+import math
+from collections import deque
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+
+from pivots import StreamingPivots
+from ringbuffer import RingColumns
+
+logger = logging.getLogger(__name__)
+
+NAN = float('nan')
+
+
+class _Ema:
+    """EMA alpha 2/(n+1), di-seed dengan nilai pertama (sama dengan kernels.ema)"""
+
+    def __init__(self, period: int):
+        self.alpha = 2.0 / (period + 1.0)
+        self.value = NAN
+
+    def update(self, x: float) -> float:
+        if math.isnan(self.value):
+            self.value = x
+        else:
+            self.value = self.alpha * x + (1.0 - self.alpha) * self.value
+        return self.value
+
+
+class _Wilder:
+    """Wilder/RMA alpha 1/n, di-seed rata-rata n nilai pertama (sama dengan kernels.wilder)"""
+
+    def __init__(self, period: int):
+        self.period = period
+        self.count = 0
+        self.seed_sum = 0.0
+        self.value = NAN
+
+    def update(self, x: float) -> float:
+        self.count += 1
+        if self.count < self.period:
+            self.seed_sum += x
+        elif self.count == self.period:
+            self.value = (self.seed_sum + x) / self.period
+        else:
+            self.value += (x - self.value) / self.period
+        return self.value
+
+
+class _Window:
+    """Jendela geser dengan running sum / sum kuadrat; di-resync berkala untuk menahan drift float"""
+
+    RESYNC_EVERY = 1000
+
+    def __init__(self, period: int):
+        self.period = period
+        self.values = deque(maxlen=period)
+        self.total = 0.0
+        self.total_sq = 0.0
+        self._since_resync = 0
+
+    def update(self, x: float):
+        if len(self.values) == self.period:
+            old = self.values[0]
+            self.total -= old
+            self.total_sq -= old * old
+        self.values.append(x)
+        self.total += x
+        self.total_sq += x * x
+        self._since_resync += 1
+        if self._since_resync >= self.RESYNC_EVERY:
+            self.total = math.fsum(self.values)
+            self.total_sq = math.fsum(v * v for v in self.values)
+            self._since_resync = 0
+
+    @property
+    def full(self) -> bool:
+        return len(self.values) == self.period
+
+    def mean(self) -> float:
+        return self.total / self.period if self.full else NAN
+
+    def std(self) -> float:
+        # populasi (ddof=0), sama dengan np.std
+        if not self.full:
+            return NAN
+        m = self.total / self.period
+        return math.sqrt(max(0.0, self.total_sq / self.period - m * m))
+
+
+class StreamingIndicators:
+    """
+    State indikator yang dimajukan satu candle per update().
+
+    Melacak EMA, SMA, Wilder ATR/RSI, MACD, Bollinger, VWMA, OBV dan VWAP rolling,
+    dan menyimpan ekor history (maks `tail` bar) untuk setiap nilai. Ekor hanya
+    menggantikan perhitungan batch selama history stream sama dengan deret yang
+    dianalisis (lihat covers()).
+    Pivot swing high/low dipelihara incremental di `self.pivots`.
+    """
+
+    def __init__(self,
+                 ema_periods: Iterable[int] = (8, 12, 21, 26, 50, 55, 200),
+                 sma_periods: Iterable[int] = (20, 50, 200),
+                 vwma_periods: Iterable[int] = (20, 50),
+                 atr_period: int = 14,
+                 rsi_period: int = 14,
+                 macd_params=(12, 26, 9),
+                 bb_period: int = 20,
+                 bb_k: float = 2.0,
+                 vwap_period: int = 20,
+                 tail: int = 1000):
+        self.ema_periods = tuple(ema_periods)
+        self.sma_periods = tuple(sma_periods)
+        self.vwma_periods = tuple(vwma_periods)
+        self.atr_period = atr_period
+        self.rsi_period = rsi_period
+        self.macd_params = tuple(macd_params)
+        self.bb_period = bb_period
+        self.bb_k = bb_k
+        self.vwap_period = vwap_period
+        self.tail_size = tail
+        self.reset()
+
+    def reset(self):
+        fast, slow, signal = self.macd_params
+        self._ema = {p: _Ema(p) for p in set(self.ema_periods) | {fast, slow}}
+        self._macd_signal = _Ema(signal)
+        self._sma = {p: _Window(p) for p in set(self.sma_periods) | {self.bb_period}}
+        self._vwma_pv = {p: _Window(p) for p in self.vwma_periods}
+        self._vwma_v = {p: _Window(p) for p in self.vwma_periods}
+        self._atr = _Wilder(self.atr_period)
+        self._rsi_gain = _Wilder(self.rsi_period)
+        self._rsi_loss = _Wilder(self.rsi_period)
+        self._vwap_pv = _Window(self.vwap_period)
+        self._vwap_v = _Window(self.vwap_period)
+        self._obv = 0.0
+        self._prev_close: Optional[float] = None
+        self.count = 0
+        self.last_ts: Optional[int] = None
+        self._tails: Optional[RingColumns] = None   # dibuat saat update pertama (nama nilai diketahui)
+        self._current: Dict[str, float] = {}
+        self.pivots = StreamingPivots(maxlen=self.tail_size)
+
+    # ---------------- update ----------------
+    def update(self, ts: int, o: float, h: float, l: float, c: float, v: float):
+        """Majukan semua state tepat satu candle tertutup"""
+        if self.last_ts is not None and ts <= self.last_ts:
+            return  # candle duplikat / out-of-order
+        prev_c = self._prev_close
+        values = {}
+
+        for p, state in self._ema.items():
+            values[f'ema_{p}'] = state.update(c)
+        fast, slow, _ = self.macd_params
+        macd_line = values[f'ema_{fast}'] - values[f'ema_{slow}']
+        macd_sig = self._macd_signal.update(macd_line)
+        values['macd'] = macd_line
+        values['macd_signal'] = macd_sig
+        values['macd_hist'] = macd_line - macd_sig
+
+        for p, window in self._sma.items():
+            window.update(c)
+            values[f'sma_{p}'] = window.mean()
+        bb = self._sma[self.bb_period]
+        mid, sd = bb.mean(), bb.std()
+        values['bb_mid'] = mid
+        values['bb_sd'] = sd
+        values['bb_up'] = mid + self.bb_k * sd
+        values['bb_dn'] = mid - self.bb_k * sd
+
+        for p in self.vwma_periods:
+            self._vwma_pv[p].update(c * v)
+            self._vwma_v[p].update(v)
+            denom = self._vwma_v[p].total
+            values[f'vwma_{p}'] = self._vwma_pv[p].total / denom if self._vwma_v[p].full and denom != 0 else NAN
+
+        tp = (h + l + c) / 3.0
+        self._vwap_pv.update(tp * v)
+        self._vwap_v.update(v)
+        denom = self._vwap_v.total
+        values['vwap'] = self._vwap_pv.total / denom if self._vwap_v.full and denom != 0 else NAN
+
+        tr = h - l if prev_c is None else max(h - l, abs(h - prev_c), abs(l - prev_c))
+        values['atr'] = self._atr.update(tr)
+
+        if prev_c is None:
+            values['rsi'] = NAN
+        else:
+            ch = c - prev_c
+            ag = self._rsi_gain.update(max(ch, 0.0))
+            al = self._rsi_loss.update(max(-ch, 0.0))
+            if math.isnan(ag) or math.isnan(al):
+                values['rsi'] = NAN
+            elif al == 0:
+                values['rsi'] = 100.0
+            else:
+                values['rsi'] = 100.0 - 100.0 / (1.0 + ag / al)
+            if c > prev_c:
+                self._obv += v
+            elif c < prev_c:
+                self._obv -= v
+        values['obv'] = self._obv
+
+        if self._tails is None:
+            self._tails = RingColumns(tuple(values), self.tail_size)
+        self._tails.append([values[name] for name in self._tails.fields])
+        self._current = values
+        self.pivots.update(h, l)
+        self._prev_close = c
+        self.last_ts = int(ts)
+        self.count += 1
+
+    def seed(self, timestamps, opens, highs, lows, closes, volumes):
+        """Reset lalu putar ulang history (sekali saat startup / backfill)"""
+        self.reset()
+        for row in zip(timestamps, opens, highs, lows, closes, volumes):
+            self.update(*row)
+
+    # ---------------- read ----------------
+    def __contains__(self, name: str) -> bool:
+        return self._tails is not None and name in self._tails
+
+    def value(self, name: str) -> float:
+        return self._current.get(name, NAN)
+
+    def values(self) -> Dict[str, float]:
+        return dict(self._current)
+
+    def tail(self, name: str, length: Optional[int] = None) -> np.ndarray:
+        """
+        Ekor history `name` (paling lama dulu), maksimal `length` bar terakhir.
+        View read-only tanpa salinan, valid sampai update() berikutnya.
+        """
+        if self._tails is None or name not in self._tails:
+            raise KeyError(f"Indicator '{name}' is not tracked")
+        return self._tails.view(name, length)
+
+    def covers(self, length: int, last_ts) -> bool:
+        """
+        True jika ekor state identik dengan indikator batch atas deret `length` bar
+        yang berakhir di last_ts: candle terakhir sama dan stream dimulai di bar
+        pertama deret itu (count == length). Begitu stream lebih panjang dari deret
+        (jendela market data sudah bergeser), EMA/RSI/ATR/MACD-nya membawa warm-up
+        dari bar sebelum jendela dan berbeda dari versi batch, jadi tidak dipakai.
+        """
+        return (self.last_ts is not None and last_ts is not None and
+                int(last_ts) == self.last_ts and length == self.count and length <= self.tail_size)
+
+    def name_for(self, kind: str, period: Optional[int] = None, method: str = 'wilder') -> Optional[str]:
+        """Nama nilai yang dilacak untuk indikator batch yang setara, atau None"""
+        if kind == 'ema' and period in self._ema:
+            return f'ema_{period}'
+        if kind == 'sma' and period in self._sma:
+            return f'sma_{period}'
+        if kind == 'vwma' and period in self._vwma_pv:
+            return f'vwma_{period}'
+        if kind == 'atr' and period == self.atr_period and method == 'wilder':
+            return 'atr'
+        if kind == 'rsi' and period == self.rsi_period and method == 'wilder':
+            return 'rsi'
+        if kind == 'obv':
+            return 'obv'
+        return None
@@ -0,0 +1,149 @@
+"""
+TA-Lib batch backend for IndicatorBundle.
+
+Jika diaktifkan (env CPD_INDICATOR_BACKEND=talib atau set_backend('talib')),
+EMA, Wilder ATR/RSI, MACD, BBANDS, STOCH dan recognizer CDL* dihitung TA-Lib
+dengan satu panggilan C per deret. Default tetap backend numpy karena seeding
+TA-Lib berbeda selama warm-up (EMA di-seed SMA, ATR mulai dari bar ke-1);
+parity() mengukur selisih kedua jalur setelah warm-up.
+"""
+
+import logging
+import os
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+try:
+    import talib
+except ImportError:  # TA-Lib opsional untuk backend ini
+    talib = None
+
+BACKENDS = ('numpy', 'talib')
+
+_backend = os.environ.get('CPD_INDICATOR_BACKEND', 'numpy').lower()
+if _backend not in BACKENDS:
+    logger.warning(f"Unknown indicator backend '{_backend}', using numpy")
+    _backend = 'numpy'
+
+
+def available() -> bool:
+    return talib is not None
+
+
+def set_backend(name: str):
+    global _backend
+    name = name.lower()
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown indicator backend: {name}")
+    if name == 'talib' and not available():
+        raise RuntimeError("TA-Lib backend requested but talib is not installed")
+    _backend = name
+
+
+def backend() -> str:
+    return _backend
+
+
+def enabled() -> bool:
+    return _backend == 'talib' and talib is not None
+
+
+def _f(x) -> np.ndarray:
+    # TA-Lib hanya menerima float64 contiguous
+    return np.ascontiguousarray(x, dtype=np.float64)
+
+
+# ================== INDICATORS ==================
+
+def ema(x, period: int) -> np.ndarray:
+    return talib.EMA(_f(x), timeperiod=period)
+
+
+def atr(highs, lows, closes, period: int = 14) -> np.ndarray:
+    return talib.ATR(_f(highs), _f(lows), _f(closes), timeperiod=period)
+
+
+def rsi(x, period: int = 14) -> np.ndarray:
+    return talib.RSI(_f(x), timeperiod=period)
+
+
+def macd(x, fast: int = 12, slow: int = 26, signal: int = 9) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    return talib.MACD(_f(x), fastperiod=fast, slowperiod=slow, signalperiod=signal)
+
+
+def bollinger(x, period: int = 20, k: float = 2.0) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """mid, upper, lower, stddev (urutan sama dengan indicators.bollinger)"""
+    up, mid, dn = talib.BBANDS(_f(x), timeperiod=period, nbdevup=k, nbdevdn=k, matype=0)
+    return mid, up, dn, (up - mid) / k if k else np.zeros_like(mid)
+
+
+def stochastic(highs, lows, closes, k_period: int = 14, d_period: int = 3,
+               smooth_k: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+    return talib.STOCH(_f(highs), _f(lows), _f(closes), fastk_period=k_period,
+                       slowk_period=smooth_k, slowk_matype=0, slowd_period=d_period, slowd_matype=0)
+
+
+def cdl(name: str, opens, highs, lows, closes) -> np.ndarray:
+    """Output recognizer TA-Lib (100 bullish, -100 bearish, 0 tidak ada) untuk setiap bar"""
+    func = getattr(talib, name, None)
+    if func is None or not name.startswith('CDL'):
+        raise ValueError(f"Unknown TA-Lib candlestick function: {name}")
+    return func(_f(opens), _f(highs), _f(lows), _f(closes))
+
+
+# ================== PARITY ==================
+
+def _max_rel_diff(a, b, skip: int) -> float:
+    a = np.asarray(a, dtype=float)[skip:]
+    b = np.asarray(b, dtype=float)[skip:]
+    both = np.isfinite(a) & np.isfinite(b)
+    if not both.any():
+        return float('nan')
+    scale = np.maximum(np.abs(b[both]), 1e-12)
+    return float(np.max(np.abs(a[both] - b[both]) / scale))
+
+
+def parity(opens, highs, lows, closes, skip: Optional[int] = None) -> Dict[str, float]:
+    """
+    Selisih relatif maksimum TA-Lib vs jalur numpy untuk setiap indikator yang
+    didelegasikan, setelah `skip` bar warm-up (default 10x periode terpanjang).
+    """
+    import indicators
+    import rolling
+
+    if talib is None:
+        raise RuntimeError("TA-Lib is not installed")
+    h, l, c = _f(highs), _f(lows), _f(closes)
+    skip = 260 if skip is None else skip
+    if len(c) <= skip:
+        raise ValueError(f"Need more than {skip} bars for a parity check, got {len(c)}")
+
+    report = {
+        'ema_12': _max_rel_diff(ema(c, 12), indicators.ema(c, 12), skip),
+        'ema_26': _max_rel_diff(ema(c, 26), indicators.ema(c, 26), skip),
+        'atr_14': _max_rel_diff(atr(h, l, c, 14), indicators.atr(h, l, c, 14, 'wilder'), skip),
+        'rsi_14': _max_rel_diff(rsi(c, 14), indicators.rsi(c, 14, 'wilder'), skip),
+    }
+    for name, a, b in zip(('macd', 'macd_signal'), macd(c, 12, 26, 9), indicators.macd(c, 12, 26, 9)):
+        report[name] = _max_rel_diff(a, b, skip)
+    for name, a, b in zip(('bb_mid', 'bb_up', 'bb_dn'), bollinger(c, 20, 2.0), indicators.bollinger(c, 20, 2.0)):
+        report[name] = _max_rel_diff(a, b, skip)
+    for name, a, b in zip(('stoch_k', 'stoch_d'), stochastic(h, l, c, 14, 3, 3),
+                          rolling.stochastic(h, l, c, 14, 3, 3)):
+        report[name] = _max_rel_diff(a, b, skip)
+    return report
+
+
+if __name__ == '__main__':
+    # Parity cepat pada random walk sintetis: python talib_backend.py
+    rng = np.random.default_rng(7)
+    close = 100.0 * np.exp(np.cumsum(rng.normal(0.0, 0.01, 1000)))
+    spread = np.abs(rng.normal(0.0, 0.005, 1000)) * close
+    open_ = np.concatenate([[close[0]], close[:-1]])
+    high = np.maximum(open_, close) + spread
+    low = np.minimum(open_, close) - spread
+    for key, value in parity(open_, high, low, close).items():
+        print(f"{key:12s} {value:.3e}")
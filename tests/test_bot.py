@@ -0,0 +1,129 @@
+import asyncio
+import os
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+import timeframes
+
+pytest.importorskip('talib')
+pytest.importorskip('aiohttp')
+pytest.importorskip('websockets')
+
+HOUR = 3_600_000
+
+
+@pytest.fixture(scope='module')
+def bot_module(tmp_path_factory):
+    # modul bot menulis crypto_bot.log ke cwd saat di-import
+    cwd = os.getcwd()
+    os.chdir(tmp_path_factory.mktemp('bot'))
+    try:
+        import crypto_pattern_bot
+    finally:
+        os.chdir(cwd)
+    return crypto_pattern_bot
+
+
+@pytest.fixture
+def bot(bot_module, tmp_path, monkeypatch):
+    monkeypatch.setenv('CPD_CANDLE_CACHE', str(tmp_path / 'candles'))
+    monkeypatch.setenv('CPD_ANALYSIS_MODE', 'process')
+    b = bot_module.CryptoPatternBot()
+    b.scheduler.debounce = 0.01
+    yield b
+    b.market_store.close()
+    b.candle_cache.close()
+
+
+def history(n, last_open):
+    ts = last_open - HOUR * np.arange(n - 1, -1, -1, dtype=np.int64)
+    close = 100.0 + np.sin(np.arange(n) / 5.0)
+    return ts, close, close + 1.0, close - 1.0, close, np.full(n, 10.0)
+
+
+def kline_msg(symbol, tf, open_ts, close, closed=True):
+    return {'stream': f'{symbol.lower()}@kline_{tf}', 'data': {'e': 'kline', 'k': {
+        's': symbol, 'i': tf, 't': int(open_ts), 'T': int(open_ts) + HOUR - 1,
+        'o': str(close), 'h': str(close + 1.0), 'l': str(close - 1.0), 'c': str(close), 'v': '10.0',
+        'x': closed}}}
+
+
+async def next_job(scheduler, timeout=1.0):
+    job = await asyncio.wait_for(scheduler.get(), timeout)
+    scheduler.done(job)
+    return job
+
+
+def test_closed_candle_schedules_analysis(bot):
+    last_open = 1_000 * HOUR
+    bot.store_history('BTCUSDT', '1h', history(300, last_open))
+
+    async def scenario():
+        # candle yang masih berjalan tidak ditulis dan tidak menjadwalkan apa pun
+        await bot.process_kline_data(kline_msg('BTCUSDT', '1h', last_open + HOUR, 101.0, closed=False))
+        assert bot.market_data['BTCUSDT']['1h'].last_ts() == last_open
+        assert not bot.scheduler._jobs
+
+        await bot.process_kline_data(kline_msg('BTCUSDT', '1h', last_open + HOUR, 101.0))
+        assert bot.market_data['BTCUSDT']['1h'].last_ts() == last_open + HOUR
+        job = await next_job(bot.scheduler)
+        assert job.symbol == 'BTCUSDT' and job.timeframes == {'1h'}
+        assert job.deadline_ms == last_open + 3 * HOUR           # close candle berikutnya
+
+        # duplikat / candle lama diabaikan
+        await bot.process_kline_data(kline_msg('BTCUSDT', '1h', last_open + HOUR, 102.0))
+        await bot.process_kline_data(kline_msg('BTCUSDT', '1h', last_open, 102.0))
+        assert not bot.scheduler._jobs
+
+    asyncio.run(scenario())
+
+
+def test_unknown_series_ignored(bot):
+    async def scenario():
+        await bot.process_kline_data(kline_msg('ETHUSDT', '1h', 1_000 * HOUR, 101.0))
+        await bot.process_kline_data({'data': {'e': 'trade'}})
+        assert not bot.scheduler._jobs
+
+    asyncio.run(scenario())
+
+
+def test_gap_backfill_merges_rest_tail_and_held_candles(bot, monkeypatch):
+    now_floor = int(time.time() * 1000) // HOUR * HOUR
+    # jam dibekukan 10 menit setelah open candle berjalan: jumlah candle yang hilang tetap
+    monkeypatch.setattr(timeframes, 'time', SimpleNamespace(time=lambda: (now_floor + 600_000) / 1000))
+    last_open = now_floor - 5 * HOUR
+    bot.store_history('BTCUSDT', '1h', history(300, last_open))
+    requests = []
+
+    async def request_klines(symbol, timeframe, limit=500, start_time=None):
+        requests.append((start_time, limit))
+        # REST mengembalikan juga candle terakhir yang sudah ada (tumpang tindih) dan candle websocket
+        ts = np.arange(last_open, now_floor, HOUR, dtype=np.int64)
+        close = np.full(len(ts), 200.0)
+        return ts, close, close + 1.0, close - 1.0, close, np.full(len(ts), 10.0)
+
+    monkeypatch.setattr(bot, 'request_klines', request_klines)
+
+    async def scenario():
+        # candle websocket setelah gap 3 candle memicu backfill dan ikut ditahan
+        await bot.process_kline_data(kline_msg('BTCUSDT', '1h', now_floor - HOUR, 150.0))
+        assert ('BTCUSDT', '1h') in bot.backfills
+        await asyncio.gather(*[t for t in asyncio.all_tasks() if t is not asyncio.current_task()])
+        return await next_job(bot.scheduler)
+
+    job = asyncio.run(scenario())
+    assert job.timeframes == {'1h'}
+    assert requests and requests[0][0] == last_open + HOUR
+    assert not bot.backfills
+
+    block = bot.market_data['BTCUSDT']['1h']
+    ts = np.array(block['timestamps'])
+    closes = np.array(block['closes'])
+    assert ts[-1] == now_floor - HOUR
+    assert np.all(np.diff(ts) == HOUR)                          # tanpa gap dan tanpa duplikat
+    assert closes[-1] == 150.0                                  # candle websocket menang atas REST
+    assert closes[-2] == 200.0 and closes[-5] == 200.0          # ekor REST menimpa candle lama yang sama
+    assert bot.gap_stats['candles'] == 3
@@ -0,0 +1,154 @@
+import numpy as np
+import pytest
+
+import candle_cache
+from candle_cache import CandleCache, CandleFile
+
+MINUTE = 60_000
+
+
+def candles(n, first=0):
+    ts = (np.arange(first, first + n) * MINUTE).astype(np.int64)
+    base = np.arange(first, first + n, dtype=np.float64)
+    return ts, base + 0.1, base + 0.2, base + 0.3, base + 0.4, base + 0.5
+
+
+def assert_columns(got, want):
+    assert got is not None and len(got) == 6
+    assert got[0].dtype == np.int64
+    for g, w in zip(got, want):
+        np.testing.assert_array_equal(g, w)
+
+
+def test_file_round_trip_across_reopen(tmp_path):
+    path = str(tmp_path / 'BTCUSDT_1h.candles')
+    f = CandleFile(path, maxlen=5)
+    assert f.read() is None and f.last_ts() is None
+    f.load(*candles(8))
+    f.close()
+
+    f = CandleFile(path, maxlen=5)
+    assert len(f) == 5
+    assert_columns(f.read(), candles(5, 3))
+    # append melewati kapasitas (compaction), lalu buka ulang lagi
+    for i in range(8, 30):
+        assert f.append(*(c[0] for c in candles(1, i)))
+        assert_columns(f.read(), candles(5, i - 4))
+    f.close()
+    f = CandleFile(path, maxlen=5)
+    assert f.last_ts() == 29 * MINUTE
+    assert_columns(f.read(), candles(5, 25))
+    f.close()
+
+
+def test_append_rejects_old_candles(tmp_path):
+    f = CandleFile(str(tmp_path / 'x.candles'), maxlen=5)
+    f.load(*candles(3))
+    assert not f.append(*(c[0] for c in candles(1, 2)))
+    assert not f.append(*(c[0] for c in candles(1, 0)))
+    assert len(f) == 3
+    f.close()
+
+
+def test_incompatible_file_recreated(tmp_path):
+    path = str(tmp_path / 'x.candles')
+    f = CandleFile(path, maxlen=5)
+    f.load(*candles(5))
+    f.close()
+    # maxlen lain -> ukuran berbeda -> file baru kosong
+    g = CandleFile(path, maxlen=6)
+    assert g.read() is None
+    g.close()
+    # header rusak dengan ukuran yang sama
+    f = CandleFile(path, maxlen=5)
+    f.load(*candles(5))
+    f.header[candle_cache._VERSION] = 99
+    f.close()
+    f = CandleFile(path, maxlen=5)
+    assert f.read() is None
+    f.close()
+
+
+def test_cache_restores_series(tmp_path):
+    cache = CandleCache(str(tmp_path), maxlen=5)
+    assert cache.read('BTCUSDT', '1h') is None
+    cache.load('BTCUSDT', '1h', *candles(5))
+    cache.append('BTCUSDT', '1h', *(c[0] for c in candles(1, 5)))
+    cache.append('BTCUSDT', '1h', *(c[0] for c in candles(1, 5)))     # duplikat tidak dihitung
+    cache.close()
+
+    cache = CandleCache(str(tmp_path), maxlen=5)
+    assert_columns(cache.read('BTCUSDT', '1h'), candles(5, 1))
+    assert cache.stats() == {'enabled': True, 'open_files': 1, 'restored': 1, 'missing': 0,
+                             'appended': 0, 'errors': 0}
+    cache.close()
+
+
+def test_cache_paths_distinguish_minute_and_month(tmp_path):
+    cache = CandleCache(str(tmp_path))
+    assert cache.path('BTCUSDT', '1m').lower() != cache.path('BTCUSDT', '1M').lower()
+    assert cache.path('../x', '1h').startswith(str(tmp_path))
+
+
+def test_cache_limits_open_files(tmp_path):
+    cache = CandleCache(str(tmp_path), maxlen=5, max_open=2)
+    for sym in ('A', 'B', 'C'):
+        cache.load(sym, '1h', *candles(5))
+    assert cache.stats()['open_files'] == 2
+    assert_columns(cache.read('A', '1h'), candles(5))        # dipetakan ulang dari disk
+    cache.close()
+
+
+@pytest.mark.parametrize('directory', ['', '0', 'off'])
+def test_cache_disabled(tmp_path, monkeypatch, directory):
+    monkeypatch.chdir(tmp_path)
+    cache = CandleCache(directory)
+    assert not cache.enabled
+    cache.load('BTCUSDT', '1h', *candles(5))
+    assert cache.read('BTCUSDT', '1h') is None
+    assert not list(tmp_path.iterdir())
+
+
+# ---------- merge_columns ----------
+
+def rows(ts, tag):
+    ts = np.asarray(ts, dtype=np.int64)
+    return (ts,) + tuple(np.full(len(ts), tag + k, dtype=np.float64) for k in range(5))
+
+
+def test_merge_without_base():
+    new = rows([3, 1, 2], 10.0)
+    merged = candle_cache.merge_columns(None, new)
+    assert merged[0].dtype == np.int64 and merged[1].dtype == np.float64
+    np.testing.assert_array_equal(merged[0], [3, 1, 2])        # apa adanya
+    assert candle_cache.merge_columns((np.empty(0),) * 6, new)[0].tolist() == [3, 1, 2]
+
+
+def test_merge_overlap_new_wins():
+    base = rows([1, 2, 3, 4], 0.0)
+    new = rows([3, 4, 5, 6], 100.0)
+    ts, o, h, l, c, v = candle_cache.merge_columns(base, new)
+    assert ts.tolist() == [1, 2, 3, 4, 5, 6]
+    assert o.tolist() == [0.0, 0.0, 100.0, 100.0, 100.0, 100.0]
+    assert v.tolist() == [4.0, 4.0, 104.0, 104.0, 104.0, 104.0]
+
+
+def test_merge_duplicates_and_unsorted_input():
+    base = rows([5, 1, 1, 3], 0.0)
+    new = [[4, 3, 4], [10.0, 11.0, 12.0], [0.0] * 3, [0.0] * 3, [0.0] * 3, [0.0] * 3]   # list biasa juga diterima
+    ts, o, *_ = candle_cache.merge_columns(base, new)
+    assert ts.tolist() == [1, 3, 4, 5]
+    # untuk timestamp ganda dalam `new`, kemunculan pertama yang dipakai
+    assert o.tolist() == [0.0, 11.0, 10.0, 0.0]
+
+
+def test_merge_gap_tail_and_websocket_rows():
+    """Urutan backfill bot: history, lalu ekor REST, lalu candle websocket yang ditahan"""
+    history = candles(10)
+    rest = candles(6, 8)                                        # tumpang tindih 2 candle
+    # candle websocket untuk open time yang juga ada di ekor REST menang
+    held = tuple(np.array([x]) for x in (13 * MINUTE, 99.0, 99.0, 99.0, 99.0, 99.0))
+    merged = candle_cache.merge_columns(candle_cache.merge_columns(history, rest), held)
+    assert merged[0].tolist() == [i * MINUTE for i in range(14)]
+    assert merged[4][-1] == 99.0 and merged[4][-2] == candles(1, 12)[4][0]
+    np.testing.assert_array_equal(merged[1][:10], history[1])
@@ -0,0 +1,115 @@
+import pytest
+
+pytest.importorskip('talib')
+
+from changepoint import FULL, REFRESH, SKIP, ChangeMonitor  # noqa: E402
+from pattern_detector import UltraPatternResult  # noqa: E402
+
+PATTERN = UltraPatternResult('Bull Flag', confidence=80.0, entry_price=100.0, target_price=110.0, stop_loss=95.0)
+
+
+def monitor(**kwargs):
+    """Deret datar close 100, range 2 -> ATR 2, reference di close 100"""
+    m = ChangeMonitor(enabled=True, **kwargs)
+    for tf in ('1m', '4h'):
+        m.seed('BTCUSDT', tf, [101.0] * 30, [99.0] * 30, [100.0] * 30, [10.0] * 30)
+        m.commit('BTCUSDT', tf, [PATTERN])
+    return m
+
+
+def close_at(m, price, volume=10.0, tf='1m'):
+    m.update('BTCUSDT', tf, price + 1.0, price - 1.0, price, volume)
+
+
+def test_new_series_is_full():
+    m = ChangeMonitor(enabled=True)
+    assert m.decide('BTCUSDT', '1m') == (FULL, 'new')
+    m.seed('BTCUSDT', '1m', [101.0] * 30, [99.0] * 30, [100.0] * 30, [10.0] * 30)
+    assert m.decide('BTCUSDT', '1m') == (FULL, 'new')        # belum pernah analisis penuh
+
+
+def test_quiet_candle_skips():
+    m = monitor()
+    close_at(m, 100.1)
+    assert m.decide('BTCUSDT', '1m') == (SKIP, 'quiet')
+    assert m.previous('BTCUSDT', '1m') == [PATTERN]
+
+
+def test_small_move_refreshes_with_series_close():
+    m = monitor()
+    close_at(m, 100.8)                                      # 0.4 ATR
+    assert m.decide('BTCUSDT', '1m') == (REFRESH, 'move')
+    (p,) = m.refreshed('BTCUSDT', '1m')
+    assert p.entry_price == pytest.approx(100.8)
+    assert p.target_price == pytest.approx(110.0 * 1.008)
+    assert p.stop_loss == pytest.approx(95.0 * 1.008)
+    assert (p.name, p.confidence) == (PATTERN.name, PATTERN.confidence)
+
+
+def test_refresh_scale_is_per_timeframe():
+    m = monitor()
+    close_at(m, 100.8, tf='1m')
+    # 4h belum punya candle baru: levelnya tidak ikut digeser gerak 1m
+    assert m.refreshed('BTCUSDT', '4h') == [PATTERN]
+    close_at(m, 99.5, tf='4h')
+    (p,) = m.refreshed('BTCUSDT', '4h')
+    assert p.entry_price == pytest.approx(99.5)
+
+
+def test_large_move_is_full():
+    m = monitor()
+    close_at(m, 102.5)                                      # 1.25 ATR
+    assert m.decide('BTCUSDT', '1m') == (FULL, 'move')
+
+
+def test_volume_surge_is_full():
+    m = monitor()
+    close_at(m, 100.0, volume=30.0)
+    assert m.decide('BTCUSDT', '1m') == (FULL, 'volume')
+
+
+def test_cusum_is_full():
+    m = monitor(drift=0.0, threshold=0.5)
+    close_at(m, 101.2)                                      # 0.6 ATR: di bawah full_move
+    assert m.decide('BTCUSDT', '1m') == (FULL, 'cusum')
+
+
+def test_age_is_full():
+    m = monitor(max_bars=3)
+    for _ in range(3):
+        close_at(m, 100.0)
+    assert m.decide('BTCUSDT', '1m') == (FULL, 'age')
+
+
+def test_commit_resets_reference():
+    m = monitor()
+    close_at(m, 102.5)
+    assert m.decide('BTCUSDT', '1m')[0] == FULL
+    moved = UltraPatternResult('Bull Flag', entry_price=102.5, target_price=112.0, stop_loss=97.0)
+    m.commit('BTCUSDT', '1m', [moved])
+    assert m.decide('BTCUSDT', '1m') == (SKIP, 'quiet')
+    close_at(m, 103.3)
+    (p,) = m.refreshed('BTCUSDT', '1m')
+    assert p.entry_price == pytest.approx(103.3)
+    assert p.stop_loss == pytest.approx(97.0 * 103.3 / 102.5)
+
+
+def test_disabled_and_reset():
+    m = monitor()
+    m.enabled = False
+    assert m.decide('BTCUSDT', '1m') == (FULL, 'disabled')
+    m.enabled = True
+    m.reset('BTCUSDT', '1m')
+    assert m.decide('BTCUSDT', '1m') == (FULL, 'new')
+    assert m.decide('BTCUSDT', '4h') == (SKIP, 'quiet')
+
+
+def test_stats_count_avoided_runs():
+    m = monitor()
+    m.record(FULL, 'move', 20)
+    m.record(SKIP, 'quiet', 20)
+    m.record(REFRESH, 'move', 20)
+    stats = m.stats()
+    assert stats['decisions'] == {FULL: 1, REFRESH: 1, SKIP: 1}
+    assert stats['saved_detector_runs'] == 40
+    assert stats['avoided_pct'] == pytest.approx(66.7)
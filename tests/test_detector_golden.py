@@ -0,0 +1,117 @@
+"""
+Golden output of all 22 detectors on a fixed synthetic corpus.
+
+Refactor detektor / indikator harus output-neutral: test ini gagal begitu
+satu pola muncul, hilang, atau entry/target/stop/confidence-nya bergeser.
+Perubahan angka yang disengaja memperbarui fixture di commit-nya sendiri
+(sebutkan jumlah pola sebelum/sesudah per detektor di pesan commit):
+
+    CPD_UPDATE_GOLDEN=1 python -m pytest tests/test_detector_golden.py
+"""
+
+import json
+import os
+
+import numpy as np
+import pytest
+
+pytest.importorskip('talib')
+
+import pipeline  # noqa: E402
+import talib_backend  # noqa: E402
+from indicators import IndicatorBundle  # noqa: E402
+from pattern_detector import UltraPatternDetector  # noqa: E402
+
+GOLDEN = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'golden', 'detectors.json')
+UPDATE = os.environ.get('CPD_UPDATE_GOLDEN', '').lower() in ('1', 'true', 'yes')
+
+TIMEFRAMES = ('4h', '1d')           # 1d: semua 22 detektor eligible; 4h: gating ikut teruji
+FIELDS = ('confidence', 'entry_price', 'target_price', 'stop_loss')
+
+
+def walk(seed, n=400):
+    """Random walk; drift dan volatilitas berganti per seed (naik / turun / datar, tenang / liar)"""
+    rng = np.random.default_rng(seed)
+    drift = 0.0006 * ((seed % 3) - 1)
+    vol = 0.008 + 0.004 * (seed % 4)
+    return candles(rng, 100.0 * np.exp(np.cumsum(rng.normal(drift, vol, n))))
+
+
+def cycle(seed, n=400):
+    """Pasar sideways / bergelombang: sinus + tren tipis (pola range dan swing yang tidak muncul di walk)"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(n)
+    period = 20 + 7 * (seed % 9)
+    amp = 0.03 + 0.02 * (seed % 4)
+    trend = 0.0008 * ((seed % 3) - 1) * t
+    noise = 0.3 * np.cumsum(rng.normal(0.0, 0.004, n))
+    opens, highs, lows, closes, volumes = candles(rng, 100.0 * np.exp(trend + amp * np.sin(2 * np.pi * t / period) + noise))
+    volumes[-2:] *= 3.0             # volume breakout di candle terakhir
+    return opens, highs, lows, closes, volumes
+
+
+def candles(rng, close):
+    n = len(close)
+    open_ = np.concatenate([[close[0]], close[:-1]]) * (1.0 + rng.normal(0.0, 0.002, n))
+    high = np.maximum(open_, close) * (1.0 + np.abs(rng.normal(0.0, 0.006, n)))
+    low = np.minimum(open_, close) * (1.0 - np.abs(rng.normal(0.0, 0.006, n)))
+    return open_, high, low, close, rng.lognormal(10.0, 0.5, n)
+
+
+MARKETS = {'walk': walk, 'cycle': cycle}
+CORPUS = ([('walk', seed, tf) for seed in range(30) for tf in TIMEFRAMES]
+          + [('cycle', seed, '1d') for seed in range(10)])
+
+
+def detect(detector, kind, seed, timeframe):
+    """Output per node seperti yang dijalankan bot: satu bundle, urutan PIPELINE"""
+    cols = MARKETS[kind](seed)
+    bundle = IndicatorBundle(*cols)
+    series = dict(zip('ohlcv', (bundle.series(k) for k in IndicatorBundle.SOURCES)))
+    outputs = pipeline.run_nodes(detector, series, float(cols[3][-1]), timeframe, indicators=bundle)
+    return {method: [[p.name] + [float(getattr(p, f)) for f in FIELDS] for p in found]
+            for method, found in outputs.items()}
+
+
+@pytest.fixture(scope='module')
+def observed():
+    # nilai golden dihitung dengan kernel numpy, apa pun backend yang aktif di mesin ini
+    enabled = talib_backend.enabled
+    talib_backend.enabled = lambda: False
+    try:
+        detector = UltraPatternDetector()
+        return {'/'.join(map(str, case)): detect(detector, *case) for case in CORPUS}
+    finally:
+        talib_backend.enabled = enabled
+
+
+@pytest.fixture(scope='module')
+def golden(observed):
+    if UPDATE:
+        os.makedirs(os.path.dirname(GOLDEN), exist_ok=True)
+        with open(GOLDEN, 'w', newline='\r\n') as f:
+            json.dump(observed, f, indent=0)
+            f.write('\n')
+    with open(GOLDEN) as f:
+        return json.load(f)
+
+
+def test_corpus_covers_every_detector(golden):
+    assert set(golden) == {'/'.join(map(str, case)) for case in CORPUS}
+    for key, outputs in golden.items():
+        assert set(outputs) == {node.method for node in pipeline.PIPELINE}, key
+
+
+@pytest.mark.parametrize('node', [node.method for node in pipeline.PIPELINE])
+def test_detector_output_matches_golden(node, observed, golden):
+    for key in golden:
+        expected, actual = golden[key][node], observed[key][node]
+        assert [p[0] for p in actual] == [p[0] for p in expected], (key, node)
+        for got, want in zip(actual, expected):
+            np.testing.assert_allclose(got[1:], want[1:], rtol=1e-9, err_msg=f'{key} {node} {want[0]}')
+
+
+def test_corpus_exercises_most_detectors(golden):
+    # detektor yang tidak pernah berbunyi di korpus ini hanya teruji "tetap kosong"
+    fired = {method for outputs in golden.values() for method, found in outputs.items() if found}
+    assert len(fired) >= 15, sorted(fired)
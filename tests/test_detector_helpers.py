@@ -0,0 +1,152 @@
+"""Helper detektor module-level (detector_helpers.py)"""
+
+import warnings
+
+import numpy as np
+import pytest
+
+from detector_helpers import (atr_stop, crossed_above, crossed_below, last_close_above, last_close_below,
+                              linreg_slope, near, rough_poc, swing_high, swing_low, vol_climax, vol_dryup,
+                              vol_spike, volume_contract, volume_surge)
+
+NAN = float('nan')
+
+
+# ---------- cross / proximity ----------
+
+def test_crossed_above_and_below():
+    assert crossed_above([1.0, 3.0], [2.0, 2.0])
+    assert crossed_above([2.0, 3.0], [2.0, 2.0])           # menyentuh di bar sebelumnya tetap dihitung
+    assert not crossed_above([3.0, 4.0], [2.0, 2.0])       # sudah di atas, bukan cross
+    assert not crossed_above([1.0, 2.0], [2.0, 2.0])
+    assert crossed_below([3.0, 1.0], [2.0, 2.0])
+    assert crossed_below([2.0, 1.0], [2.0, 2.0])
+    assert not crossed_below([1.0, 0.5], [2.0, 2.0])
+    assert crossed_above(np.array([0.0, 1.0, 5.0]), np.array([9.0, 2.0, 2.0]))
+
+
+def test_cross_short_and_nan_inputs():
+    assert not crossed_above([3.0], [2.0])
+    assert not crossed_below([], [])
+    assert not crossed_above([NAN, 3.0], [2.0, 2.0])
+    assert not crossed_below([3.0, 1.0], [2.0, NAN])
+
+
+def test_near():
+    assert near(101.0, 100.0)
+    assert near(99.0, 100.0, tol=0.01)
+    assert not near(102.0, 100.0)
+    assert near(0.0, 0.0)
+    assert not near(1e-6, 0.0)
+    assert not near(NAN, 100.0)
+    assert not near(100.0, NAN)
+    assert not near(float('inf'), 100.0)
+    assert isinstance(near(np.float64(1.0), 1.0), bool)
+
+
+# ---------- volume ----------
+
+def test_vol_spike_and_dryup_use_bars_before_the_last():
+    v = np.r_[np.full(30, 100.0), 150.0]
+    assert vol_spike(v)                                     # 150 > 1.2 x 100
+    assert not vol_spike(v, factor=1.5)
+    assert vol_climax(np.r_[np.full(30, 100.0), 151.0])
+    assert vol_dryup(np.r_[np.full(30, 100.0), 70.0])
+    assert not vol_dryup(v)
+    # bar-bar lama di luar jendela n tidak ikut rata-rata
+    assert vol_spike(np.r_[np.full(10, 1000.0), np.full(20, 100.0), 150.0], n=20)
+
+
+def test_vol_spike_short_and_nan_inputs():
+    assert not vol_spike([100.0])
+    assert not vol_dryup([])
+    # deret lebih pendek dari n: rata-rata seluruh deret, termasuk bar terakhir
+    assert vol_spike([1.0, 1.0, 3.0])
+    assert not vol_spike(np.r_[np.full(30, 100.0), NAN])
+    assert not vol_dryup(np.r_[np.full(29, 100.0), NAN, 10.0])
+
+
+def test_volume_surge():
+    base = np.full(30, 100.0)
+    assert volume_surge(np.r_[base, 150.0])                 # >= factor x rata-rata
+    assert not volume_surge(np.r_[base, 149.0])
+    assert not volume_surge(np.r_[base[1:], 500.0])         # kurang dari lookback + 1 bar
+    base[3] = NAN
+    assert not volume_surge(np.r_[base, 500.0])
+
+
+def test_volume_contract():
+    rng = np.random.default_rng(0)
+    wide = 100.0 + rng.normal(0.0, 20.0, 30)
+    tight = 100.0 + rng.normal(0.0, 2.0, 30)
+    assert volume_contract(np.r_[wide, tight])
+    assert not volume_contract(np.r_[tight, wide])
+    assert not volume_contract(np.r_[wide, tight][1:])
+    tight[5] = NAN                                          # NaN diabaikan (nanstd)
+    assert volume_contract(np.r_[wide, tight])
+
+
+def test_rough_poc():
+    close = np.r_[np.linspace(100.0, 112.0, 50), np.full(20, 106.1)]
+    vol = np.r_[np.full(50, 1.0), np.full(20, 50.0)]
+    poc = rough_poc(close, vol, bins=24)
+    assert 105.5 <= poc <= 106.5 and abs(poc - 106.1) <= 0.25
+    # lookback memotong bar lama
+    assert rough_poc(close, vol, lookback=10) is None       # 10 bar terakhir datar
+
+
+def test_rough_poc_flat_short_and_nan():
+    assert rough_poc(np.full(50, 100.0), np.ones(50)) is None
+    assert rough_poc(np.linspace(1.0, 2.0, 9), np.ones(9)) is None
+    close = np.r_[np.linspace(100.0, 112.0, 50), np.full(20, 106.1)]
+    vol = np.r_[np.full(50, 1.0), np.full(20, 50.0)]
+    expected = rough_poc(close, vol)
+    close[3], vol[7] = NAN, NAN                             # bar NaN dilewati, bukan merusak bin
+    assert rough_poc(close, vol) == pytest.approx(expected, abs=0.5)
+    assert rough_poc(np.full(20, NAN), np.ones(20)) is None
+
+
+# ---------- price / trend ----------
+
+def test_linreg_slope():
+    assert linreg_slope(np.arange(30.0) * 2.5 + 7.0) == pytest.approx(2.5)
+    assert linreg_slope(np.arange(30.0)[::-1], window=10) == pytest.approx(-1.0)
+    assert linreg_slope(np.full(25, 3.0)) == 0.0
+    assert linreg_slope([1.0, 2.0, 3.0]) == 0.0             # data kurang dari window
+    assert isinstance(linreg_slope(list(np.arange(20.0))), float)
+
+
+def test_linreg_slope_nan():
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        assert linreg_slope(np.full(20, NAN)) == 0.0
+    assert np.isnan(linreg_slope(np.r_[np.arange(19.0), NAN]))
+
+
+def test_last_close_above_and_below():
+    closes = np.array([99.0, 101.0, 101.5])
+    assert last_close_above(closes, 100.0)
+    assert last_close_above(closes, 100.0, k=2)
+    assert not last_close_above(closes, 100.0, k=3)
+    assert not last_close_above(closes, 101.4)              # margin 0.2%
+    assert last_close_above(closes, 101.4, margin=0.0)
+    assert last_close_below(np.array([101.0, 98.0]), 100.0)
+    assert not last_close_below(np.array([101.0, 99.9]), 100.0)
+    assert not last_close_above(closes, 50.0, k=4)          # deret terlalu pendek
+    assert not last_close_above(np.array([NAN, 120.0]), 100.0, k=2)
+
+
+def test_swing_levels():
+    lows = np.array([5.0, 3.0, 4.0, 6.0])
+    assert swing_low(lows) == 3.0
+    assert swing_low(lows, lookback=2) == 4.0
+    assert swing_high(lows, lookback=3) == 6.0
+
+
+# ---------- risk ----------
+
+def test_atr_stop():
+    assert atr_stop(100.0, 2.5) == 95.0
+    assert atr_stop(100.0, 2.5, long=False) == 105.0
+    assert atr_stop(100.0, 2.5, mult=1.0) == 97.5
+    assert np.isnan(atr_stop(100.0, NAN))
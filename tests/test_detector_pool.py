@@ -0,0 +1,207 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+pytest.importorskip('talib')
+
+import detector_pool  # noqa: E402
+from indicators import IndicatorCache  # noqa: E402
+from shared_market import SharedOHLCV  # noqa: E402
+
+MINUTE = 60_000
+
+
+def candles(n, first=0):
+    ts = (np.arange(first, first + n) * MINUTE).astype(np.int64)
+    base = np.arange(first, first + n, dtype=np.float64)
+    return ts, base + 0.1, base + 0.2, base + 0.3, base + 0.4, base + 0.5
+
+
+def append(block, i):
+    block.append(*(c[0] for c in candles(1, i)))
+
+
+@pytest.fixture
+def block():
+    b = SharedOHLCV(maxlen=5, shared=True)
+    if not b.shared:
+        pytest.skip('shared memory unavailable')
+    b.load(*candles(5))
+    yield b
+    b.close()
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    """Rekam frame yang dianalisis; hook opsional dijalankan di tengah analisis"""
+    seen = []
+
+    def fake(detector, cache, symbol, tf, frame, current_price, streams):
+        seen.append((frame[0], [np.array(col) for col in frame[1:]], [col.flags.writeable for col in frame[1:]]))
+        if fake.hook:
+            hook, fake.hook = fake.hook, None
+            hook()
+        return [len(seen)]
+
+    fake.hook = None
+    monkeypatch.setattr(detector_pool, '_detect_arrays', fake)
+    return fake, seen
+
+
+def test_detect_shared_uses_views_when_unchanged(block, calls):
+    _, seen = calls
+    assert detector_pool._detect_shared(None, IndicatorCache(), 'BTCUSDT', '1m', block.handle(), 1.0, None) == [1]
+    last_ts, cols, writeable = seen[0]
+    assert last_ts == 4 * MINUTE
+    np.testing.assert_array_equal(cols[3], candles(5)[4])
+    assert not any(writeable)                   # view segmen, tanpa salinan
+
+
+def test_detect_shared_retries_after_compaction(block, calls):
+    fake, seen = calls
+    # isi buffer sampai append berikutnya memicu compaction
+    i = 5
+    while sum(block.snapshot()[:2]) < len(block.ts):
+        append(block, i)
+        i += 1
+    handle = block.handle()
+    fake.hook = lambda: append(block, i)        # writer meng-compact saat detektor berjalan
+
+    found = detector_pool._detect_shared(None, IndicatorCache(), 'BTCUSDT', '1m', handle, 1.0, None)
+
+    assert found == [2]                         # hasil pertama (data basi) dibuang
+    assert not block.still_valid(handle[4])
+    last_ts, cols, writeable = seen[1]
+    assert last_ts == i * MINUTE
+    expected = candles(5, i - 4)
+    for got, want in zip(cols, expected[1:]):
+        np.testing.assert_array_equal(got, want)
+    # analisis ulang memakai salinan, bukan view segmen yang bisa ditimpa lagi
+    assert all(writeable)
+
+
+def test_detect_shared_gives_up_when_segment_keeps_changing(block, calls, monkeypatch):
+    fake, seen = calls
+    i = 5
+    while sum(block.snapshot()[:2]) < len(block.ts):
+        append(block, i)
+        i += 1
+    handle = block.handle()
+    fake.hook = lambda: append(block, i)
+    monkeypatch.setattr(block, 'still_valid', lambda epoch: False)
+    assert detector_pool._detect_shared(None, IndicatorCache(), 'BTCUSDT', '1m', handle, 1.0, None) == []
+    assert len(seen) == 1
+
+
+def test_detect_frames_skips_closed_segment(block, calls):
+    _, seen = calls
+    handle = block.handle()
+    block.close()
+    # segmen sudah di-unlink: timeframe itu dilewati, bukan crash
+    assert detector_pool._detect_frames(None, IndicatorCache(), 'BTCUSDT', {'1m': handle}, 1.0) == {}
+    assert not seen
+
+
+# ---------- DetectionCache ----------
+
+def test_detection_cache_key():
+    cache = detector_pool.DetectionCache()
+    cache.put('BTCUSDT', '1h', 1000, ('ctx',), ['p'])
+    assert cache.get('BTCUSDT', '1h', 1000, ('ctx',)) == ['p']
+    assert cache.get('BTCUSDT', '1h', np.int64(1000), ('ctx',)) == ['p']
+    # candle baru, timeframe / simbol lain, atau context lain -> miss
+    assert cache.get('BTCUSDT', '1h', 2000, ('ctx',)) is None
+    assert cache.get('BTCUSDT', '4h', 1000, ('ctx',)) is None
+    assert cache.get('ETHUSDT', '1h', 1000, ('ctx',)) is None
+    assert cache.get('BTCUSDT', '1h', 1000, ('other',)) is None
+    assert cache.stats() == {'entries': 1, 'hits': 2, 'misses': 4}
+
+
+def test_detection_cache_version_bump_misses(monkeypatch):
+    cache = detector_pool.DetectionCache()
+    cache.put('BTCUSDT', '1h', 1000, (), ['p'])
+    monkeypatch.setattr(detector_pool, 'DETECTOR_VERSION', detector_pool.DETECTOR_VERSION + 1)
+    assert cache.get('BTCUSDT', '1h', 1000, ()) is None
+
+
+def test_detection_cache_lru_and_invalidate():
+    cache = detector_pool.DetectionCache(max_entries=3)
+    for sym, tf in (('A', '1h'), ('A', '4h'), ('B', '1h')):
+        cache.put(sym, tf, 1, (), [sym + tf])
+    assert cache.get('A', '1h', 1, ()) == ['A1h']           # jadi paling baru
+    cache.put('C', '1h', 1, (), ['C1h'])                    # menyingkirkan A 4h
+    assert cache.get('A', '4h', 1, ()) is None
+    assert cache.get('A', '1h', 1, ()) == ['A1h']
+    cache.invalidate('A')
+    assert cache.get('A', '1h', 1, ()) is None
+    cache.invalidate(timeframe='1h')
+    assert cache.stats()['entries'] == 0
+
+
+# ---------- DetectorPool ----------
+
+def test_pipeline_threads_default_to_one_per_worker(monkeypatch):
+    monkeypatch.delenv('CPD_PIPELINE_THREADS', raising=False)
+    monkeypatch.setattr(detector_pool.os, 'cpu_count', lambda: 16)
+    assert detector_pool.DetectorPool(workers=2, mode='process').threads == 1
+    monkeypatch.setenv('CPD_PIPELINE_THREADS', '3')
+    assert detector_pool.DetectorPool(workers=2, mode='process').threads == 3
+    monkeypatch.setenv('CPD_PIPELINE_THREADS', '64')
+    assert detector_pool.DetectorPool(workers=2, mode='process').threads == detector_pool.MAX_PIPELINE_THREADS
+
+
+def array_frame(n, last_ts):
+    ts, *cols = candles(n, last_ts // MINUTE - n + 1)
+    return (int(ts[-1]), *cols)
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    runs = []
+
+    def fake(detector, cache, symbol, frames, current_price, streams=None):
+        runs.append(sorted(frames))
+        return {tf: [f'{symbol} {tf} {detector_pool.frame_ts(frame)}'] for tf, frame in frames.items()}
+
+    monkeypatch.setattr(detector_pool, '_detect_frames', fake)
+    p = detector_pool.DetectorPool(workers=1, mode='inline')
+    p.changes.enabled = False
+    return p, runs
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_detect_symbol_serves_unchanged_series_from_cache(pool):
+    p, runs = pool
+    frames = {'1h': array_frame(300, 300 * MINUTE), '4h': array_frame(300, 600 * MINUTE)}
+    first = run(p.detect_symbol('BTCUSDT', frames, 1.0))
+    assert runs == [['1h', '4h']]
+    assert run(p.detect_symbol('BTCUSDT', frames, 2.0)) == first
+    assert len(runs) == 1
+
+    # candle baru hanya di 1h: 4h tetap dari cache
+    frames['1h'] = array_frame(300, 301 * MINUTE)
+    out = run(p.detect_symbol('BTCUSDT', frames, 1.0))
+    assert runs[-1] == ['1h']
+    assert out['4h'] == first['4h'] and out['1h'] != first['1h']
+
+
+def test_detect_symbol_invalidation(pool):
+    p, runs = pool
+    frames = {'1h': array_frame(300, 300 * MINUTE)}
+    run(p.detect_symbol('BTCUSDT', frames, 1.0))
+    p.invalidate('BTCUSDT', '1h')                           # mis. history di-load ulang
+    run(p.detect_symbol('BTCUSDT', frames, 1.0))
+    assert len(runs) == 2
+    p.detector.ultra_config['min_target_percentage'] += 1   # context berubah -> cache dibuang
+    run(p.detect_symbol('BTCUSDT', frames, 1.0))
+    assert len(runs) == 3
+
+
+def test_detect_symbol_short_series_not_dispatched(pool):
+    p, runs = pool
+    out = run(p.detect_symbol('BTCUSDT', {'1h': array_frame(5, 5 * MINUTE)}, 1.0))
+    assert out == {'1h': []} and not runs
@@ -0,0 +1,105 @@
+"""Garis support/resistance (geometry.py), termasuk input degenerate"""
+
+import math
+
+import numpy as np
+import pytest
+
+from geometry import Line, apex, channel, converging, fit_bars, fit_line, fit_lines, line_through, pivot_line
+
+
+def test_fit_bars_matches_polyfit():
+    rng = np.random.default_rng(0)
+    a = 100.0 + np.cumsum(rng.normal(0.0, 1.0, 60))
+    b = 90.0 + 0.3 * np.arange(60) + rng.normal(0.0, 0.5, 60)
+    for line, s in zip(fit_bars(a, b), (a, b)):
+        slope, intercept = np.polyfit(np.arange(60), s, 1)
+        assert line.slope == pytest.approx(slope, rel=1e-9)
+        assert line.intercept == pytest.approx(intercept, rel=1e-9)
+        assert line.points == 60
+
+
+def test_exact_line_has_zero_error_and_full_touches():
+    line = fit_line([10, 20, 30], [5.0, 6.0, 7.0])
+    assert line.slope == pytest.approx(0.1)
+    assert line.at(40) == pytest.approx(8.0)
+    np.testing.assert_allclose(line.at([10, 30]), [5.0, 7.0])
+    assert line.error == pytest.approx(0.0, abs=1e-12)
+    assert line.touches == 3
+    assert line.rel_slope(10) == pytest.approx(0.02)
+
+
+# ---------- degenerate inputs ----------
+
+def test_line_through_equal_x_is_horizontal_at_first_point():
+    line = line_through(5, 10.0, 5, 12.0)
+    assert (line.slope, line.intercept, line.points) == (0.0, 10.0, 1)
+    line = line_through(2, 10.0, 6, 12.0)
+    assert (line.slope, line.at(2), line.at(6), line.points) == (0.5, 10.0, 12.0, 2)
+
+
+def test_vertical_point_set_fits_flat_line_through_mean():
+    # semua x sama: sxx = 0, slope dibuat 0 alih-alih dibagi nol
+    line = fit_line([7, 7, 7], [1.0, 2.0, 3.0])
+    assert line.slope == 0.0
+    assert line.intercept == pytest.approx(2.0)
+    assert line.points == 3
+
+
+def test_too_few_points():
+    one = fit_line([3], [4.0])
+    assert (one.slope, one.intercept, one.points, one.touches) == (0.0, 4.0, 1, 1)
+    assert one.error == 0.0
+    two = fit_line([0, 2], [1.0, 3.0])
+    assert two.slope == pytest.approx(1.0) and two.error == pytest.approx(0.0, abs=1e-12)
+    (single,) = fit_bars([42.0])
+    assert (single.slope, single.intercept) == (0.0, 42.0)
+
+
+def test_no_finite_points_gives_nan_line():
+    for line in (fit_line([1, 2], [np.nan, np.nan]), pivot_line([], [1.0, 2.0]), fit_line([], [])):
+        assert line.points == 0 and line.slope == 0.0
+        assert math.isnan(line.intercept) and math.isnan(line.error)
+        assert math.isnan(line.at(3))
+
+
+def test_nan_values_are_ignored_per_row():
+    upper, lower = fit_lines([0, 1, 2, 3], [[1.0, np.nan, 3.0, 4.0], [np.nan] * 4])
+    assert upper.points == 3 and upper.slope == pytest.approx(fit_line([0, 2, 3], [1.0, 3.0, 4.0]).slope)
+    assert lower.points == 0
+    assert fit_line([0, np.nan, 2], [1.0, 5.0, 3.0]).slope == pytest.approx(1.0)
+
+
+def test_pivot_line_and_channel():
+    highs = np.array([1.0, 5.0, 2.0, 6.0, 2.0, 7.0])
+    lows = highs - 1.0
+    line = pivot_line([1, 3, 5], highs)
+    assert line.slope == pytest.approx(0.5) and line.at(1) == pytest.approx(5.0)
+    upper, lower = channel(highs, lows, peaks=[1, 3, 5], troughs=[0, 2, 4])
+    assert upper == line
+    assert lower.slope == pytest.approx(0.25)
+    upper, lower = channel(highs, lows)
+    assert upper.points == lower.points == 6
+    assert upper.slope == pytest.approx(lower.slope)
+    upper, lower = channel(highs, lows, peaks=[], troughs=[2])
+    assert upper.points == 0 and lower.points == 1
+
+
+def test_converging_and_apex():
+    upper, lower = Line(-0.5, 20.0), Line(0.5, 10.0)
+    assert converging(upper, lower)
+    assert apex(upper, lower) == pytest.approx(10.0)
+    assert not converging(lower, upper)                    # melebar (broadening)
+
+
+def test_parallel_lines_have_no_apex():
+    upper, lower = Line(0.3, 20.0), Line(0.3, 10.0)
+    assert not converging(upper, lower)
+    assert apex(upper, lower) is None
+    nan = fit_line([], [])
+    assert apex(nan, nan) is None
+
+
+def test_rel_slope_at_zero_base():
+    assert Line(2.0, 0.0).rel_slope(0) == 0.0
+    assert Line(2.0, 0.0).rel_slope(5) == pytest.approx(0.2)
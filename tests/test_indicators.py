@@ -0,0 +1,238 @@
+import numpy as np
+import pytest
+
+import indicators
+import talib_backend
+from indicators import IndicatorBundle, IndicatorCache, ensure_bundle
+from pivots import DEFAULT_PIVOT_CONFIGS
+from streaming import StreamingIndicators
+
+TAIL = 60
+
+
+def history(n, seed=5):
+    rng = np.random.default_rng(seed)
+    close = 100.0 * np.exp(np.cumsum(rng.normal(0.0, 0.01, n)))
+    spread = np.abs(rng.normal(0.0, 0.004, n)) * close
+    open_ = np.concatenate([[close[0]], close[:-1]])
+    ts = np.arange(n, dtype=np.int64) * 60_000
+    return ts, open_, np.maximum(open_, close) + spread, np.minimum(open_, close) - spread, close, rng.uniform(1, 10, n)
+
+
+@pytest.fixture(autouse=True)
+def numpy_backend(monkeypatch):
+    monkeypatch.setattr(talib_backend, 'enabled', lambda: False)
+
+
+def streamed_bundle(n=TAIL):
+    ts, *cols = history(n + 100)
+    stream = StreamingIndicators(tail=TAIL)
+    stream.seed(ts[:n], *(c[:n] for c in cols))
+    bundle = IndicatorBundle(*(c[n - TAIL:n] for c in cols), stream=stream, last_ts=int(ts[n - 1]))
+    return bundle, stream, (ts[n:], *(c[n:] for c in cols))
+
+
+def test_streamed_values_come_from_stream():
+    bundle, stream, _ = streamed_bundle()
+    np.testing.assert_array_equal(bundle.ema(12), stream.tail('ema_12', TAIL))
+    np.testing.assert_array_equal(bundle.atr(14), stream.tail('atr', TAIL))
+    np.testing.assert_array_equal(bundle.bollinger(20, 2.0)[1], stream.tail('bb_up', TAIL))
+    np.testing.assert_array_equal(bundle.macd(12, 26, 9)[0], stream.tail('macd', TAIL))
+
+
+def test_streamed_tails_match_batch_indicators():
+    bundle, stream, _ = streamed_bundle()
+    assert stream.covers(TAIL, bundle.last_ts)
+    _, h, l, c, _ = (bundle.series(s) for s in IndicatorBundle.SOURCES)
+    for period in (12, 200):
+        np.testing.assert_allclose(bundle.ema(period), indicators.ema(c, period), rtol=1e-12)
+    np.testing.assert_allclose(bundle.rsi(14), indicators.rsi(c, 14), rtol=1e-9, equal_nan=True)
+    np.testing.assert_allclose(bundle.atr(14), indicators.atr(h, l, c, 14), rtol=1e-9, equal_nan=True)
+    for streamed, batch in zip(bundle.macd(12, 26, 9), indicators.macd(c, 12, 26, 9)):
+        np.testing.assert_allclose(streamed, batch, rtol=1e-9, atol=1e-12)
+    for kind, left, right, prominence, min_distance in DEFAULT_PIVOT_CONFIGS:
+        src = h if kind == 'high' else l
+        np.testing.assert_array_equal(bundle.pivots(kind, left, right, None, prominence, min_distance),
+                                      indicators.find_pivots(src, left, right, kind, prominence, min_distance))
+
+
+def test_stream_longer_than_series_falls_back_to_batch():
+    ts, *cols = history(4 * TAIL)
+    stream = StreamingIndicators(tail=TAIL)
+    stream.seed(ts[:TAIL], *(col[:TAIL] for col in cols))
+    for row in zip(ts[TAIL:], *(col[TAIL:] for col in cols)):
+        stream.update(*row)                                 # > maxlen append: ring buffer berputar
+    window = [col[-TAIL:] for col in cols]
+    _, h, l, c, _ = window
+    bundle = IndicatorBundle(*window, stream=stream, last_ts=int(ts[-1]))
+    assert not stream.covers(TAIL, int(ts[-1]))
+    # warm-up stream dimulai sebelum jendela: ekornya memang berbeda dari batch
+    assert not np.allclose(stream.tail('ema_200', TAIL), indicators.ema(c, 200))
+    np.testing.assert_array_equal(bundle.ema(200), indicators.ema(c, 200))
+    np.testing.assert_array_equal(bundle.rsi(14), indicators.rsi(c, 14))
+    np.testing.assert_array_equal(bundle.atr(14), indicators.atr(h, l, c, 14))
+    for streamed, batch in zip(bundle.macd(12, 26, 9), indicators.macd(c, 12, 26, 9)):
+        np.testing.assert_array_equal(streamed, batch)
+    np.testing.assert_array_equal(bundle.pivots('high'), indicators.find_pivots(h, 3, 3, 'high'))
+
+
+def test_memoized_stream_tails_survive_stream_updates():
+    bundle, stream, later = streamed_bundle()
+    values = {
+        'ema': bundle.ema(12), 'sma': bundle.sma(20), 'vwma': bundle.vwma(20), 'atr': bundle.atr(14),
+        'rsi': bundle.rsi(14), 'obv': bundle.obv(),
+        **{f'bb{i}': x for i, x in enumerate(bundle.bollinger(20, 2.0))},
+        **{f'macd{i}': x for i, x in enumerate(bundle.macd(12, 26, 9))},
+    }
+    before = {k: v.copy() for k, v in values.items()}
+
+    # ring buffer ekor berputar penuh: setiap slot view lama ditimpa
+    for row in zip(*later):
+        stream.update(*row)
+
+    for key, value in values.items():
+        assert not value.flags.writeable, key
+        np.testing.assert_array_equal(value, before[key], err_msg=key)
+    assert bundle.ema(12) is values['ema']          # tetap dari memo
+    assert not np.array_equal(stream.tail('ema_12', TAIL), before['ema'])
+
+
+def test_bundle_ignores_stream_out_of_sync():
+    bundle, stream, later = streamed_bundle()
+    stream.update(*(col[0] for col in later))
+    # stream sudah maju satu candle: bundle menghitung dari deretnya sendiri
+    plain = IndicatorBundle(*(bundle.series(s) for s in IndicatorBundle.SOURCES))
+    np.testing.assert_array_equal(bundle.ema(12), plain.ema(12))
+
+
+# ---------- bundle tanpa stream ----------
+
+def plain_bundle(n=300, seed=5):
+    _, *cols = history(n, seed)
+    return IndicatorBundle(*cols), cols
+
+
+def sma_loop(x, period):
+    out = np.full(len(x), np.nan)
+    for i in range(period - 1, len(x)):
+        out[i] = np.mean(x[i - period + 1:i + 1])
+    return out
+
+
+def ema_loop(x, period):
+    out = np.empty(len(x))
+    alpha = 2.0 / (period + 1.0)
+    out[0] = x[0]
+    for i in range(1, len(x)):
+        out[i] = alpha * x[i] + (1.0 - alpha) * out[i - 1]
+    return out
+
+
+def wilder_loop(x, period):
+    out = np.full(len(x), np.nan)
+    out[period - 1] = np.mean(x[:period])
+    for i in range(period, len(x)):
+        out[i] = (out[i - 1] * (period - 1) + x[i]) / period
+    return out
+
+
+def tr_loop(h, l, c):
+    # bar pertama belum punya close sebelumnya: high-low
+    return np.array([max(h[i] - l[i], abs(h[i] - c[i - 1]), abs(l[i] - c[i - 1])) if i else h[i] - l[i]
+                     for i in range(len(c))])
+
+
+def test_memoizes_by_name_and_params():
+    bundle, _ = plain_bundle()
+    first = bundle.ema(12)
+    assert bundle.ema(12) is first
+    assert bundle.ema(26) is not first
+    assert bundle.atr(14, method='sma') is not bundle.atr(14, method='wilder')
+    assert bundle.rsi(14, method='ema') is bundle.rsi(14, method='ema')
+    assert (bundle.hits, bundle.misses) == (3, 6)           # atr wilder & sma berbagi true_range
+
+
+def test_outputs_are_read_only_and_inputs_are_copied():
+    bundle, cols = plain_bundle()
+    closes = cols[3]
+    snapshot = closes.copy()
+    for value in (bundle.ema(12), bundle.atr(14), bundle.rsi(14), *bundle.macd(12, 26, 9), bundle.series('close')):
+        assert not value.flags.writeable
+    closes[-1] *= 2.0                                       # caller tetap bebas menulis ke array-nya
+    assert bundle.series('close')[-1] == snapshot[-1]
+    assert bundle.sma(20)[-1] == pytest.approx(snapshot[-20:].mean())
+
+
+def test_true_range_uses_previous_close():
+    h, l, c = np.array([10.0, 12.0, 11.0]), np.array([9.0, 11.0, 8.0]), np.array([9.5, 11.5, 9.0])
+    np.testing.assert_array_equal(indicators.true_range(h, l, c), [1.0, 2.5, 3.5])
+
+
+def test_atr_variants():
+    bundle, (_, h, l, c, _) = plain_bundle()
+    tr = tr_loop(h, l, c)
+    np.testing.assert_allclose(bundle.true_range(), tr, rtol=1e-12)
+    np.testing.assert_allclose(bundle.atr(14, 'wilder'), wilder_loop(tr, 14), rtol=1e-10, equal_nan=True)
+    np.testing.assert_allclose(bundle.atr(14, 'sma'), sma_loop(tr, 14), rtol=1e-10, equal_nan=True)
+    np.testing.assert_allclose(bundle.atr(14, 'ema'), ema_loop(tr, 14), rtol=1e-10)
+    with pytest.raises(ValueError):
+        bundle.atr(14, 'hull')
+
+
+def test_rsi_variants():
+    bundle, (*_, c, _) = plain_bundle()
+    d = np.diff(c)
+    gain, loss = np.maximum(d, 0.0), np.maximum(-d, 0.0)
+
+    def from_averages(ag, al):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.r_[np.nan, np.where(al == 0, 100.0, 100.0 - 100.0 / (1.0 + ag / al))]
+
+    np.testing.assert_allclose(bundle.rsi(14, 'wilder'), from_averages(wilder_loop(gain, 14), wilder_loop(loss, 14)),
+                               rtol=1e-9, equal_nan=True)
+    np.testing.assert_allclose(bundle.rsi(14, 'sma'), from_averages(sma_loop(gain, 14), sma_loop(loss, 14)),
+                               rtol=1e-9, equal_nan=True)
+    # ema: gain/loss bar pertama 0, di-seed dengan nilai pertama seperti ema()
+    ema_rsi = bundle.rsi(14, 'ema')
+    expected = from_averages(ema_loop(np.r_[0.0, gain], 14)[1:], ema_loop(np.r_[0.0, loss], 14)[1:])
+    np.testing.assert_allclose(ema_rsi[15:], expected[15:], rtol=1e-9)
+    assert np.isnan(bundle.rsi(14, 'wilder')[:14]).all() and np.isfinite(bundle.rsi(14, 'wilder')[14])
+    with pytest.raises(ValueError):
+        bundle.rsi(14, 'hull')
+
+
+def test_macd_and_bollinger_are_trailing():
+    bundle, (*_, c, _) = plain_bundle()
+    line, signal, hist = bundle.macd(12, 26, 9)
+    np.testing.assert_allclose(line, ema_loop(c, 12) - ema_loop(c, 26), rtol=1e-10)
+    np.testing.assert_allclose(hist, line - ema_loop(line, 9), rtol=1e-9, atol=1e-12)
+    assert np.abs(hist).max() > 0
+    mid, up, dn, sd = bundle.bollinger(20, 2.0)
+    assert mid[-1] == pytest.approx(c[-20:].mean())
+    assert sd[-1] == pytest.approx(c[-20:].std())
+    assert up[-1] - mid[-1] == pytest.approx(2.0 * sd[-1])
+    assert np.isnan(mid[:19]).all()
+
+
+def test_ensure_bundle_reuses_only_matching_series():
+    bundle, cols = plain_bundle()
+    assert ensure_bundle(bundle, *cols) is bundle
+    other = history(300, seed=6)[1:]
+    rebuilt = ensure_bundle(bundle, *other)
+    assert rebuilt is not bundle
+    np.testing.assert_array_equal(rebuilt.series('close'), other[3])
+    assert ensure_bundle(None, *cols) is not bundle
+
+
+def test_indicator_cache_lru():
+    cache = IndicatorCache(max_entries=2)
+    _, *cols = history(50)
+    a = cache.get('BTCUSDT', '1h', 1, *cols)
+    assert cache.get('BTCUSDT', '1h', 1, *cols) is a
+    b = cache.get('BTCUSDT', '1h', 2, *cols)
+    cache.get('BTCUSDT', '1h', 1, *cols)                    # a paling baru dipakai
+    cache.get('ETHUSDT', '1h', 1, *cols)                    # b tergusur
+    assert cache.get('BTCUSDT', '1h', 2, *cols) is not b
+    cache.invalidate('BTCUSDT')
+    assert cache.stats()['entries'] == 1
+    assert cache.hits == 2
@@ -0,0 +1,99 @@
+"""Kernel numba (jit.py) vs versi Python-nya"""
+
+import importlib.util
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+import jit
+import pivots
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def closes(seed, n=400):
+    rng = np.random.default_rng(seed)
+    return 100.0 * np.exp(np.cumsum(rng.normal(0.0, rng.uniform(0.005, 0.04), n)))
+
+
+def assert_same(a, b):
+    assert len(a) == len(b)
+    for x, y in zip(a, b):
+        assert x.dtype == y.dtype
+        np.testing.assert_array_equal(x, y)
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_zigzag_walk_compiled_equals_python(seed):
+    s = closes(seed)
+    for thr, backstep in ((0.008, 3), (0.03, 3), (0.05, 1), (0.02, 10)):
+        args = (s, thr, backstep)
+        assert_same(pivots._zigzag_walk.func(*args), pivots._zigzag_walk.py_func(*args))
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_alternating_walk_compiled_equals_python(seed):
+    s = closes(seed)
+    rng = np.random.default_rng(seed)
+    h = s * (1.0 + np.abs(rng.normal(0.0, 0.004, len(s))))
+    l = s * (1.0 - np.abs(rng.normal(0.0, 0.004, len(s))))
+    peaks = pivots.find_pivots(h, 2, 2, 'high')
+    troughs = pivots.find_pivots(l, 2, 2, 'low')
+    cand = np.union1d(peaks, troughs).astype(np.int64)
+    is_peak, is_trough = np.isin(cand, peaks), np.isin(cand, troughs)
+    cand_kind = np.where(is_peak & is_trough, 0, np.where(is_peak, 1, -1)).astype(np.int64)
+    for min_move in (0.0, 0.01, 0.05):
+        args = (cand, cand_kind, h, l, min_move)
+        assert_same(pivots._alternating_walk.func(*args), pivots._alternating_walk.py_func(*args))
+
+
+def test_kernels_compile_when_numba_is_available():
+    pytest.importorskip('numba')
+    if not jit.JIT_ENABLED:
+        pytest.skip('CPD_DISABLE_JIT aktif')
+    assert jit.backend() == 'numba'
+    assert pivots._zigzag_walk.compiled and pivots._alternating_walk.compiled
+    timings = jit.warmup()
+    assert {'_zigzag_walk', '_alternating_walk'} <= set(timings)
+
+
+def _untypable_sample():
+    return (np.arange(3.0),)
+
+
+def _untypable(x):
+    # objek Python sembarang: numba tidak bisa mengetik fungsi ini saat compile
+    return float(len(str(object()))) + x.sum()
+
+
+def test_numba_error_falls_back_to_python_permanently(monkeypatch):
+    pytest.importorskip('numba')
+    monkeypatch.setattr(jit, 'JIT_ENABLED', True)
+    k = jit.Kernel(_untypable, _untypable_sample)
+    assert k.compiled
+    x = np.arange(3.0)
+    assert k(x) == _untypable(x)
+    assert not k.compiled and k.func is k.py_func
+    assert k(x) == _untypable(x)                            # tidak mencoba compile lagi
+
+
+def test_disabled_jit_runs_python(monkeypatch):
+    monkeypatch.setattr(jit, 'JIT_ENABLED', False)
+    k = jit.Kernel(_untypable, _untypable_sample)
+    assert not k.compiled
+    assert k(np.arange(3.0)) == _untypable(np.arange(3.0))
+
+
+@pytest.mark.parametrize('value,enabled', [('1', False), ('true', False), ('0', None)])
+def test_cpd_disable_jit_env(value, enabled):
+    env = dict(os.environ, CPD_DISABLE_JIT=value, PYTHONPATH=os.pathsep.join(sys.path))
+    out = subprocess.run(
+        [sys.executable, '-c', 'import jit, pivots; print(jit.backend(), pivots._zigzag_walk.compiled)'],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True).stdout.split()
+    if enabled is None:
+        # env tidak mematikan JIT: backend tergantung numba terpasang atau tidak
+        enabled = importlib.util.find_spec('numba') is not None
+    assert out == (['numba', 'True'] if enabled else ['python', 'False'])
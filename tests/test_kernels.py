@@ -0,0 +1,187 @@
+"""Vectorized kernels vs the per-element loops they replaced"""
+
+import math
+
+import numpy as np
+import pytest
+
+import kernels
+
+
+# ---------- reference loops (implementasi lama di indicators.py) ----------
+
+def ema_loop(x, period):
+    out = np.empty(len(x))
+    if not len(x):
+        return out
+    alpha = 2.0 / (period + 1.0)
+    out[0] = x[0]
+    for i in range(1, len(x)):
+        out[i] = alpha * x[i] + (1.0 - alpha) * out[i - 1]
+    return out
+
+
+def wilder_loop(x, period):
+    out = np.full(len(x), np.nan)
+    if period <= 0 or len(x) < period:
+        return out
+    out[period - 1] = sum(x[:period]) / period
+    for i in range(period, len(x)):
+        out[i] = out[i - 1] + (x[i] - out[i - 1]) / period
+    return out
+
+
+def atr_loop(h, l, c, period):
+    tr = np.empty(len(c))
+    for i in range(len(c)):
+        prev = c[i - 1] if i else c[0]
+        tr[i] = max(h[i] - l[i], abs(h[i] - prev), abs(l[i] - prev))
+    return wilder_loop(tr, period)
+
+
+def rsi_loop(x, period, smoothing='wilder'):
+    n = len(x)
+    out = np.full(n, np.nan)
+    if n <= period:
+        return out
+    gain = [0.0] * n
+    loss = [0.0] * n
+    for i in range(1, n):
+        d = x[i] - x[i - 1]
+        gain[i] = d if d > 0 else 0.0
+        loss[i] = -d if d < 0 else 0.0
+    if smoothing == 'wilder':
+        ag = np.r_[np.nan, wilder_loop(gain[1:], period)]
+        al = np.r_[np.nan, wilder_loop(loss[1:], period)]
+    else:
+        ag, al = ema_loop(gain, period), ema_loop(loss, period)
+    for i in range(n):
+        if math.isnan(ag[i]) or math.isnan(al[i]):
+            continue
+        out[i] = 100.0 if al[i] == 0 else 100.0 - 100.0 / (1.0 + ag[i] / al[i])
+    return out
+
+
+def from_first_valid(loop, *arrays, **kw):
+    """Loop lama pada ekor valid, NaN di depan dipertahankan"""
+    finite = np.logical_and.reduce([np.isfinite(a) for a in arrays])
+    out = np.full(len(arrays[0]), np.nan)
+    if finite.any():
+        k = int(finite.argmax())
+        out[k:] = loop(*(a[k:] for a in arrays), **kw)
+    return out
+
+
+# ---------- data ----------
+
+def walk(n, seed=0, start=100.0):
+    rng = np.random.default_rng(seed)
+    return start * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+
+
+def ohlc(n, seed=0):
+    rng = np.random.default_rng(seed + 100)
+    c = walk(n, seed)
+    h = c * (1 + rng.uniform(0, 0.01, n))
+    l = c * (1 - rng.uniform(0, 0.01, n))
+    return h, l, c
+
+
+def nan_lead(x, k):
+    x = np.array(x, dtype=float)
+    x[:k] = np.nan
+    return x
+
+
+LENGTHS = [0, 1, 5, 14, 15, 16, 300]
+
+
+def close(actual, expected):
+    np.testing.assert_allclose(actual, expected, rtol=1e-10, atol=1e-10, equal_nan=True)
+
+
+# ---------- 1-D ----------
+
+@pytest.mark.parametrize('n', LENGTHS)
+@pytest.mark.parametrize('period', [1, 5, 14])
+def test_ema_matches_loop(n, period):
+    x = walk(n)
+    close(kernels.ema(x, period), ema_loop(x, period))
+
+
+@pytest.mark.parametrize('n', LENGTHS)
+@pytest.mark.parametrize('period', [1, 5, 14])
+def test_wilder_matches_loop(n, period):
+    x = walk(n)
+    close(kernels.wilder(x, period), wilder_loop(x, period))
+
+
+@pytest.mark.parametrize('n', LENGTHS)
+def test_atr_matches_loop(n):
+    h, l, c = ohlc(n)
+    close(kernels.atr(h, l, c, 14), atr_loop(h, l, c, 14))
+
+
+@pytest.mark.parametrize('n', LENGTHS)
+@pytest.mark.parametrize('smoothing', ['wilder', 'ema'])
+def test_rsi_matches_loop(n, smoothing):
+    x = walk(n)
+    close(kernels.rsi(x, 14, smoothing), rsi_loop(x, 14, smoothing))
+
+
+def test_rsi_without_losses_is_100():
+    x = np.arange(1.0, 40.0)
+    close(kernels.rsi(x, 14), rsi_loop(x, 14))
+    assert kernels.rsi(x, 14)[-1] == 100.0
+
+
+def test_rsi_rejects_unknown_smoothing():
+    with pytest.raises(ValueError):
+        kernels.rsi(walk(30), 14, 'sma')
+
+
+# ---------- NaN di depan ----------
+
+@pytest.mark.parametrize('lead', [1, 5, 20, 300])
+def test_nan_leading_series(lead):
+    x = nan_lead(walk(300), lead)
+    h, l, c = (nan_lead(a, lead) for a in ohlc(300))
+    close(kernels.ema(x, 10), from_first_valid(ema_loop, x, period=10))
+    close(kernels.wilder(x, 14), from_first_valid(wilder_loop, x, period=14))
+    close(kernels.atr(h, l, c, 14), from_first_valid(atr_loop, h, l, c, period=14))
+    close(kernels.rsi(x, 14), from_first_valid(rsi_loop, x, period=14))
+    close(kernels.rsi(x, 14, 'ema'), from_first_valid(rsi_loop, x, period=14, smoothing='ema'))
+
+
+# ---------- 2-D: satu deret per baris ----------
+
+def test_2d_rows_match_loops():
+    n = 120
+    leads = [0, 0, 3, 17, 120]
+    xs = np.vstack([nan_lead(walk(n, seed), k) for seed, k in enumerate(leads)])
+    hs, ls, cs = (np.vstack(rows) for rows in zip(*[
+        tuple(nan_lead(a, k) for a in ohlc(n, seed)) for seed, k in enumerate(leads)]))
+
+    cases = [
+        (kernels.ema(xs, 9), lambda i: from_first_valid(ema_loop, xs[i], period=9)),
+        (kernels.wilder(xs, 14), lambda i: from_first_valid(wilder_loop, xs[i], period=14)),
+        (kernels.atr(hs, ls, cs, 14), lambda i: from_first_valid(atr_loop, hs[i], ls[i], cs[i], period=14)),
+        (kernels.rsi(xs, 14), lambda i: from_first_valid(rsi_loop, xs[i], period=14)),
+    ]
+    for actual, expected in cases:
+        assert actual.shape == xs.shape
+        for i in range(len(leads)):
+            close(actual[i], expected(i))
+
+
+def test_2d_equals_per_row_calls():
+    xs = np.vstack([walk(50, seed) for seed in range(4)])
+    for func in (lambda a: kernels.ema(a, 7), lambda a: kernels.wilder(a, 7), lambda a: kernels.rsi(a, 7)):
+        stacked = func(xs)
+        for i in range(len(xs)):
+            close(stacked[i], func(xs[i]))
+
+
+def test_rejects_3d_input():
+    with pytest.raises(ValueError):
+        kernels.ema(np.zeros((2, 2, 2)), 3)
@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+
+pytest.importorskip('talib')
+
+import parity  # noqa: E402
+from parity import NodeParity, parity_report, parity_summary, roundtrip  # noqa: E402
+from pattern_detector import UltraPatternDetector, UltraPatternResult  # noqa: E402
+from pipeline import PIPELINE  # noqa: E402
+from shared_market import SharedOHLCV  # noqa: E402
+
+
+def walk(n, seed=9):
+    rng = np.random.default_rng(seed)
+    close = 0.0123 * np.exp(np.cumsum(rng.normal(0.0, 0.02, n)))       # harga kecil: presisi float32 terasa
+    spread = np.abs(rng.normal(0.0, 0.01, n)) * close
+    open_ = np.concatenate([[close[0]], close[:-1]])
+    return open_, np.maximum(open_, close) + spread, np.minimum(open_, close) - spread, close, rng.uniform(1e6, 1e9, n)
+
+
+def test_roundtrip_matches_float32_storage():
+    cols = walk(50)
+    block = SharedOHLCV(maxlen=50, shared=False, dtype=np.float32)
+    block.load(np.arange(50), *cols)
+    for name, values in zip(('opens', 'highs', 'lows', 'closes', 'volumes'), cols):
+        stored = np.asarray(block[name], dtype=np.float64)
+        np.testing.assert_array_equal(stored, roundtrip(values, np.float32))
+        np.testing.assert_allclose(stored, values, rtol=np.finfo(np.float32).eps)
+    np.testing.assert_array_equal(roundtrip(cols[3], np.float64), cols[3])
+
+
+def test_float64_storage_is_identical():
+    cols = walk(300)
+    reports = parity_report(UltraPatternDetector(), *cols, float(cols[3][-1]), '1d', dtype=np.float64)
+    assert [r.detector for r in reports] == [n.method for n in PIPELINE]
+    assert not any(r.changed for r in reports)
+    assert all(r.max_rel_diff == 0.0 and r.reference == r.candidate for r in reports)
+
+
+def test_float32_parity():
+    cols = walk(300)
+    reports = parity_report(UltraPatternDetector(), *cols, float(cols[3][-1]), '1d', dtype=np.float32)
+    assert [r.detector for r in reports] == [n.method for n in PIPELINE]
+    assert sum(r.reference for r in reports) > 0
+    for r in reports:
+        assert r.candidate - len(r.extra) == r.reference - len(r.missing)
+        # deret ini tidak punya pola di tepi ambang: float32 tidak mengubah output
+        assert not r.changed, (r.detector, r.missing, r.extra, r.max_rel_diff)
+        assert r.max_rel_diff < 1e-6
+
+
+def pattern(name, entry=1.0, target=1.1, stop=0.9, confidence=50.0):
+    return UltraPatternResult(name, confidence=confidence, entry_price=entry, target_price=target, stop_loss=stop)
+
+
+def test_compare_pairs_patterns_by_name():
+    ref = [pattern('A'), pattern('A', entry=2.0), pattern('B')]
+    cand = [pattern('A', entry=1.0001), pattern('A', entry=2.0), pattern('C')]
+    r = parity._compare('_detect_x_patterns_stable', ref, cand, tol=1e-3)
+    assert (r.reference, r.candidate) == (3, 3)
+    assert r.missing == ['B'] and r.extra == ['C']
+    assert r.max_rel_diff == pytest.approx(1e-4, rel=1e-3)
+    assert r.changed
+
+    same = parity._compare('_detect_x_patterns_stable', ref[:2], cand[:2], tol=1e-3)
+    assert not same.changed
+    assert parity._compare('n', [pattern('A', stop=float('nan'))], [pattern('A', stop=float('nan'))], 1e-4).max_rel_diff == 0.0
+    assert parity._compare('n', [pattern('A', stop=float('inf'))], [pattern('A')], 1e-4).changed
+
+
+def test_parity_summary():
+    reports = [
+        [NodeParity('_detect_harmonic_patterns_stable', 2, 2, max_rel_diff=1e-6),
+         NodeParity('_most_perfect_patterns_stable', 1, 0, missing=['X'])],
+        [NodeParity('_detect_harmonic_patterns_stable', 1, 1, max_rel_diff=5e-4)],
+    ]
+    summary = parity_summary(reports)
+    assert summary == {
+        'harmonic': '1/2 changed (max rel diff 5.00e-04)',
+        'most_perfect': '1/1 changed (max rel diff 0.00e+00)',
+    }
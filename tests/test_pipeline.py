@@ -0,0 +1,159 @@
+import threading
+import time
+
+import pytest
+
+pytest.importorskip('talib')
+
+import pipeline  # noqa: E402
+from pattern_detector import UltraPatternResult  # noqa: E402
+from pipeline import DEPENDENCIES, PIPELINE, Node  # noqa: E402
+
+SERIES = {k: k for k in 'ohlcv'}
+
+
+class RecordingDetector:
+    """Detektor palsu: setiap node mengembalikan satu pola bernama method-nya"""
+
+    def __init__(self, catalog=None, fail=None, delay=0.0):
+        self.ultra_patterns = catalog if catalog is not None else {}
+        self.fail = fail
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.started = {}
+        self.finished = {}
+        self.calls = {}
+
+    def __getattr__(self, method):
+        if not method.startswith('_detect') and not method.startswith('_most'):
+            raise AttributeError(method)
+        node = next(n for n in PIPELINE if n.method == method)
+
+        def run(*args, indicators=None):
+            with self.lock:
+                self.started[method] = time.perf_counter()
+            if self.delay:
+                time.sleep(self.delay)
+            base = args[-1] if node.composite else None
+            with self.lock:
+                self.calls[method] = (args[:len(node.inputs)], None if base is None else [p.name for p in base])
+                self.finished[method] = time.perf_counter()
+            if method == self.fail:
+                raise RuntimeError(method)
+            return [UltraPatternResult(method, confidence=50.0)]
+        return run
+
+
+@pytest.fixture(params=[1, 4], ids=['sequential', 'threaded'])
+def threads(request):
+    pipeline.configure(request.param)
+    yield request.param
+    pipeline.configure(1)
+
+
+def test_validate_rejects_bad_graphs():
+    with pytest.raises(ValueError):
+        pipeline._validate((Node('a'), Node('a')))
+    with pytest.raises(ValueError):
+        pipeline._validate((Node('a', after=('b',)), Node('b')))
+    assert pipeline._validate((Node('a'), Node('b'), Node('c', after=('b', 'a', 'b')))) == {
+        'a': (), 'b': (), 'c': ('a', 'b')}
+
+
+def test_dependencies_follow_pipeline_order():
+    order = [n.method for n in PIPELINE]
+    for node in PIPELINE:
+        deps = DEPENDENCIES[node.method]
+        assert all(order.index(d) < order.index(node.method) for d in deps)
+        assert list(deps) == sorted(deps, key=order.index)
+    assert set(DEPENDENCIES['_detect_combination_patterns_stable']) == set(pipeline.BASE)
+    assert '_detect_godlike_patterns_stable' in DEPENDENCIES['_detect_master_patterns_stable']
+
+
+def test_nodes_run_after_dependencies(threads):
+    det = RecordingDetector(delay=0.002)
+    outputs = pipeline.run_nodes(det, SERIES, 1.0, '1h')
+    assert list(outputs) == [n.method for n in PIPELINE]
+    for node in PIPELINE:
+        args, base = det.calls[node.method]
+        assert args == tuple(node.inputs)                 # deret sesuai deklarasi inputs
+        for dep in DEPENDENCIES[node.method]:
+            assert det.finished[dep] <= det.started[node.method]
+        if node.composite:
+            # base_patterns = output dependensi dalam urutan PIPELINE, sama seperti eksekusi berurutan
+            assert base == list(DEPENDENCIES[node.method])
+
+
+def test_result_order_independent_of_threads(threads):
+    patterns = pipeline.run_pipeline(RecordingDetector(delay=0.001), SERIES, 1.0, '1h')
+    assert [p.name for p in patterns] == [n.method for n in PIPELINE]
+
+
+def test_skipped_node_reads_as_empty(threads):
+    det = RecordingDetector()
+    skip = frozenset({'_detect_harmonic_patterns_stable'})
+    outputs = pipeline.run_nodes(det, SERIES, 1.0, '1h', skip=skip)
+    assert outputs['_detect_harmonic_patterns_stable'] == []
+    assert '_detect_harmonic_patterns_stable' not in det.calls
+    assert '_detect_harmonic_patterns_stable' not in det.calls['_detect_combination_patterns_stable'][1]
+
+
+def test_node_error_propagates(threads):
+    with pytest.raises(RuntimeError, match='_detect_wyckoff_patterns_stable'):
+        pipeline.run_nodes(RecordingDetector(fail='_detect_wyckoff_patterns_stable'), SERIES, 1.0, '1h')
+
+
+# ---------- gating ----------
+
+CATALOG = {
+    'TIER_PERFECT': {'min_timeframe': '1h', 'patterns': {'PERFECT_A': {}, 'SHARED': {}}},
+    'HARMONIC_ULTRA': {'min_timeframe': '15m', 'patterns': {'GARTLEY': {}}},
+    'VOLUME_ULTRA': {'patterns': {'CLIMAX': {}}},                  # tanpa min_timeframe: selalu
+    'ELLIOTT_ULTRA': {'min_timeframe': '4h', 'patterns': {'WAVE_5': {}, 'SHARED': {}}},
+    'CANDLESTICK_ULTRA': {'min_timeframe': '9x', 'patterns': {'DOJI': {}}},   # tidak dikenal: tidak di-gate
+}
+
+
+def test_build_gating_table():
+    table = pipeline.build_gating_table(CATALOG)
+    assert set(table) == set(pipeline.TIMEFRAME_MS)
+
+    g = table['30m']
+    assert g.tiers == {'HARMONIC_ULTRA', 'VOLUME_ULTRA', 'CANDLESTICK_ULTRA'}
+    assert g.patterns == {'GARTLEY', 'CLIMAX', 'DOJI'}
+    # pola yang juga dimiliki tier eligible tidak diblokir
+    assert g.blocked == {'PERFECT_A', 'WAVE_5', 'SHARED'}
+    assert '_detect_perfect_patterns_stable' not in g.nodes
+    assert '_detect_elliott_wave_patterns_stable' not in g.nodes
+    assert {'_detect_harmonic_patterns_stable', '_detect_volume_patterns_stable',
+            '_detect_candlestick_patterns_stable'} <= g.nodes
+    # node yang tier-nya tidak ada di katalog tidak di-gate
+    assert '_detect_seasonal_patterns_stable' in g.nodes
+
+    assert table['1h'].blocked == {'WAVE_5'}
+    assert table['4h'].blocked == frozenset() and table['1d'].tiers == set(CATALOG)
+    assert table['1m'].patterns == {'CLIMAX', 'DOJI'}
+    assert table['1m'].nodes < table['1h'].nodes < table['4h'].nodes
+
+
+def test_gated_nodes_not_run_and_blocked_patterns_dropped():
+    catalog = {n.tier: {'min_timeframe': '1d', 'patterns': {n.method: {}}} for n in PIPELINE}
+    catalog['VOLUME_ULTRA']['min_timeframe'] = '1h'
+    det = RecordingDetector(catalog)
+    assert not pipeline.eligible(det, '15m')
+    assert pipeline.eligible(det, '1h')
+    assert pipeline.gate(det, '7m') is None and pipeline.eligible(det, '7m')
+
+    outputs = pipeline.run_nodes(det, SERIES, 1.0, '1h')
+    assert set(det.calls) == {'_detect_volume_patterns_stable'}
+    assert [p.name for found in outputs.values() for p in found] == ['_detect_volume_patterns_stable']
+
+
+def test_real_catalog_gates_short_timeframes():
+    from pattern_detector import UltraPatternDetector
+    det = UltraPatternDetector()
+    table = pipeline.gating_table(det)
+    assert pipeline.gating_table(det) is table          # dibangun sekali per katalog
+    assert pipeline.eligible(det, '5m')
+    assert not pipeline.eligible(det, '1m')
+    assert table['1d'].nodes == frozenset(n.method for n in PIPELINE)
@@ -0,0 +1,217 @@
+"""Pivot engine (pivots.py) vs the swing finders it replaced"""
+
+import numpy as np
+import pytest
+
+from pivots import (DEFAULT_PIVOT_CONFIGS, PivotTracker, StreamingPivots, alternating_swings,
+                    extrema_mask, find_pivots, in_window, zigzag)
+
+
+def random_closes(seed, n=300, vol=0.02):
+    rng = np.random.default_rng(seed)
+    return 100.0 * np.exp(np.cumsum(rng.normal(0.0, vol, n)))
+
+
+# ---------- reference loops (swing finder lama di detektor) ----------
+
+def pivots_loop(a, left, right, kind):
+    ext = max if kind == 'high' else min
+    return [i for i in range(left, len(a) - right) if a[i] == ext(a[i - left:i + right + 1])]
+
+
+def zigzag_loop(series, pct=0.03, backstep=3):
+    """zigzag_pivots lama dari detektor Elliott, dengan seed harga series[0]"""
+    series = list(series)
+    if len(series) < 10:
+        return []
+    window = min(20, len(series))
+    mean = sum(series[-window:]) / window
+    std = (sum((x - mean) ** 2 for x in series[-window:]) / window) ** 0.5
+    thr = max(pct, min(0.08, max(0.008, std / mean)) * 0.8) if mean > 0 else pct
+
+    pivots = []
+    last_pivot_idx = 0
+    last_pivot_price = series[0]
+    mode = 0
+    for i in range(1, len(series)):
+        chg = (series[i] - last_pivot_price) / (last_pivot_price if last_pivot_price != 0 else 1e-9)
+        if mode >= 0 and chg >= thr:
+            j = max(last_pivot_idx, i - backstep)
+            low = min(series[j:i + 1])
+            if not pivots or pivots[-1][2] != 'L':
+                pivots.append((series[j:i + 1].index(low) + j, low, 'L'))
+            last_pivot_idx, last_pivot_price, mode = i, series[i], -1
+        elif mode <= 0 and chg <= -thr:
+            j = max(last_pivot_idx, i - backstep)
+            high = max(series[j:i + 1])
+            if not pivots or pivots[-1][2] != 'H':
+                pivots.append((series[j:i + 1].index(high) + j, high, 'H'))
+            last_pivot_idx, last_pivot_price, mode = i, series[i], 1
+        elif mode >= 0 and series[i] > last_pivot_price:
+            last_pivot_idx, last_pivot_price = i, series[i]
+        elif mode <= 0 and series[i] < last_pivot_price:
+            last_pivot_idx, last_pivot_price = i, series[i]
+    if pivots:
+        last = pivots[-1]
+        if last[2] == 'H' and series[-1] < last[1]:
+            pivots.append((len(series) - 1, series[-1], 'L'))
+        elif last[2] == 'L' and series[-1] > last[1]:
+            pivots.append((len(series) - 1, series[-1], 'H'))
+    return list(dict.fromkeys(pivots))
+
+
+# ---------- find_pivots ----------
+
+@pytest.mark.parametrize('seed', range(5))
+@pytest.mark.parametrize('left,right', [(2, 2), (3, 3), (5, 5), (3, 1)])
+@pytest.mark.parametrize('kind', ['high', 'low'])
+def test_find_pivots_matches_window_loop(seed, left, right, kind):
+    a = random_closes(seed)
+    assert find_pivots(a, left, right, kind).tolist() == pivots_loop(a, left, right, kind)
+
+
+def test_equal_highs_are_both_pivots_until_deduplicated():
+    a = np.array([1.0, 2.0, 3.0, 5.0, 5.0, 3.0, 2.0, 1.0, 0.5])
+    assert find_pivots(a, 2, 2, 'high').tolist() == [3, 4]
+    # pivot kedua tidak lebih ekstrem: pivot pertama dipertahankan
+    assert find_pivots(a, 2, 2, 'high', min_distance=3).tolist() == [3]
+    a[4] = 5.5
+    assert find_pivots(a, 2, 2, 'high', min_distance=3).tolist() == [4]
+
+
+def test_window_edges():
+    a = np.array([5.0, 4.0, 3.0, 2.0, 3.0, 4.0, 6.0])
+    assert find_pivots(a, 2, 2, 'high').tolist() == []
+    assert find_pivots(a, 2, 2, 'high', edges=True).tolist() == [0, 6]
+    assert find_pivots(a, 2, 2, 'low').tolist() == [3]
+    assert extrema_mask(a[:3], 2, 2, 'high').tolist() == [False, False, False]
+    assert extrema_mask([], 2, 2, 'high').tolist() == []
+
+
+def test_nan_is_never_a_pivot():
+    a = random_closes(3, n=60)
+    a[30] = np.nan
+    found = find_pivots(a, 3, 3, 'high')
+    assert all(abs(i - 30) > 3 for i in found)
+
+
+def test_prominence_filter():
+    a = np.array([1.0, 1.0, 1.0, 1.001, 1.0, 1.0, 1.0, 1.0, 1.2, 1.0, 1.0, 1.0])
+    assert find_pivots(a, 3, 3, 'high').tolist() == [3, 8]
+    assert find_pivots(a, 3, 3, 'high', prominence=0.005).tolist() == [8]
+
+
+def test_unknown_kind():
+    with pytest.raises(ValueError):
+        find_pivots([1.0, 2.0, 1.0], 1, 1, 'mid')
+
+
+@pytest.mark.parametrize('window', [10, 50, 120, 300])
+def test_in_window_equals_pivots_of_the_segment(window):
+    a = random_closes(7)
+    for kind in ('high', 'low'):
+        mapped = in_window(find_pivots(a, 3, 3, kind), len(a), window, 3, 3)
+        assert mapped == find_pivots(a[-window:], 3, 3, kind).tolist()
+
+
+# ---------- zigzag ----------
+
+def test_zigzag_on_a_known_staircase():
+    s = np.repeat([100.0, 112.0, 101.0, 118.0, 104.0, 125.0], 5)
+    # pivot dikonfirmasi saat lompatan >= threshold, diambil dari `backstep` bar terakhir
+    assert zigzag(s) == [(2, 100.0, 'L'), (7, 112.0, 'H'), (12, 101.0, 'L'),
+                         (17, 118.0, 'H'), (22, 104.0, 'L'), (29, 125.0, 'H')]
+
+
+def test_zigzag_short_or_flat_series():
+    assert zigzag(np.linspace(1.0, 2.0, 9)) == []
+    assert zigzag(np.full(50, 100.0)) == []
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_zigzag_matches_fixed_elliott_loop(seed):
+    s = random_closes(seed, n=200, vol=0.025)
+    expected = zigzag_loop(s, 0.02, 3)
+    assert zigzag(s, 0.02, 3) == [(i, float(p), k) for i, p, k in expected]
+    assert zigzag(list(s), 0.02, 3) == zigzag(s, 0.02, 3)
+
+
+def test_zigzag_seed_is_first_price():
+    # regresi: seed dulu `last_pivot_price = series` (seluruh list), sehingga walk
+    # langsung error dan detektor Elliott tidak pernah menghasilkan pola
+    s = np.concatenate([[100.0], np.full(11, 104.0)])
+    assert zigzag(s, 0.03) == [(0, 100.0, 'L'), (11, 104.0, 'H')]
+
+
+def test_elliott_detects_patterns_after_seed_fix():
+    pytest.importorskip('talib')
+    from pattern_detector import UltraPatternDetector
+
+    s = random_closes(3, n=200, vol=0.025)
+    found = UltraPatternDetector()._detect_elliott_wave_patterns_stable(s, float(s[-1]), '1d')
+    assert len(zigzag(s, 0.02)) >= 5
+    assert found                                    # baseline: selalu [] (walk error)
+    assert all(p.timeframe == '1d' for p in found)
+
+
+# ---------- alternating_swings ----------
+
+def test_alternating_swings_alternate_and_respect_min_move():
+    h = np.array([1.0, 1.5, 1.2, 1.52, 1.1, 1.8, 1.3, 1.7])
+    l = np.array([0.9, 1.4, 1.1, 1.42, 1.0, 1.7, 1.2, 1.6])
+    swings = alternating_swings([1, 3, 5, 7], [2, 4, 6], h, l, 0.05)
+    assert swings == [('H', 1, 1.5), ('L', 2, 1.1), ('H', 3, 1.52), ('L', 4, 1.0),
+                      ('H', 5, 1.8), ('L', 6, 1.2), ('H', 7, 1.7)]
+    # gerak < min_move dilewati, jadi swing tetap berselang-seling
+    swings = alternating_swings([1, 3, 5, 7], [2, 4, 6], h, l, 0.3)
+    kinds = [k for k, _, _ in swings]
+    assert all(a != b for a, b in zip(kinds, kinds[1:]))
+    assert [i for _, i, _ in swings] == [1, 4, 5, 6, 7]   # L2 (-27%) dilewati
+
+
+def test_alternating_swings_outside_bar_and_empty():
+    h = np.array([1.0, 1.4, 1.2])
+    l = np.array([0.9, 0.8, 1.1])
+    # bar 1 sekaligus pivot high dan low: high dinilai lebih dulu
+    assert alternating_swings([1], [1], h, l, 0.0) == [('H', 1, 1.4), ('L', 1, 0.8)]
+    assert alternating_swings([], [], h, l, 0.0) == []
+
+
+# ---------- incremental ----------
+
+def streamed_candles(seed, n=300):
+    c = random_closes(seed, n=n, vol=0.01)
+    rng = np.random.default_rng(seed + 100)
+    h = c * (1.0 + np.abs(rng.normal(0.0, 0.003, n)))
+    l = c * (1.0 - np.abs(rng.normal(0.0, 0.003, n)))
+    h[40:43] = h[40:43].max()                           # equal highs
+    h[120] = np.nan
+    return h, l
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_streaming_pivots_equal_find_pivots_after_each_append(seed):
+    h, l = streamed_candles(seed)
+    stream = StreamingPivots()
+    for n in range(1, len(h) + 1):
+        stream.update(h[n - 1], l[n - 1])
+        for key in DEFAULT_PIVOT_CONFIGS:
+            kind, left, right, prominence, min_distance = key
+            expected = find_pivots((h if kind == 'high' else l)[:n], left, right, kind, prominence, min_distance)
+            assert stream.indices(key, n).tolist() == expected.tolist(), (n, key)
+
+
+def test_pivot_tracker_reports_confirmed_and_replaced_pivots():
+    tracker = PivotTracker(1, 1, 'high', min_distance=3)
+    updates = [tracker.update(x) for x in (1.0, 2.0, 1.0, 3.0, 1.0, 1.0, 1.0)]
+    # bar 1 terkonfirmasi di bar 2; bar 3 terlalu dekat tapi lebih tinggi, jadi menggantikannya
+    assert updates == [None, None, 1, None, 3, None, None]
+    assert list(tracker.confirmed) == [(3, 3.0)]
+
+
+def test_streaming_pivots_key_for():
+    stream = StreamingPivots()
+    assert stream.key_for('high', 3, 3, 'high', 0.005, 5) == ('high', 3, 3, 0.005, 5)
+    assert stream.key_for('low', 2, 2, 'low', None, 1) == ('low', 2, 2, None, None)
+    assert stream.key_for('high', 3, 3, 'close') is None       # sumber lain: hitung batch
+    assert stream.key_for('high', 4, 4, 'high') is None
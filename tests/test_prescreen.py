@@ -0,0 +1,106 @@
+import sys
+
+import numpy as np
+import pytest
+
+pytest.importorskip('talib')
+
+import prescreen  # noqa: E402
+from indicators import IndicatorBundle  # noqa: E402
+from pattern_detector import UltraPatternDetector  # noqa: E402
+from pipeline import PIPELINE  # noqa: E402
+
+NODES = {node.method: node for node in PIPELINE}
+
+
+@pytest.fixture(scope='module')
+def detector():
+    return UltraPatternDetector()
+
+
+def walk(n, seed=3):
+    rng = np.random.default_rng(seed)
+    close = 100.0 * np.exp(np.cumsum(rng.normal(0.0, 0.02, n)))
+    spread = np.abs(rng.normal(0.0, 0.01, n)) * close
+    open_ = np.concatenate([[close[0]], close[:-1]])
+    return {'o': open_, 'h': np.maximum(open_, close) + spread, 'l': np.minimum(open_, close) - spread,
+            'c': close, 'v': rng.uniform(100, 1000, n)}
+
+
+def call(detector, method, series, tf='1d'):
+    """Jalankan satu node seperti pipeline; kembalikan (pola, jumlah baris method yang dieksekusi)"""
+    node = NODES[method]
+    func = getattr(detector, method)
+    code = func.__func__.__code__
+    args = [series[k] for k in node.inputs] + [float(series['c'][-1]), tf]
+    if node.composite:
+        args.append([])
+    lines = [0]
+
+    def tracer(frame, event, arg):
+        if frame.f_code is not code:
+            return None
+
+        def local(frame, event, arg):
+            if event == 'line':
+                lines[0] += 1
+            return local
+        return local(frame, event, arg)
+
+    sys.settrace(tracer)
+    try:
+        found = func(*args, indicators=IndicatorBundle(*(series[k] for k in 'ohlcv')))
+    finally:
+        sys.settrace(None)
+    return found, lines[0]
+
+
+@pytest.mark.parametrize('method', prescreen.METHODS)
+def test_min_bars_matches_detector_early_return(detector, method):
+    m = prescreen.SCREENS[method].min_bars
+    short, long_ = walk(m - 1), walk(m)
+    assert prescreen.screen(detector, {'k': ('1d', m - 1)}, record=False)['k'].isdisjoint({method})
+    assert method in prescreen.screen(detector, {'k': ('1d', m)}, record=False)['k']
+
+    found, guarded = call(detector, method, short)
+    assert found == []
+    # tepat di min_bars detektor melewati guard-nya: jauh lebih banyak baris yang jalan
+    _, ran = call(detector, method, long_)
+    assert ran > guarded + 10, (guarded, ran)
+
+
+def test_timeframe_screen_matches_detector(detector):
+    method = '_detect_seasonal_patterns_stable'
+    series = walk(400)
+    assert method not in prescreen.screen(detector, {'k': ('4h', 400)}, record=False)['k']
+    assert call(detector, method, series, '4h')[0] == []
+    assert method in prescreen.screen(detector, {'k': ('1d', 400)}, record=False)['k']
+
+
+def test_harmonic_swing_check_matches_detector(detector):
+    method = '_detect_harmonic_patterns_stable'
+    n = 200
+    line = np.linspace(100.0, 110.0, n)
+    flat = {'o': line, 'h': line + 0.05, 'l': line - 0.05, 'c': line, 'v': np.full(n, 10.0)}
+    bundle = IndicatorBundle(*(flat[k] for k in 'ohlcv'))
+    assert not prescreen._harmonic_swings(flat, float(line[-1]), bundle)
+    assert prescreen.structural_skips(detector, flat, float(line[-1]), '1d', bundle) == {method}
+    assert call(detector, method, flat)[0] == []
+
+    noisy = walk(n)
+    bundle = IndicatorBundle(*(noisy[k] for k in 'ohlcv'))
+    assert prescreen._harmonic_swings(noisy, float(noisy['c'][-1]), bundle)
+    assert prescreen.structural_skips(detector, noisy, float(noisy['c'][-1]), '1d', bundle) == frozenset()
+
+
+def test_screen_batches_and_records():
+    detector = UltraPatternDetector()
+    prescreen.LOCAL.drain()
+    out = prescreen.screen(detector, {('A', '1d'): ('1d', 500), ('B', '1d'): ('1d', 20), ('C', '1m'): ('1m', 500)})
+    assert out[('A', '1d')] == frozenset(prescreen.METHODS)
+    assert out[('B', '1d')] == {'_detect_candlestick_patterns_stable'}
+    assert out[('C', '1m')] == frozenset()                  # tidak ada tier yang eligible di 1m
+    counts = prescreen.LOCAL.drain()
+    assert counts['candlestick'] == (2, 2)
+    assert counts['moving'] == (2, 1)
+    assert prescreen.screen(detector, {}) == {}
@@ -0,0 +1,58 @@
+"""RingColumns vs deque(maxlen) per field"""
+
+from collections import deque
+
+import numpy as np
+import pytest
+
+from ringbuffer import RingColumns
+
+
+@pytest.mark.parametrize('capacity', [1, 3, 8])
+def test_views_match_deque_after_each_append(capacity):
+    ring = RingColumns(('a', 'b'), capacity)
+    ref_a, ref_b = deque(maxlen=capacity), deque(maxlen=capacity)
+    for i in range(5 * capacity + 2):
+        ring.append((float(i), -float(i)))
+        ref_a.append(float(i))
+        ref_b.append(-float(i))
+        assert len(ring) == len(ref_a)
+        assert ring.view('a').tolist() == list(ref_a)
+        assert ring.view('b').tolist() == list(ref_b)
+        for length in range(capacity + 2):
+            assert ring.view('a', length).tolist() == list(ref_a)[len(ref_a) - min(length, len(ref_a)):]
+        assert ring.last('a') == float(i)
+
+
+def test_view_is_a_read_only_window_without_copy():
+    ring = RingColumns(('x',), 4)
+    for v in range(6):
+        ring.append((float(v),))
+    view = ring.view('x')
+    assert view.tolist() == [2.0, 3.0, 4.0, 5.0]
+    assert np.shares_memory(view, ring._buf) and view.flags.c_contiguous
+    with pytest.raises(ValueError):
+        view[0] = 1.0
+    # view menunjuk buffer yang sama: append menimpa slot tertua (lihat docstring modul)
+    ring.append((6.0,))
+    assert view.tolist() != ring.view('x').tolist()
+
+
+def test_empty_unknown_and_clear():
+    ring = RingColumns(('x', 'y'), 3)
+    assert len(ring) == 0 and ring.view('x').tolist() == []
+    assert np.isnan(ring.last('x'))
+    assert 'y' in ring and 'z' not in ring
+    with pytest.raises(KeyError):
+        ring.view('z')
+    ring.append((1.0, 2.0))
+    assert ring.view('y', -5).tolist() == []
+    ring.clear()
+    assert len(ring) == 0 and np.isnan(ring.last('y'))
+    ring.append((3.0, 4.0))
+    assert ring.view('x').tolist() == [3.0]
+
+
+def test_capacity_must_be_positive():
+    with pytest.raises(ValueError):
+        RingColumns(('x',), 0)
@@ -0,0 +1,157 @@
+"""rolling.py vs per-window loops (dan pandas jika terpasang)"""
+
+import numpy as np
+import pytest
+
+import rolling
+
+PERIODS = [1, 2, 5, 14, 50]
+
+
+def closes(seed=0, n=300):
+    rng = np.random.default_rng(seed)
+    return 100.0 * np.exp(np.cumsum(rng.normal(0.0, 0.02, n)))
+
+
+def with_nans(seed=0, n=300):
+    x = closes(seed, n)
+    x[[0, 40, 41, 200]] = np.nan
+    return x
+
+
+# ---------- reference loops ----------
+
+def window_loop(x, period, func, min_periods=None):
+    mp = period if min_periods is None else max(1, min(min_periods, period))
+    out = np.full(len(x), np.nan)
+    for i in range(len(x)):
+        w = x[max(0, i - period + 1):i + 1]
+        if len(w) >= mp and not np.isnan(w).any():
+            out[i] = func(w)
+    return out
+
+
+def wma_loop(x, period):
+    weights = np.arange(1, period + 1, dtype=float)
+    out = np.full(len(x), np.nan)
+    for i in range(period - 1, len(x)):
+        out[i] = np.dot(x[i - period + 1:i + 1], weights) / weights.sum()
+    return out
+
+
+def extreme_loop(x, period, func, min_periods=None):
+    # jendela terpotong di awal deret (sebelum `period` bar) ikut dinilai
+    mp = period if min_periods is None else max(1, min(min_periods, period))
+    out = np.full(len(x), np.nan)
+    for i in range(mp - 1, len(x)):
+        out[i] = func(x[max(0, i - period + 1):i + 1])
+    return out
+
+
+def stochastic_loop(h, l, c, k_period, d_period):
+    k = np.full(len(c), np.nan)
+    for i in range(k_period - 1, len(c)):
+        hh = h[i - k_period + 1:i + 1].max()
+        ll = l[i - k_period + 1:i + 1].min()
+        if hh != ll:
+            k[i] = (c[i] - ll) / (hh - ll) * 100.0
+    return k, window_loop(k, d_period, np.mean)
+
+
+# ---------- sum / mean / std / wma ----------
+
+@pytest.mark.parametrize('period', PERIODS)
+def test_sum_and_mean(period):
+    x = with_nans()
+    np.testing.assert_allclose(rolling.rolling_sum(x, period), window_loop(x, period, np.sum), rtol=1e-9)
+    np.testing.assert_allclose(rolling.rolling_mean(x, period), window_loop(x, period, np.mean), rtol=1e-9)
+
+
+@pytest.mark.parametrize('period', PERIODS)
+def test_std(period):
+    x = with_nans()
+    for ddof in (0, 1):
+        expected = window_loop(x, period, lambda w: w.std(ddof=ddof) if len(w) > ddof else np.nan)
+        # cumsum kuadrat: galat absolut kecil terhadap skala harga, bukan relatif per jendela
+        np.testing.assert_allclose(rolling.rolling_std(x, period, ddof=ddof), expected, rtol=1e-6, atol=1e-6)
+
+
+def test_std_of_single_bar_and_flat_windows_is_exactly_zero():
+    x = closes(n=2000)
+    out = rolling.rolling_std(x, 1)
+    assert (out == 0.0).all()
+    flat = np.concatenate([closes(n=100), np.full(50, 123.456)])
+    assert (rolling.rolling_std(flat, 10)[-40:] == 0.0).all()
+    assert (rolling.rolling_std(flat, 10)[:100][9:] > 0.0).all()
+
+
+def test_min_periods():
+    x = closes(n=30)
+    np.testing.assert_allclose(rolling.rolling_mean(x, 10, min_periods=3),
+                               window_loop(x, 10, np.mean, min_periods=3), rtol=1e-9)
+    np.testing.assert_allclose(rolling.rolling_std(x, 10, min_periods=1),
+                               window_loop(x, 10, np.std, min_periods=1), rtol=1e-6, atol=1e-9)
+    assert np.isnan(rolling.rolling_sum(x, 10)[:9]).all()
+
+
+@pytest.mark.parametrize('period', PERIODS)
+def test_wma(period):
+    x = closes()
+    np.testing.assert_allclose(rolling.rolling_wma(x, period), wma_loop(x, period), rtol=1e-9)
+    x[100] = np.nan
+    out = rolling.rolling_wma(x, period)
+    assert np.isnan(out[100:100 + period]).all()
+
+
+def test_short_and_empty_inputs():
+    for func in (rolling.rolling_sum, rolling.rolling_mean, rolling.rolling_std, rolling.rolling_wma,
+                 rolling.rolling_max, rolling.rolling_min):
+        assert len(func(np.array([]), 5)) == 0
+        assert np.isnan(func(np.array([1.0, 2.0]), 5)).all()
+        assert np.isnan(func(np.array([1.0, 2.0]), 0)).all()
+
+
+# ---------- max / min ----------
+
+@pytest.mark.parametrize('period', PERIODS + [299, 300, 400])
+def test_max_min(period):
+    x = closes()
+    np.testing.assert_array_equal(rolling.rolling_max(x, period), extreme_loop(x, period, np.max))
+    np.testing.assert_array_equal(rolling.rolling_min(x, period), extreme_loop(x, period, np.min))
+    np.testing.assert_array_equal(rolling.rolling_max(x, period, min_periods=1),
+                                  extreme_loop(x, period, np.max, min_periods=1))
+
+
+# ---------- stochastic / williams / donchian ----------
+
+@pytest.mark.parametrize('k_period,d_period', [(14, 3), (5, 3), (9, 1)])
+def test_stochastic(k_period, d_period):
+    c = closes(3)
+    h, l = c * 1.01, c * 0.99
+    h[50:60] = l[50:60] = c[50:60] = 100.0                  # range nol -> %K NaN
+    k, d = rolling.stochastic(h, l, c, k_period, d_period)
+    k_ref, d_ref = stochastic_loop(h, l, c, k_period, d_period)
+    np.testing.assert_allclose(k, k_ref, rtol=1e-12)
+    np.testing.assert_allclose(d, d_ref, rtol=1e-9)
+
+
+def test_williams_and_donchian():
+    c = closes(4)
+    h, l = c * 1.01, c * 0.99
+    hh, ll = extreme_loop(h, 14, np.max), extreme_loop(l, 14, np.min)
+    np.testing.assert_allclose(rolling.williams_r(h, l, c, 14), -100.0 * (hh - c) / (hh - ll), rtol=1e-12)
+    up, dn, mid = rolling.donchian(h, l, 20)
+    np.testing.assert_array_equal(up, extreme_loop(h, 20, np.max))
+    np.testing.assert_array_equal(mid, (up + dn) / 2.0)
+
+
+def test_matches_pandas():
+    pd = pytest.importorskip('pandas')
+    x = with_nans()
+    s = pd.Series(x)
+    for period in PERIODS:
+        r = s.rolling(period)
+        np.testing.assert_allclose(rolling.rolling_mean(x, period), r.mean(), rtol=1e-9)
+        np.testing.assert_allclose(rolling.rolling_sum(x, period), r.sum(), rtol=1e-9)
+        np.testing.assert_allclose(rolling.rolling_std(x, period), r.std(ddof=0), rtol=1e-6, atol=1e-6)
+        np.testing.assert_allclose(rolling.rolling_max(closes(), period), pd.Series(closes()).rolling(period).max())
@@ -0,0 +1,130 @@
+import asyncio
+
+import pytest
+
+import scheduler
+from scheduler import UNRANKED, AnalysisScheduler
+from timeframes import period_ms
+
+CLASSES = {'short': ['1m', '5m'], 'mid': ['30m', '1h'], 'long': ['4h', '1d']}
+NOW = 1_700_000_000_000
+DEBOUNCE = 0.01
+
+
+@pytest.fixture(autouse=True)
+def clock(monkeypatch):
+    now = [NOW]
+    monkeypatch.setattr(scheduler, '_now_ms', lambda: now[0])
+    return now
+
+
+def last_open(tf):
+    """Open time candle tertutup terakhir pada NOW"""
+    return NOW - NOW % period_ms(tf) - period_ms(tf)
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+async def drain(s, n):
+    jobs = []
+    for _ in range(n):
+        job = await asyncio.wait_for(s.get(), 1.0)
+        s.done(job)
+        jobs.append(job)
+    return jobs
+
+
+def test_deadline_orders_before_rank_and_volatility():
+    async def scenario():
+        s = AnalysisScheduler(CLASSES, debounce=DEBOUNCE)
+        s.mark('DAILY', '1d', last_open('1d'), rank=0, volatility=9.0)
+        s.mark('HOURLY', '1h', last_open('1h'), rank=0)
+        s.mark('MINUTE_B', '1m', last_open('1m'), rank=5, volatility=0.1)
+        s.mark('MINUTE_A', '1m', last_open('1m'), rank=1, volatility=0.1)
+        s.mark('MINUTE_C', '1m', last_open('1m'), rank=5, volatility=0.5)
+        await asyncio.sleep(2 * DEBOUNCE)
+        return [job.symbol for job in await drain(s, 5)]
+
+    # deadline (1m < 1h < 1d), lalu rank, lalu volatilitas tertinggi
+    assert run(scenario()) == ['MINUTE_A', 'MINUTE_C', 'MINUTE_B', 'HOURLY', 'DAILY']
+
+
+def test_debounce_merges_timeframes_of_one_symbol():
+    async def scenario():
+        s = AnalysisScheduler(CLASSES, debounce=DEBOUNCE)
+        s.mark('BTCUSDT', '4h', last_open('4h'))
+        s.mark('BTCUSDT', '1h', last_open('1h'))
+        s.mark('BTCUSDT', '1m', last_open('1m'))
+        assert s.stats()['debouncing'] == 1
+        assert s.depths() == {'short': 0, 'mid': 0, 'long': 0}   # belum dirilis
+        await asyncio.sleep(2 * DEBOUNCE)
+        assert s.depths() == {'short': 1, 'mid': 0, 'long': 0}
+        (job,) = await drain(s, 1)
+        return job
+
+    job = run(scenario())
+    assert job.timeframes == {'1m', '1h', '4h'}
+    assert job.deadline_ms == last_open('1m') + 2 * period_ms('1m')    # timeframe dirty tercepat
+    assert job.priority == 'short'
+
+
+def test_mark_while_queued_reorders():
+    async def scenario():
+        s = AnalysisScheduler(CLASSES, debounce=DEBOUNCE)
+        s.mark('SLOW', '1d', last_open('1d'))
+        s.mark('OTHER', '1h', last_open('1h'))
+        await asyncio.sleep(2 * DEBOUNCE)
+        s.mark('SLOW', '1m', last_open('1m'))       # sudah antre: deadline maju tanpa debounce ulang
+        return [job.symbol for job in await drain(s, 2)]
+
+    assert run(scenario()) == ['SLOW', 'OTHER']
+
+
+def test_mark_during_analysis_requeues_after_done():
+    async def scenario():
+        s = AnalysisScheduler(CLASSES, debounce=DEBOUNCE)
+        s.mark('BTCUSDT', '1h', last_open('1h'))
+        await asyncio.sleep(2 * DEBOUNCE)
+        job = await asyncio.wait_for(s.get(), 1.0)
+        s.mark('BTCUSDT', '1m', last_open('1m'))    # candle tutup selama analisis berjalan
+        await asyncio.sleep(2 * DEBOUNCE)
+        assert s.stats()['running'] == 1 and s.depths()['short'] == 0
+        s.done(job)
+        (again,) = await drain(s, 1)
+        return job, again
+
+    job, again = run(scenario())
+    assert job.timeframes == {'1h'} and again.timeframes == {'1m'}
+
+
+def test_deadline_miss_counted_per_class(clock):
+    async def scenario():
+        s = AnalysisScheduler(CLASSES, debounce=DEBOUNCE)
+        s.mark('BTCUSDT', '1m', last_open('1m'))
+        s.mark('ETHUSDT', '1d', last_open('1d'))
+        await asyncio.sleep(2 * DEBOUNCE)
+        first = await asyncio.wait_for(s.get(), 1.0)
+        clock[0] = first.deadline_ms + 5_000        # selesai 5 detik terlambat
+        s.done(first)
+        await drain(s, 1)
+        return s.stats()
+
+    stats = run(scenario())
+    assert stats['completed'] == {'short': 1, 'mid': 0, 'long': 1}
+    assert stats['deadline_misses'] == {'short': 1, 'mid': 0, 'long': 0}
+    assert stats['worst_lateness_s']['short'] == 5.0
+
+
+def test_unknown_timeframe_and_missing_history():
+    async def scenario():
+        s = AnalysisScheduler(CLASSES, debounce=DEBOUNCE)
+        s.mark('NEW', '1h', None)                   # tanpa history: deadline sekarang
+        s.mark('ODD', '7m', last_open('1m'), rank=UNRANKED)
+        await asyncio.sleep(2 * DEBOUNCE)
+        return await drain(s, 2)
+
+    jobs = run(scenario())
+    assert all(job.deadline_ms == NOW for job in jobs)
+    assert {job.symbol: job.priority for job in jobs} == {'NEW': 'mid', 'ODD': 'long'}
@@ -0,0 +1,116 @@
+import numpy as np
+import pytest
+
+from shared_market import SharedMarketStore, SharedOHLCV
+
+MINUTE = 60_000
+
+
+def candles(n, first=0):
+    ts = (np.arange(first, first + n) * MINUTE).astype(np.int64)
+    base = np.arange(first, first + n, dtype=np.float64)
+    return ts, base + 0.1, base + 0.2, base + 0.3, base + 0.4, base + 0.5
+
+
+def contents(block):
+    return [np.array(block[k]) for k in ('timestamps', 'opens', 'highs', 'lows', 'closes', 'volumes')]
+
+
+def assert_window(block, first, n):
+    for got, want in zip(contents(block), candles(n, first)):
+        np.testing.assert_array_equal(got, want)
+
+
+@pytest.fixture(params=[True, False], ids=['shm', 'local'])
+def block(request):
+    b = SharedOHLCV(maxlen=5, shared=request.param)
+    if request.param and not b.shared:
+        pytest.skip('shared memory unavailable')
+    yield b
+    b.close()
+
+
+def test_load_keeps_last_maxlen(block):
+    epoch = block.snapshot()[2]
+    block.load(*candles(8))
+    assert block.snapshot()[2] == epoch + 1
+    assert len(block) == 5
+    assert_window(block, 3, 5)
+
+
+def test_append_across_compaction_boundary(block):
+    block.load(*candles(5))
+    capacity = len(block.ts)
+    epochs = []
+    for i in range(5, 5 + 2 * capacity):
+        before = block.snapshot()
+        block.append(*(c[0] for c in candles(1, i)))
+        start, length, epoch = block.snapshot()
+        epochs.append(epoch)
+        if before[0] + before[1] >= capacity:
+            # compaction: jendela pindah ke depan buffer, epoch naik
+            assert epoch == before[2] + 1 and start == 0
+        else:
+            assert epoch == before[2]
+        assert length == 5
+        assert block.last_ts() == i * MINUTE
+        assert_window(block, i - 4, 5)
+    assert len(set(epochs)) > 1
+
+
+def test_views_are_read_only(block):
+    block.load(*candles(5))
+    with pytest.raises(ValueError):
+        block['closes'][0] = 0.0
+
+
+def test_stale_view_detected_after_compaction(block):
+    block.load(*candles(5))
+    start, length, epoch = block.snapshot()
+    old_ts = block.views(start, length)[0]
+    first = int(old_ts[0])
+    i = 5
+    while block.still_valid(epoch):
+        block.append(*(c[0] for c in candles(1, i)))
+        i += 1
+    # baris di bawah view lama sudah ditimpa, dan epoch memberitahu reader
+    assert int(old_ts[0]) != first
+
+
+def test_float32_storage():
+    b = SharedOHLCV(maxlen=5, shared=False, dtype=np.float32)
+    b.load(*candles(5))
+    assert b.dtype == np.float32 and b['closes'].dtype == np.float32
+    np.testing.assert_array_equal(b['closes'], candles(5)[4].astype(np.float32))
+
+
+def test_load_after_close_raises():
+    b = SharedOHLCV(maxlen=5, shared=True)
+    if not b.shared:
+        pytest.skip('shared memory unavailable')
+    b.load(*candles(5))
+    name = b.name
+    b.close()
+    assert b.closed
+    with pytest.raises(ValueError):
+        b.load(*candles(5))
+    with pytest.raises(ValueError):
+        b.append(*(c[0] for c in candles(1, 9)))
+    with pytest.raises(ValueError):
+        b.snapshot()
+    # segmen sudah di-unlink: worker tidak bisa memetakannya lagi
+    with pytest.raises(FileNotFoundError):
+        SharedOHLCV.attach(name)
+    b.close()       # idempoten
+
+
+def test_store_nbytes_and_close():
+    store = SharedMarketStore(maxlen=5, shared=False, dtype=np.float32)
+    a = store.block('BTCUSDT', '1m')
+    assert store.block('BTCUSDT', '1m') is a
+    store.block('ETHUSDT', '1m')
+    assert len(store) == 2
+    assert store.nbytes == 2 * a.nbytes
+    assert a.nbytes == 8 * 8 + 8 * 10 + 4 * 5 * 10
+    store.close()
+    assert len(store) == 0 and store.nbytes == 0
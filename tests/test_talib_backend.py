@@ -0,0 +1,32 @@
+import numpy as np
+import pytest
+
+pytest.importorskip('talib')
+
+import talib_backend  # noqa: E402
+
+# macd/ema_26 mewarisi sisa warm-up yang meluruh; selain itu selisihnya setara pembulatan
+TOL = 1e-6
+
+
+def ohlc(n, seed):
+    rng = np.random.default_rng(seed)
+    close = 100.0 * np.exp(np.cumsum(rng.normal(0.0, 0.01, n)))
+    spread = np.abs(rng.normal(0.0, 0.005, n)) * close
+    open_ = np.concatenate([[close[0]], close[:-1]])
+    return open_, np.maximum(open_, close) + spread, np.minimum(open_, close) - spread, close
+
+
+@pytest.mark.parametrize('seed', [7, 11, 2024])
+def test_talib_matches_numpy_kernels(seed):
+    report = talib_backend.parity(*ohlc(1000, seed))
+    assert set(report) == {'ema_12', 'ema_26', 'atr_14', 'rsi_14', 'macd', 'macd_signal',
+                           'bb_mid', 'bb_up', 'bb_dn', 'stoch_k', 'stoch_d'}
+    for key, diff in report.items():
+        assert np.isfinite(diff), key
+        assert diff < TOL, f"{key}: {diff:.3e}"
+
+
+def test_parity_needs_bars_past_warmup():
+    with pytest.raises(ValueError):
+        talib_backend.parity(*ohlc(200, 7))
@@ -0,0 +1,53 @@
+import pytest
+
+from timeframes import closed_since, grace_ms, is_fresh, next_close_ms, period_ms, staleness_ms
+
+HOUR = 3_600_000
+OPEN = 1_000 * HOUR          # open time candle tertutup terakhir
+
+
+def test_period_and_grace():
+    assert period_ms('1m') == 60_000 and period_ms('1d') == 24 * HOUR
+    with pytest.raises(ValueError):
+        period_ms('7m')
+    assert grace_ms('1m') == 15_000                 # minimal 15 detik
+    assert grace_ms('1h') == 5 * 60_000             # 10% = 6 menit, dibatasi 5 menit
+    assert grace_ms('5m') == 30_000
+
+
+@pytest.mark.parametrize('tf', ['1m', '1h', '4h', '1d'])
+def test_fresh_until_next_close_plus_grace(tf):
+    deadline = next_close_ms(OPEN, tf) + grace_ms(tf)
+    assert next_close_ms(OPEN, tf) == OPEN + 2 * period_ms(tf)
+    # tepat setelah close dan sepanjang periode berikutnya tetap segar
+    for now in (OPEN + period_ms(tf), OPEN + 2 * period_ms(tf) - 1, deadline):
+        assert is_fresh(OPEN, tf, now)
+        assert staleness_ms(OPEN, tf, now) == 0
+    assert not is_fresh(OPEN, tf, deadline + 1)
+    assert staleness_ms(OPEN, tf, deadline + 1) == 1
+    assert staleness_ms(OPEN, tf, deadline + period_ms(tf)) == period_ms(tf)
+
+
+def test_daily_stays_fresh_past_old_cutoff():
+    # cutoff lama 300 detik menandai 1d basi beberapa menit setelah close
+    assert is_fresh(OPEN, '1d', OPEN + 24 * HOUR + 6 * HOUR)
+
+
+def test_missing_history():
+    assert not is_fresh(None, '1h', OPEN)
+    assert staleness_ms(None, '1h', OPEN) == 0
+
+
+@pytest.mark.parametrize('now, expected', [
+    (OPEN, 0),                          # candle terakhir belum tutup (tidak terjadi di praktik)
+    (OPEN + HOUR, 0),                   # tepat saat candle terakhir tutup
+    (OPEN + 2 * HOUR - 1, 0),
+    (OPEN + 2 * HOUR, 1),               # candle berikutnya tutup
+    (OPEN + 5 * HOUR + 30 * 60_000, 4),
+])
+def test_closed_since(now, expected):
+    assert closed_since(OPEN, '1h', now) == expected
+
+
+def test_closed_since_never_negative():
+    assert closed_since(OPEN + 10 * HOUR, '1h', OPEN) == 0
@@ -0,0 +1,62 @@
+"""
+Timeframe periods and freshness model.
+
+Sebuah deret dianggap segar selama candle tertutup terakhirnya adalah candle
+terbaru yang memang sudah seharusnya tutup: candle berikutnya baru tutup di
+open_time + 2 x periode. Deret baru basi jika close berikutnya terlewat lebih
+dari `grace` (keterlambatan websocket / REST). Dengan begitu 4h dan 1d tetap
+segar sepanjang periodenya, tidak hanya beberapa menit setelah close seperti
+cutoff tetap 300 detik.
+"""
+
+import time
+from typing import Optional
+
+MINUTE_MS = 60_000
+
+# Interval kline Binance -> panjang periode (ms); 1M didekati 31 hari
+TIMEFRAME_MS = {
+    '1m': MINUTE_MS, '3m': 3 * MINUTE_MS, '5m': 5 * MINUTE_MS, '15m': 15 * MINUTE_MS,
+    '30m': 30 * MINUTE_MS, '1h': 60 * MINUTE_MS, '2h': 120 * MINUTE_MS, '4h': 240 * MINUTE_MS,
+    '6h': 360 * MINUTE_MS, '8h': 480 * MINUTE_MS, '12h': 720 * MINUTE_MS, '1d': 1440 * MINUTE_MS,
+    '3d': 3 * 1440 * MINUTE_MS, '1w': 7 * 1440 * MINUTE_MS, '1M': 31 * 1440 * MINUTE_MS,
+}
+
+
+def period_ms(timeframe: str) -> int:
+    try:
+        return TIMEFRAME_MS[timeframe]
+    except KeyError:
+        raise ValueError(f"Unknown timeframe: {timeframe}")
+
+
+def grace_ms(timeframe: str) -> int:
+    """Toleransi keterlambatan close: 10% periode, minimal 15 detik, maksimal 5 menit"""
+    return max(15_000, min(period_ms(timeframe) // 10, 5 * MINUTE_MS))
+
+
+def next_close_ms(last_open_ts: int, timeframe: str) -> int:
+    """Kapan candle setelah candle tertutup terakhir seharusnya tutup"""
+    return int(last_open_ts) + 2 * period_ms(timeframe)
+
+
+def is_fresh(last_open_ts: Optional[int], timeframe: str, now_ms: Optional[int] = None) -> bool:
+    """True jika belum ada close yang terlewat sejak candle tertutup terakhir (open time last_open_ts)"""
+    if last_open_ts is None:
+        return False
+    now_ms = int(time.time() * 1000) if now_ms is None else now_ms
+    return now_ms <= next_close_ms(last_open_ts, timeframe) + grace_ms(timeframe)
+
+
+def staleness_ms(last_open_ts: Optional[int], timeframe: str, now_ms: Optional[int] = None) -> int:
+    """Berapa lama (ms) deret melewati batas segarnya; 0 jika masih segar"""
+    if last_open_ts is None:
+        return 0
+    now_ms = int(time.time() * 1000) if now_ms is None else now_ms
+    return max(0, now_ms - next_close_ms(last_open_ts, timeframe) - grace_ms(timeframe))
+
+
+def closed_since(last_open_ts: int, timeframe: str, now_ms: Optional[int] = None) -> int:
+    """Jumlah candle yang sudah tertutup setelah candle dengan open time last_open_ts"""
+    now_ms = int(time.time() * 1000) if now_ms is None else now_ms
+    return max(0, (now_ms - int(last_open_ts)) // period_ms(timeframe) - 1)